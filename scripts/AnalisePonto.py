@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+"""
+AnalisePonto.py
+
+Horas de presença calculadas a partir das abas PontoPratica e PontoTeoria,
+com NumPy: os registros viram vetores (dia, HoraEntrada/HoraSaida em segundos,
+códigos de aluno e de escala) e os totais saem de agrupamentos vetorizados,
+sem laço por registro.
+
+  - duração de cada sessão (HoraSaida - HoraEntrada)
+  - sessões abertas (entrada sem saída) e inconsistentes (saída antes da entrada)
+  - totais por aluno, por aluno e dia, e por escala, separados em Prática/Teoria
+
+Data e Hora podem vir como o Code.gs grava (dd/MM/yyyy, HH:mm:ss) ou como
+Date serializado em ISO pelo doGet; as horas são lidas direto dos bytes,
+em bloco, e cada data distinta é interpretada uma vez, no fuso
+America/Sao_Paulo.
+
+Requer: pip install numpy
+
+Uso:
+  python AnalisePonto.py                                  # endpoint do config_ponto.json
+  python AnalisePonto.py ../BancoDeDadosTeste.json --por dia --desde 2026-02-01
+  python AnalisePonto.py dados/snapshot.colunar --por escala --csv horas.csv
+  python AnalisePonto.py --benchmark --linhas 300000
+"""
+
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import urllib.parse
+import urllib.request
+from datetime import datetime, date
+
+from SnapshotStream import FluxoSnapshot, data_iso_do_valor, FUSO, TIMEOUT_ENDPOINT_SECONDS
+
+ABAS_PONTO = {"PontoPratica": 0, "PontoTeoria": 1}
+MODALIDADES = ("Prática", "Teoria")
+CAMPOS = ("SerialNumber", "EmailHC", "NomeCompleto", "Data", "HoraEntrada", "HoraSaida", "Escala")
+SEM_VALOR = -1
+ORCAMENTO_MS = 600  # --benchmark: carga + cálculo acima disso sai com código 1
+
+
+def importar_numpy():
+    """Importa o NumPy sob demanda; se não existir, mostra instrução e encerra."""
+    try:
+        import numpy
+    except ImportError:
+        print("Erro: O módulo 'numpy' não está instalado.")
+        print("Execute: pip install numpy")
+        sys.exit(1)
+    return numpy
+
+
+# ========== INTERPRETAÇÃO DE DATA/HORA ==========
+
+def segundos_do_valor(valor):
+    """Segundos desde a meia-noite de uma célula de hora (HH:mm[:ss], ISO ou fração de dia), ou -1."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return int(round(valor * 86400)) % 86400 if 0 <= valor < 1 else SEM_VALOR
+    if not isinstance(valor, str) or not valor.strip():
+        return SEM_VALOR
+    valor = valor.strip()
+    if "T" in valor:
+        try:
+            instante = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        except ValueError:
+            return SEM_VALOR
+        if instante.tzinfo is not None:
+            instante = instante.astimezone(FUSO) if FUSO is not None else instante.astimezone()
+        return instante.hour * 3600 + instante.minute * 60 + instante.second
+    partes = valor.split(":")
+    try:
+        h, m = int(partes[0]), int(partes[1])
+        s = int(partes[2]) if len(partes) > 2 else 0
+    except (ValueError, IndexError):
+        return SEM_VALOR
+    return h * 3600 + m * 60 + s if 0 <= h < 24 and 0 <= m < 60 and 0 <= s < 60 else SEM_VALOR
+
+def _texto(valor):
+    """Célula como texto (inteiros vindos como float perdem o '.0'; vazio para None)."""
+    if isinstance(valor, str):
+        return valor.strip()
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _agrupar(np, chave, faixa):
+    """
+    (chaves distintas ordenadas, grupo de cada linha) de chaves inteiras em
+    [0, faixa). Com a faixa da ordem do número de linhas (alunos × dias de um
+    semestre), uma contagem com bincount substitui a ordenação do np.unique.
+    """
+    if faixa > 4 * len(chave) + 4096:
+        chaves, grupo = np.unique(chave, return_inverse=True)
+        return chaves, grupo.ravel()
+    presentes = np.bincount(chave, minlength=faixa) > 0
+    return np.flatnonzero(presentes), (np.cumsum(presentes) - 1)[chave]
+
+def _fatorar(np, *colunas):
+    """
+    (código por linha, primeira linha de cada combinação distinta) de uma ou
+    mais colunas lidas juntas, sem laço em Python: dict.setdefault e map rodam
+    em C, numa passada só. Planilhas repetem muito (crachás, datas; nome,
+    e-mail e escala andam com o crachá), então o trabalho por valor fica nos
+    distintos.
+    """
+    n = len(colunas[0])
+    chaves = colunas[0] if len(colunas) == 1 else zip(*colunas)
+    primeira = {}
+    linhas = np.fromiter(map(primeira.setdefault, chaves, range(n)), dtype=np.int64, count=n)
+    primeiras, codigos = _agrupar(np, linhas, n)
+    return codigos, primeiras.tolist()
+
+def _codificar(np, valores, fatoracao=None):
+    """
+    (códigos por linha, textos distintos ordenados) de uma coluna, com
+    np.unique. `fatoracao` reaproveita um _fatorar() de várias colunas.
+    """
+    if not valores:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=str)
+    codigos, primeiras = fatoracao or _fatorar(np, valores)
+    distintos, qual = np.unique(np.array([_texto(valores[i]) for i in primeiras], dtype=str), return_inverse=True)
+    return qual.ravel()[codigos], distintos
+
+def _unir(np, codificados):
+    """Um só (códigos por linha, textos distintos ordenados) a partir dos _codificar() de cada aba."""
+    if not codificados:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=str)
+    distintos, qual = np.unique(np.concatenate([d for _, d in codificados]), return_inverse=True)
+    fatias = np.cumsum([0] + [len(d) for _, d in codificados])
+    return np.concatenate([qual.ravel()[inicio:][c] for (c, _), inicio in zip(codificados, fatias)]), distintos
+
+def _segundos_vetorizado(np, valores):
+    """
+    segundos_do_valor() de uma coluna inteira. "HH:mm[:ss]" e ISO em UTC
+    ("...THH:mm:ss[.sss]Z", como o doGet serializa as horas) são lidos
+    direto dos bytes; o deslocamento do fuso é calculado por data distinta
+    (o Sheets usa 30/12/1899, com o LMT de São Paulo). O resto passa por
+    segundos_do_valor(), um valor distinto por vez.
+    """
+    n = len(valores)
+    if not n:
+        return np.zeros(0, dtype=np.int32)
+    # A coluna vira um texto só, uma célula por linha: o join e o encode rodam
+    # em C, sem a cópia de largura fixa (e o preenchimento) de um array "U24"
+    def em_bytes(textos):
+        bruto = np.frombuffer("\n".join(textos).encode("utf-8", "replace"), dtype=np.uint8)
+        return bruto, np.flatnonzero(bruto == 10)
+
+    outras = None
+    try:
+        bruto, fins = em_bytes(valores)
+    except TypeError:
+        fins = None
+    if fins is None or len(fins) != n - 1:
+        # None, números ou quebras de linha na célula: essas vão pelo caminho geral
+        outras = np.fromiter((not isinstance(v, str) or "\n" in v for v in valores), dtype=bool, count=n)
+        bruto, fins = em_bytes(v if isinstance(v, str) and "\n" not in v else "" for v in valores)
+    inicio = np.zeros(n, dtype=np.int64)
+    inicio[1:] = fins + 1
+    tamanho = np.append(fins, len(bruto)) - inicio
+    # Os primeiros 24 bytes de cada linha (uma cópia por linha, sem índice por byte)
+    janela = np.lib.stride_tricks.sliding_window_view(np.append(bruto, np.zeros(24, dtype=np.uint8)), 24)[inicio]
+    # Cada dígito vira "0": o formato da célula fica comparável com um molde
+    # (sem sinal, o que ficou abaixo de '0' dá a volta e não passa por dígito;
+    # subtrair o próprio dígito sai bem mais barato que um np.where)
+    digito = janela - np.uint8(48)
+    forma = (janela - digito * (digito <= 9)).view(np.uint64)  # 3 palavras por linha
+
+    def casa(*moldes):
+        """Linhas (índices) no formato de um dos moldes, com o tamanho exato."""
+        linhas = []
+        for molde in moldes:
+            candidatas = np.flatnonzero(tamanho == len(molde))
+            mascara = np.frombuffer(b"\xff" * len(molde) + bytes(24 - len(molde)), dtype=np.uint64)
+            valor = np.frombuffer(molde.encode().ljust(24, b"\0"), dtype=np.uint64)
+            iguais = np.ones(len(candidatas), dtype=bool)
+            for i in range((len(molde) + 7) // 8):  # só as palavras que o molde cobre
+                iguais &= ((forma[candidatas, i] ^ valor[i]) & mascara[i]) == 0
+            linhas.append(candidatas[iguais])
+        return np.concatenate(linhas)
+
+    resultado = np.full(n, SEM_VALOR, dtype=np.int32)
+    lidas = np.zeros(n, dtype=bool)
+
+    linhas = casa("00:00", "00:00:00")
+    d = digito[linhas, :8].astype(np.int32)
+    seg = np.where(tamanho[linhas] == 8, d[:, 6] * 10 + d[:, 7], 0)
+    h, m = d[:, 0] * 10 + d[:, 1], d[:, 3] * 10 + d[:, 4]
+    valida = (h < 24) & (m < 60) & (seg < 60)
+    resultado[linhas[valida]] = (h * 3600 + m * 60 + seg)[valida]
+    lidas[linhas[valida]] = True
+
+    linhas = casa("0000-00-00T00:00:00.000Z", "0000-00-00T00:00:00Z")
+    if len(linhas):
+        d = digito[linhas, :19].astype(np.int32)
+        utc = (d[:, 11] * 10 + d[:, 12]) * 3600 + (d[:, 14] * 10 + d[:, 15]) * 60 + d[:, 17] * 10 + d[:, 18]
+        aaaammdd = (d[:, 0] * 10000000 + d[:, 1] * 1000000 + d[:, 2] * 100000 + d[:, 3] * 10000
+                    + (d[:, 5] * 10 + d[:, 6]) * 100 + d[:, 8] * 10 + d[:, 9])
+        base = int(aaaammdd.min())
+        datas, qual = _agrupar(np, aaaammdd - base, int(aaaammdd.max()) - base + 1)
+        deslocamentos = np.zeros(len(datas), dtype=np.int32)
+        for i, aaaammdd in enumerate((datas + base).tolist()):
+            try:
+                meio_dia = datetime(aaaammdd // 10000, aaaammdd // 100 % 100, aaaammdd % 100, 12)
+            except ValueError:
+                continue
+            fuso = FUSO if FUSO is not None else datetime.now().astimezone().tzinfo
+            deslocamentos[i] = int(fuso.utcoffset(meio_dia).total_seconds())
+        resultado[linhas] = (utc + deslocamentos[qual]) % 86400
+        lidas[linhas] = True
+
+    restantes = ~lidas & (tamanho > 0)
+    if outras is not None:
+        restantes |= outras
+    restantes = np.flatnonzero(restantes)
+    if len(restantes):
+        vistos = {}
+        for i in restantes.tolist():
+            v = valores[i]
+            chave = (type(v), v) if not isinstance(v, (list, dict)) else None
+            if chave not in vistos:
+                vistos[chave] = segundos_do_valor(v)
+            resultado[i] = vistos[chave]
+    return resultado
+
+
+# ========== VETORES ==========
+
+class PontosVetorizados:
+    """
+    As batidas das duas abas como vetores NumPy, uma posição por linha:
+
+      dia        datetime64[D] (NaT se a Data não pôde ser lida)
+      entrada    int32, segundos desde a meia-noite (-1 = vazio)
+      saida      int32, idem
+      aluno      int32, índice em `seriais` / `nomes`
+      email      int32, índice em `emails` (EmailHC da batida)
+      modalidade int8, 0 = Prática, 1 = Teoria
+      escala     int32, índice em `escalas`
+    """
+
+    def __init__(self, np, dia, entrada, saida, aluno, seriais, nomes, email, emails, modalidade, escala, escalas):
+        self.np = np
+        self.dia = dia
+        self.entrada = entrada
+        self.saida = saida
+        self.aluno = aluno
+        self.seriais = seriais
+        self.nomes = nomes
+        self.email = email
+        self.emails = emails
+        self.modalidade = modalidade
+        self.escala = escala
+        self.escalas = escalas
+
+    def __len__(self):
+        return len(self.dia)
+
+    @classmethod
+    def de_colunas(cls, colunas_por_aba, np=None):
+        """
+        Monta os vetores a partir de {aba: {campo: [valores]}} (PontoPratica e
+        PontoTeoria). Textos viram códigos com np.unique; cada data distinta é
+        interpretada uma vez e espalhada por indexação.
+        """
+        np = np or importar_numpy()
+        abas = [aba for aba in ABAS_PONTO if aba in colunas_por_aba]
+
+        tamanhos = [len(colunas_por_aba[aba].get("SerialNumber") or []) for aba in abas]
+
+        def por_aba(campo):
+            """A coluna de cada aba (vazia onde a aba não tem o campo)."""
+            return [colunas_por_aba[aba].get(campo) or [""] * tamanho for aba, tamanho in zip(abas, tamanhos)]
+
+        # Cada aba é lida separada (concatenar as listas custaria outra passada
+        # pelas linhas) e os dicionários de códigos são unidos no fim
+        modalidade = np.repeat(np.array([ABAS_PONTO[aba] for aba in abas], dtype=np.int8),
+                               tamanhos) if abas else np.zeros(0, dtype=np.int8)
+
+        codigos, distintos = _unir(np, [_codificar(np, valores) for valores in por_aba("Data")])
+        dias = np.array([data_iso_do_valor(v) or "NaT" for v in distintos.tolist()], dtype="datetime64[D]")
+        dia = dias[codigos] if len(codigos) else np.zeros(0, dtype="datetime64[D]")
+
+        # Crachá, e-mail, nome e escala se repetem juntos: uma passada fatora os quatro
+        alunos, emails_aba, escalas_aba, combinacoes, nomes_combinacoes = [], [], [], [], []
+        for colunas in zip(*map(por_aba, ("SerialNumber", "EmailHC", "NomeCompleto", "Escala"))):
+            fatoracao = _fatorar(np, *colunas)
+            alunos.append(_codificar(np, colunas[0], fatoracao))
+            emails_aba.append(_codificar(np, colunas[1], fatoracao))
+            escalas_aba.append(_codificar(np, colunas[3], fatoracao))
+            combinacoes.append(fatoracao[0] + len(nomes_combinacoes))
+            nomes_combinacoes.extend(colunas[2][i] for i in fatoracao[1])
+        aluno, seriais = _unir(np, alunos)
+        email, emails = _unir(np, emails_aba)
+        escala, escalas = _unir(np, escalas_aba)
+
+        # O nome de cada crachá vem da sua batida mais recente que tenha nome
+        combinacao = np.concatenate(combinacoes) if combinacoes else np.zeros(0, dtype=np.int64)
+        com_nome = np.array([bool(nome) for nome in nomes_combinacoes], dtype=bool)[combinacao]
+        dia_int = dia.view(np.int64)  # NaT é o menor int64
+        recente = np.full(len(seriais), np.iinfo(np.int64).min)
+        np.maximum.at(recente, aluno[com_nome], dia_int[com_nome])
+        candidatas = np.nonzero(com_nome & (dia_int == recente[aluno]))[0][::-1]
+        codigos_com_nome, primeira = np.unique(aluno[candidatas], return_index=True)
+        nomes = [""] * len(seriais)
+        for codigo, linha in zip(codigos_com_nome.tolist(), combinacao[candidatas[primeira]].tolist()):
+            nomes[codigo] = str(nomes_combinacoes[linha])
+
+        def segundos(campo):
+            return np.concatenate([_segundos_vetorizado(np, valores) for valores in por_aba(campo)]
+                                  or [np.zeros(0, dtype=np.int32)])
+
+        return cls(np, dia, segundos("HoraEntrada"), segundos("HoraSaida"), aluno.astype(np.int32),
+                   seriais.astype(object), nomes, email.astype(np.int32), emails.astype(object), modalidade, escala.astype(np.int32), escalas.astype(object))
+
+    # ----- máscaras e durações -----
+
+    @property
+    def fechadas(self):
+        return (self.entrada >= 0) & (self.saida >= self.entrada)
+
+    @property
+    def abertas(self):
+        return (self.entrada >= 0) & (self.saida < 0)
+
+    @property
+    def inconsistentes(self):
+        return (self.entrada >= 0) & (self.saida >= 0) & (self.saida < self.entrada)
+
+    def duracoes(self):
+        """Segundos de cada sessão fechada (0 nas abertas e inconsistentes)."""
+        return self.np.where(self.fechadas, self.saida - self.entrada, 0).astype(self.np.int64)
+
+    def filtrar(self, mascara):
+        """Cópia só com as linhas da máscara (os dicionários de códigos são mantidos)."""
+        return PontosVetorizados(self.np, self.dia[mascara], self.entrada[mascara], self.saida[mascara],
+                                 self.aluno[mascara], self.seriais, self.nomes, self.email[mascara], self.emails,
+                                 self.modalidade[mascara],
+                                 self.escala[mascara], self.escalas)
+
+    # ----- agregações -----
+
+    def _somas(self, grupo, n):
+        """Segundos por modalidade, sessões, abertas e inconsistentes por grupo (bincount)."""
+        np = self.np
+        duracoes = self.duracoes()
+        return {
+            "segundos_pratica": np.bincount(grupo, weights=duracoes * (self.modalidade == 0), minlength=n),
+            "segundos_teoria": np.bincount(grupo, weights=duracoes * (self.modalidade == 1), minlength=n),
+            "sessoes": np.bincount(grupo, minlength=n),
+            "abertas": np.bincount(grupo[self.abertas], minlength=n),
+            "inconsistentes": np.bincount(grupo[self.inconsistentes], minlength=n),
+        }
+
+    def _dias_distintos(self, grupo, n):
+        """Quantos dias distintos cada grupo tem batidas."""
+        np = self.np
+        validos = ~np.isnat(self.dia)
+        dia = self.dia[validos].astype(np.int64)
+        if not len(dia):
+            return np.zeros(n, dtype=np.int64)
+        largura = int(dia.max() - dia.min() + 1)
+        chaves, _ = _agrupar(np, grupo[validos].astype(np.int64) * largura + (dia - dia.min()), n * largura)
+        return np.bincount(chaves // largura, minlength=n)
+
+    def por_aluno(self):
+        """Uma linha por crachá com batidas: horas de prática/teoria, dias, sessões, abertas."""
+        n = len(self.seriais)
+        tabela = self._somas(self.aluno, n)
+        tabela["dias"] = self._dias_distintos(self.aluno, n)
+        presentes = tabela["sessoes"] > 0
+        tabela = {k: v[presentes] for k, v in tabela.items()}
+        indices = self.np.nonzero(presentes)[0]
+        tabela["serial"] = self.seriais[indices]
+        tabela["nome"] = self.np.array([self.nomes[i] for i in indices], dtype=object)
+        return tabela
+
+    def por_dia(self):
+        """Uma linha por (aluno, dia): horas de prática/teoria, sessões, abertas."""
+        np = self.np
+        validos = ~np.isnat(self.dia)
+        pontos = self if validos.all() else self.filtrar(validos)
+        dia = pontos.dia.astype(np.int64)
+        if not len(dia):
+            return {"serial": np.zeros(0, dtype=object), "nome": np.zeros(0, dtype=object),
+                    "dia": np.zeros(0, dtype="datetime64[D]"), **pontos._somas(np.zeros(0, dtype=np.int64), 0)}
+        base = dia.min()
+        largura = int(dia.max() - base + 1)
+        chaves, grupo = _agrupar(np, pontos.aluno.astype(np.int64) * largura + (dia - base), len(self.seriais) * largura)
+        tabela = pontos._somas(grupo, len(chaves))
+        alunos = chaves // largura
+        tabela["serial"] = self.seriais[alunos]
+        tabela["nome"] = np.array(self.nomes, dtype=object)[alunos]
+        tabela["dia"] = (chaves % largura + base).astype("datetime64[D]")
+        return tabela
+
+    def por_escala(self):
+        """Uma linha por escala: horas de prática/teoria, alunos distintos, sessões, abertas."""
+        np = self.np
+        n = len(self.escalas)
+        tabela = self._somas(self.escala, n)
+        alunos = max(len(self.seriais), 1)
+        pares, _ = _agrupar(np, self.escala.astype(np.int64) * alunos + self.aluno, n * alunos)
+        tabela["alunos"] = np.bincount(pares // alunos, minlength=n)
+        tabela["dias"] = self._dias_distintos(self.escala, n)
+        presentes = tabela["sessoes"] > 0
+        tabela = {k: v[presentes] for k, v in tabela.items()}
+        tabela["escala"] = self.escalas[np.nonzero(presentes)[0]]
+        return tabela
+
+
+# ========== FONTES ==========
+
+def colunas_de_registros(registros_por_aba):
+    """{aba: [registros]} → {aba: {campo: [valores]}} só com os CAMPOS usados."""
+    return {aba: {campo: [r.get(campo) for r in registros] for campo in CAMPOS}
+            for aba, registros in registros_por_aba.items()}
+
+def buscar_aba(endpoint, aba):
+    """Registros de uma aba pelo doGet?aba= ([] se a aba não existe)."""
+    url = f"{endpoint}{'&' if '?' in endpoint else '?'}{urllib.parse.urlencode({'aba': aba})}"
+    with urllib.request.urlopen(url, timeout=TIMEOUT_ENDPOINT_SECONDS) as resposta:
+        dados = json.load(resposta)
+    if dados.get("erro"):
+        if dados["erro"] == "Aba não encontrada":
+            return []
+        raise ValueError(f"{aba}: {dados.get('mensagem') or dados['erro']}")
+    return dados.get("registros") or []
+
+def carregar_colunas(fonte):
+    """
+    {aba: {campo: [valores]}} das abas de ponto. `fonte` pode ser a URL do
+    endpoint (busca só as duas abas, com doGet?aba=), um arquivo colunar
+    (lê só as colunas usadas) ou um snapshot JSON (lido em fluxo).
+    """
+    if fonte.startswith(("http://", "https://")):
+        return colunas_de_registros({aba: buscar_aba(fonte, aba) for aba in ABAS_PONTO})
+    from SnapshotColunar import SnapshotColunar, eh_colunar
+    if eh_colunar(fonte):
+        with SnapshotColunar(fonte) as snap:
+            colunas = {}
+            for aba in ABAS_PONTO:
+                if aba in snap:
+                    tabela = snap[aba]
+                    colunas[aba] = {campo: (tabela.coluna(campo) if campo in tabela.nomes_colunas
+                                            else [None] * len(tabela)) for campo in CAMPOS}
+            return colunas
+    registros = {aba: [] for aba in ABAS_PONTO}
+    for aba, registro in FluxoSnapshot(fonte, abas=ABAS_PONTO):
+        registros[aba].append(registro)
+    return colunas_de_registros(registros)
+
+
+# ========== SAÍDA ==========
+
+def _horas(segundos):
+    segundos = int(round(segundos))
+    return f"{segundos // 3600}:{segundos % 3600 // 60:02d}"
+
+COLUNAS_SAIDA = {
+    "aluno": ("serial", "nome", "dias", "segundos_pratica", "segundos_teoria", "sessoes", "abertas", "inconsistentes"),
+    "dia": ("dia", "serial", "nome", "segundos_pratica", "segundos_teoria", "sessoes", "abertas", "inconsistentes"),
+    "escala": ("escala", "alunos", "dias", "segundos_pratica", "segundos_teoria", "sessoes", "abertas", "inconsistentes"),
+}
+
+def linhas_da_tabela(tabela, por):
+    """Linhas (dicts) ordenadas para impressão/CSV/JSON; segundos viram inteiros."""
+    colunas = COLUNAS_SAIDA[por]
+    n = len(tabela["sessoes"])
+    linhas = []
+    for i in range(n):
+        linha = {}
+        for c in colunas:
+            v = tabela[c][i]
+            if c == "dia":
+                v = str(v)
+            elif c in ("serial", "nome", "escala"):
+                v = str(v)
+            else:
+                v = int(round(float(v)))
+            linha[c] = v
+        linhas.append(linha)
+    chave = {"aluno": lambda l: (l["nome"].lower(), l["serial"]),
+             "dia": lambda l: (l["dia"], l["nome"].lower(), l["serial"]),
+             "escala": lambda l: (len(l["escala"]), l["escala"])}[por]
+    return sorted(linhas, key=chave)
+
+def imprimir_tabela(linhas, por, pontos):
+    print(f"\n⏱️  Horas de presença por {por} ({len(pontos)} batida(s))\n")
+    if not linhas:
+        print("  Nenhuma batida no período.\n")
+        return
+    rotulo = {"aluno": "Aluno", "dia": "Dia / Aluno", "escala": "Escala"}[por]
+    print(f"  {rotulo:<40} {'Prática':>9} {'Teoria':>9} {'Dias':>5} {'Sessões':>8} {'Abertas':>8}")
+    for l in linhas:
+        if por == "aluno":
+            titulo = f"{l['nome'] or '(sem nome)'} ({l['serial'] or '-'})"
+        elif por == "dia":
+            titulo = f"{l['dia']}  {l['nome'] or l['serial'] or '-'}"
+        else:
+            titulo = f"Escala {l['escala'] or '(sem escala)'} · {l['alunos']} aluno(s)"
+        dias = l.get("dias", 1)
+        print(f"  {titulo[:40]:<40} {_horas(l['segundos_pratica']):>9} {_horas(l['segundos_teoria']):>9} "
+              f"{dias:>5} {l['sessoes']:>8} {l['abertas']:>8}")
+    inconsistentes = sum(l["inconsistentes"] for l in linhas)
+    if inconsistentes:
+        print(f"\n  ⚠️  {inconsistentes} sessão(ões) com saída antes da entrada (não somadas)")
+    print()
+
+
+# ========== BENCHMARK (--benchmark) ==========
+
+def colunas_sinteticas(linhas, alunos=300, dias=120, semente=1):
+    """Colunas de ponto sintéticas: metade no formato do Code.gs, metade como Date ISO do doGet."""
+    aleatorio = random.Random(semente)
+    inicio = date(2026, 2, 2).toordinal()
+    colunas = {aba: {campo: [] for campo in CAMPOS} for aba in ABAS_PONTO}
+    for i in range(linhas):
+        aba = "PontoTeoria" if i % 4 == 0 else "PontoPratica"
+        c = colunas[aba]
+        aluno = aleatorio.randrange(alunos)
+        dia = date.fromordinal(inicio + aleatorio.randrange(dias))
+        entrada = aleatorio.randrange(7 * 3600, 18 * 3600)
+        saida = "" if aleatorio.random() < 0.02 else min(entrada + aleatorio.randrange(1800, 5 * 3600), 86399)
+        if i % 2:
+            c["Data"].append(dia.strftime("%d/%m/%Y"))
+            c["HoraEntrada"].append(f"{entrada // 3600:02d}:{entrada % 3600 // 60:02d}:{entrada % 60:02d}")
+            c["HoraSaida"].append(saida if saida == "" else
+                                  f"{saida // 3600:02d}:{saida % 3600 // 60:02d}:{saida % 60:02d}")
+        else:
+            c["Data"].append(f"{dia.isoformat()}T03:00:00.000Z")
+            # Horas como o Sheets as serializa: 30/12/1899 no fuso local (LMT -03:06:28)
+            e = entrada + 11188
+            c["HoraEntrada"].append(f"1899-12-30T{e // 3600 % 24:02d}:{e % 3600 // 60:02d}:{e % 60:02d}.000Z")
+            s = saida if saida == "" else saida + 11188
+            c["HoraSaida"].append(s if s == "" else
+                                  f"1899-12-{30 + s // 86400}T{s // 3600 % 24:02d}:{s % 3600 // 60:02d}:{s % 60:02d}.000Z")
+        c["SerialNumber"].append(str(10000000 + aluno))
+        c["EmailHC"].append(f"aluno{aluno}@hc.fm.usp.br")
+        c["NomeCompleto"].append(f"Aluno {aluno}")
+        c["Escala"].append(str(aluno % 12 + 1))
+    return colunas
+
+def executar_benchmark(linhas, orcamento_ms=ORCAMENTO_MS, repeticoes=3):
+    np = importar_numpy()
+    colunas = colunas_sinteticas(linhas)
+    tempos = {"vetores": [], "por_aluno": [], "por_dia": [], "por_escala": []}
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        pontos = PontosVetorizados.de_colunas(colunas, np)
+        t1 = time.perf_counter()
+        pontos.por_aluno()
+        t2 = time.perf_counter()
+        pontos.por_dia()
+        t3 = time.perf_counter()
+        pontos.por_escala()
+        t4 = time.perf_counter()
+        for nome, ms in zip(tempos, ((t1 - t0), (t2 - t1), (t3 - t2), (t4 - t3))):
+            tempos[nome].append(ms * 1000)
+    medianas = {nome: sorted(v)[len(v) // 2] for nome, v in tempos.items()}
+    total = sum(medianas.values())
+    print(f"\n📊 {linhas} batida(s) sintética(s), mediana de {repeticoes} execução(ões):\n")
+    for nome, ms in medianas.items():
+        print(f"  {nome:<12} {ms:>8.1f} ms")
+    print(f"  {'total':<12} {total:>8.1f} ms  (orçamento: {orcamento_ms} ms)\n")
+    if total > orcamento_ms:
+        print("❌ Acima do orçamento.")
+        return 1
+    print("✅ Dentro do orçamento.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Horas de presença por aluno, dia e escala (PontoPratica/PontoTeoria) com NumPy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("fonte", nargs="?",
+                        help="URL do endpoint, snapshot JSON ou arquivo colunar (padrão: endpoint do config_ponto.json)")
+    parser.add_argument("--por", choices=("aluno", "dia", "escala"), default="aluno", help="Agrupamento (padrão: aluno)")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primeiro dia (YYYY-MM-DD)")
+    parser.add_argument("--ate", type=date.fromisoformat, help="Último dia (YYYY-MM-DD)")
+    parser.add_argument("--aluno", help="Só este aluno (SerialNumber ou EmailHC)")
+    parser.add_argument("--abertas", action="store_true", help="Lista as sessões abertas (entrada sem saída)")
+    parser.add_argument("--csv", metavar="ARQUIVO", help="Grava a tabela em CSV")
+    parser.add_argument("--json", action="store_true", help="Imprime a tabela em JSON")
+    parser.add_argument("--benchmark", action="store_true", help="Mede carga e agregações em batidas sintéticas")
+    parser.add_argument("--linhas", type=int, default=300000, help="Batidas sintéticas no --benchmark (padrão: 300000)")
+    parser.add_argument("--orcamento-ms", type=int, default=ORCAMENTO_MS,
+                        help=f"Limite de carga + cálculo no --benchmark (padrão: {ORCAMENTO_MS} ms)")
+    args = parser.parse_args()
+
+    np = importar_numpy()
+    if args.benchmark:
+        sys.exit(executar_benchmark(args.linhas, args.orcamento_ms))
+
+    fonte = args.fonte
+    if not fonte:
+        from SistemaPonto import load_config
+        fonte = load_config().get("endpoint")
+        if not fonte:
+            print("❌ Informe a fonte (URL, snapshot ou arquivo colunar) ou configure o endpoint.")
+            sys.exit(1)
+    try:
+        pontos = PontosVetorizados.de_colunas(carregar_colunas(fonte), np)
+    except (OSError, ValueError) as e:
+        print(f"❌ Não foi possível carregar as batidas de {fonte}: {e}")
+        sys.exit(1)
+
+    mascara = np.ones(len(pontos), dtype=bool)
+    if args.desde:
+        mascara &= pontos.dia >= np.datetime64(args.desde)
+    if args.ate:
+        mascara &= pontos.dia <= np.datetime64(args.ate)
+    if args.aluno:
+        mascara &= (pontos.seriais[pontos.aluno] == args.aluno) | (pontos.emails[pontos.email] == args.aluno)
+    pontos = pontos.filtrar(mascara)
+
+    if args.abertas:
+        indices = np.nonzero(pontos.abertas)[0]
+        print(f"\n🔓 {len(indices)} sessão(ões) aberta(s)\n")
+        for i in indices[np.argsort(pontos.dia[indices], kind="stable")]:
+            e = int(pontos.entrada[i])
+            print(f"  {pontos.dia[i]}  {MODALIDADES[pontos.modalidade[i]]:<8} entrada {e // 3600:02d}:"
+                  f"{e % 3600 // 60:02d}  {pontos.nomes[pontos.aluno[i]] or '-'} ({pontos.seriais[pontos.aluno[i]]})")
+        print()
+        return
+
+    tabela = {"aluno": pontos.por_aluno, "dia": pontos.por_dia, "escala": pontos.por_escala}[args.por]()
+    linhas = linhas_da_tabela(tabela, args.por)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=COLUNAS_SAIDA[args.por])
+            escritor.writeheader()
+            escritor.writerows(linhas)
+        print(f"✅ {len(linhas)} linha(s) gravada(s) em {args.csv}")
+    elif args.json:
+        print(json.dumps(linhas, ensure_ascii=False, indent=2))
+    else:
+        imprimir_tabela(linhas, args.por, pontos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+BenchmarkPonto.py
+
+Mede a latência leitura→confirmação do SistemaPonto.py sob carga, sem rede:
+sobe um servidor HTTP local que imita o contrato do Apps Script (doGet/doPost)
+e executa o SistemaPonto.py real num subprocesso, "digitando" crachás
+sintéticos no stdin como faria o leitor NFC.
+
+Para cada cenário informa p50/p95/p99 da latência até a confirmação e a vazão
+sustentada (leituras/s). No modo pipeline há duas confirmações: a local (ponto
+gravado e bipe, linha "📥") e a do servidor (linha "✅"/"❌", ou a resposta do
+stub para pontos que transbordaram da fila e seguiram pelo journal).
+
+Uso:
+  python BenchmarkPonto.py
+  python BenchmarkPonto.py --modos interativo background pipeline --leituras 200
+  python BenchmarkPonto.py --modos pipeline --filas 5 20 100 --workers 4 \\
+      --latencia-ms 800 --jitter-ms 300 --taxa-erro 0.05 --redirecionar
+  python BenchmarkPonto.py --taxa 5 --json resultado.json
+  python BenchmarkPonto.py --inicio              # perfil de inicialização + orçamentos (sai com 1 se estourar)
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_PONTO = Path(__file__).parent / "SistemaPonto.py"
+
+# Primeiro serial sintético (8+ dígitos, como os crachás reais)
+SERIAL_BASE = 70000000
+
+# Perfil de inicialização (--inicio): orçamentos em ms; acima deles o benchmark sai com código 1
+ORCAMENTO_COMANDO_MS = 400    # comando de configuração (--list-dias), do início ao fim do processo
+ORCAMENTO_ACEITO_MS = 600     # do início do processo até o 1º crachá aceito (--background)
+# Módulos que os comandos de configuração não devem importar (só o envio precisa deles)
+MODULOS_PESADOS = {"requests", "urllib3"}
+
+# Linha que indica que o loop está pronto para ler crachás, por modo
+MARCA_PRONTO = {
+    "interativo": "APROXIME O CRACHÁ",
+    "background": "Aguardando leitura de crachás",
+    "pipeline": "APROXIME O CRACHÁ",
+}
+
+# Linhas de desfecho de uma leitura nos modos sequenciais (uma por leitura, em ordem)
+MARCAS_DESFECHO = {
+    "interativo": ("PONTO REGISTRADO", "ERRO DE ENVIO", "Resposta do servidor", "PONTO JÁ REGISTRADO"),
+    "background": ("Resposta: ", "Erro de envio", "): "),
+}
+
+
+# ========== STUB DO APPS SCRIPT ==========
+
+class StubAppsScript:
+    """
+    Servidor HTTP local com o contrato do Apps Script usado pelo SistemaPonto:
+
+    - GET  ?action=ping       → {"ok": true, ...}
+    - GET  ?action=getPontos  → {"pontos": []}
+    - GET  ?aba=<nome>        → {"aba", "registros": [], "metadados"}
+    - POST (JSON do ponto)    → texto "Entrada prática registrada: HH:MM:SS"
+
+    latencia_ms/jitter_ms atrasam cada resposta; taxa_erro é a fração de POSTs
+    respondidos com HTTP 500; redirecionar imita o 302 do Apps Script para
+    script.googleusercontent.com (o cliente segue com um GET).
+    """
+
+    def __init__(self, latencia_ms=300, jitter_ms=0, taxa_erro=0.0, redirecionar=False, semente=None):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.redirecionar = redirecionar
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._respostas = {}
+        # SerialNumber → instante (perf_counter) da primeira resposta de sucesso
+        self.confirmados = {}
+        self.contadores = {"get": 0, "post": 0, "erros": 0, "redirecionamentos": 0}
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._criar_handler())
+        self.servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}/exec"
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def _sortear(self):
+        with self._lock:
+            atraso = self.latencia_ms + self._aleatorio.uniform(-self.jitter_ms, self.jitter_ms)
+            falha = self._aleatorio.random() < self.taxa_erro
+        return max(0.0, atraso) / 1000, falha
+
+    def _contar(self, chave):
+        with self._lock:
+            self.contadores[chave] += 1
+
+    def _confirmar(self, serial):
+        if serial:
+            with self._lock:
+                self.confirmados.setdefault(serial, time.perf_counter())
+
+    def _criar_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, codigo, corpo, tipo="application/json", extra=None):
+                dados = corpo.encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(dados)))
+                for nome, valor in (extra or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                q = urllib.parse.parse_qs(url.query)
+                stub._contar("get")
+                if url.path == "/echo":
+                    # Segunda perna do redirecionamento: devolve a resposta guardada do POST
+                    with stub._lock:
+                        texto, serial = stub._respostas.pop(q.get("id", [""])[0], ("Sem ação", None))
+                    self._responder(200, texto, "text/plain; charset=utf-8")
+                    return stub._confirmar(serial)
+                if q.get("action") == ["ping"]:
+                    return self._responder(200, json.dumps({"ok": True, "agora": time.time()}))
+                if q.get("action") == ["getPontos"]:
+                    return self._responder(200, json.dumps({"pontos": []}))
+                if "aba" in q:
+                    return self._responder(200, json.dumps({
+                        "aba": q["aba"][0],
+                        "registros": [],
+                        "metadados": {"totalRegistros": 0, "ultimaAtualizacao": "benchmark"},
+                    }))
+                return self._responder(200, json.dumps({"cache": {}, "metadados": {"totalAbas": 0}}))
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                try:
+                    serial = str(json.loads(self.rfile.read(tamanho) or b"{}").get("SerialNumber") or "")
+                except (ValueError, AttributeError):
+                    serial = ""
+                stub._contar("post")
+                atraso, falha = stub._sortear()
+                time.sleep(atraso)
+                if falha:
+                    stub._contar("erros")
+                    return self._responder(500, "Erro interno simulado", "text/plain; charset=utf-8")
+                texto = "Entrada prática registrada: " + time.strftime("%H:%M:%S")
+                if stub.redirecionar:
+                    stub._contar("redirecionamentos")
+                    chave = f"{threading.get_ident()}-{time.monotonic_ns()}"
+                    with stub._lock:
+                        stub._respostas[chave] = (texto, serial)
+                    return self._responder(302, "", "text/plain", {"Location": f"/echo?id={chave}"})
+                self._responder(200, texto, "text/plain; charset=utf-8")
+                stub._confirmar(serial)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# ========== EXECUÇÃO DE UM CENÁRIO ==========
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return None
+    posto = max(1, math.ceil(p / 100 * len(valores)))
+    return valores[posto - 1]
+
+def resumir(latencias_s, inicio, fim):
+    """Estatísticas de um conjunto de latências (em segundos)."""
+    ordenadas = sorted(latencias_s)
+    duracao = (fim - inicio) if (fim and inicio) else 0
+    return {
+        "confirmadas": len(ordenadas),
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 1) if ordenadas else None,
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 1) if ordenadas else None,
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 1) if ordenadas else None,
+        "max_ms": round(ordenadas[-1] * 1000, 1) if ordenadas else None,
+        "leituras_por_s": round(len(ordenadas) / duracao, 2) if duracao > 0 else None,
+    }
+
+def escrever_config(diretorio, endpoint, seriais, fila_max, workers):
+    """config_ponto.json do cenário: todos os crachás cadastrados, endpoint local."""
+    config = {
+        "endpoint": endpoint,
+        "alunos": {s: {"nome": f"Bench{s}", "email": ""} for s in seriais},
+        "nomes": {},
+        "pipeline_fila_max": fila_max,
+        "pipeline_workers": workers,
+        "journal_flush_seconds": 1.0,
+        "dias_especiais_teoria": [],
+        "horarios_teoria": [],
+        "dias_teoria": [],
+    }
+    with open(Path(diretorio) / "config_ponto.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+
+def executar_cenario(modo, stub, leituras=100, fila_max=50, workers=2, taxa=0.0, timeout=120.0):
+    """
+    Executa o SistemaPonto.py em `modo` contra o stub e mede cada leitura.
+
+    taxa = leituras por segundo (0 = rajada: todas as leituras de uma vez).
+    Retorna um dict com os resumos de latência do cenário.
+    """
+    seriais = [str(SERIAL_BASE + i) for i in range(leituras)]
+    with stub._lock:
+        stub.confirmados.clear()
+    args = {"interativo": [], "background": ["--background"], "pipeline": ["--pipeline"]}[modo]
+
+    with tempfile.TemporaryDirectory(prefix="bench_ponto_") as diretorio:
+        escrever_config(diretorio, stub.url, seriais, fila_max, workers)
+        env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8", TERM="dumb")
+        proc = subprocess.Popen(
+            [sys.executable, str(SCRIPT_PONTO)] + args,
+            cwd=diretorio, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace", bufsize=1,
+        )
+
+        pronto = threading.Event()
+        concluido = threading.Event()
+        enviado_em = {}
+        local_em = {}
+        servidor_em = {}
+        sequencia = []
+        saida = []
+
+        def ler_saida():
+            for linha in proc.stdout:
+                agora = time.perf_counter()
+                saida.append(linha)
+                if not pronto.is_set():
+                    if MARCA_PRONTO[modo] in linha:
+                        pronto.set()
+                    continue
+                if modo == "pipeline":
+                    for serial in _seriais_na_linha(linha):
+                        if "📥" in linha or "FILA CHEIA" in linha:
+                            local_em.setdefault(serial, agora)
+                        elif "✅" in linha or "❌" in linha:
+                            servidor_em.setdefault(serial, agora)
+                    if len(servidor_em.keys() | _confirmados_do_cenario()) >= leituras:
+                        concluido.set()
+                elif any(m in linha for m in MARCAS_DESFECHO[modo]):
+                    if modo == "background" and "): " in linha and "Bench" not in linha:
+                        continue
+                    sequencia.append(agora)
+                    if len(sequencia) >= leituras:
+                        concluido.set()
+            pronto.set()
+            concluido.set()
+
+        def _confirmados_do_cenario():
+            with stub._lock:
+                return {s for s in seriais if s in stub.confirmados}
+
+        leitor = threading.Thread(target=ler_saida, daemon=True)
+        leitor.start()
+        if not pronto.wait(30):
+            proc.kill()
+            raise RuntimeError(f"SistemaPonto.py não ficou pronto no modo {modo}:\n{''.join(saida[-20:])}")
+
+        inicio = time.perf_counter()
+        for i, serial in enumerate(seriais):
+            if taxa > 0:
+                alvo = inicio + i / taxa
+                espera = alvo - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            enviado_em[serial] = time.perf_counter()
+            try:
+                proc.stdin.write(serial + "\n")
+                proc.stdin.flush()
+            except BrokenPipeError:
+                break
+
+        if modo == "pipeline":
+            # Pontos que transbordaram para o journal não geram linha no console:
+            # a confirmação deles é o instante em que o stub respondeu com sucesso
+            limite = time.perf_counter() + timeout
+            while not concluido.is_set() and time.perf_counter() < limite:
+                if len(servidor_em.keys() | _confirmados_do_cenario()) >= leituras:
+                    break
+                concluido.wait(0.2)
+        else:
+            concluido.wait(timeout)
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        leitor.join(5)
+
+    resultado = {"modo": modo, "leituras": leituras, "taxa": taxa}
+    if modo == "pipeline":
+        resultado.update({"fila_max": fila_max, "workers": workers})
+        lat_local = [local_em[s] - enviado_em[s] for s in seriais if s in local_em and s in enviado_em]
+        for s in seriais:
+            if s not in servidor_em and s in stub.confirmados:
+                servidor_em[s] = stub.confirmados[s]
+        lat_serv = [servidor_em[s] - enviado_em[s] for s in seriais if s in servidor_em and s in enviado_em]
+        resultado["local"] = resumir(lat_local, inicio, max(local_em.values(), default=None))
+        resultado["servidor"] = resumir(lat_serv, inicio, max(servidor_em.values(), default=None))
+    else:
+        # Modos sequenciais: o n-ésimo desfecho corresponde à n-ésima leitura
+        lat = [t - enviado_em[s] for s, t in zip(seriais, sequencia) if s in enviado_em]
+        resultado["servidor"] = resumir(lat, inicio, sequencia[-1] if sequencia else None)
+    resultado["sem_confirmacao"] = leituras - resultado["servidor"]["confirmadas"]
+    return resultado
+
+def _seriais_na_linha(linha):
+    """Seriais sintéticos presentes numa linha de saída (nome 'Bench<serial>')."""
+    encontrados = []
+    pos = linha.find("Bench")
+    while pos != -1:
+        fim = pos + 5
+        while fim < len(linha) and linha[fim].isdigit():
+            fim += 1
+        if fim > pos + 5:
+            encontrados.append(linha[pos + 5:fim])
+        pos = linha.find("Bench", fim)
+    return encontrados
+
+
+# ========== PERFIL DE INICIALIZAÇÃO (--inicio) ==========
+
+def _env_subprocesso():
+    return dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8", TERM="dumb")
+
+def medir_comando(diretorio, argumentos):
+    """Tempo (s) de um processo completo do SistemaPonto.py, como o .bat o chama."""
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(SCRIPT_PONTO)] + argumentos, cwd=diretorio, env=_env_subprocesso(),
+                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - t0
+
+def perfil_importacao(diretorio, argumentos, maiores=8):
+    """
+    Roda o comando com `python -X importtime` e retorna (módulos importados,
+    [(ms próprios, módulo), ...] dos `maiores` custos).
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPT_PONTO)] + argumentos,
+                          cwd=diretorio, env=_env_subprocesso(), stdin=subprocess.DEVNULL,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    modulos = set()
+    custos = []
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        partes = linha.split("|")
+        nome = partes[-1].strip()
+        modulos.add(nome.split(".")[0])
+        try:
+            custos.append((int(partes[0].split(":")[1]) / 1000, nome))
+        except ValueError:
+            continue  # cabeçalho "self [us] | cumulative | imported package"
+    return modulos, sorted(custos, reverse=True)[:maiores]
+
+def medir_primeira_leitura(diretorio, serial, timeout=30.0):
+    """
+    Sobe o SistemaPonto.py --background com um crachá já no stdin e mede, a
+    partir do início do processo: pronto (loop aguardando), aceito (leitura
+    validada e em processamento) e confirmado (resposta do servidor).
+    """
+    shutil.rmtree(Path(diretorio) / "dados", ignore_errors=True)
+    marcas = {"pronto": MARCA_PRONTO["background"], "aceito": "Lido: ", "confirmado": "Resposta: "}
+    tempos = {}
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPT_PONTO), "--background"],
+        cwd=diretorio, env=_env_subprocesso(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace", bufsize=1,
+    )
+    proc.stdin.write(serial + "\n")
+    proc.stdin.flush()
+    vigia = threading.Timer(timeout, proc.kill)
+    vigia.start()
+    try:
+        for linha in proc.stdout:
+            agora = time.perf_counter()
+            for fase, marca in marcas.items():
+                if fase not in tempos and marca in linha:
+                    tempos[fase] = agora - t0
+            if "confirmado" in tempos or "Erro de envio" in linha:
+                break
+    finally:
+        vigia.cancel()
+        proc.kill()
+        proc.wait()
+    return tempos
+
+def executar_inicio(stub, repeticoes=5, orcamento_comando_ms=ORCAMENTO_COMANDO_MS,
+                    orcamento_aceito_ms=ORCAMENTO_ACEITO_MS):
+    """Perfil de inicialização com os orçamentos conferidos. Retorna o dict de resultados."""
+    serial = str(SERIAL_BASE)
+    with tempfile.TemporaryDirectory(prefix="bench_inicio_") as diretorio:
+        escrever_config(diretorio, stub.url, [serial], 50, 2)
+        comando = [medir_comando(diretorio, ["--list-dias"]) for _ in range(repeticoes)]
+        modulos, custos = perfil_importacao(diretorio, ["--list-dias"])
+        leituras = [medir_primeira_leitura(diretorio, serial) for _ in range(repeticoes)]
+
+    def mediana_ms(valores):
+        valores = sorted(v for v in valores if v is not None)
+        return round(percentil(valores, 50) * 1000, 1) if valores else None
+
+    resultado = {
+        "repeticoes": repeticoes,
+        "comando_ms": mediana_ms(comando),
+        "pronto_ms": mediana_ms(t.get("pronto") for t in leituras),
+        "aceito_ms": mediana_ms(t.get("aceito") for t in leituras),
+        "confirmado_ms": mediana_ms(t.get("confirmado") for t in leituras),
+        "importados_pelo_comando": sorted(MODULOS_PESADOS & modulos),
+        "maiores_importacoes": [{"modulo": nome, "ms": round(ms, 1)} for ms, nome in custos],
+    }
+    violacoes = []
+    if resultado["importados_pelo_comando"]:
+        violacoes.append(f"--list-dias importou {', '.join(resultado['importados_pelo_comando'])}")
+    if resultado["comando_ms"] is None or resultado["comando_ms"] > orcamento_comando_ms:
+        violacoes.append(f"--list-dias: {resultado['comando_ms']} ms > {orcamento_comando_ms} ms")
+    if resultado["aceito_ms"] is None or resultado["aceito_ms"] > orcamento_aceito_ms:
+        violacoes.append(f"1º crachá aceito: {resultado['aceito_ms']} ms > {orcamento_aceito_ms} ms")
+    resultado["violacoes"] = violacoes
+    return resultado
+
+def imprimir_inicio(r, orcamento_comando_ms, orcamento_aceito_ms):
+    def ms(v):
+        return f"{v:8.1f}" if v is not None else "       -"
+    print("\n=== Perfil de Inicialização do Sistema de Ponto ===\n")
+    print(f"  Mediana de {r['repeticoes']} execução(ões), a partir do início do processo:\n")
+    print(f"  {'--list-dias (processo completo)':<40} {ms(r['comando_ms'])} ms   (orçamento {orcamento_comando_ms} ms)")
+    print(f"  {'quiosque pronto (--background)':<40} {ms(r['pronto_ms'])} ms")
+    print(f"  {'1º crachá aceito':<40} {ms(r['aceito_ms'])} ms   (orçamento {orcamento_aceito_ms} ms)")
+    print(f"  {'1º ponto confirmado pelo stub':<40} {ms(r['confirmado_ms'])} ms")
+    print("\n  Maiores importações do --list-dias (ms próprios):")
+    for item in r["maiores_importacoes"]:
+        print(f"    {item['ms']:7.1f}  {item['modulo']}")
+    print("")
+    if r["violacoes"]:
+        for v in r["violacoes"]:
+            print(f"  ❌ Fora do orçamento: {v}")
+    else:
+        print("  ✅ Dentro do orçamento de inicialização")
+    print("")
+
+
+# ========== RELATÓRIO ==========
+
+def formatar_linha(rotulo, resumo):
+    def ms(v):
+        return f"{v:8.1f}" if v is not None else "       -"
+    vazao = f"{resumo['leituras_por_s']:8.2f}" if resumo["leituras_por_s"] is not None else "       -"
+    return (f"  {rotulo:<34} {resumo['confirmadas']:>5} {ms(resumo['p50_ms'])} {ms(resumo['p95_ms'])} "
+            f"{ms(resumo['p99_ms'])} {ms(resumo['max_ms'])} {vazao}")
+
+def imprimir_relatorio(resultados, stub):
+    print("\n=== Benchmark do Sistema de Ponto ===\n")
+    print(f"  Stub: latência {stub.latencia_ms} ms ± {stub.jitter_ms} ms | "
+          f"erro {stub.taxa_erro:.0%} | redirecionamento {'sim' if stub.redirecionar else 'não'}\n")
+    print(f"  {'Cenário':<34} {'ok':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8} {'leit/s':>8}")
+    print("  " + "─" * 86)
+    for r in resultados:
+        if r["modo"] == "pipeline":
+            base = f"pipeline fila={r['fila_max']} w={r['workers']}"
+            print(formatar_linha(base + " (local)", r["local"]))
+            print(formatar_linha(base + " (servidor)", r["servidor"]))
+        else:
+            print(formatar_linha(r["modo"], r["servidor"]))
+        if r["sem_confirmacao"]:
+            print(f"  {'':<34} ⚠️  {r['sem_confirmacao']} leitura(s) sem confirmação no tempo limite")
+    print(f"\n  Requisições ao stub: {stub.contadores}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark leitura→confirmação do SistemaPonto.py contra um Apps Script local (sem rede)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--modos", nargs="+", default=["interativo", "background", "pipeline"],
+                        choices=["interativo", "background", "pipeline"], help="Modos do SistemaPonto a medir")
+    parser.add_argument("--leituras", type=int, default=100, help="Leituras por cenário (padrão: 100)")
+    parser.add_argument("--filas", type=int, nargs="+", default=[5, 50],
+                        help="Tamanhos de fila do modo pipeline (padrão: 5 50)")
+    parser.add_argument("--workers", type=int, default=2, help="Workers do modo pipeline (padrão: 2)")
+    parser.add_argument("--taxa", type=float, default=0.0,
+                        help="Leituras por segundo (padrão: 0 = rajada)")
+    parser.add_argument("--latencia-ms", type=float, default=300, help="Latência do stub por POST (padrão: 300)")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Variação da latência (padrão: 100)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de POSTs com HTTP 500 (padrão: 0)")
+    parser.add_argument("--redirecionar", action="store_true", help="Responde POST com 302, como o Apps Script")
+    parser.add_argument("--semente", type=int, default=None, help="Semente do sorteio de latência/erros")
+    parser.add_argument("--timeout", type=float, default=300, help="Tempo limite por cenário em segundos")
+    parser.add_argument("--json", metavar="ARQUIVO", help="Grava os resultados em JSON")
+    parser.add_argument("--inicio", action="store_true",
+                        help="Mede a inicialização (importações, --list-dias, 1º crachá) contra os orçamentos")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por medida do --inicio (padrão: 5)")
+    parser.add_argument("--orcamento-comando-ms", type=float, default=ORCAMENTO_COMANDO_MS,
+                        help=f"Orçamento do --list-dias (padrão: {ORCAMENTO_COMANDO_MS})")
+    parser.add_argument("--orcamento-aceito-ms", type=float, default=ORCAMENTO_ACEITO_MS,
+                        help=f"Orçamento até o 1º crachá aceito (padrão: {ORCAMENTO_ACEITO_MS})")
+    args = parser.parse_args()
+
+    stub = StubAppsScript(args.latencia_ms, args.jitter_ms, args.taxa_erro, args.redirecionar, args.semente).iniciar()
+    if args.inicio:
+        try:
+            resultado = executar_inicio(stub, args.repeticoes, args.orcamento_comando_ms, args.orcamento_aceito_ms)
+        finally:
+            stub.parar()
+        imprimir_inicio(resultado, args.orcamento_comando_ms, args.orcamento_aceito_ms)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+            print(f"  Resultados gravados em {args.json}")
+        sys.exit(1 if resultado["violacoes"] else 0)
+    resultados = []
+    try:
+        for modo in args.modos:
+            filas = args.filas if modo == "pipeline" else [None]
+            for fila in filas:
+                rotulo = f"{modo} (fila {fila})" if fila else modo
+                print(f"  ▶ {rotulo}: {args.leituras} leitura(s)...", flush=True)
+                resultados.append(executar_cenario(
+                    modo, stub, args.leituras, fila or 50, args.workers, args.taxa, args.timeout
+                ))
+    finally:
+        stub.parar()
+
+    imprimir_relatorio(resultados, stub)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"stub": {"latencia_ms": args.latencia_ms, "jitter_ms": args.jitter_ms,
+                                "taxa_erro": args.taxa_erro, "redirecionar": args.redirecionar},
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"  Resultados gravados em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
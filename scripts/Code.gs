@@ -12,6 +12,19 @@ const ABA_PONTO_TEORIA = 'PontoTeoria';
 // Headers padrão para abas de ponto (usado quando aba está vazia)
 const HEADERS_PONTO_PADRAO = ['SerialNumber', 'EmailHC', 'NomeCompleto', 'Data', 'HoraEntrada', 'HoraSaida', 'Escala', 'Tipo'];
 
+// Ações compostas que o doPost aplica de uma vez (anunciadas em doGet?action=capacidades)
+const ACOES_COMPOSTAS_PONTO = ['transicao', 'lote'];
+
+// Prefixo da resposta quando o lock não sai a tempo: nada foi gravado e o
+// SistemaPonto.py repete o envio (o Web App sempre responde HTTP 200)
+const ERRO_SERVIDOR_OCUPADO = 'Erro: servidor ocupado';
+
+// Registro durável das IdempotencyKey já aplicadas (o CacheService é só o atalho
+// rápido e pode descartar chaves). Chaves com mais de IDEMPOTENCIA_DIAS são
+// podadas; o journal do SistemaPonto.py não reenvia batidas mais antigas.
+const ABA_IDEMPOTENCIA = 'IdempotenciaPonto';
+const IDEMPOTENCIA_DIAS = 30;
+
 // Threshold para distinguir seriais do Excel de timestamps Unix
 // Seriais Excel: números pequenos (dias desde 31/12/1899), tipicamente 1-50000
 // Timestamps Unix modernos em milissegundos: números grandes (>= 1000000000000, ano 2001+)
@@ -37,7 +50,29 @@ function doGet(e) {
     const planilha = SpreadsheetApp.getActiveSpreadsheet();
     const parametros = e.parameter || {};
     const abaEspecifica = parametros.aba;
-    
+
+    // Ping leve usado pelo SistemaPonto.py para aquecer as conexões (keep-alive)
+    if (parametros.action === 'ping') {
+      return ContentService.createTextOutput(JSON.stringify({
+        ok: true,
+        agora: new Date().toISOString()
+      })).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    // Ações compostas aceitas pelo doPost (o SistemaPonto.py consulta antes de usá-las)
+    if (parametros.action === 'capacidades') {
+      return ContentService.createTextOutput(JSON.stringify({
+        acoes: ACOES_COMPOSTAS_PONTO
+      })).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    // Batidas de ponto de um dia (ledger local / anti-duplicata do SistemaPonto.py)
+    if (parametros.action === 'getPontos') {
+      return ContentService.createTextOutput(JSON.stringify({
+        pontos: listarPontosDoDia_(parametros.data, parametros.serial)
+      })).setMimeType(ContentService.MimeType.JSON);
+    }
+
     // Se uma aba específica foi solicitada
     if (abaEspecifica) {
       const aba = planilha.getSheetByName(abaEspecifica);
@@ -48,14 +83,30 @@ function doGet(e) {
         })).setMimeType(ContentService.MimeType.JSON);
       }
       
+      // ultimaAtualizacao só avança quando a aba é gravada (ver marcarAbaAlterada_)
+      const ultimaAtualizacao = carimboDaAba_(abaEspecifica);
+
+      // Leitura condicional: o cliente já tem esta versão da aba (nem lê os valores)
+      if (parametros.desde && parametros.desde === ultimaAtualizacao) {
+        return ContentService.createTextOutput(JSON.stringify({
+          aba: abaEspecifica,
+          naoModificado: true,
+          metadados: {
+            totalRegistros: Math.max(aba.getLastRow() - 1, 0),
+            ultimaAtualizacao: ultimaAtualizacao
+          }
+        })).setMimeType(ContentService.MimeType.JSON);
+      }
+
       const dados = aba.getDataRange().getValues();
+
       if (dados.length < 2) {
         return ContentService.createTextOutput(JSON.stringify({
           aba: abaEspecifica,
           registros: [],
           metadados: {
             totalRegistros: 0,
-            ultimaAtualizacao: new Date().toISOString()
+            ultimaAtualizacao: ultimaAtualizacao
           }
         })).setMimeType(ContentService.MimeType.JSON);
       }
@@ -68,7 +119,7 @@ function doGet(e) {
         registros: registros,
         metadados: {
           totalRegistros: registros.length,
-          ultimaAtualizacao: new Date().toISOString()
+          ultimaAtualizacao: ultimaAtualizacao
         }
       })).setMimeType(ContentService.MimeType.JSON);
     }
@@ -85,6 +136,7 @@ function doGet(e) {
     
     for (let aba of abas) {
       const nomeAba = aba.getName();
+      if (nomeAba === ABA_IDEMPOTENCIA) continue; // controle interno do doPost
       const nomeAbaSanitizado = sanitizeKey(nomeAba);
       const dados = aba.getDataRange().getValues();
       
@@ -213,6 +265,7 @@ function sanitizeKey(texto) {
  */
 function onEdit(e){
   try {
+    if (e && e.range) marcarAbaAlterada_(e.range.getSheet().getName());
     handlePontoChange(e);
   } catch(err) {
     console.error("Erro em onEdit:", err);
@@ -227,6 +280,7 @@ function onEdit(e){
  */
 function onEditPontoInstalavel(e) {
   try {
+    if (e && e.range) marcarAbaAlterada_(e.range.getSheet().getName());
     handlePontoChange(e);
   } catch(err) {
     console.error("Erro em onEditPontoInstalavel:", err);
@@ -241,6 +295,7 @@ function onEditPontoInstalavel(e) {
 function onChangePontoInstalavel(e) {
   try {
     if (!e || !e.source) return;
+    marcarAbaAlterada_(e.source.getActiveSheet().getName());
     
     // Verifica se foi uma inserção de linha
     if (e.changeType === 'INSERT_ROW' || e.changeType === 'EDIT') {
@@ -466,6 +521,7 @@ function syncOnePontoRow_(spreadsheet, escalaNumber, serial, email, nome, dataRa
   
   if (currentStr !== newStr){
     escalaSheet.getRange(targetRow, dataColIndex).setValue(entSaiStr);
+    marcarAbaAlterada_(escalaSheet.getName());
   }
 }
 
@@ -558,6 +614,7 @@ function syncToFrequenciaTeorica_(spreadsheet, pontoTeoriaSheet, rowNumber, esca
   
   if (currentStr !== newStr){
     freqSheet.getRange(targetRow, dataColIndex).setValue(entSaiStr);
+    marcarAbaAlterada_(freqSheet.getName());
   }
 }
 
@@ -757,158 +814,612 @@ function doPost(e) {
     if (tipo === 'ausencia' || tipo === 'reposicao') {
       return doPostAusenciasReposicoes(e);
     }
-    
-    var id = data.SerialNumber || "";
-    var nome = data.NomeCompleto || "Desconhecido";
-    var email = data.EmailHC || "";
-    var escala = data.Escala || "";
-    var simularTerca = data.SimularTerça || false;
-    var isDiaTeoria = data.IsDiaTeoria || false;
 
-    var ss = SpreadsheetApp.getActiveSpreadsheet();
-    var abaPratica = ss.getSheetByName(ABA_PONTO_PRATICA);
-    var abaTeoria = ss.getSheetByName(ABA_PONTO_TEORIA);
-    if (!abaPratica || !abaTeoria)
-      throw new Error("Abas '" + ABA_PONTO_PRATICA + "' ou '" + ABA_PONTO_TEORIA + "' não encontradas!");
+    // Lote de batidas: uma leitura e uma escrita em bloco por aba de ponto
+    if (data.Acao === 'lote') {
+      return registrarLote_(data.Taps);
+    }
 
-    var agora = new Date();
-    var dataStr = Utilities.formatDate(agora, "America/Sao_Paulo", "dd/MM/yyyy");
-    var horaStr = Utilities.formatDate(agora, "America/Sao_Paulo", "HH:mm:ss");
-    var diaSemana = agora.getDay();
-    if (simularTerca) diaSemana = 2;
+    // Cada batida é processada sob o lock do script e uma única vez por IdempotencyKey
+    return comIdempotencia_(data, function () {
+      // Transição Prática→Teoria em uma única requisição (saída + entrada atômicas)
+      var saida = data.Acao === 'transicao' ? registrarTransicao_(data) : registrarPonto_(data);
+      if (!/^(Erro|Sem ação)/.test(saida.getContent())) {
+        marcarAbaAlterada_(ABA_PONTO_PRATICA);
+        marcarAbaAlterada_(ABA_PONTO_TEORIA);
+      }
+      return saida;
+    });
+  } catch (err) {
+    return resposta("Erro: " + err.message);
+  }
+}
 
-    var ehDiaTeoria = isDiaTeoria || diaSemana === 2 || diaSemana === 4;
+/**
+ * Executa `processar` sob o lock do script, no máximo uma vez por IdempotencyKey.
+ * A resposta de uma batida processada é gravada na aba ABA_IDEMPOTENCIA (e no
+ * CacheService, por 6 horas, como atalho): um reenvio com a mesma chave
+ * (retry, fila offline do SistemaPonto.py) recebe a mesma resposta sem alterar
+ * a planilha. Respostas de erro não são guardadas.
+ * Sem o lock em 10 s responde ERRO_SERVIDOR_OCUPADO, que o cliente repete.
+ * @param {Object} data - Payload da batida
+ * @param {Function} processar - Função que aplica a batida e retorna um TextOutput
+ * @returns {TextOutput}
+ */
+function comIdempotencia_(data, processar) {
+  var chave = data.IdempotencyKey ? 'idem_' + String(data.IdempotencyKey).slice(0, 200) : null;
+  var cache = CacheService.getScriptCache();
 
-    // === 1. Verifica se há linha aberta na TEORIA ===
-    var dadosTeoria = abaTeoria.getDataRange().getValues();
-    if (dadosTeoria.length < 2) {
-      // Só tem cabeçalho ou está vazia - usa headers padrão
-      dadosTeoria = [HEADERS_PONTO_PADRAO];
+  var lock = LockService.getScriptLock();
+  if (!lock.tryLock(10000)) {
+    return resposta(ERRO_SERVIDOR_OCUPADO + ", ponto não registrado. Tente novamente.");
+  }
+  try {
+    var anterior = chave ? respostasGuardadas_(cache, [chave])[chave] : undefined;
+    if (anterior !== undefined) {
+      return resposta(anterior);
     }
-    
-    var linhaTeoriaAberta = null;
-    var linhaTeoriaCompleta = false;
-
-    // Mapeia cabeçalhos da teoria com validação
-    var headerTeoria = dadosTeoria[0] || [];
-    var colIdxTeoria = {
-      id: headerTeoria.indexOf('SerialNumber'),
-      data: headerTeoria.indexOf('Data'),
-      entrada: headerTeoria.indexOf('HoraEntrada'),
-      saida: headerTeoria.indexOf('HoraSaida')
-    };
-    
-    // Valida se encontrou as colunas essenciais
-    if (colIdxTeoria.id < 0 || colIdxTeoria.data < 0) {
-      return resposta("Erro: Colunas essenciais não encontradas na aba PontoTeoria");
+    var saida = processar();
+    var texto = saida.getContent();
+    if (chave && texto.indexOf('Erro') !== 0) {
+      SpreadsheetApp.flush();
+      var nova = {};
+      nova[chave] = texto;
+      guardarRespostas_(cache, nova);
     }
+    return saida;
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * Aba oculta com as IdempotencyKey aplicadas (Chave | Resposta | RegistradaEm),
+ * em ordem de gravação. Criada na primeira batida.
+ * @returns {Sheet}
+ */
+function abaIdempotencia_() {
+  var ss = SpreadsheetApp.getActiveSpreadsheet();
+  var aba = ss.getSheetByName(ABA_IDEMPOTENCIA);
+  if (!aba) {
+    aba = ss.insertSheet(ABA_IDEMPOTENCIA);
+    aba.appendRow(['Chave', 'Resposta', 'RegistradaEm']);
+    aba.hideSheet();
+  }
+  return aba;
+}
 
-    for (var i = 1; i < dadosTeoria.length; i++) {
-      var linhaId = dadosTeoria[i][colIdxTeoria.id];
-      var linhaData = formatarData(dadosTeoria[i][colIdxTeoria.data]);
-      var entrada = colIdxTeoria.entrada >= 0 ? dadosTeoria[i][colIdxTeoria.entrada] : null;
-      var saida = colIdxTeoria.saida >= 0 ? dadosTeoria[i][colIdxTeoria.saida] : null;
+/**
+ * Respostas já guardadas para as chaves: CacheService primeiro; as que
+ * faltarem são procuradas na aba durável (e voltam ao cache).
+ * @param {Cache} cache - CacheService do script
+ * @param {Array<string>} chaves - Chaves 'idem_...'
+ * @returns {Object} {chave: resposta} só das chaves encontradas
+ */
+function respostasGuardadas_(cache, chaves) {
+  var guardadas = chaves.length ? cache.getAll(chaves) : {};
+  var faltando = chaves.filter(function (c) { return guardadas[c] === undefined; });
+  if (!faltando.length) return guardadas;
+  var aba = abaIdempotencia_();
+  if (aba.getLastRow() < 2) return guardadas;
+  var coluna = aba.getRange(2, 1, aba.getLastRow() - 1, 1);
+  var achadas = {};
+  faltando.forEach(function (chave) {
+    var celula = coluna.createTextFinder(chave).matchEntireCell(true).findNext();
+    if (celula) achadas[chave] = String(aba.getRange(celula.getRow(), 2).getValue());
+  });
+  if (Object.keys(achadas).length) cache.putAll(achadas, 21600);
+  Object.keys(achadas).forEach(function (c) { guardadas[c] = achadas[c]; });
+  return guardadas;
+}
 
-      if (String(linhaId) === String(id) && String(linhaData) === String(dataStr)) {
-        if (!saida) linhaTeoriaAberta = i + 1;
-        else linhaTeoriaCompleta = true;
-      }
-    }
+/**
+ * Grava as respostas aplicadas ({chave: resposta}) na aba durável e no cache,
+ * descartando da aba as chaves com mais de IDEMPOTENCIA_DIAS.
+ */
+function guardarRespostas_(cache, novas) {
+  var chaves = Object.keys(novas);
+  if (!chaves.length) return;
+  var aba = abaIdempotencia_();
+  var agora = new Date();
+  aba.getRange(aba.getLastRow() + 1, 1, chaves.length, 3)
+    .setValues(chaves.map(function (c) { return [c, novas[c], agora]; }));
+  cache.putAll(novas, 21600);
+
+  // Poda: as linhas estão em ordem de gravação; só lê a coluna quando a primeira venceu
+  var limite = agora.getTime() - IDEMPOTENCIA_DIAS * 86400000;
+  var primeira = aba.getRange(2, 3).getValue();
+  if (!(primeira instanceof Date) || primeira.getTime() >= limite) return;
+  var datas = aba.getRange(2, 3, aba.getLastRow() - 1, 1).getValues();
+  var vencidas = 0;
+  while (vencidas < datas.length - 1 && datas[vencidas][0] instanceof Date &&
+         datas[vencidas][0].getTime() < limite) {
+    vencidas++;
+  }
+  if (vencidas) aba.deleteRows(2, vencidas);
+}
 
-    if (linhaTeoriaCompleta) {
-      return resposta("Sem ação: aluno já completou a teoria hoje.");
-    }
+/**
+ * Instante da batida: DataHoraLeitura enviada pelo cliente (ISO 8601 com fuso,
+ * capturada na leitura do crachá) ou a hora de chegada, se ausente, inválida
+ * ou mais de 5 minutos no futuro (relógio do quiosque adiantado).
+ * @param {Object} data - Payload da batida
+ * @returns {Date}
+ */
+function instanteDoPonto_(data) {
+  var agora = new Date();
+  if (!data.DataHoraLeitura) return agora;
+  var instante = new Date(String(data.DataHoraLeitura));
+  if (isNaN(instante.getTime()) || instante.getTime() > agora.getTime() + 5 * 60 * 1000) {
+    return agora;
+  }
+  return instante;
+}
 
-    if (linhaTeoriaAberta) {
-      if (colIdxTeoria.saida >= 0) {
-        abaTeoria.getRange(linhaTeoriaAberta, colIdxTeoria.saida + 1).setValue(horaStr);
-      }
-      return resposta("Saída teórica registrada: " + horaStr);
+/**
+ * Aplica uma batida comum à máquina de estados Prática/Teoria.
+ * @param {Object} data - Payload do SistemaPonto.py
+ * @returns {TextOutput} Mensagem com o resultado
+ */
+function registrarPonto_(data) {
+  var id = data.SerialNumber || "";
+  var nome = data.NomeCompleto || "Desconhecido";
+  var email = data.EmailHC || "";
+  var escala = data.Escala || "";
+  var simularTerca = data.SimularTerça || false;
+  var isDiaTeoria = data.IsDiaTeoria || false;
+
+  var ss = SpreadsheetApp.getActiveSpreadsheet();
+  var abaPratica = ss.getSheetByName(ABA_PONTO_PRATICA);
+  var abaTeoria = ss.getSheetByName(ABA_PONTO_TEORIA);
+  if (!abaPratica || !abaTeoria)
+    throw new Error("Abas '" + ABA_PONTO_PRATICA + "' ou '" + ABA_PONTO_TEORIA + "' não encontradas!");
+
+  var agora = instanteDoPonto_(data);
+  var dataStr = Utilities.formatDate(agora, "America/Sao_Paulo", "dd/MM/yyyy");
+  var horaStr = Utilities.formatDate(agora, "America/Sao_Paulo", "HH:mm:ss");
+  var diaSemana = agora.getDay();
+  if (simularTerca) diaSemana = 2;
+
+  var ehDiaTeoria = isDiaTeoria || diaSemana === 2 || diaSemana === 4;
+
+  // === 1. Verifica se há linha aberta na TEORIA ===
+  var dadosTeoria = abaTeoria.getDataRange().getValues();
+  if (dadosTeoria.length < 2) {
+    // Só tem cabeçalho ou está vazia - usa headers padrão
+    dadosTeoria = [HEADERS_PONTO_PADRAO];
+  }
+  
+  var linhaTeoriaAberta = null;
+  var linhaTeoriaCompleta = false;
+
+  // Mapeia cabeçalhos da teoria com validação
+  var headerTeoria = dadosTeoria[0] || [];
+  var colIdxTeoria = {
+    id: headerTeoria.indexOf('SerialNumber'),
+    data: headerTeoria.indexOf('Data'),
+    entrada: headerTeoria.indexOf('HoraEntrada'),
+    saida: headerTeoria.indexOf('HoraSaida')
+  };
+  
+  // Valida se encontrou as colunas essenciais
+  if (colIdxTeoria.id < 0 || colIdxTeoria.data < 0) {
+    return resposta("Erro: Colunas essenciais não encontradas na aba PontoTeoria");
+  }
+
+  for (var i = 1; i < dadosTeoria.length; i++) {
+    var linhaId = dadosTeoria[i][colIdxTeoria.id];
+    var linhaData = formatarData(dadosTeoria[i][colIdxTeoria.data]);
+    var entrada = colIdxTeoria.entrada >= 0 ? dadosTeoria[i][colIdxTeoria.entrada] : null;
+    var saida = colIdxTeoria.saida >= 0 ? dadosTeoria[i][colIdxTeoria.saida] : null;
+
+    if (String(linhaId) === String(id) && String(linhaData) === String(dataStr)) {
+      if (!saida) linhaTeoriaAberta = i + 1;
+      else linhaTeoriaCompleta = true;
     }
+  }
 
-    // === 2. Verifica se há linha aberta na PRÁTICA ===
-    var dadosPratica = abaPratica.getDataRange().getValues();
-    if (dadosPratica.length < 2) {
-      // Só tem cabeçalho ou está vazia - usa headers padrão
-      dadosPratica = [HEADERS_PONTO_PADRAO];
+  if (linhaTeoriaCompleta) {
+    return resposta("Sem ação: aluno já completou a teoria hoje.");
+  }
+
+  if (linhaTeoriaAberta) {
+    if (colIdxTeoria.saida >= 0) {
+      abaTeoria.getRange(linhaTeoriaAberta, colIdxTeoria.saida + 1).setValue(horaStr);
     }
-    
-    var linhaPraticaAberta = null;
-    var linhaPraticaCompleta = false;
-
-    // Mapeia cabeçalhos da prática com validação
-    var headerPratica = dadosPratica[0] || [];
-    var colIdxPratica = {
-      id: headerPratica.indexOf('SerialNumber'),
-      data: headerPratica.indexOf('Data'),
-      entrada: headerPratica.indexOf('HoraEntrada'),
-      saida: headerPratica.indexOf('HoraSaida')
-    };
-    
-    // Valida se encontrou as colunas essenciais
-    if (colIdxPratica.id < 0 || colIdxPratica.data < 0) {
-      return resposta("Erro: Colunas essenciais não encontradas na aba PontoPratica");
+    return resposta("Saída teórica registrada: " + horaStr);
+  }
+
+  // === 2. Verifica se há linha aberta na PRÁTICA ===
+  var dadosPratica = abaPratica.getDataRange().getValues();
+  if (dadosPratica.length < 2) {
+    // Só tem cabeçalho ou está vazia - usa headers padrão
+    dadosPratica = [HEADERS_PONTO_PADRAO];
+  }
+  
+  var linhaPraticaAberta = null;
+  var linhaPraticaCompleta = false;
+
+  // Mapeia cabeçalhos da prática com validação
+  var headerPratica = dadosPratica[0] || [];
+  var colIdxPratica = {
+    id: headerPratica.indexOf('SerialNumber'),
+    data: headerPratica.indexOf('Data'),
+    entrada: headerPratica.indexOf('HoraEntrada'),
+    saida: headerPratica.indexOf('HoraSaida')
+  };
+  
+  // Valida se encontrou as colunas essenciais
+  if (colIdxPratica.id < 0 || colIdxPratica.data < 0) {
+    return resposta("Erro: Colunas essenciais não encontradas na aba PontoPratica");
+  }
+
+  for (var i = 1; i < dadosPratica.length; i++) {
+    var linhaId = dadosPratica[i][colIdxPratica.id];
+    var linhaData = formatarData(dadosPratica[i][colIdxPratica.data]);
+    var entrada = colIdxPratica.entrada >= 0 ? dadosPratica[i][colIdxPratica.entrada] : null;
+    var saida = colIdxPratica.saida >= 0 ? dadosPratica[i][colIdxPratica.saida] : null;
+
+    if (String(linhaId) === String(id) && String(linhaData) === String(dataStr)) {
+      if (!saida) linhaPraticaAberta = i + 1;
+      else linhaPraticaCompleta = true;
     }
+  }
 
-    for (var i = 1; i < dadosPratica.length; i++) {
-      var linhaId = dadosPratica[i][colIdxPratica.id];
-      var linhaData = formatarData(dadosPratica[i][colIdxPratica.data]);
-      var entrada = colIdxPratica.entrada >= 0 ? dadosPratica[i][colIdxPratica.entrada] : null;
-      var saida = colIdxPratica.saida >= 0 ? dadosPratica[i][colIdxPratica.saida] : null;
+  if (linhaPraticaCompleta && !ehDiaTeoria) {
+    return resposta("Sem ação: aluno já completou a prática hoje.");
+  }
 
-      if (String(linhaId) === String(id) && String(linhaData) === String(dataStr)) {
-        if (!saida) linhaPraticaAberta = i + 1;
-        else linhaPraticaCompleta = true;
-      }
+  // === 3. Caso não exista prática aberta → cria nova entrada ===
+  if (!linhaPraticaAberta && !linhaPraticaCompleta) {
+    if (ehDiaTeoria) {
+      abaTeoria.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Teoria"]);
+      var novaLinhaTeoria = abaTeoria.getLastRow();
+      syncToFrequenciaTeoricaFromPonto_(ss, abaTeoria, novaLinhaTeoria, escala);
+      return resposta("Entrada teórica registrada: " + horaStr);
     }
+    abaPratica.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Prática"]);
+    return resposta("Entrada prática registrada: " + horaStr);
+  }
 
-    if (linhaPraticaCompleta && !ehDiaTeoria) {
-      return resposta("Sem ação: aluno já completou a prática hoje.");
+  // === 4. Caso exista prática aberta → registra saída ===
+  if (linhaPraticaAberta) {
+    if (colIdxPratica.saida >= 0) {
+      abaPratica.getRange(linhaPraticaAberta, colIdxPratica.saida + 1).setValue(horaStr);
     }
 
-    // === 3. Caso não exista prática aberta → cria nova entrada ===
-    if (!linhaPraticaAberta && !linhaPraticaCompleta) {
-      if (ehDiaTeoria) {
+    if (ehDiaTeoria) {
+      var existeTeoriaHoje = dadosTeoria.some(function (r, idx) {
+        if (idx === 0) return false; // Pula cabeçalho
+        var rId = colIdxTeoria.id >= 0 ? r[colIdxTeoria.id] : null;
+        var rData = colIdxTeoria.data >= 0 ? formatarData(r[colIdxTeoria.data]) : null;
+        return String(rId) === String(id) && String(rData) === String(dataStr);
+      });
+      if (!existeTeoriaHoje) {
         abaTeoria.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Teoria"]);
-        var novaLinhaTeoria = abaTeoria.getLastRow();
-        syncToFrequenciaTeoricaFromPonto_(ss, abaTeoria, novaLinhaTeoria, escala);
-        return resposta("Entrada teórica registrada: " + horaStr);
+        var novaLinha = abaTeoria.getLastRow();
+        syncToFrequenciaTeoricaFromPonto_(ss, abaTeoria, novaLinha, escala);
+        return resposta("Saída prática e entrada teórica registradas: " + horaStr);
       }
-      abaPratica.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Prática"]);
-      return resposta("Entrada prática registrada: " + horaStr);
     }
 
-    // === 4. Caso exista prática aberta → registra saída ===
-    if (linhaPraticaAberta) {
-      if (colIdxPratica.saida >= 0) {
-        abaPratica.getRange(linhaPraticaAberta, colIdxPratica.saida + 1).setValue(horaStr);
-      }
+    return resposta("Saída prática registrada: " + horaStr);
+  }
 
-      if (ehDiaTeoria) {
-        var existeTeoriaHoje = dadosTeoria.some(function (r, idx) {
-          if (idx === 0) return false; // Pula cabeçalho
-          var rId = colIdxTeoria.id >= 0 ? r[colIdxTeoria.id] : null;
-          var rData = colIdxTeoria.data >= 0 ? formatarData(r[colIdxTeoria.data]) : null;
-          return String(rId) === String(id) && String(rData) === String(dataStr);
-        });
-        if (!existeTeoriaHoje) {
-          abaTeoria.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Teoria"]);
-          var novaLinha = abaTeoria.getLastRow();
-          syncToFrequenciaTeoricaFromPonto_(ss, abaTeoria, novaLinha, escala);
-          return resposta("Saída prática e entrada teórica registradas: " + horaStr);
-        }
+  return resposta("Sem ação necessária para o ID " + id + ".");
+}
+
+/**
+ * Processa um lote de batidas ({Acao: 'lote', Taps: [...]}) com uma única
+ * leitura de PontoPratica/PontoTeoria e uma escrita em bloco por aba.
+ * Cada batida segue as regras de registrarPonto_ / registrarTransicao_,
+ * aplicadas em memória na ordem recebida; chaves já processadas recebem a
+ * resposta guardada. Se uma escrita falhar, as anteriores são desfeitas e
+ * todas as batidas recebem o erro (nenhuma chave é guardada).
+ * @param {Array} taps - Payloads individuais, no formato do doPost
+ * @returns {TextOutput} JSON {resultados: [{IdempotencyKey, SerialNumber, mensagem}]}
+ */
+function registrarLote_(taps) {
+  if (!Array.isArray(taps)) {
+    return resposta("Erro: 'Taps' deve ser uma lista de batidas.");
+  }
+  var lock = LockService.getScriptLock();
+  if (!lock.tryLock(20000)) {
+    return respostaLote_(taps, ERRO_SERVIDOR_OCUPADO + ", lote não registrado. Tente novamente.");
+  }
+  try {
+    var ss = SpreadsheetApp.getActiveSpreadsheet();
+    var pratica = carregarAbaPonto_(ss, ABA_PONTO_PRATICA);
+    var teoria = carregarAbaPonto_(ss, ABA_PONTO_TEORIA);
+
+    var cache = CacheService.getScriptCache();
+    var chaves = taps.map(function (tap) {
+      return tap.IdempotencyKey ? 'idem_' + String(tap.IdempotencyKey).slice(0, 200) : null;
+    });
+    var guardadas = respostasGuardadas_(cache, chaves.filter(function (c) { return c; }));
+    var novas = {};
+
+    var mensagens = taps.map(function (tap, i) {
+      var chave = chaves[i];
+      if (chave && guardadas[chave] !== undefined) return guardadas[chave];
+      if (chave && novas[chave] !== undefined) return novas[chave];
+      var mensagem = aplicarBatida_(tap, pratica, teoria);
+      if (chave && mensagem.indexOf('Erro') !== 0) novas[chave] = mensagem;
+      return mensagem;
+    });
+
+    var desfazer = [];
+    try {
+      gravarAbaPonto_(pratica, desfazer);
+      gravarAbaPonto_(teoria, desfazer);
+      SpreadsheetApp.flush();
+      [pratica, teoria].forEach(function (estado) {
+        if (estado.novas.length || Object.keys(estado.saidas).length) marcarAbaAlterada_(estado.aba.getName());
+      });
+    } catch (err) {
+      desfazer.reverse().forEach(function (f) {
+        try { f(); } catch (e) { Logger.log('❌ Falha ao desfazer escrita do lote: ' + e); }
+      });
+      throw err;
+    }
+
+    teoria.novas.forEach(function (linha, k) {
+      try {
+        syncToFrequenciaTeoricaFromPonto_(ss, teoria.aba, teoria.ultimaLinha + 1 + k, linha[6]);
+      } catch (e) {
+        Logger.log('⚠️ Falha ao sincronizar FrequenciaTeorica: ' + e);
       }
+    });
+
+    guardarRespostas_(cache, novas);
+    return respostaLote_(taps, mensagens);
+  } catch (err) {
+    return respostaLote_(taps, "Erro: " + err.message);
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * Lê uma aba de ponto e indexa suas linhas por SerialNumber + Data.
+ * @returns {Object} Estado em memória usado por aplicarBatida_ e gravarAbaPonto_
+ */
+function carregarAbaPonto_(ss, nomeAba) {
+  var aba = ss.getSheetByName(nomeAba);
+  if (!aba) throw new Error("Aba '" + nomeAba + "' não encontrada!");
+  var dados = aba.getDataRange().getValues();
+  if (dados.length < 2) dados = [HEADERS_PONTO_PADRAO];
+
+  var header = dados[0] || [];
+  var col = {
+    id: header.indexOf('SerialNumber'),
+    data: header.indexOf('Data'),
+    saida: header.indexOf('HoraSaida')
+  };
+  if (col.id < 0 || col.data < 0) {
+    throw new Error("Colunas essenciais não encontradas na aba " + nomeAba);
+  }
+
+  var estado = { aba: aba, dados: dados, col: col, indice: {}, ultimaLinha: aba.getLastRow(),
+                 novas: [], saidas: {} };
+  for (var i = 1; i < dados.length; i++) {
+    indexarLinhaPonto_(estado, dados[i][col.id], formatarData(dados[i][col.data]),
+                       { linha: i + 1, valores: dados[i] });
+  }
+  return estado;
+}
+
+function indexarLinhaPonto_(estado, id, dataStr, entrada) {
+  var chave = String(id) + '|' + String(dataStr);
+  (estado.indice[chave] = estado.indice[chave] || []).push(entrada);
+}
+
+/**
+ * Situação de um aluno em uma aba de ponto na data: mesma regra do doPost
+ * (última linha sem HoraSaida = aberta; qualquer linha com HoraSaida = completa).
+ */
+function situacaoDoDia_(estado, id, dataStr) {
+  var situacao = { aberta: null, completa: false };
+  (estado.indice[String(id) + '|' + String(dataStr)] || []).forEach(function (entrada) {
+    var saida = estado.col.saida >= 0 ? entrada.valores[estado.col.saida] : null;
+    if (!saida) situacao.aberta = entrada;
+    else situacao.completa = true;
+  });
+  return situacao;
+}
+
+function registrarSaidaEmMemoria_(estado, entrada, horaStr) {
+  if (estado.col.saida < 0) return false;
+  // Guarda o valor original da célula (para desfazer) antes de alterá-la
+  if (entrada.linha <= estado.ultimaLinha && !(entrada.linha in estado.saidas))
+    estado.saidas[entrada.linha] = entrada.valores[estado.col.saida];
+  entrada.valores[estado.col.saida] = horaStr;
+  return true;
+}
+
+function acrescentarLinhaEmMemoria_(estado, valores) {
+  estado.novas.push(valores);
+  indexarLinhaPonto_(estado, valores[0], valores[3],
+                     { linha: estado.ultimaLinha + estado.novas.length, valores: valores });
+}
+
+/**
+ * Aplica uma batida do lote ao estado em memória das duas abas.
+ * @returns {string} Mensagem igual à do doPost para a mesma batida
+ */
+function aplicarBatida_(tap, pratica, teoria) {
+  var id = tap.SerialNumber || "";
+  var agora = instanteDoPonto_(tap);
+  var dataStr = Utilities.formatDate(agora, "America/Sao_Paulo", "dd/MM/yyyy");
+  var horaStr = Utilities.formatDate(agora, "America/Sao_Paulo", "HH:mm:ss");
+  var diaSemana = tap.SimularTerça ? 2 : agora.getDay();
+  var ehDiaTeoria = tap.IsDiaTeoria || diaSemana === 2 || diaSemana === 4;
+  var linhaNova = function (tipo) {
+    return [id, tap.EmailHC || "", tap.NomeCompleto || "Desconhecido", dataStr, horaStr, "",
+            tap.Escala || "", tipo];
+  };
+
+  var t = situacaoDoDia_(teoria, id, dataStr);
+  var p = situacaoDoDia_(pratica, id, dataStr);
+
+  if (tap.Acao === 'transicao') {
+    if (t.aberta || t.completa) return "Sem ação: entrada teórica já registrada hoje.";
+    var fechou = p.aberta !== null && registrarSaidaEmMemoria_(pratica, p.aberta, horaStr);
+    acrescentarLinhaEmMemoria_(teoria, linhaNova("Teoria"));
+    return (fechou ? "Saída prática e entrada teórica registradas: " : "Entrada teórica registrada: ") + horaStr;
+  }
+
+  if (t.completa) return "Sem ação: aluno já completou a teoria hoje.";
+  if (t.aberta) {
+    registrarSaidaEmMemoria_(teoria, t.aberta, horaStr);
+    return "Saída teórica registrada: " + horaStr;
+  }
+  if (p.completa && !ehDiaTeoria) return "Sem ação: aluno já completou a prática hoje.";
+
+  if (!p.aberta && !p.completa) {
+    if (ehDiaTeoria) {
+      acrescentarLinhaEmMemoria_(teoria, linhaNova("Teoria"));
+      return "Entrada teórica registrada: " + horaStr;
+    }
+    acrescentarLinhaEmMemoria_(pratica, linhaNova("Prática"));
+    return "Entrada prática registrada: " + horaStr;
+  }
+
+  if (p.aberta) {
+    registrarSaidaEmMemoria_(pratica, p.aberta, horaStr);
+    // Sem teoria no dia (aberta/completa já retornaram acima): abre a teoria
+    if (ehDiaTeoria) {
+      acrescentarLinhaEmMemoria_(teoria, linhaNova("Teoria"));
+      return "Saída prática e entrada teórica registradas: " + horaStr;
+    }
+    return "Saída prática registrada: " + horaStr;
+  }
+
+  return "Sem ação necessária para o ID " + id + ".";
+}
 
-      return resposta("Saída prática registrada: " + horaStr);
+/**
+ * Grava em bloco as alterações de uma aba: linhas novas em um setValues e só
+ * as células de HoraSaida alteradas (as linhas entre elas não são reescritas,
+ * preservando edições concorrentes na planilha).
+ * Cada escrita registra em `desfazer` a função que a reverte.
+ */
+function gravarAbaPonto_(estado, desfazer) {
+  var aba = estado.aba;
+  if (estado.novas.length) {
+    var inicio = estado.ultimaLinha + 1;
+    var total = estado.novas.length;
+    aba.getRange(inicio, 1, total, estado.novas[0].length).setValues(estado.novas);
+    desfazer.push(function () { aba.deleteRows(inicio, total); });
+  }
+
+  var col = estado.col.saida;
+  Object.keys(estado.saidas).map(Number).forEach(function (linha) {
+    var celula = aba.getRange(linha, col + 1);
+    var original = estado.saidas[linha];
+    celula.setValue(estado.dados[linha - 1][col]);
+    desfazer.push(function () { celula.setValue(original); });
+  });
+}
+
+/**
+ * Resposta JSON de um lote. `mensagens` é uma lista (uma por batida) ou uma
+ * única mensagem aplicada a todas (ex.: erro do lote inteiro).
+ */
+function respostaLote_(taps, mensagens) {
+  var resultados = taps.map(function (tap, i) {
+    return {
+      IdempotencyKey: tap.IdempotencyKey || null,
+      SerialNumber: tap.SerialNumber || "",
+      mensagem: Array.isArray(mensagens) ? mensagens[i] : mensagens
+    };
+  });
+  return ContentService.createTextOutput(JSON.stringify({ resultados: resultados }))
+    .setMimeType(ContentService.MimeType.JSON);
+}
+
+/**
+ * Aplica a transição Prática→Teoria de um aluno como uma única operação:
+ * fecha a prática aberta do dia (se houver) e abre a teoria. Roda sob o lock
+ * do script (ver comIdempotencia_), sem intercalar com outra batida. Se a
+ * entrada teórica não puder ser gravada, a saída prática é desfeita — o
+ * aluno nunca fica pela metade.
+ * Reenvios são idempotentes: com teoria já registrada hoje, nada é alterado.
+ * @param {Object} data - Payload do SistemaPonto.py (Acao: 'transicao')
+ * @returns {TextOutput} Mensagem no mesmo formato do doPost
+ */
+function registrarTransicao_(data) {
+  var id = data.SerialNumber || "";
+  var nome = data.NomeCompleto || "Desconhecido";
+  var email = data.EmailHC || "";
+  var escala = data.Escala || "";
+
+  try {
+    var ss = SpreadsheetApp.getActiveSpreadsheet();
+    var abaPratica = ss.getSheetByName(ABA_PONTO_PRATICA);
+    var abaTeoria = ss.getSheetByName(ABA_PONTO_TEORIA);
+    if (!abaPratica || !abaTeoria)
+      throw new Error("Abas '" + ABA_PONTO_PRATICA + "' ou '" + ABA_PONTO_TEORIA + "' não encontradas!");
+
+    var agora = instanteDoPonto_(data);
+    var dataStr = Utilities.formatDate(agora, "America/Sao_Paulo", "dd/MM/yyyy");
+    var horaStr = Utilities.formatDate(agora, "America/Sao_Paulo", "HH:mm:ss");
+
+    var teoria = localizarPontoDoDia_(abaTeoria, id, dataStr);
+    var pratica = localizarPontoDoDia_(abaPratica, id, dataStr);
+    if (!teoria || !pratica) {
+      return resposta("Erro: Colunas essenciais não encontradas nas abas de ponto");
+    }
+    if (teoria.aberta || teoria.completa) {
+      return resposta("Sem ação: entrada teórica já registrada hoje.");
     }
 
-    return resposta("Sem ação necessária para o ID " + id + ".");
+    var celulaSaida = null;
+    if (pratica.aberta && pratica.colSaida >= 0) {
+      celulaSaida = abaPratica.getRange(pratica.aberta, pratica.colSaida + 1);
+      celulaSaida.setValue(horaStr);
+    }
+    try {
+      abaTeoria.appendRow([id, email, nome, dataStr, horaStr, "", escala, "Teoria"]);
+    } catch (err) {
+      if (celulaSaida) celulaSaida.setValue("");
+      throw err;
+    }
+    SpreadsheetApp.flush();
+    syncToFrequenciaTeoricaFromPonto_(ss, abaTeoria, abaTeoria.getLastRow(), escala);
 
+    return resposta((celulaSaida ? "Saída prática e entrada teórica registradas: "
+                                 : "Entrada teórica registrada: ") + horaStr);
   } catch (err) {
     return resposta("Erro: " + err.message);
   }
 }
 
+/**
+ * Localiza as linhas de um aluno em uma aba de ponto na data informada.
+ * @returns {Object|null} {aberta: nº da linha sem HoraSaida ou null, completa, colSaida}
+ *                        ou null se faltarem as colunas SerialNumber/Data
+ */
+function localizarPontoDoDia_(aba, id, dataStr) {
+  var dados = aba.getDataRange().getValues();
+  if (dados.length < 2) dados = [HEADERS_PONTO_PADRAO];
+  var header = dados[0] || [];
+  var colId = header.indexOf('SerialNumber');
+  var colData = header.indexOf('Data');
+  var colSaida = header.indexOf('HoraSaida');
+  if (colId < 0 || colData < 0) return null;
+
+  var resultado = { aberta: null, completa: false, colSaida: colSaida };
+  for (var i = 1; i < dados.length; i++) {
+    if (String(dados[i][colId]) !== String(id)) continue;
+    if (String(formatarData(dados[i][colData])) !== String(dataStr)) continue;
+    var saida = colSaida >= 0 ? dados[i][colSaida] : null;
+    if (!saida) resultado.aberta = i + 1;
+    else resultado.completa = true;
+  }
+  return resultado;
+}
+
 /**
  * Formata data (Date object ou número para DD/MM/YYYY).
  * Trata Date objects, números (timestamps) e strings.
@@ -955,6 +1466,78 @@ function formatarData(valor) {
   return valor;
 }
 
+/**
+ * Carimbo de última alteração de uma aba (ultimaAtualizacao do doGet ?aba=).
+ * Só lê ScriptProperties: quem grava na aba avança o carimbo com
+ * marcarAbaAlterada_, então a leitura não precisa reler nem resumir os valores.
+ * @param {string} nomeAba - Nome da aba
+ * @returns {string} Data ISO da última alteração registrada
+ */
+function carimboDaAba_(nomeAba) {
+  var salvo = PropertiesService.getScriptProperties().getProperty('carimbo_' + nomeAba);
+  if (salvo && salvo.charAt(0) === '{') salvo = JSON.parse(salvo).em; // formato anterior {digest, em}
+  return salvo || marcarAbaAlterada_(nomeAba);
+}
+
+/**
+ * Registra que a aba foi gravada (doPost, lote, onEdit/onChange, sincronização
+ * das escalas): avança o carimbo lido por carimboDaAba_.
+ * @param {string} nomeAba - Nome da aba alterada
+ * @returns {string} Novo carimbo (data ISO)
+ */
+function marcarAbaAlterada_(nomeAba) {
+  var em = new Date().toISOString();
+  PropertiesService.getScriptProperties().setProperty('carimbo_' + nomeAba, em);
+  return em;
+}
+
+/**
+ * Lista as batidas de ponto (uma por entrada/saída) de PontoPratica e PontoTeoria em uma data.
+ * @param {string} dataIso - Data no formato YYYY-MM-DD (padrão: hoje)
+ * @param {string} serial - SerialNumber para filtrar (opcional; vazio = todos os alunos)
+ * @returns {Array} [{SerialNumber, Data, Hora, TipoRegistro, Modalidade}]
+ */
+function listarPontosDoDia_(dataIso, serial) {
+  var ss = SpreadsheetApp.getActiveSpreadsheet();
+  var dataStr = dataIso
+    ? String(dataIso).split('-').reverse().join('/')
+    : Utilities.formatDate(new Date(), "America/Sao_Paulo", "dd/MM/yyyy");
+  var abas = [[ABA_PONTO_PRATICA, 'Prática'], [ABA_PONTO_TEORIA, 'Teoria']];
+  var pontos = [];
+
+  for (var a = 0; a < abas.length; a++) {
+    var aba = ss.getSheetByName(abas[a][0]);
+    if (!aba) continue;
+    var dados = aba.getDataRange().getValues();
+    if (dados.length < 2) continue;
+
+    var header = dados[0];
+    var colId = header.indexOf('SerialNumber');
+    var colData = header.indexOf('Data');
+    var colEntrada = header.indexOf('HoraEntrada');
+    var colSaida = header.indexOf('HoraSaida');
+    if (colId < 0 || colData < 0) continue;
+
+    for (var i = 1; i < dados.length; i++) {
+      var linhaId = String(dados[i][colId]);
+      if (serial && linhaId !== String(serial)) continue;
+      if (String(formatarData(dados[i][colData])) !== dataStr) continue;
+
+      var entrada = colEntrada >= 0 ? dados[i][colEntrada] : '';
+      var saida = colSaida >= 0 ? dados[i][colSaida] : '';
+      if (entrada) {
+        pontos.push({ SerialNumber: linhaId, Data: dataStr, Hora: formatTimeForComparison_(entrada),
+                      TipoRegistro: 'Entrada', Modalidade: abas[a][1] });
+      }
+      if (saida) {
+        pontos.push({ SerialNumber: linhaId, Data: dataStr, Hora: formatTimeForComparison_(saida),
+                      TipoRegistro: 'Saída', Modalidade: abas[a][1] });
+      }
+    }
+  }
+  return pontos;
+}
+
 /**
  * Retorna resposta em texto simples.
  */
@@ -1054,6 +1637,7 @@ function registrarAusencia(data) {
   });
   
   aba.appendRow(registro);
+  marcarAbaAlterada_(ABA_AUSENCIAS);
   
   Logger.log('✅ Ausência registrada: ' + data.NomeCompleto + ' - ' + data.DataAusencia);
   
@@ -1100,6 +1684,7 @@ function registrarReposicao(data) {
   });
   
   aba.appendRow(registro);
+  marcarAbaAlterada_(ABA_REPOSICOES);
   
   Logger.log('✅ Reposição registrada: ' + data.NomeCompleto + ' - ' + data.DataReposicao);
   
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+ConformidadeEscala.py
+
+Índice pré-calculado das 24 abas de escala (EscalaPratica1..12 e
+EscalaTeoria1..12) cruzado com as batidas de PontoPratica/PontoTeoria.
+
+As abas de escala são largas, uma coluna por data: "10_03_25" nas de prática
+e "11_03" (sem ano) nas de teoria. O índice normaliza todas em
+(aluno, data, modalidade) → turno (valor da célula, tipo, início e fim
+previstos, unidade) e guarda em SQLite, com um hash por aba: quando só uma
+aba muda, só ela é reconstruída.
+
+Com o índice, uma passada pelas batidas responde, para a turma inteira:
+  - escalado e ausente   (turno previsto sem batida no dia)
+  - presente sem escala  (batida num dia sem turno, ou de folga)
+  - atraso               (entrada depois do início previsto + tolerância)
+
+As regras seguem o painel (script.js): Folga/descanso não é dia de escala na
+prática; na teoria todos os alunos da aba estão escalados em todas as datas,
+com início fixo às 18:00; a tolerância é de 10 minutos.
+
+Uso:
+  python ConformidadeEscala.py                                   # endpoint do config_ponto.json
+  python ConformidadeEscala.py ../BancoDeDadosTeste.json --desde 2025-03-10 --ate 2025-03-31
+  python ConformidadeEscala.py snapshot.json --escala 3 --so atrasos --csv atrasos.csv
+  python ConformidadeEscala.py http://.../exec --aba EscalaPratica3    # reconstrói só essa aba
+"""
+
+import re
+import sys
+import csv
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import unicodedata
+from collections import Counter
+from datetime import datetime, date
+from pathlib import Path
+
+from SnapshotStream import FluxoSnapshot, data_iso_do_valor, FUSO
+from AnalisePonto import segundos_do_valor, buscar_aba
+
+ABAS_ESCALA = {**{f"EscalaPratica{n}": ("Prática", n) for n in range(1, 13)},
+               **{f"EscalaTeoria{n}": ("Teoria", n) for n in range(1, 13)}}
+ABAS_PONTO = {"PontoPratica": "Prática", "PontoTeoria": "Teoria"}
+ABA_ALUNOS = "Alunos"
+
+INDICE_PADRAO = "dados/indice_escalas.db"
+TOLERANCIA_MINUTOS = 10            # ATRASO_THRESHOLD_MINUTES / TEORIA_TOLERANCE_MINUTES do painel
+INICIO_TEORIA_MINUTOS = 18 * 60    # TEORIA_FIXED_START_MINUTES
+
+# Tipos de turno que contam como "escalado" (folga e célula vazia não contam)
+TIPOS_ESCALADO = ("presenca", "plantao", "noturno", "aula", "reposicao", "ausencia")
+
+_CABECALHO_DATA = re.compile(r"^(\d{1,2})_(\d{1,2})(?:_(\d{2}|\d{4}))?$")
+_HORARIO_COMPLETO = re.compile(r"(\d{1,2}):(\d{2})(?::\d{2})?\s*(?:às|as|a|-)\s*(\d{1,2}):(\d{2})(?::\d{2})?",
+                               re.IGNORECASE)
+_HORARIO_LEGADO = re.compile(r"(\d{1,2})h\s*(?:às|as|a)?\s*(\d{1,2})h", re.IGNORECASE)
+
+
+# ========== NORMALIZAÇÃO ==========
+
+def normalizar_texto(valor):
+    """Minúsculas, sem acentos e com espaços simples (normalizeString do painel)."""
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.lower().split())
+
+def identificadores(serial, email, nome):
+    """Identificadores de um aluno, do mais para o menos confiável."""
+    ids = []
+    if email and str(email).strip():
+        ids.append("email:" + str(email).strip().lower())
+    if serial not in (None, "") and str(serial).strip():
+        ids.append("serial:" + str(serial).strip())
+    if nome and normalizar_texto(nome):
+        ids.append("nome:" + normalizar_texto(nome))
+    return ids
+
+def chave_aluno(serial, email, nome):
+    """Chave do aluno no índice: o EmailHC; sem ele, o crachá; sem ambos, o nome."""
+    ids = identificadores(serial, email, nome)
+    return ids[0] if ids else None
+
+def anos_por_mes(abas):
+    """
+    {mês: ano} tirado dos cabeçalhos com ano ("10_03_25") das abas de prática,
+    usado para datar as colunas "dd_mm" da teoria. Em cada mês vale o ano mais
+    frequente.
+    """
+    contagem = {}
+    for aba, registros in abas.items():
+        if ABAS_ESCALA.get(aba, ("",))[0] != "Prática" or not registros:
+            continue
+        for cabecalho in registros[0]:
+            m = _CABECALHO_DATA.match(str(cabecalho).strip())
+            if m and m.group(3):
+                ano = int(m.group(3))
+                contagem.setdefault(int(m.group(2)), Counter())[ano + 2000 if ano < 100 else ano] += 1
+    return {mes: c.most_common(1)[0][0] for mes, c in sorted(contagem.items())}
+
+def _ano_inferido(mes, anos):
+    """Ano de uma coluna "dd_mm" cujo mês não aparece na prática."""
+    if not anos:
+        # Sem referência na prática: a regra do painel (inferYearFromDayMonth)
+        hoje = datetime.now(FUSO).date()
+        if hoje.month <= 2 and mes >= 10:
+            return hoje.year - 1
+        if hoje.month >= 10 and mes <= 2:
+            return hoje.year + 1
+        return hoje.year
+    # O ano que deixa o mês mais perto do período das escalas
+    periodo = [ano * 12 + m for m, ano in anos.items()]
+    candidatos = {ano + d for ano in anos.values() for d in (-1, 0, 1)}
+    return min(sorted(candidatos), key=lambda ano: min(abs(ano * 12 + mes - p) for p in periodo))
+
+def data_da_coluna(cabecalho, anos):
+    """Data ISO de um cabeçalho "dd_mm_aa" ou "dd_mm" (None se não for coluna de data)."""
+    m = _CABECALHO_DATA.match(str(cabecalho).strip())
+    if not m:
+        return None
+    dia, mes = int(m.group(1)), int(m.group(2))
+    if m.group(3):
+        ano = int(m.group(3))
+        ano = ano + 2000 if ano < 100 else ano
+    else:
+        ano = anos.get(mes) or _ano_inferido(mes, anos)
+    try:
+        return date(ano, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+def _horario(valor):
+    """(início, fim) em minutos de um texto "08h às 13h" / "07:00:00 às 12:00:00", ou (None, None)."""
+    m = _HORARIO_COMPLETO.search(valor)
+    if m:
+        h1, m1, h2, m2 = (int(g) for g in m.groups())
+        if h1 < 24 and h2 < 24 and m1 < 60 and m2 < 60:
+            return h1 * 60 + m1, h2 * 60 + m2
+        return None, None
+    m = _HORARIO_LEGADO.search(valor)
+    if m:
+        h1, h2 = int(m.group(1)), int(m.group(2))
+        if h1 < 24 and h2 < 24:
+            return h1 * 60, h2 * 60
+    return None, None
+
+def classificar_turno(valor, modalidade):
+    """
+    (tipo, início, fim) de uma célula de escala, com as regras do painel
+    (_esc_normalizeStatusKey): ausencia, reposicao, folga, aula, noturno,
+    plantao, presenca ou vazio. Na teoria toda célula é aula às 18:00,
+    inclusive vazia ou de folga; só ausência e reposição são mantidas.
+    """
+    texto = str(valor).strip() if valor is not None else ""
+    s = normalizar_texto(texto)
+    inicio, fim = _horario(texto) if texto else (None, None)
+    if "ausencia" in s or "falta" in s:
+        tipo = "ausencia"
+    elif "reposi" in s:
+        tipo = "reposicao"
+    elif modalidade == "Teoria":
+        tipo = "aula"
+    elif not s:
+        tipo = "vazio"
+    elif "folga" in s or "descanso" in s:
+        tipo = "folga"
+    elif "aula" in s or "hcx" in s or "inicial" in s:
+        tipo = "aula"
+    elif s == "n" or s.startswith(("n ", "n-")) or "noite" in s or "noturno" in s:
+        tipo = "noturno"
+    elif "plantao" in s:
+        tipo = "plantao"
+    else:
+        tipo = "presenca"
+    if modalidade == "Teoria":
+        inicio = INICIO_TEORIA_MINUTOS
+    return tipo, inicio, fim
+
+def turnos_da_aba(aba, registros, anos):
+    """
+    Linhas do índice de uma aba de escala: (chave, data, modalidade, escala,
+    nome, unidade, tipo, início, fim, valor). Células vazias da prática não
+    geram turno.
+    """
+    modalidade, numero = ABAS_ESCALA[aba]
+    datas = {}
+    for registro in registros:
+        for cabecalho in registro:
+            if cabecalho not in datas:
+                datas[cabecalho] = data_da_coluna(cabecalho, anos)
+        chave = chave_aluno(registro.get("SerialNumber"), registro.get("EmailHC"), registro.get("NomeCompleto"))
+        if not chave:
+            continue
+        nome = str(registro.get("NomeCompleto") or "").strip()
+        unidade = str(registro.get("Unidade") or "").strip()
+        for cabecalho, valor in registro.items():
+            data_iso = datas[cabecalho]
+            if not data_iso:
+                continue
+            tipo, inicio, fim = classificar_turno(valor, modalidade)
+            if tipo == "vazio":
+                continue
+            yield (chave, data_iso, modalidade, numero, nome, unidade, tipo, inicio, fim,
+                   "" if valor is None else str(valor).strip())
+
+def _hash_aba(registros):
+    """Hash do conteúdo de uma aba, sem os _rowIndex (linhas só deslocadas não reconstroem)."""
+    texto = json.dumps([{k: v for k, v in r.items() if k != "_rowIndex"} for r in registros],
+                       sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+
+
+# ========== ÍNDICE (SQLite) ==========
+
+class IndiceEscalas:
+    """
+    As abas de escala normalizadas em SQLite.
+
+      turnos       - (aba, chave, data) → modalidade, escala, nome, unidade,
+                     tipo, início/fim previstos (minutos) e o valor da célula;
+                     indexado por (chave, data) e por data
+      identidades  - e-mail, crachá e nome → chave do aluno (escalas e Alunos)
+      abas         - hash e total de linhas de cada aba indexada
+      meta         - {mês: ano} usado para datar as colunas da teoria
+
+    atualizar() compara o hash de cada aba lida com o guardado e reconstrói
+    só as que mudaram (todas as de teoria, se o {mês: ano} mudar).
+    """
+
+    def __init__(self, caminho=INDICE_PADRAO):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.caminho), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS turnos (
+                aba TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                data TEXT NOT NULL,
+                modalidade TEXT NOT NULL,
+                escala INTEGER NOT NULL,
+                nome TEXT NOT NULL,
+                unidade TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                inicio INTEGER,
+                fim INTEGER,
+                valor TEXT NOT NULL,
+                PRIMARY KEY (aba, chave, data)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_turnos_aluno ON turnos(chave, data);
+            CREATE INDEX IF NOT EXISTS idx_turnos_data ON turnos(data);
+            CREATE TABLE IF NOT EXISTS identidades (
+                aba TEXT NOT NULL,
+                identificador TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                PRIMARY KEY (aba, identificador)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_identidades ON identidades(identificador);
+            CREATE TABLE IF NOT EXISTS abas (
+                aba TEXT PRIMARY KEY,
+                hash BLOB NOT NULL,
+                linhas INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL
+            );
+        """)
+
+    def fechar(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def abas(self):
+        return [r[0] for r in self._conn.execute("SELECT aba FROM abas ORDER BY aba")]
+
+    def _anos_guardados(self):
+        r = self._conn.execute("SELECT valor FROM meta WHERE chave = 'anos_por_mes'").fetchone()
+        return {int(m): a for m, a in json.loads(r[0]).items()} if r else None
+
+    def _reconstruir(self, aba, registros, anos):
+        conn = self._conn
+        conn.execute("DELETE FROM turnos WHERE aba = ?", (aba,))
+        conn.execute("DELETE FROM identidades WHERE aba = ?", (aba,))
+        if aba in ABAS_ESCALA:
+            conn.executemany("INSERT OR REPLACE INTO turnos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             ((aba,) + t for t in turnos_da_aba(aba, registros, anos)))
+        identidades = {}
+        for r in registros:
+            ids = identificadores(r.get("SerialNumber"), r.get("EmailHC"), r.get("NomeCompleto"))
+            for identificador in ids:
+                identidades[identificador] = ids[0]
+        conn.executemany("INSERT INTO identidades VALUES (?, ?, ?)",
+                         ((aba, i, c) for i, c in identidades.items()))
+        conn.execute("INSERT OR REPLACE INTO abas (aba, hash, linhas) VALUES (?, ?, ?)",
+                     (aba, _hash_aba(registros), len(registros)))
+
+    def atualizar(self, abas, completo=True):
+        """
+        Atualiza o índice com {aba: registros} (abas de escala e Alunos).
+        completo=True quando `abas` traz todas as abas da planilha: as que
+        sumiram saem do índice. Retorna {"reconstruidas", "inalteradas", "removidas"}.
+        """
+        abas = {aba: regs for aba, regs in abas.items() if aba in ABAS_ESCALA or aba == ABA_ALUNOS}
+        guardados = dict(self._conn.execute("SELECT aba, hash FROM abas"))
+        # O {mês: ano} só é recalculado com a planilha inteira em mãos; numa
+        # leitura parcial (--aba) vale o guardado
+        anos = self._anos_guardados()
+        novos_anos = anos_por_mes(abas) if completo or anos is None else anos
+        refazer_teoria = anos is not None and novos_anos != anos
+
+        resumo = {"reconstruidas": [], "inalteradas": 0, "removidas": []}
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if novos_anos != anos:
+                conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('anos_por_mes', ?)",
+                             (json.dumps(novos_anos),))
+            for aba, registros in abas.items():
+                eh_teoria = ABAS_ESCALA.get(aba, ("",))[0] == "Teoria"
+                if guardados.get(aba) == _hash_aba(registros) and not (eh_teoria and refazer_teoria):
+                    resumo["inalteradas"] += 1
+                    continue
+                self._reconstruir(aba, registros, novos_anos)
+                resumo["reconstruidas"].append(aba)
+            if completo:
+                for aba in guardados:
+                    if aba not in abas:
+                        conn.execute("DELETE FROM turnos WHERE aba = ?", (aba,))
+                        conn.execute("DELETE FROM identidades WHERE aba = ?", (aba,))
+                        conn.execute("DELETE FROM abas WHERE aba = ?", (aba,))
+                        resumo["removidas"].append(aba)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return resumo
+
+    def identidades(self):
+        """{identificador: chave do aluno} de todas as abas indexadas."""
+        return dict(self._conn.execute("SELECT identificador, chave FROM identidades ORDER BY aba"))
+
+    def resolver(self, serial, email, nome, identidades=None):
+        """Chave do aluno de uma batida: o 1º identificador conhecido no índice."""
+        identidades = self.identidades() if identidades is None else identidades
+        ids = identificadores(serial, email, nome)
+        for identificador in ids:
+            if identificador in identidades:
+                return identidades[identificador]
+        return ids[0] if ids else None
+
+    def turnos_do_aluno(self, chave, desde=None, ate=None):
+        """Turnos de um aluno, por data (usa o índice (chave, data))."""
+        consulta = "SELECT data, modalidade, escala, aba, tipo, inicio, fim, unidade, valor FROM turnos WHERE chave = ?"
+        parametros = [chave]
+        if desde:
+            consulta += " AND data >= ?"
+            parametros.append(str(desde))
+        if ate:
+            consulta += " AND data <= ?"
+            parametros.append(str(ate))
+        campos = ("data", "modalidade", "escala", "aba", "tipo", "inicio", "fim", "unidade", "valor")
+        return [dict(zip(campos, r)) for r in self._conn.execute(consulta + " ORDER BY data, modalidade", parametros)]
+
+    def turnos(self, desde=None, ate=None, escala=None, modalidade=None):
+        """
+        {(chave, data, modalidade): turno} no período. Se o aluno aparece em
+        mais de uma aba no mesmo dia, vale o turno escalado.
+        """
+        consulta = ("SELECT chave, data, modalidade, escala, aba, nome, unidade, tipo, inicio, fim, valor "
+                    "FROM turnos WHERE 1 = 1")
+        parametros = []
+        for condicao, valor in (("data >= ?", desde), ("data <= ?", ate), ("escala = ?", escala),
+                                ("modalidade = ?", modalidade)):
+            if valor is not None:
+                consulta += f" AND {condicao}"
+                parametros.append(str(valor) if isinstance(valor, date) else valor)
+        resultado = {}
+        campos = ("chave", "data", "modalidade", "escala", "aba", "nome", "unidade", "tipo", "inicio", "fim", "valor")
+        for r in self._conn.execute(consulta, parametros):
+            turno = dict(zip(campos, r))
+            k = (turno["chave"], turno["data"], turno["modalidade"])
+            if k not in resultado or (turno["tipo"] in TIPOS_ESCALADO and resultado[k]["tipo"] not in TIPOS_ESCALADO):
+                resultado[k] = turno
+        return resultado
+
+
+# ========== FONTES ==========
+
+def ler_fonte(fonte, abas_escala=None):
+    """
+    ({aba: registros} das escalas e de Alunos, [registros de ponto com "_aba"])
+    numa leitura só. `abas_escala` limita as abas de escala lidas (com a URL
+    do endpoint, cada aba vem do doGet?aba=).
+    """
+    escalas = set(abas_escala) if abas_escala else set(ABAS_ESCALA)
+    desejadas = escalas | {ABA_ALUNOS} | set(ABAS_PONTO)
+    lidas = {}
+    if fonte.startswith(("http://", "https://")) and abas_escala:
+        for aba in sorted(desejadas):
+            lidas[aba] = buscar_aba(fonte, aba)
+    else:
+        for aba, registro in FluxoSnapshot(fonte, abas=desejadas):
+            lidas.setdefault(aba, []).append(registro)
+    pontos = []
+    for aba in ABAS_PONTO:
+        for registro in lidas.pop(aba, []):
+            registro["_aba"] = aba
+            pontos.append(registro)
+    return lidas, pontos
+
+
+# ========== CONFORMIDADE ==========
+
+def _numero_escala(valor):
+    """Número da escala de uma batida ("3", "Escala 3" → 3; None se não houver)."""
+    digitos = re.sub(r"\D", "", str(valor or ""))
+    return int(digitos) if digitos else None
+
+def _hhmm(minutos):
+    return "" if minutos is None else f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+def conformidade(indice, pontos, desde=None, ate=None, escala=None, modalidade=None,
+                 tolerancia=TOLERANCIA_MINUTOS):
+    """
+    Cruza as batidas com o índice numa passada:
+      {"ausentes": [...], "sem_escala": [...], "atrasos": [...]}
+    `ate` (padrão: hoje) limita também as ausências, para não acusar dias futuros.
+    """
+    ate = str(ate or datetime.now(FUSO).date().isoformat())
+    desde = str(desde) if desde else None
+    turnos = indice.turnos(desde, ate, escala, modalidade)
+    identidades = indice.identidades()
+
+    # 1ª entrada de cada (aluno, dia, modalidade)
+    presencas = {}
+    for p in pontos:
+        data_iso = data_iso_do_valor(p.get("Data"))
+        mod = ABAS_PONTO.get(p.get("_aba"))
+        if not data_iso or not mod or data_iso > ate or (desde and data_iso < desde):
+            continue
+        if modalidade and mod != modalidade:
+            continue
+        chave = indice.resolver(p.get("SerialNumber"), p.get("EmailHC"), p.get("NomeCompleto"), identidades)
+        if not chave:
+            continue
+        segundos = segundos_do_valor(p.get("HoraEntrada"))
+        entrada = segundos // 60 if segundos >= 0 else None
+        k = (chave, data_iso, mod)
+        anterior = presencas.get(k)
+        if anterior is None or (entrada is not None and (anterior["entrada"] is None or entrada < anterior["entrada"])):
+            presencas[k] = {"entrada": entrada, "nome": str(p.get("NomeCompleto") or "").strip(),
+                            "escala": _numero_escala(p.get("Escala"))}
+
+    ausentes, sem_escala, atrasos = [], [], []
+    for (chave, data_iso, mod), presenca in presencas.items():
+        turno = turnos.get((chave, data_iso, mod))
+        if turno is None or turno["tipo"] not in TIPOS_ESCALADO:
+            if escala is not None and turno is None and presenca["escala"] != escala:
+                continue
+            sem_escala.append({"data": data_iso, "modalidade": mod, "aluno": chave,
+                               "nome": (turno or {}).get("nome") or presenca["nome"],
+                               "escala": (turno or {}).get("escala") or presenca["escala"],
+                               "entrada": _hhmm(presenca["entrada"]),
+                               "situacao": "folga" if turno else "sem escala"})
+            continue
+        if turno["inicio"] is not None and presenca["entrada"] is not None:
+            minutos = presenca["entrada"] - turno["inicio"]
+            if minutos > tolerancia:
+                atrasos.append({"data": data_iso, "modalidade": mod, "aluno": chave, "nome": turno["nome"],
+                                "escala": turno["escala"], "unidade": turno["unidade"],
+                                "previsto": _hhmm(turno["inicio"]), "entrada": _hhmm(presenca["entrada"]),
+                                "minutos": minutos})
+    for (chave, data_iso, mod), turno in turnos.items():
+        if turno["tipo"] in TIPOS_ESCALADO and (chave, data_iso, mod) not in presencas:
+            ausentes.append({"data": data_iso, "modalidade": mod, "aluno": chave, "nome": turno["nome"],
+                             "escala": turno["escala"], "unidade": turno["unidade"],
+                             "turno": turno["valor"] or turno["tipo"], "tipo": turno["tipo"]})
+
+    ordem = lambda l: (l["data"], l["modalidade"], normalizar_texto(l["nome"]), l["aluno"])
+    return {"ausentes": sorted(ausentes, key=ordem), "sem_escala": sorted(sem_escala, key=ordem),
+            "atrasos": sorted(atrasos, key=ordem)}
+
+
+# ========== SAÍDA ==========
+
+TITULOS = {
+    "ausentes": ("🚫", "Escalado e ausente"),
+    "sem_escala": ("❔", "Presente sem escala"),
+    "atrasos": ("⏰", "Atraso"),
+}
+
+def _detalhe(categoria, l):
+    if categoria == "ausentes":
+        return f"{l['turno']}" + (f" · {l['unidade']}" if l["unidade"] else "")
+    if categoria == "sem_escala":
+        return f"entrada {l['entrada'] or '-'} ({l['situacao']})"
+    return f"previsto {l['previsto']}, entrada {l['entrada']} (+{l['minutos']} min)"
+
+def imprimir_resultado(resultado, categorias):
+    for categoria in categorias:
+        emoji, titulo = TITULOS[categoria]
+        linhas = resultado[categoria]
+        print(f"\n{emoji} {titulo}: {len(linhas)}\n")
+        for l in linhas:
+            print(f"  {l['data']}  {l['modalidade']:<8} E{l['escala'] or '-':<3} "
+                  f"{(l['nome'] or l['aluno'])[:36]:<36} {_detalhe(categoria, l)}")
+    print()
+
+
+# ========== MAIN ==========
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Escala × ponto: escalados ausentes, presentes sem escala e atrasos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("fonte", nargs="?",
+                        help="URL do endpoint, snapshot JSON ou arquivo colunar (padrão: endpoint do config_ponto.json)")
+    parser.add_argument("--indice", default=INDICE_PADRAO, help=f"Banco do índice (padrão: {INDICE_PADRAO})")
+    parser.add_argument("--aba", action="append", choices=sorted(ABAS_ESCALA, key=ABAS_ESCALA.get),
+                        metavar="ABA", help="Relê só esta aba de escala (pode repetir); as demais vêm do índice")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primeiro dia (YYYY-MM-DD)")
+    parser.add_argument("--ate", type=date.fromisoformat, help="Último dia (YYYY-MM-DD, padrão: hoje)")
+    parser.add_argument("--escala", type=int, help="Só esta escala (1 a 12)")
+    parser.add_argument("--modalidade", choices=("pratica", "teoria"), help="Só prática ou só teoria")
+    parser.add_argument("--tolerancia", type=int, default=TOLERANCIA_MINUTOS,
+                        help=f"Minutos de tolerância para atraso (padrão: {TOLERANCIA_MINUTOS})")
+    parser.add_argument("--so", choices=("ausentes", "sem-escala", "atrasos"), help="Só uma das listas")
+    parser.add_argument("--csv", metavar="ARQUIVO", help="Grava as listas em CSV (uma linha por ocorrência)")
+    parser.add_argument("--json", action="store_true", help="Imprime as listas em JSON")
+    args = parser.parse_args()
+
+    fonte = args.fonte
+    if not fonte:
+        from SistemaPonto import load_config
+        fonte = load_config().get("endpoint")
+        if not fonte:
+            print("❌ Informe a fonte (URL, snapshot ou arquivo colunar) ou configure o endpoint.")
+            sys.exit(1)
+
+    inicio = time.perf_counter()
+    try:
+        abas, pontos = ler_fonte(fonte, args.aba)
+    except (OSError, ValueError) as e:
+        print(f"❌ Não foi possível ler {fonte}: {e}")
+        sys.exit(1)
+    lido = time.perf_counter()
+
+    modalidade = {"pratica": "Prática", "teoria": "Teoria", None: None}[args.modalidade]
+    with IndiceEscalas(args.indice) as indice:
+        resumo = indice.atualizar(abas, completo=not args.aba)
+        indexado = time.perf_counter()
+        resultado = conformidade(indice, pontos, args.desde, args.ate, args.escala, modalidade, args.tolerancia)
+    fim = time.perf_counter()
+
+    categorias = [args.so.replace("-", "_")] if args.so else list(TITULOS)
+    if args.csv:
+        campos = ["categoria", "data", "modalidade", "escala", "aluno", "nome", "unidade", "turno", "tipo",
+                  "previsto", "entrada", "minutos", "situacao"]
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=campos, extrasaction="ignore")
+            escritor.writeheader()
+            total = 0
+            for categoria in categorias:
+                for l in resultado[categoria]:
+                    escritor.writerow({"categoria": categoria, **l})
+                    total += 1
+        print(f"✅ {total} linha(s) gravada(s) em {args.csv}")
+    elif args.json:
+        print(json.dumps({c: resultado[c] for c in categorias}, ensure_ascii=False, indent=2))
+    else:
+        reconstruidas = resumo["reconstruidas"]
+        print(f"\n📅 Índice {args.indice}: {len(reconstruidas)} aba(s) reconstruída(s)"
+              f"{' (' + ', '.join(reconstruidas) + ')' if 0 < len(reconstruidas) <= 4 else ''}, "
+              f"{resumo['inalteradas']} inalterada(s)"
+              + (f", {len(resumo['removidas'])} removida(s)" if resumo["removidas"] else ""))
+        print(f"   {len(pontos)} batida(s) · leitura {(lido - inicio) * 1000:.0f} ms · "
+              f"índice {(indexado - lido) * 1000:.0f} ms · cruzamento {(fim - indexado) * 1000:.0f} ms")
+        imprimir_resultado(resultado, categorias)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+EmuladorAppsScript.py
+
+Servidor local com o mesmo contrato do scripts/Code.gs (doGet/doPost), com a
+planilha guardada em SQLite. Serve de alvo para testes de vazão e de backend
+offline do SistemaPonto.py, sem tocar na planilha de produção.
+
+Cobre:
+  - doGet sem parâmetros   → snapshot de todas as abas ({cache, metadados})
+  - doGet ?aba=<nome>      → registros da aba (com ?desde= / naoModificado)
+  - doGet ?action=getPontos&data=YYYY-MM-DD[&serial=...]
+  - doGet ?action=ping / ?action=capacidades
+  - doPost de ponto        → máquina de estados entrada/saída de PontoPratica e
+                             PontoTeoria, transição (Acao "transicao"), lote
+                             (Acao "lote") e IdempotencyKey
+  - doPost de ausência/reposição (tipo "ausencia" / "reposicao")
+
+As abas PontoPratica/PontoTeoria ficam numa tabela indexada por
+(SerialNumber, Data); as demais abas guardam as linhas como JSON. Datas e
+horas do ponto são gravadas como texto (dd/MM/yyyy, HH:mm:ss), como o Code.gs
+as escreve. Os gatilhos da planilha (onEdit, FrequenciaTeorica) não são
+emulados.
+
+Uso:
+  python EmuladorAppsScript.py --semear ../BancoDeDadosTeste.json
+  python EmuladorAppsScript.py --porta 8790 --banco dados/emulador_apps_script.db
+  python SistemaPonto.py --endpoint http://127.0.0.1:8790/exec
+"""
+
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+import unicodedata
+import urllib.parse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from zoneinfo import ZoneInfo
+    FUSO = ZoneInfo("America/Sao_Paulo")
+except Exception:
+    FUSO = None  # usa o fuso local da máquina
+
+# ========== CONTRATO DO CODE.GS ==========
+ABA_AUSENCIAS = "Ausencias"
+ABA_REPOSICOES = "Reposicoes"
+ABA_PONTO_PRATICA = "PontoPratica"
+ABA_PONTO_TEORIA = "PontoTeoria"
+ABAS_PONTO = {ABA_PONTO_PRATICA: "Prática", ABA_PONTO_TEORIA: "Teoria"}
+HEADERS_PONTO_PADRAO = ["SerialNumber", "EmailHC", "NomeCompleto", "Data", "HoraEntrada", "HoraSaida", "Escala", "Tipo"]
+ACOES_COMPOSTAS_PONTO = ["transicao", "lote"]
+EMAIL_REGEX = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+
+# Abas criadas num banco vazio (sem --semear)
+ABAS_INICIAIS = {
+    "Alunos": ["SerialNumber", "NomeCompleto", "EmailHC", "Curso", "Status"],
+    ABA_PONTO_PRATICA: HEADERS_PONTO_PADRAO,
+    ABA_PONTO_TEORIA: HEADERS_PONTO_PADRAO,
+    ABA_AUSENCIAS: ["NomeCompleto", "EmailHC", "Curso", "Escala", "DataAusencia", "Unidade", "Horario", "Motivo"],
+    ABA_REPOSICOES: ["NomeCompleto", "EmailHC", "Curso", "Escala", "Horario", "Unidade", "Motivo",
+                     "DataReposicao", "DataAusencia"],
+}
+
+IDEMPOTENCIA_TTL_SECONDS = 30 * 86400  # aba IdempotenciaPonto: IDEMPOTENCIA_DIAS = 30
+FUTURO_MAX_SECONDS = 300           # DataHoraLeitura mais adiantada que isso é ignorada
+BANCO_PADRAO = "dados/emulador_apps_script.db"
+PORTA_PADRAO = 8790
+# ===========================
+
+
+def agora_iso():
+    """Instante atual como o new Date().toISOString() do Apps Script."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def sanitize_key(texto):
+    """Mesma sanitização de nomes de aba/coluna do Code.gs (sanitizeKey)."""
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[.$#\[\]/]", "_", texto)
+    texto = re.sub(r"[^a-zA-Z0-9_]", "", texto)
+    return texto.strip("_")
+
+def gerar_id_linha(registro, indice):
+    """_rowId de uma linha, como gerarIdLinha(): SerialHC, EmailHC, ID ou hash do conteúdo."""
+    for chaves in (("SerialHC", "serialHC", "serialhc"), ("EmailHC", "emailHC", "emailhc"), ("ID", "id", "Id")):
+        for chave in chaves:
+            if registro.get(chave):
+                return str(registro[chave])
+    conteudo = json.dumps(registro, ensure_ascii=False, separators=(",", ":"))[:100]
+    return hashlib.md5((conteudo + str(indice)).encode("utf-8")).hexdigest()[:16]
+
+def _no_fuso(instante):
+    return instante.astimezone(FUSO) if FUSO is not None else instante.astimezone()
+
+def instante_do_ponto(data):
+    """
+    Instante da batida (instanteDoPonto_): DataHoraLeitura do quiosque ou a
+    hora de chegada, se ausente, inválida ou adiantada mais de 5 minutos.
+    """
+    agora = datetime.now(timezone.utc)
+    texto = data.get("DataHoraLeitura")
+    if not texto:
+        return agora
+    try:
+        instante = datetime.fromisoformat(str(texto).replace("Z", "+00:00"))
+    except ValueError:
+        return agora
+    if instante.tzinfo is None:
+        instante = instante.replace(tzinfo=FUSO) if FUSO is not None else instante.astimezone()
+    if (instante - agora).total_seconds() > FUTURO_MAX_SECONDS:
+        return agora
+    return instante
+
+def _valor_de_data(valor, formato):
+    """Converte datas ISO do snapshot (Date serializado pelo doGet) para o texto que o Code.gs compara."""
+    if isinstance(valor, str) and len(valor) >= 19 and valor[4] == "-" and "T" in valor:
+        try:
+            return _no_fuso(datetime.fromisoformat(valor.replace("Z", "+00:00"))).strftime(formato)
+        except ValueError:
+            pass
+    return "" if valor is None else str(valor)
+
+
+# ========== PLANILHA EM SQLITE ==========
+
+class PlanilhaSQLite:
+    """
+    A planilha do Apps Script em SQLite.
+
+      abas         - nome, ordem, cabeçalhos e carimbo (ultimaAtualizacao)
+      linhas       - linhas das abas comuns (valores em JSON), por (aba, linha)
+      pontos       - linhas de PontoPratica/PontoTeoria, indexadas por aluno e dia
+      idempotencia - respostas guardadas por IdempotencyKey (a aba IdempotenciaPonto)
+
+    `linha` é o número da linha na planilha (2 = primeira linha de dados).
+    Escritas acontecem dentro de transacao(), que também faz o papel do
+    LockService: uma batida (ou um lote) por vez.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS abas (
+                nome TEXT PRIMARY KEY,
+                ordem INTEGER NOT NULL,
+                cabecalhos TEXT NOT NULL,
+                carimbo TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS linhas (
+                aba TEXT NOT NULL,
+                linha INTEGER NOT NULL,
+                valores TEXT NOT NULL,
+                PRIMARY KEY (aba, linha)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS pontos (
+                aba TEXT NOT NULL,
+                linha INTEGER NOT NULL,
+                serial TEXT NOT NULL,
+                email TEXT NOT NULL DEFAULT '',
+                nome TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL,
+                hora_entrada TEXT NOT NULL DEFAULT '',
+                hora_saida TEXT NOT NULL DEFAULT '',
+                escala TEXT NOT NULL DEFAULT '',
+                tipo TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (aba, linha)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pontos_aluno_dia ON pontos(serial, data, aba);
+            CREATE INDEX IF NOT EXISTS idx_pontos_dia ON pontos(data);
+            CREATE TABLE IF NOT EXISTS idempotencia (
+                chave TEXT PRIMARY KEY,
+                resposta TEXT NOT NULL,
+                expira_em REAL NOT NULL
+            );
+        """)
+        if not self.nomes_abas():
+            with self.transacao():
+                for ordem, (nome, cabecalhos) in enumerate(ABAS_INICIAIS.items()):
+                    self._criar_aba(nome, ordem, cabecalhos)
+
+    @contextmanager
+    def transacao(self):
+        """BEGIN IMMEDIATE … COMMIT sob o lock; qualquer exceção desfaz tudo."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _criar_aba(self, nome, ordem, cabecalhos):
+        self._conn.execute("INSERT INTO abas (nome, ordem, cabecalhos, carimbo) VALUES (?, ?, ?, ?)",
+                           (nome, ordem, json.dumps(cabecalhos, ensure_ascii=False), agora_iso()))
+
+    def _tocar(self, aba):
+        """A aba mudou: avança o carimbo (ultimaAtualizacao do doGet ?aba=)."""
+        self._conn.execute("UPDATE abas SET carimbo = ? WHERE nome = ?", (agora_iso(), aba))
+
+    # ----- carga a partir de um snapshot do doGet -----
+
+    def semear(self, snapshot):
+        """
+        Substitui o conteúdo do banco por um snapshot do doGet (formato do
+        BancoDeDadosTeste.json). Os cabeçalhos são os nomes já sanitizados do
+        snapshot; datas/horas ISO das abas de ponto voltam a dd/MM/yyyy e HH:mm:ss.
+        Retorna {nome da aba: linhas carregadas}.
+        """
+        carregadas = {}
+        with self.transacao() as conn:
+            for tabela in ("abas", "linhas", "pontos", "idempotencia"):
+                conn.execute(f"DELETE FROM {tabela}")
+            abas = list((snapshot.get("cache") or {}).items())
+            for nome in ABAS_INICIAIS:
+                if not any((v.get("metadados") or {}).get("nomeOriginal", k) == nome for k, v in abas):
+                    abas.append((nome, {"registros": [], "metadados": {"nomeOriginal": nome}}))
+            for ordem, (chave, conteudo) in enumerate(abas):
+                nome = (conteudo.get("metadados") or {}).get("nomeOriginal") or chave
+                registros = sorted(conteudo.get("registros") or [], key=lambda r: r.get("_rowIndex", 0))
+                if nome in ABAS_PONTO:
+                    cabecalhos = HEADERS_PONTO_PADRAO
+                else:
+                    cabecalhos = []
+                    for registro in registros:
+                        cabecalhos.extend(k for k in registro if not k.startswith("_") and k not in cabecalhos)
+                    cabecalhos = cabecalhos or ABAS_INICIAIS.get(nome, [])
+                self._criar_aba(nome, ordem, cabecalhos)
+                for i, registro in enumerate(registros):
+                    if nome in ABAS_PONTO:
+                        conn.execute(
+                            "INSERT INTO pontos (aba, linha, serial, email, nome, data, hora_entrada, hora_saida, escala, tipo)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (nome, i + 2, str(registro.get("SerialNumber", "")), registro.get("EmailHC") or "",
+                             registro.get("NomeCompleto") or "", _valor_de_data(registro.get("Data"), "%d/%m/%Y"),
+                             _valor_de_data(registro.get("HoraEntrada"), "%H:%M:%S"),
+                             _valor_de_data(registro.get("HoraSaida"), "%H:%M:%S"),
+                             str(registro.get("Escala") or ""), registro.get("Tipo") or ""))
+                    else:
+                        valores = [registro.get(c, "") for c in cabecalhos]
+                        conn.execute("INSERT INTO linhas (aba, linha, valores) VALUES (?, ?, ?)",
+                                     (nome, i + 2, json.dumps(valores, ensure_ascii=False)))
+                carregadas[nome] = len(registros)
+        return carregadas
+
+    # ----- leitura de abas -----
+
+    def nomes_abas(self):
+        return [r[0] for r in self._conn.execute("SELECT nome FROM abas ORDER BY ordem")]
+
+    def aba(self, nome):
+        """(cabeçalhos, carimbo) da aba ou None se não existir."""
+        with self._lock:
+            r = self._conn.execute("SELECT cabecalhos, carimbo FROM abas WHERE nome = ?", (nome,)).fetchone()
+        return (json.loads(r[0]), r[1]) if r else None
+
+    def valores(self, nome):
+        """Linhas de dados da aba (sem o cabeçalho), na ordem da planilha."""
+        with self._lock:
+            if nome in ABAS_PONTO:
+                return [list(r) for r in self._conn.execute(
+                    "SELECT serial, email, nome, data, hora_entrada, hora_saida, escala, tipo"
+                    " FROM pontos WHERE aba = ? ORDER BY linha", (nome,))]
+            return [json.loads(r[0]) for r in self._conn.execute(
+                "SELECT valores FROM linhas WHERE aba = ? ORDER BY linha", (nome,))]
+
+    def acrescentar(self, nome, valores):
+        """appendRow() numa aba comum (dentro de uma transação)."""
+        proxima = self._conn.execute("SELECT COALESCE(MAX(linha), 1) + 1 FROM linhas WHERE aba = ?",
+                                     (nome,)).fetchone()[0]
+        self._conn.execute("INSERT INTO linhas (aba, linha, valores) VALUES (?, ?, ?)",
+                           (nome, proxima, json.dumps(valores, ensure_ascii=False)))
+        self._tocar(nome)
+
+    # ----- abas de ponto (dentro de uma transação) -----
+
+    def situacao_do_dia(self, aba, serial, data_str):
+        """
+        {aberta: nº da última linha sem HoraSaida ou None, completa: alguma linha
+        com HoraSaida} — mesma regra de situacaoDoDia_ / localizarPontoDoDia_.
+        """
+        aberta, completa = None, False
+        for linha, saida in self._conn.execute(
+                "SELECT linha, hora_saida FROM pontos WHERE serial = ? AND data = ? AND aba = ? ORDER BY linha",
+                (str(serial), data_str, aba)):
+            if saida:
+                completa = True
+            else:
+                aberta = linha
+        return {"aberta": aberta, "completa": completa}
+
+    def registrar_saida(self, aba, linha, hora_str):
+        self._conn.execute("UPDATE pontos SET hora_saida = ? WHERE aba = ? AND linha = ?", (hora_str, aba, linha))
+        self._tocar(aba)
+
+    def acrescentar_ponto(self, aba, valores):
+        proxima = self._conn.execute("SELECT COALESCE(MAX(linha), 1) + 1 FROM pontos WHERE aba = ?",
+                                     (aba,)).fetchone()[0]
+        self._conn.execute(
+            "INSERT INTO pontos (aba, linha, serial, email, nome, data, hora_entrada, hora_saida, escala, tipo)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (aba, proxima, *[str(v) for v in valores]))
+        self._tocar(aba)
+
+    def pontos_do_dia(self, data_str, serial=None):
+        """Linhas de ponto (aba, serial, entrada, saída) de uma data, opcionalmente de um aluno."""
+        sql = "SELECT aba, serial, hora_entrada, hora_saida FROM pontos WHERE data = ?"
+        parametros = [data_str]
+        if serial:
+            sql += " AND serial = ?"
+            parametros.append(str(serial))
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY aba, linha", parametros).fetchall()
+
+    # ----- idempotência (CacheService) -----
+
+    def resposta_guardada(self, chave):
+        r = self._conn.execute("SELECT resposta FROM idempotencia WHERE chave = ? AND expira_em > ?",
+                               (chave, time.time())).fetchone()
+        return r[0] if r else None
+
+    def guardar_resposta(self, chave, texto):
+        self._conn.execute("INSERT OR REPLACE INTO idempotencia (chave, resposta, expira_em) VALUES (?, ?, ?)",
+                           (chave, texto, time.time() + IDEMPOTENCIA_TTL_SECONDS))
+
+    def limpar_expiradas(self):
+        with self.transacao() as conn:
+            conn.execute("DELETE FROM idempotencia WHERE expira_em <= ?", (time.time(),))
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ========== doGet / doPost ==========
+
+class EmuladorAppsScript:
+    """
+    doGet/doPost do Code.gs sobre uma PlanilhaSQLite. Cada método retorna
+    (tipo de conteúdo, corpo) como o ContentService.
+    """
+
+    JSON = "application/json; charset=utf-8"
+    TEXTO = "text/plain; charset=utf-8"
+
+    def __init__(self, planilha):
+        self.planilha = planilha
+
+    def _json(self, objeto):
+        return self.JSON, json.dumps(objeto, ensure_ascii=False)
+
+    def _texto(self, mensagem):
+        return self.TEXTO, mensagem
+
+    # ----- doGet -----
+
+    def do_get(self, parametros):
+        try:
+            acao = parametros.get("action")
+            if acao == "ping":
+                return self._json({"ok": True, "agora": agora_iso()})
+            if acao == "capacidades":
+                return self._json({"acoes": ACOES_COMPOSTAS_PONTO})
+            if acao == "getPontos":
+                return self._json({"pontos": self.listar_pontos_do_dia(parametros.get("data"),
+                                                                       parametros.get("serial"))})
+            if parametros.get("aba"):
+                return self._json(self._dados_da_aba(parametros["aba"], parametros.get("desde")))
+            return self._json(self._snapshot())
+        except Exception as erro:
+            return self._json({"erro": "Erro ao processar requisição", "mensagem": str(erro)})
+
+    def _registros(self, nome):
+        cabecalhos, carimbo = self.planilha.aba(nome)
+        chaves = [sanitize_key(c) for c in cabecalhos]
+        registros = []
+        for i, valores in enumerate(self.planilha.valores(nome)):
+            registro = {chave: (valores[j] if j < len(valores) else "") for j, chave in enumerate(chaves)}
+            registro["_rowId"] = gerar_id_linha(registro, i)
+            registro["_rowIndex"] = i + 2
+            registros.append(registro)
+        return registros, carimbo
+
+    def _dados_da_aba(self, nome, desde=None):
+        if self.planilha.aba(nome) is None:
+            return {"erro": "Aba não encontrada", "abaSolicitada": nome}
+        registros, carimbo = self._registros(nome)
+        if desde and desde == carimbo:
+            return {"aba": nome, "naoModificado": True,
+                    "metadados": {"totalRegistros": len(registros), "ultimaAtualizacao": carimbo}}
+        return {"aba": nome, "registros": registros,
+                "metadados": {"totalRegistros": len(registros), "ultimaAtualizacao": carimbo}}
+
+    def _snapshot(self):
+        resultado = {"cache": {}, "metadados": {"totalAbas": 0, "ultimaAtualizacao": agora_iso()}}
+        for nome in self.planilha.nomes_abas():
+            registros, _ = self._registros(nome)
+            resultado["cache"][sanitize_key(nome)] = {
+                "registros": registros,
+                "metadados": {"nomeOriginal": nome, "totalRegistros": len(registros)},
+            }
+            if registros:
+                resultado["metadados"]["totalAbas"] += 1
+        return resultado
+
+    def listar_pontos_do_dia(self, data_iso=None, serial=None):
+        """Batidas do dia (listarPontosDoDia_): uma por entrada/saída, das duas abas."""
+        if data_iso:
+            data_str = "/".join(reversed(str(data_iso).split("-")))
+        else:
+            data_str = _no_fuso(datetime.now(timezone.utc)).strftime("%d/%m/%Y")
+        pontos = []
+        for aba, linha_serial, entrada, saida in self.planilha.pontos_do_dia(data_str, serial):
+            for hora, tipo in ((entrada, "Entrada"), (saida, "Saída")):
+                if hora:
+                    pontos.append({"SerialNumber": linha_serial, "Data": data_str, "Hora": hora,
+                                   "TipoRegistro": tipo, "Modalidade": ABAS_PONTO[aba]})
+        return pontos
+
+    # ----- doPost -----
+
+    def do_post(self, conteudo):
+        try:
+            data = json.loads(conteudo)
+            tipo = str(data.get("tipo") or data.get("Tipo") or data.get("TIPO") or "").lower()
+            if tipo in ("ausencia", "reposicao"):
+                return self._json(self._ausencia_reposicao(data))
+            if data.get("Acao") == "lote":
+                return self._lote(data.get("Taps"))
+            with self.planilha.transacao():
+                chave = self._chave(data)
+                anterior = self.planilha.resposta_guardada(chave) if chave else None
+                if anterior is not None:
+                    return self._texto(anterior)
+                mensagem = self.aplicar_batida(data)
+                if chave and not mensagem.startswith("Erro"):
+                    self.planilha.guardar_resposta(chave, mensagem)
+            return self._texto(mensagem)
+        except Exception as erro:
+            return self._texto(f"Erro: {erro}")
+
+    @staticmethod
+    def _chave(tap):
+        return "idem_" + str(tap["IdempotencyKey"])[:200] if tap.get("IdempotencyKey") else None
+
+    def _lote(self, taps):
+        """registrarLote_: todas as batidas numa transação; se uma escrita falhar, nada fica gravado."""
+        if not isinstance(taps, list):
+            return self._texto("Erro: 'Taps' deve ser uma lista de batidas.")
+        try:
+            mensagens = []
+            with self.planilha.transacao():
+                for tap in taps:
+                    chave = self._chave(tap)
+                    anterior = self.planilha.resposta_guardada(chave) if chave else None
+                    if anterior is not None:
+                        mensagens.append(anterior)
+                        continue
+                    mensagem = self.aplicar_batida(tap)
+                    if chave and not mensagem.startswith("Erro"):
+                        self.planilha.guardar_resposta(chave, mensagem)
+                    mensagens.append(mensagem)
+        except Exception as erro:
+            mensagens = [f"Erro: {erro}"] * len(taps)
+        return self._json({"resultados": [
+            {"IdempotencyKey": tap.get("IdempotencyKey") or None, "SerialNumber": tap.get("SerialNumber") or "",
+             "mensagem": mensagem}
+            for tap, mensagem in zip(taps, mensagens)
+        ]})
+
+    def aplicar_batida(self, tap):
+        """
+        Uma batida na máquina de estados Prática/Teoria (registrarPonto_,
+        registrarTransicao_ e aplicarBatida_ têm as mesmas regras e mensagens).
+        Deve ser chamada dentro de planilha.transacao().
+        """
+        p = self.planilha
+        serial = tap.get("SerialNumber") or ""
+        agora = _no_fuso(instante_do_ponto(tap))
+        data_str = agora.strftime("%d/%m/%Y")
+        hora_str = agora.strftime("%H:%M:%S")
+        # getDay() do JavaScript: domingo = 0, terça = 2, quinta = 4
+        dia_semana = 2 if tap.get("SimularTerça") else (agora.weekday() + 1) % 7
+        eh_dia_teoria = bool(tap.get("IsDiaTeoria")) or dia_semana in (2, 4)
+
+        def linha_nova(tipo):
+            return [serial, tap.get("EmailHC") or "", tap.get("NomeCompleto") or "Desconhecido", data_str,
+                    hora_str, "", tap.get("Escala") or "", tipo]
+
+        t = p.situacao_do_dia(ABA_PONTO_TEORIA, serial, data_str)
+        pr = p.situacao_do_dia(ABA_PONTO_PRATICA, serial, data_str)
+
+        if tap.get("Acao") == "transicao":
+            if t["aberta"] or t["completa"]:
+                return "Sem ação: entrada teórica já registrada hoje."
+            if pr["aberta"]:
+                p.registrar_saida(ABA_PONTO_PRATICA, pr["aberta"], hora_str)
+            p.acrescentar_ponto(ABA_PONTO_TEORIA, linha_nova("Teoria"))
+            return ("Saída prática e entrada teórica registradas: " if pr["aberta"]
+                    else "Entrada teórica registrada: ") + hora_str
+
+        if t["completa"]:
+            return "Sem ação: aluno já completou a teoria hoje."
+        if t["aberta"]:
+            p.registrar_saida(ABA_PONTO_TEORIA, t["aberta"], hora_str)
+            return "Saída teórica registrada: " + hora_str
+        if pr["completa"] and not eh_dia_teoria:
+            return "Sem ação: aluno já completou a prática hoje."
+
+        if not pr["aberta"] and not pr["completa"]:
+            if eh_dia_teoria:
+                p.acrescentar_ponto(ABA_PONTO_TEORIA, linha_nova("Teoria"))
+                return "Entrada teórica registrada: " + hora_str
+            p.acrescentar_ponto(ABA_PONTO_PRATICA, linha_nova("Prática"))
+            return "Entrada prática registrada: " + hora_str
+
+        if pr["aberta"]:
+            p.registrar_saida(ABA_PONTO_PRATICA, pr["aberta"], hora_str)
+            if eh_dia_teoria:
+                p.acrescentar_ponto(ABA_PONTO_TEORIA, linha_nova("Teoria"))
+                return "Saída prática e entrada teórica registradas: " + hora_str
+            return "Saída prática registrada: " + hora_str
+
+        return f"Sem ação necessária para o ID {serial}."
+
+    def _ausencia_reposicao(self, data):
+        """doPostAusenciasReposicoes: valida e acrescenta a linha conforme os cabeçalhos da aba."""
+        tipo = str(data.get("tipo") or "").lower()
+        if tipo not in ("ausencia", "reposicao"):
+            return {"success": False, "message": 'Tipo inválido. Use "ausencia" ou "reposicao".'}
+        nome_aba = ABA_AUSENCIAS if tipo == "ausencia" else ABA_REPOSICOES
+        aba = self.planilha.aba(nome_aba)
+        if aba is None:
+            return {"success": False, "message": f'Aba "{nome_aba}" não encontrada.'}
+
+        campo_data = "DataAusencia" if tipo == "ausencia" else "DataReposicao"
+        if not str(data.get("NomeCompleto") or "").strip():
+            return {"success": False, "message": "Nome completo é obrigatório"}
+        if not str(data.get("EmailHC") or "").strip():
+            return {"success": False, "message": "Email HC é obrigatório"}
+        if not data.get(campo_data):
+            rotulo = "ausência" if tipo == "ausencia" else "reposição"
+            return {"success": False, "message": f"Data da {rotulo} é obrigatória"}
+        if tipo == "reposicao":
+            if not isinstance(data.get("DataReposicao"), str):
+                return {"success": False, "message": "Data da reposição deve ser texto (YYYY-MM-DD)"}
+            if data.get("DataAusencia") and not isinstance(data["DataAusencia"], str):
+                return {"success": False, "message": "Data da ausência deve ser texto (YYYY-MM-DD)"}
+        if not EMAIL_REGEX.match(str(data["EmailHC"])):
+            return {"success": False, "message": "Email inválido"}
+
+        campos = set(ABAS_INICIAIS[nome_aba])
+        registro = []
+        for coluna in aba[0]:
+            coluna = str(coluna or "").strip()
+            valor = data.get(coluna) if coluna in campos else ""
+            if coluna == "Escala" and tipo == "reposicao":
+                valor = data.get("Escala") or data.get("escala")
+            registro.append(valor or "")
+        with self.planilha.transacao():
+            self.planilha.acrescentar(nome_aba, registro)
+        rotulo = "Ausência" if tipo == "ausencia" else "Reposição"
+        return {"success": True, "message": f"{rotulo} registrada com sucesso",
+                "data": {"nome": data["NomeCompleto"], "data": data[campo_data]}}
+
+
+# ========== SERVIDOR HTTP ==========
+
+class ServidorEmulador:
+    """Expõe o emulador em http://<host>:<porta>/exec (qualquer caminho é aceito)."""
+
+    def __init__(self, emulador, porta=PORTA_PADRAO, host="127.0.0.1"):
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, tipo, corpo):
+                dados = corpo.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def do_GET(self):
+                consulta = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                # e.parameter do Apps Script: o primeiro valor de cada parâmetro
+                self._responder(*emulador.do_get({k: v[0] for k, v in consulta.items()}))
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                conteudo = self.rfile.read(tamanho).decode("utf-8", errors="replace")
+                self._responder(*emulador.do_post(conteudo))
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer((host, porta), Handler)
+        self.servidor.daemon_threads = True
+
+    @property
+    def url(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}/exec"
+
+    def iniciar(self):
+        threading.Thread(target=self.servidor.serve_forever, name="ServidorEmulador", daemon=True).start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Emulador local do Code.gs (doGet/doPost) com a planilha em SQLite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--banco", default=BANCO_PADRAO, help=f"Arquivo SQLite (padrão: {BANCO_PADRAO})")
+    parser.add_argument("--semear", metavar="JSON",
+                        help="Recarrega o banco a partir de um snapshot do doGet (JSON, como o "
+                             "BancoDeDadosTeste.json, ou arquivo do SnapshotColunar.py)")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help=f"Porta (padrão: {PORTA_PADRAO})")
+    args = parser.parse_args()
+
+    planilha = PlanilhaSQLite(args.banco)
+    if args.semear:
+        from SnapshotColunar import carregar_snapshot
+        carregadas = planilha.semear(carregar_snapshot(args.semear))
+        print(f"  🌱 {len(carregadas)} aba(s) carregada(s) de {args.semear} "
+              f"({sum(carregadas.values())} linha(s))")
+    planilha.limpar_expiradas()
+
+    servidor = ServidorEmulador(EmuladorAppsScript(planilha), args.porta, args.host)
+    print(f"  📡 Emulador do Apps Script em {servidor.url}  (banco: {args.banco})")
+    print(f"     python SistemaPonto.py --endpoint {servidor.url}")
+    try:
+        servidor.servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.servidor.server_close()
+        planilha.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,32 +24,53 @@ import time
 import json
 import logging
 import argparse
-import platform
+import bisect
+import io
+import random
 import unicodedata
-from datetime import datetime, date, time as dtime
+import queue
+import hmac
+import secrets
+import socket
+import sqlite3
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, date, timedelta, time as dtime
 from pathlib import Path
 
-# Tenta importar requests, se não existir, mostra instrução
-try:
-    import requests
-except ImportError:
-    print("Erro: O módulo 'requests' não está instalado.")
-    print("Execute: pip install requests")
-    sys.exit(1)
-
-# Tenta importar msvcrt para Windows (leitura de teclado não-bloqueante)
-if platform.system() == "Windows":
+# O requests (e o urllib3) só é importado na primeira requisição HTTP:
+# os comandos de configuração (--list-dias, --set-escala, ...) não pagam esse custo.
+def importar_requests():
+    """Importa o requests sob demanda; se não existir, mostra instrução e encerra."""
     try:
-        import msvcrt
+        import requests
     except ImportError:
-        msvcrt = None
-else:
-    msvcrt = None
+        print("Erro: O módulo 'requests' não está instalado.")
+        print("Execute: pip install requests")
+        sys.exit(1)
+    return requests
+
+def verificar_requests():
+    """Confere, sem importar, que o requests está instalado (antes de subir o quiosque)."""
+    import importlib.util
+    if importlib.util.find_spec("requests") is None:
+        importar_requests()
+
+EM_WINDOWS = sys.platform == "win32"
+
+# Fuso das batidas (Python 3.9+; no Windows requer o pacote tzdata)
+try:
+    from zoneinfo import ZoneInfo
+    FUSO_PONTO = ZoneInfo("America/Sao_Paulo")
+except Exception:
+    FUSO_PONTO = None  # usa o fuso local do quiosque
 
 # ========== CONFIG ==========
 # URL do Apps Script (turma 2026) - espelha apps-script-config.js
 ENDPOINT = "https://script.google.com/macros/s/AKfycbxF39enADoiGglxeCOzQbjlrc8CWoWn7eHP2OzyuNiqaD4wiAhnkE57NEGhnl81tC3h/exec"
 DEBOUNCE_SECONDS = 1.2
+DEBOUNCE_MAX_CRACHAS = 4096
 CONFIG_FILE = "config_ponto.json"
 
 # Mapeie aqui os IDs para exibir nome (opcional) - legado, usar alunos no config
@@ -76,9 +97,64 @@ HORA_FIM_TEORIA_PADRAO = "00:00"
 
 # Número máximo de pontos por modalidade por dia (entrada + saída = 2)
 MAX_PONTOS_POR_MODALIDADE = 2
-# ===========================
 
-_last_time = 0.0
+# Fila local durável (journal) de pontos ainda não confirmados pelo servidor
+JOURNAL_FILE_PADRAO = "dados/fila_ponto.db"
+JOURNAL_FLUSH_SECONDS = 5.0
+JOURNAL_LOTE_ENVIO = 20
+JOURNAL_MAX_RECUSAS = 50      # respostas de falha transitória (429, 5xx, ocupado) antes de rejeitar
+JOURNAL_MAX_IDADE_DIAS = 30   # = IDEMPOTENCIA_DIAS do Code.gs: além disso um reenvio poderia duplicar
+
+# Modo pipeline: leitor de crachás dedicado + fila limitada + workers de envio
+PIPELINE_WORKERS = 2
+PIPELINE_FILA_MAX = 50
+
+# Sessão HTTP compartilhada (keep-alive) com o Apps Script
+HTTP_POOL_MAX = 8
+HTTP_KEEPALIVE_SECONDS = 240
+
+# Ledger local de pontos do dia (anti-duplicata sem GET por leitura)
+LEDGER_RECONCILE_SECONDS = 300
+
+# Registro de alunos (log de cadastros, só acréscimo)
+REGISTRO_ALUNOS_FILE_PADRAO = "dados/alunos.jsonl"
+SYNC_ALUNOS_SECONDS = 900  # 0 desativa a sincronização com a aba Alunos
+
+# Diagnóstico: spans por leitura (trace_file) e relatório do --profile
+PERFIL_FILE_PADRAO = "logs/perfil_ponto.prof"
+
+# Transição Prática→Teoria em um único POST (quando o Code.gs anuncia a ação)
+ACAO_TRANSICAO = "transicao"
+CAPACIDADES_TTL_SECONDS = 3600
+
+# Resiliência do envio: backoff com jitter, timeout adaptativo e disjuntor
+ENVIO_TENTATIVAS = 3          # tentativas por envio direto (sem journal)
+ENVIO_BACKOFF_BASE = 0.5      # s; dobra a cada nova tentativa
+ENVIO_BACKOFF_MAX = 4.0
+ENVIO_TIMEOUT_MIN = 4.0       # limites do timeout adaptativo dos POSTs
+ENVIO_TIMEOUT_MAX = 10.0
+DISJUNTOR_FALHAS = 5          # falhas seguidas (rede, 429, 5xx, ocupado) que abrem o disjuntor
+DISJUNTOR_ABERTO_SECONDS = 30
+JOURNAL_BACKOFF_MAX = 120.0   # espera máxima entre reenvios do journal após falhas
+ERRO_SERVIDOR_OCUPADO = "Erro: servidor ocupado"  # lock do Code.gs esgotado: nada gravado, repetir
+
+# Envio em lote (modo pipeline e reenvio do journal), se o Code.gs aceitar a ação
+ACAO_LOTE = "lote"
+LOTE_MAX = 10                 # batidas por POST (1 desativa o lote)
+LOTE_JANELA_MS = 250          # espera por mais batidas após a primeira da fila
+
+# Governador de cota do Apps Script (chamadas por dia / por minuto; 0 desativa o limite)
+COTA_FILE_PADRAO = "dados/cota_ponto.json"
+COTA_DIARIA = 20000
+COTA_POR_MINUTO = 60
+COTA_FRACAO_ECONOMIA = 0.8    # uso do dia a partir do qual GETs opcionais são pulados
+COTA_FRACAO_LOTE = 0.9        # uso do dia a partir do qual os pontos seguem só em lote
+
+# Socket de controle do daemon (--serve); sem AF_UNIX (Windows), TCP local
+CONTROLE_SOCKET_PADRAO = "dados/ponto.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8767"
+CONTROLE_TIMEOUT_SECONDS = 5.0
+CONTROLE_TOKEN_FILE = "dados/controle_ponto.token"  # segredo exigido em cada comando (permissão 600)
+# ===========================
 
 # Configuração padrão - usada em load_config() e save_default_config()
 def get_default_config():
@@ -93,7 +169,28 @@ def get_default_config():
         "hora_fim_teoria": HORA_FIM_TEORIA_PADRAO,
         "escala_atual": "9",  # Escala atual para registro de ponto (1-12)
         "log_file": None,
-        "max_pontos_por_modalidade": MAX_PONTOS_POR_MODALIDADE
+        "max_pontos_por_modalidade": MAX_PONTOS_POR_MODALIDADE,
+        "journal_file": JOURNAL_FILE_PADRAO,
+        "journal_flush_seconds": JOURNAL_FLUSH_SECONDS,
+        "pipeline_workers": PIPELINE_WORKERS,
+        "pipeline_fila_max": PIPELINE_FILA_MAX,
+        "http_pool_max": HTTP_POOL_MAX,
+        "http_keepalive_seconds": HTTP_KEEPALIVE_SECONDS,
+        "ledger_reconcile_seconds": LEDGER_RECONCILE_SECONDS,
+        "envio_tentativas": ENVIO_TENTATIVAS,
+        "disjuntor_falhas": DISJUNTOR_FALHAS,
+        "disjuntor_aberto_seconds": DISJUNTOR_ABERTO_SECONDS,
+        "lote_max": LOTE_MAX,
+        "lote_janela_ms": LOTE_JANELA_MS,
+        "cota_file": COTA_FILE_PADRAO,
+        "cota_diaria": COTA_DIARIA,
+        "cota_por_minuto": COTA_POR_MINUTO,
+        "registro_alunos_file": REGISTRO_ALUNOS_FILE_PADRAO,
+        "sync_alunos_seconds": SYNC_ALUNOS_SECONDS,
+        "trace_file": None,  # spans por leitura em JSON Lines (None = desativado)
+        "metrics_port": None,  # porta do endpoint /metrics (None = desativado)
+        "metrics_host": "127.0.0.1",
+        "controle_socket": None  # socket de controle (None = só com --serve, no endereço padrão)
     }
 
 # Configurar logging
@@ -108,36 +205,63 @@ def setup_logging(log_file=None):
             log_dir.mkdir(parents=True, exist_ok=True)
         handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
     
+    # force=True: load_config() já pode ter configurado o logging implícito (nível WARNING)
     logging.basicConfig(
         level=logging.INFO,
         format=log_format,
-        handlers=handlers
+        handlers=handlers,
+        force=True
     )
 
-def load_config():
-    """Carrega a configuração do arquivo JSON."""
-    config = get_default_config()
-    
-    # Procura o arquivo de configuração no diretório atual ou no diretório do script
-    config_paths = [
+# Sobrescritas vindas da linha de comando (--endpoint, --workers, ...), reaplicadas
+# a cada carga para que a recarga da configuração não as descarte.
+CONFIG_SOBRESCRITAS = {}
+
+# Caminho do arquivo usado na última chamada a load_config() (None = só padrões)
+_config_carregada_de = None
+
+def caminhos_config():
+    """Caminhos procurados para o config_ponto.json, em ordem de prioridade."""
+    return [
         Path(CONFIG_FILE),
         Path(__file__).parent / CONFIG_FILE,
         Path.home() / ".config" / "sistemaponto" / CONFIG_FILE
     ]
+
+def ler_arquivo_config(config_path):
+    """Lê um config_ponto.json e retorna a configuração completa (padrões + arquivo + sobrescritas).
+
+    Propaga json.JSONDecodeError / IOError; quem chama decide se tenta outro caminho.
+    """
+    config = get_default_config()
+    with open(config_path, 'r', encoding='utf-8') as f:
+        user_config = json.load(f)
+    if not isinstance(user_config, dict):
+        raise ValueError("o arquivo deve conter um objeto JSON")
+    config.update(user_config)
+    config.update(CONFIG_SOBRESCRITAS)
+    return config
+
+def load_config():
+    """Carrega a configuração do arquivo JSON."""
+    global _config_carregada_de
     
-    for config_path in config_paths:
+    # Procura o arquivo de configuração no diretório atual ou no diretório do script
+    for config_path in caminhos_config():
         if config_path.exists():
             try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    user_config = json.load(f)
-                    config.update(user_config)
-                    logging.info(f"Configuração carregada de: {config_path}")
-                    break
+                config = ler_arquivo_config(config_path)
+                logging.info(f"Configuração carregada de: {config_path}")
+                _config_carregada_de = config_path
+                return config
             except json.JSONDecodeError as e:
                 logging.warning(f"Erro de sintaxe JSON em {config_path}: {e}")
-            except IOError as e:
+            except (IOError, ValueError) as e:
                 logging.warning(f"Erro ao ler arquivo {config_path}: {e}")
     
+    _config_carregada_de = None
+    config = get_default_config()
+    config.update(CONFIG_SOBRESCRITAS)
     return config
 
 def save_default_config(path=None):
@@ -157,43 +281,155 @@ def save_default_config(path=None):
         print(f"Erro ao criar arquivo de configuração: {e}")
         return False
 
-def is_dia_teoria(config):
+# ========== AGENDA DE TEORIA (índice pré-compilado) ==========
+
+def _dia_da_semana(valor):
+    """True se `valor` é um dia da semana 0-6 (int; 1.0 e True não contam)."""
+    return isinstance(valor, int) and not isinstance(valor, bool) and 0 <= valor < 7
+
+class AgendaTeoria:
     """
-    Verifica se hoje é um dia de teoria.
+    Índice dos horários de teoria de uma configuração, montado uma única vez.
+
+    - especiais: date → horário (dias_especiais_teoria)
+    - semana:    tabela 0-6 (Segunda..Domingo) → horário (horarios_teoria ou legado)
+
+    Cada horário é um dict {"hora_transicao", "hora_inicio"} (strings, como na
+    configuração) acompanhado da hora de transição já convertida em datetime.time.
+    Responde à modalidade em um instante em tempo constante e informa o
+    próximo instante em que ela muda.
 
     Suporta dois formatos de configuração:
     - Novo: "horarios_teoria": [{"dia": 1, "hora_transicao": "17:30", "hora_inicio": "18:00"}, ...]
-    - Legado: "dias_teoria": [1, 3]
-
-    Retorna True se:
-    - O dia da semana consta em horarios_teoria (ou dias_teoria legado)
-    - OU a data de hoje está na lista dias_especiais_teoria
+    - Legado: "dias_teoria": [1, 3] com hora_transicao_teoria / hora_inicio_teoria
     """
-    hoje = date.today()
-    dia_semana = hoje.weekday()  # 0=Segunda, 1=Terça, ..., 6=Domingo
 
-    # Verifica no novo formato horarios_teoria
-    horarios = config.get("horarios_teoria")
-    if horarios:
-        for h in horarios:
-            if isinstance(h, dict) and h.get("dia") == dia_semana:
-                return True
-    else:
-        # Fallback para formato legado
-        if dia_semana in config.get("dias_teoria", DIAS_TEORIA_PADRAO):
-            return True
+    def __init__(self, config):
+        legado = {
+            "hora_transicao": config.get("hora_transicao_teoria", HORA_TRANSICAO_TEORIA_PADRAO),
+            "hora_inicio": config.get("hora_inicio_teoria", HORA_INICIO_TEORIA_PADRAO),
+        }
+        self.semana = [None] * 7
+        horarios = config.get("horarios_teoria")
+        if horarios:
+            for h in horarios:
+                if isinstance(h, dict) and _dia_da_semana(h.get("dia")) and self.semana[h["dia"]] is None:
+                    self.semana[h["dia"]] = self._compilar({
+                        "hora_transicao": h.get("hora_transicao", HORA_TRANSICAO_TEORIA_PADRAO),
+                        "hora_inicio": h.get("hora_inicio", HORA_INICIO_TEORIA_PADRAO),
+                    })
+        else:
+            # Fallback para formato legado
+            for dia in config.get("dias_teoria", DIAS_TEORIA_PADRAO):
+                if _dia_da_semana(dia):
+                    self.semana[dia] = self._compilar(legado)
+        # Dia de teoria sem horário próprio na tabela semanal (ex.: dia especial em formato string)
+        self._padrao = self._compilar(legado)
+
+        self.especiais = {}
+        com_horario_proprio = set()
+        for item in config.get("dias_especiais_teoria", []):
+            data_item = item.get("data", item) if isinstance(item, dict) else item
+            try:
+                dia = datetime.strptime(str(data_item), "%d/%m/%Y").date()
+            except ValueError:
+                logging.warning(f"Dia especial de teoria inválido ignorado: {data_item!r}")
+                continue
+            if isinstance(item, dict):
+                # Dia especial com horário próprio tem prioridade (vale a primeira entrada da data)
+                if dia in com_horario_proprio:
+                    continue
+                com_horario_proprio.add(dia)
+                self.especiais[dia] = self._compilar({
+                    "hora_transicao": item.get("hora_transicao", HORA_TRANSICAO_TEORIA_PADRAO),
+                    "hora_inicio": item.get("hora_inicio", HORA_INICIO_TEORIA_PADRAO),
+                })
+            elif dia not in self.especiais:
+                self.especiais[dia] = self.semana[dia.weekday()] or self._padrao
+
+    @staticmethod
+    def _compilar(horario):
+        return horario, _parse_hhmm(horario["hora_transicao"])
+
+    def _compilado(self, dia):
+        return self.especiais.get(dia) or self.semana[dia.weekday()]
+
+    def is_dia_teoria(self, dia):
+        return self._compilado(dia) is not None
+
+    def horario(self, dia):
+        """Horário de teoria do dia como dict {"hora_transicao", "hora_inicio"} ou None."""
+        compilado = self._compilado(dia)
+        return dict(compilado[0]) if compilado else None
+
+    def modalidade(self, instante):
+        """'Teoria' se `instante` for >= hora_transicao de um dia de teoria; senão 'Prática'."""
+        compilado = self._compilado(instante.date())
+        if compilado is None or compilado[1] is None:
+            return 'Prática'
+        return 'Teoria' if instante.time() >= compilado[1] else 'Prática'
+
+    def proxima_transicao(self, instante, max_dias=400):
+        """Próximo instante (datetime) em que a modalidade muda, ou None se não houver no horizonte."""
+        atual = self.modalidade(instante)
+        dia = instante.date()
+        for _ in range(max_dias):
+            candidatos = []
+            if dia != instante.date():
+                candidatos.append(datetime.combine(dia, dtime()))
+            compilado = self._compilado(dia)
+            if compilado is not None and compilado[1] is not None:
+                candidatos.append(datetime.combine(dia, compilado[1]))
+            for candidato in candidatos:
+                if candidato > instante and self.modalidade(candidato) != atual:
+                    return candidato
+            dia += timedelta(days=1)
+        return None
 
-    # Verifica se é um dia especial de teoria
-    data_hoje_str = hoje.strftime("%d/%m/%Y")
-    dias_especiais = config.get("dias_especiais_teoria", [])
+# Agenda da última configuração consultada. A configuração é tratada como
+# imutável: um novo dict (load_config) gera uma nova agenda.
+_agenda_cache = (None, None)
 
-    for item in dias_especiais:
-        data_item = item.get("data", item) if isinstance(item, dict) else item
-        if data_item == data_hoje_str:
-            logging.info(f"Dia especial de teoria: {data_hoje_str}")
-            return True
+def obter_agenda(config):
+    """Retorna a AgendaTeoria de `config`, montando-a apenas na primeira consulta."""
+    global _agenda_cache
+    config_cache, agenda = _agenda_cache
+    if config_cache is not config:
+        agenda = AgendaTeoria(config)
+        _agenda_cache = (config, agenda)
+    return agenda
 
-    return False
+class RelogioModalidade:
+    """
+    Modalidade vigente do quiosque. Só recalcula quando passa o instante da
+    próxima transição agendada (ex.: Prática→Teoria às 17:30), não a cada leitura.
+    """
+
+    def __init__(self, agenda, agora=None):
+        self.agenda = agenda
+        agora = agora or datetime.now()
+        self.atual = agenda.modalidade(agora)
+        self.proxima = agenda.proxima_transicao(agora)
+
+    def modalidade(self, agora=None):
+        """Retorna (modalidade, mudou) para o instante `agora`."""
+        agora = agora or datetime.now()
+        if self.proxima is None or agora < self.proxima:
+            return self.atual, False
+        anterior = self.atual
+        self.atual = self.agenda.modalidade(agora)
+        self.proxima = self.agenda.proxima_transicao(agora)
+        return self.atual, self.atual != anterior
+
+def is_dia_teoria(config, dia=None):
+    """
+    Verifica se hoje (ou `dia`) é um dia de teoria.
+
+    Retorna True se:
+    - O dia da semana consta em horarios_teoria (ou dias_teoria legado)
+    - OU a data está na lista dias_especiais_teoria
+    """
+    return obter_agenda(config).is_dia_teoria(dia or date.today())
 
 def _parse_hhmm(hhmm_str):
     """Converte string 'HH:MM' para objeto datetime.time. Retorna None se inválido."""
@@ -220,34 +456,7 @@ def get_horario_teoria_hoje(config):
 
     Retorna None se hoje não é dia de teoria.
     """
-    if not is_dia_teoria(config):
-        return None
-
-    hoje = date.today()
-    dia_semana = hoje.weekday()
-    data_hoje_str = hoje.strftime("%d/%m/%Y")
-
-    # 1. Dia especial com horário próprio
-    for item in config.get("dias_especiais_teoria", []):
-        if isinstance(item, dict) and item.get("data") == data_hoje_str:
-            return {
-                "hora_transicao": item.get("hora_transicao", HORA_TRANSICAO_TEORIA_PADRAO),
-                "hora_inicio": item.get("hora_inicio", HORA_INICIO_TEORIA_PADRAO),
-            }
-
-    # 2. horarios_teoria por dia da semana
-    for h in config.get("horarios_teoria", []):
-        if isinstance(h, dict) and h.get("dia") == dia_semana:
-            return {
-                "hora_transicao": h.get("hora_transicao", HORA_TRANSICAO_TEORIA_PADRAO),
-                "hora_inicio": h.get("hora_inicio", HORA_INICIO_TEORIA_PADRAO),
-            }
-
-    # 3. Campos legados / constantes
-    return {
-        "hora_transicao": config.get("hora_transicao_teoria", HORA_TRANSICAO_TEORIA_PADRAO),
-        "hora_inicio": config.get("hora_inicio_teoria", HORA_INICIO_TEORIA_PADRAO),
-    }
+    return obter_agenda(config).horario(date.today())
 
 def determinar_modalidade(config):
     """
@@ -258,33 +467,748 @@ def determinar_modalidade(config):
     - Se hoje É dia de teoria E hora atual >= hora_transicao → 'Teoria'
     - Caso contrário → 'Prática'
     """
-    horario = get_horario_teoria_hoje(config)
-    if horario is None:
-        return 'Prática'
+    return obter_agenda(config).modalidade(datetime.now())
+
+# ========== RECARGA DA CONFIGURAÇÃO (hot-reload) ==========
+
+# Chaves que alimentam a AgendaTeoria: se nenhuma mudar, a agenda é reaproveitada
+CHAVES_AGENDA = ("horarios_teoria", "dias_teoria", "dias_especiais_teoria",
+                 "hora_transicao_teoria", "hora_inicio_teoria")
+
+# Chaves lidas apenas na inicialização (journal, pool HTTP, pipeline)
+CHAVES_REQUEREM_REINICIO = ("journal_file", "journal_flush_seconds", "pipeline_workers",
+                            "pipeline_fila_max", "http_pool_max", "http_keepalive_seconds",
+                            "ledger_reconcile_seconds", "log_file", "registro_alunos_file",
+                            "sync_alunos_seconds", "metrics_port", "metrics_host",
+                            "trace_file", "cota_file", "controle_socket")
+
+def validar_config(config):
+    """
+    Valida uma configuração recém-lida antes de colocá-la em uso.
+    Retorna a lista de erros encontrados (vazia = configuração válida).
+    """
+    erros = []
+    endpoint = config.get("endpoint")
+    if not isinstance(endpoint, str) or not endpoint.startswith(("http://", "https://")):
+        erros.append(f"endpoint inválido: {endpoint!r}")
+    for chave in ("alunos", "nomes"):
+        if not isinstance(config.get(chave), dict):
+            erros.append(f"'{chave}' deve ser um objeto")
+    for chave in ("debounce_seconds", "max_pontos_por_modalidade", "envio_tentativas",
+                  "disjuntor_falhas", "disjuntor_aberto_seconds", "lote_max", "lote_janela_ms", "cota_diaria", "cota_por_minuto"):
+        valor = config.get(chave)
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor < 0:
+            erros.append(f"'{chave}' deve ser um número não negativo")
+    escala = str(config.get("escala_atual", ""))
+    if not (escala.isdigit() and 1 <= int(escala) <= 12):
+        erros.append(f"escala_atual inválida: {config.get('escala_atual')!r}")
+    if _parse_hhmm(config.get("hora_fim_teoria")) is None:
+        erros.append(f"hora_fim_teoria inválida: {config.get('hora_fim_teoria')!r}")
+
+    horarios = config.get("horarios_teoria") or []
+    if not isinstance(horarios, list):
+        erros.append("'horarios_teoria' deve ser uma lista")
+        horarios = []
+    for h in horarios:
+        if not isinstance(h, dict) or not _dia_da_semana(h.get("dia")):
+            erros.append(f"horário de teoria inválido: {h!r}")
+            continue
+        for campo in ("hora_transicao", "hora_inicio"):
+            if campo in h and _parse_hhmm(h[campo]) is None:
+                erros.append(f"{campo} inválida no dia {h['dia']}: {h[campo]!r}")
+    if not horarios:
+        for dia in config.get("dias_teoria") or []:
+            if not _dia_da_semana(dia):
+                erros.append(f"dia de teoria inválido: {dia!r}")
+
+    especiais = config.get("dias_especiais_teoria") or []
+    if not isinstance(especiais, list):
+        erros.append("'dias_especiais_teoria' deve ser uma lista")
+        especiais = []
+    for item in especiais:
+        data_item = item.get("data", item) if isinstance(item, dict) else item
+        try:
+            datetime.strptime(str(data_item), "%d/%m/%Y")
+        except ValueError:
+            erros.append(f"dia especial inválido: {data_item!r}")
+            continue
+        if isinstance(item, dict):
+            for campo in ("hora_transicao", "hora_inicio"):
+                if campo in item and _parse_hhmm(item[campo]) is None:
+                    erros.append(f"{campo} inválida em {data_item}: {item[campo]!r}")
+    return erros
+
+def reaproveitar_agenda(config_antiga, config_nova):
+    """Transfere a AgendaTeoria já montada para a nova configuração. Retorna True se reaproveitou."""
+    global _agenda_cache
+    config_cache, agenda = _agenda_cache
+    if config_cache is config_antiga and agenda is not None:
+        _agenda_cache = (config_nova, agenda)
+        return True
+    return False
+
+class _InotifyConfig(threading.Thread):
+    """
+    Observa o diretório do arquivo de configuração via inotify (Linux, ctypes).
+    Observar o diretório, e não o arquivo, cobre editores que salvam por
+    renomeação (o inode muda). Apenas sinaliza o evento; a leitura do arquivo
+    acontece na thread do loop, entre leituras de crachá.
+    """
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+
+    def __init__(self, caminho, sinal):
+        super().__init__(name="InotifyConfig", daemon=True)
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._nome = os.fsencode(caminho.name)
+        self._sinal = sinal
+        self._parar = threading.Event()
+        self._fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mascara = (self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+                   | self.IN_CREATE | self.IN_DELETE)
+        diretorio = os.fsencode(str(caminho.parent.resolve()))
+        if libc.inotify_add_watch(self._fd, diretorio, mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(erro, "inotify_add_watch falhou")
+
+    def run(self):
+        import select
+        import struct
+        try:
+            while not self._parar.is_set():
+                prontos, _, _ = select.select([self._fd], [], [], 1.0)
+                if not prontos:
+                    continue
+                try:
+                    buf = os.read(self._fd, 4096)
+                except BlockingIOError:
+                    continue
+                pos = 0
+                while pos + 16 <= len(buf):
+                    _wd, _mascara, _cookie, tamanho = struct.unpack_from("iIII", buf, pos)
+                    nome = buf[pos + 16:pos + 16 + tamanho].rstrip(b"\0")
+                    pos += 16 + tamanho
+                    if nome == self._nome:
+                        self._sinal.set()
+        finally:
+            os.close(self._fd)
+
+    def parar(self):
+        self._parar.set()
+
+class ObservadorConfig:
+    """
+    Recarrega o config_ponto.json somente quando ele muda de fato.
+
+    - Linux: inotify sinaliza a alteração; sem evento, verificar() não toca no disco.
+    - Demais sistemas (ou inotify indisponível): compara mtime/tamanho (um os.stat por leitura).
+
+    verificar(config) deve ser chamado pelo loop entre leituras: lê e valida o
+    arquivo alterado e devolve a nova configuração para troca atômica, com a
+    AgendaTeoria reaproveitada quando os horários de teoria não mudaram.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho or _config_carregada_de or Path(CONFIG_FILE))
+        self.recargas = 0
+        self.rejeitadas = 0
+        self._sinal = threading.Event()
+        self._assinatura = self._ler_assinatura()
+        self._inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _InotifyConfig(self.caminho, self._sinal)
+                self._inotify.start()
+            except (OSError, AttributeError) as e:
+                logging.warning(f"inotify indisponível, usando verificação por mtime: {e}")
+                self._inotify = None
 
-    hora_transicao = _parse_hhmm(horario["hora_transicao"])
-    hora_atual = _parse_hhmm(datetime.now().strftime("%H:%M"))
+    @property
+    def modo(self):
+        return "inotify" if self._inotify is not None else "mtime"
 
-    if hora_transicao is None or hora_atual is None:
-        return 'Prática'
+    def _ler_assinatura(self):
+        try:
+            st = os.stat(self.caminho)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def mudou(self):
+        """True se o arquivo mudou desde a última verificação."""
+        if self._inotify is not None:
+            if not self._sinal.is_set():
+                return False
+            self._sinal.clear()
+        assinatura = self._ler_assinatura()
+        if assinatura == self._assinatura:
+            return False
+        self._assinatura = assinatura
+        return assinatura is not None
+
+    def verificar(self, config):
+        """
+        Retorna None se nada mudou; senão (nova_config, alteracoes, erros).
+        nova_config é None quando o arquivo novo é inválido (a atual continua em uso).
+        """
+        if not self.mudou():
+            return None
+        try:
+            nova = ler_arquivo_config(self.caminho)
+        except (IOError, ValueError) as e:
+            # json.JSONDecodeError é ValueError
+            self.rejeitadas += 1
+            metricas.contar("ponto_config_recargas_total", resultado="rejeitada")
+            return None, [], [f"{self.caminho}: {e}"]
+        erros = validar_config(nova)
+        if erros:
+            self.rejeitadas += 1
+            metricas.contar("ponto_config_recargas_total", resultado="rejeitada")
+            return None, [], erros
+
+        alteracoes = sorted(k for k in set(config) | set(nova) if config.get(k) != nova.get(k))
+        if not alteracoes:
+            # Ex.: o próprio sistema salvou o cadastro que já estava em memória
+            return None
+        if not any(k in CHAVES_AGENDA for k in alteracoes):
+            reaproveitar_agenda(config, nova)
+        self.recargas += 1
+        metricas.contar("ponto_config_recargas_total", resultado="aplicada")
+        logging.info(f"Configuração recarregada de {self.caminho}: {', '.join(alteracoes)}")
+        reinicio = [k for k in alteracoes if k in CHAVES_REQUEREM_REINICIO]
+        if reinicio:
+            logging.warning(f"Alterações que só valem após reiniciar: {', '.join(reinicio)}")
+        return nova, alteracoes, []
+
+    def parar(self):
+        if self._inotify is not None:
+            self._inotify.parar()
+
+# ========== MÉTRICAS (Prometheus/OpenMetrics) ==========
+
+# nome → (tipo, ajuda)
+DESCRICAO_METRICAS = {
+    "ponto_leituras_total": ("counter", "Leituras de crachá por desfecho"),
+    "ponto_envios_total": ("counter", "POSTs ao Apps Script (inclui reenvios do journal) por desfecho"),
+    "ponto_config_recargas_total": ("counter", "Recargas do config_ponto.json por resultado"),
+    "ponto_envio_segundos": ("histogram", "Latência dos POSTs ao Apps Script"),
+    "ponto_consulta_pontos_segundos": ("histogram", "Latência das consultas getPontos ao Apps Script"),
+    "ponto_fila_profundidade": ("gauge", "Pontos aguardando envio na fila do modo pipeline"),
+    "ponto_journal_pendentes": ("gauge", "Pontos pendentes de envio no journal"),
+    "ponto_journal_rejeitados_total": ("counter", "Pontos do journal rejeitados em definitivo pelo servidor"),
+    "ponto_alunos_cadastrados": ("gauge", "Alunos no índice do registro de alunos"),
+    "ponto_disjuntor_estado": ("gauge", "Disjuntor do endpoint: 0 fechado, 1 meio-aberto, 2 aberto"),
+    "ponto_disjuntor_transicoes_total": ("counter", "Mudanças de estado do disjuntor do endpoint"),
+    "ponto_lote_batidas_total": ("counter", "Batidas enviadas dentro de POSTs em lote"),
+    "ponto_cota_chamadas_total": ("counter", "Chamadas ao Apps Script autorizadas pelo governador de cota"),
+    "ponto_cota_puladas_total": ("counter", "Consultas opcionais puladas para poupar a cota"),
+    "ponto_cota_chamadas_dia": ("gauge", "Chamadas ao Apps Script feitas hoje (persistido entre reinícios)"),
+    "ponto_cota_nivel": ("gauge", "Nível do governador de cota: 0 normal, 1 economia, 2 lote"),
+}
+
+# Limites (segundos) dos buckets dos histogramas de latência
+BUCKETS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def ponto_aceito(code, text):
+    """
+    True se o servidor aplicou o envio: HTTP 200 e resposta que não começa
+    com "Erro". O Web App responde 200 mesmo quando o doPost falha, então o
+    status sozinho não basta. Journal, console e métricas usam esta checagem.
+    """
+    return code == 200 and not str(text or "").lstrip().startswith("Erro")
+
+def ponto_aplicado(code, text):
+    """
+    True se o envio foi aceito e alterou a planilha: respostas "Sem ação…"
+    (aluno já completou a modalidade, teoria já aberta) são aceitas pelo
+    journal, mas não entram nas contagens do LedgerPontos.
+    """
+    return ponto_aceito(code, text) and not str(text or "").lstrip().startswith("Sem ação")
+
+def resultado_envio(code, text="", aceito=None):
+    """
+    Rótulo de desfecho de um envio: '200', 'erro_servidor' (200 com "Erro…"),
+    'nao_200' ou 'erro_envio'. `aceito` substitui ponto_aceito(code, text)
+    quando o chamador já o calculou (ex.: transição em duas chamadas).
+    """
+    if code is None:
+        return "erro_envio"
+    if code != 200:
+        return "nao_200"
+    if aceito is None:
+        aceito = ponto_aceito(code, text)
+    return "200" if aceito else "erro_servidor"
+
+class MetricasPonto:
+    """
+    Contadores, histogramas e medidores do processo no formato texto do
+    Prometheus. Registrar custa um lock e uma soma; os medidores (funções)
+    só são avaliados quando /metrics é consultado.
+    """
+
+    def __init__(self, buckets=BUCKETS_LATENCIA):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._medidores = {}
+
+    def contar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, segundos):
+        indice = bisect.bisect_left(self.buckets, segundos)
+        with self._lock:
+            hist = self._histogramas.get(nome)
+            if hist is None:
+                # contagens por bucket (+Inf no fim), soma, total
+                hist = self._histogramas[nome] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            hist[0][indice] += 1
+            hist[1] += segundos
+            hist[2] += 1
+
+    def medidor(self, nome, funcao):
+        """Registra (ou substitui) um medidor avaliado a cada exportação."""
+        self._medidores[nome] = funcao
+
+    @staticmethod
+    def _rotulos(pares):
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pares) + "}"
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = {nome: (list(h[0]), h[1], h[2]) for nome, h in self._histogramas.items()}
+        linhas = []
+        anunciadas = set()
+
+        def cabecalho(nome):
+            if nome not in anunciadas:
+                anunciadas.add(nome)
+                tipo, ajuda = DESCRICAO_METRICAS.get(nome, ("untyped", nome))
+                linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+
+        for (nome, pares), valor in contadores:
+            cabecalho(nome)
+            linhas.append(f"{nome}{self._rotulos(pares)} {valor}")
+        for nome in sorted(histogramas):
+            contagens, soma, total = histogramas[nome]
+            cabecalho(nome)
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f'{nome}_bucket{{le="{le}"}} {acumulado}')
+            linhas.append(f"{nome}_sum {soma:.6f}")
+            linhas.append(f"{nome}_count {total}")
+        for nome, funcao in sorted(self._medidores.items()):
+            try:
+                valor = funcao()
+            except Exception as e:
+                logging.debug(f"Medidor {nome} indisponível: {e}")
+                continue
+            cabecalho(nome)
+            linhas.append(f"{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+# Métricas do processo (sempre coletadas; expostas só com metrics_port)
+metricas = MetricasPonto()
+
+class ServidorMetricas:
+    """Expõe `metricas` em http://<metrics_host>:<metrics_port>/metrics numa thread própria."""
+
+    def __init__(self, registro, porta, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                corpo = registro.exportar().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
 
-    return 'Teoria' if hora_atual >= hora_transicao else 'Prática'
+        self.servidor = ThreadingHTTPServer((host, porta), Handler)
+        self.servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self.servidor.serve_forever, name="ServidorMetricas", daemon=True)
+        self._thread.start()
+        logging.info(f"Métricas disponíveis em http://{host}:{self.servidor.server_address[1]}/metrics")
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+# ========== RASTREAMENTO POR LEITURA (spans) ==========
+
+class SpanLeitura:
+    """
+    Tempos de uma leitura de crachá, fase a fase. marcar(fase) atribui à fase
+    o tempo decorrido desde a marca anterior; finalizar() grava a linha.
+    """
+
+    __slots__ = ("_tracador", "id", "serial", "inicio", "_t0", "_ultimo", "fases")
+
+    def __init__(self, tracador, id_leitura, serial, t0):
+        self._tracador = tracador
+        self.id = id_leitura
+        self.serial = serial
+        self._t0 = self._ultimo = t0
+        self.inicio = time.time() - (time.perf_counter() - t0)
+        self.fases = {}
+
+    def marcar(self, fase):
+        agora = time.perf_counter()
+        self.fases[fase] = self.fases.get(fase, 0.0) + (agora - self._ultimo) * 1000
+        self._ultimo = agora
+
+    def finalizar(self, resultado):
+        self._tracador.gravar({
+            "id": self.id,
+            "inicio": round(self.inicio, 3),
+            "serial": self.serial,
+            "resultado": resultado,
+            "total_ms": round((self._ultimo - self._t0) * 1000, 3),
+            "fases": {fase: round(ms, 3) for fase, ms in self.fases.items()},
+        })
+
+class _SpanNulo:
+    """Span sem efeito, usado quando o rastreamento está desligado."""
+
+    __slots__ = ()
+    id = None
+
+    def marcar(self, fase):
+        pass
+
+    def finalizar(self, resultado):
+        pass
+
+SPAN_NULO = _SpanNulo()
+
+class TracadorLeituras:
+    """
+    Grava um span por leitura em trace_file, em JSON Lines compacto:
+      {"id":"3f2a-17","inicio":…,"serial":"…","resultado":"200","total_ms":…,
+       "fases":{"stdin":…,"validacao":…,"config":…,"registro":…,"agenda":…,
+                "duplicata":…,"envio":…,"bipe":…}}
+    Sem trace_file, iniciar() devolve SPAN_NULO e o custo por leitura é nulo.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho) if caminho else None
+        self._arquivo = None
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self._prefixo = f"{os.getpid():x}"
+        if self.caminho is not None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+    @property
+    def ativo(self):
+        return self._arquivo is not None
+
+    def iniciar(self, serial, t0=None):
+        """Abre o span de uma leitura; t0 = perf_counter() do início da leitura do stdin."""
+        if self._arquivo is None:
+            return SPAN_NULO
+        with self._lock:
+            self._sequencia += 1
+            id_leitura = f"{self._prefixo}-{self._sequencia}"
+        return SpanLeitura(self, id_leitura, serial, t0 if t0 is not None else time.perf_counter())
+
+    def gravar(self, registro):
+        linha = json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.write(linha)
+                self._arquivo.flush()
+
+    def fechar(self):
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+
+# ========== PERFIL (--profile) ==========
+
+# Perfis cProfile ativos (thread principal + threads do pipeline); None = desligado
+_perfis = None
+
+def alvo_perfilado(alvo):
+    """Com --profile ativo, envolve o alvo de uma thread num cProfile próprio."""
+    if _perfis is None:
+        return alvo
+
+    import cProfile
+
+    def executar(*args, **kwargs):
+        perfil = cProfile.Profile()
+        _perfis.append(perfil)
+        perfil.enable()
+        try:
+            return alvo(*args, **kwargs)
+        finally:
+            perfil.disable()
+
+    return executar
+
+def executar_com_perfil(funcao, config, destino, limite=30):
+    """
+    Executa o loop `funcao(config)` sob cProfile (inclusive nas threads do
+    pipeline) e, ao sair, grava as estatísticas em `destino` (.prof, abrir com
+    pstats/snakeviz) e imprime as funções mais custosas.
+    """
+    import pstats
+    global _perfis
+    _perfis = []
+    try:
+        alvo_perfilado(funcao)(config)
+    finally:
+        perfis, _perfis = _perfis, None
+        for perfil in perfis:
+            perfil.disable()
+        estatisticas = pstats.Stats(perfis[0], stream=sys.stdout)
+        for perfil in perfis[1:]:
+            estatisticas.add(perfil)
+        destino = Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        estatisticas.dump_stats(str(destino))
+        print(f"\n=== Perfil ({len(perfis)} thread(s)) — gravado em {destino} ===\n")
+        estatisticas.sort_stats("cumulative").print_stats(limite)
+
+# ========== SESSÃO HTTP (keep-alive) ==========
+
+# Tempos por fase da requisição corrente, por thread (preenchidos pelas conexões cronometradas)
+_fases_http = threading.local()
+
+def _somar_fase(nome, valor):
+    fases = getattr(_fases_http, "atual", None)
+    if fases is not None:
+        fases[nome] = fases.get(nome, 0) + valor
+
+def _criar_adaptador_http(pool_max):
+    """
+    Cria um HTTPAdapter cujas conexões medem o tempo de TCP e de TLS.
+    O pool mantém conexões abertas para script.google.com e para o host do
+    redirecionamento (script.googleusercontent.com), reaproveitadas entre pontos.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _Cronometrada:
+        def _new_conn(self):
+            t0 = time.perf_counter()
+            sock = super()._new_conn()
+            self._tcp_ms = (time.perf_counter() - t0) * 1000
+            return sock
+
+        def connect(self):
+            self._tcp_ms = 0.0
+            t0 = time.perf_counter()
+            super().connect()
+            total_ms = (time.perf_counter() - t0) * 1000
+            _somar_fase("conexao_ms", self._tcp_ms)
+            _somar_fase("tls_ms", max(0.0, total_ms - self._tcp_ms))
+            _somar_fase("conexoes_novas", 1)
+
+    class _ConexaoHTTP(_Cronometrada, HTTPConnection):
+        pass
+
+    class _ConexaoHTTPS(_Cronometrada, HTTPSConnection):
+        pass
+
+    class _PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = _ConexaoHTTP
+
+    class _PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = _ConexaoHTTPS
+
+    class _AdaptadorCronometrado(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": _PoolHTTP, "https": _PoolHTTPS}
+
+    return _AdaptadorCronometrado(pool_connections=4, pool_maxsize=pool_max)
+
+class ClienteHTTP:
+    """
+    Sessão HTTP compartilhada entre threads, com pool de conexões keep-alive.
+
+    Cada requisição registra os tempos por fase (ultimas_fases()):
+      conexao_ms       - handshake TCP de conexões novas
+      tls_ms           - handshake TLS de conexões novas
+      primeiro_byte_ms - espera até o primeiro byte da resposta (todas as etapas do redirecionamento)
+      total_ms         - tempo total, incluindo leitura do corpo
+    """
+
+    def __init__(self, pool_max=HTTP_POOL_MAX):
+        self.pool_max = pool_max
+        self._sessao = None
+        self._lock_sessao = threading.Lock()
+        self._local = threading.local()
+        self._ultimo_uso = 0.0
+
+    @property
+    def sessao(self):
+        """Sessão criada no primeiro uso (normalmente pelo AquecedorConexoes, fora do loop)."""
+        if self._sessao is None:
+            with self._lock_sessao:
+                if self._sessao is None:
+                    sessao = importar_requests().Session()
+                    adaptador = _criar_adaptador_http(self.pool_max)
+                    sessao.mount("https://", adaptador)
+                    sessao.mount("http://", adaptador)
+                    self._sessao = sessao
+        return self._sessao
+
+    def requisicao(self, metodo, url, **kwargs):
+        fases = {"conexao_ms": 0.0, "tls_ms": 0.0, "conexoes_novas": 0}
+        _fases_http.atual = fases
+        t0 = time.perf_counter()
+        try:
+            r = self.sessao.request(metodo, url, **kwargs)
+        finally:
+            _fases_http.atual = None
+            self._ultimo_uso = time.monotonic()
+        espera_ms = sum(h.elapsed.total_seconds() for h in r.history) * 1000 + r.elapsed.total_seconds() * 1000
+        fases["primeiro_byte_ms"] = max(0.0, espera_ms - fases["conexao_ms"] - fases["tls_ms"])
+        fases["total_ms"] = (time.perf_counter() - t0) * 1000
+        fases["redirecionamentos"] = len(r.history)
+        self._local.fases = fases
+        logging.debug(f"HTTP {metodo} {r.status_code}: {formatar_fases(fases)}")
+        return r
+
+    def post(self, url, **kwargs):
+        return self.requisicao("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.requisicao("GET", url, **kwargs)
+
+    def ultimas_fases(self):
+        """Tempos por fase da última requisição feita pela thread atual (ou None)."""
+        return getattr(self._local, "fases", None)
+
+    def ocioso_ha(self):
+        """Segundos desde a última requisição."""
+        return time.monotonic() - self._ultimo_uso
+
+    def aquecer(self, endpoint):
+        """
+        Faz uma requisição leve (ping) para abrir as conexões com o Apps Script
+        e com o host do redirecionamento. Retorna os tempos por fase ou None.
+        """
+        try:
+            # 'aba' inexistente mantém a resposta pequena em versões do Code.gs sem 'ping'
+            self.get(endpoint, params={"action": "ping", "aba": "__ping__"}, timeout=10)
+            return self.ultimas_fases()
+        except Exception as e:
+            logging.debug(f"Falha ao aquecer conexões: {e}")
+            return None
+
+    def fechar(self):
+        if self._sessao is not None:
+            self._sessao.close()
+
+def formatar_fases(fases):
+    """Resumo legível dos tempos por fase de uma requisição."""
+    if not fases:
+        return "(sem medição)"
+    return (f"conexão {fases.get('conexao_ms', 0):.0f} ms | TLS {fases.get('tls_ms', 0):.0f} ms | "
+            f"1º byte {fases.get('primeiro_byte_ms', 0):.0f} ms | total {fases.get('total_ms', 0):.0f} ms | "
+            f"{fases.get('conexoes_novas', 0)} conexão(ões) nova(s), {fases.get('redirecionamentos', 0)} redirecionamento(s)")
+
+_cliente_http = None
+_cliente_http_lock = threading.Lock()
+
+def obter_cliente_http(config=None):
+    """Retorna o ClienteHTTP compartilhado do processo (criado na primeira chamada)."""
+    global _cliente_http
+    if _cliente_http is None:
+        with _cliente_http_lock:
+            if _cliente_http is None:
+                pool_max = (config or {}).get("http_pool_max", HTTP_POOL_MAX)
+                _cliente_http = ClienteHTTP(pool_max)
+    return _cliente_http
+
+class AquecedorConexoes(threading.Thread):
+    """
+    Mantém as conexões com o Apps Script aquecidas: ao iniciar, na virada
+    do dia e sempre que a sessão ficar ociosa por mais de http_keepalive_seconds.
+    Também renova a consulta de capacidades do servidor quando ela vence, para
+    que o modo pipeline só leia o cache (capacidades_em_cache).
+    """
+
+    def __init__(self, cliente, endpoint, intervalo_ocioso=HTTP_KEEPALIVE_SECONDS):
+        super().__init__(name="AquecedorConexoes", daemon=True)
+        self.cliente = cliente
+        self.endpoint = endpoint
+        self.intervalo_ocioso = intervalo_ocioso
+        self._parar = threading.Event()
+
+    def run(self):
+        dia_aquecido = None
+        while not self._parar.is_set():
+            hoje = date.today()
+            precisa = hoje != dia_aquecido or self.cliente.ocioso_ha() >= self.intervalo_ocioso
+            if precisa and governador.adquirir(essencial=False):
+                fases = self.cliente.aquecer(self.endpoint)
+                if fases is not None:
+                    dia_aquecido = hoje
+                    logging.info(f"Conexões com o endpoint aquecidas: {formatar_fases(fases)}")
+            capacidades_servidor(self.endpoint)
+            self._parar.wait(30)
+
+    def parar(self):
+        self._parar.set()
 
 def consultar_pontos_do_dia(serial, data_iso, endpoint):
     """
     Consulta o endpoint via GET para verificar pontos já registrados
-    para o aluno no dia informado.
+    para o aluno no dia informado (serial=None → todos os alunos).
 
     Retorna lista de registros ou None em caso de erro / sem suporte.
     Formato esperado da resposta: {"pontos": [...]} ou lista direta [...].
+    Consulta opcional: pulada (None) quando o governador de cota economiza.
     """
+    if not governador.adquirir(essencial=False):
+        logging.debug("Consulta getPontos pulada para poupar a cota do Apps Script.")
+        return None
     try:
         params = {
             "action": "getPontos",
-            "serial": serial,
             "data": data_iso,
         }
-        r = requests.get(endpoint, params=params, timeout=5)
+        if serial:
+            params["serial"] = serial
+        t0 = time.perf_counter()
+        try:
+            r = obter_cliente_http().get(endpoint, params=params, timeout=5)
+        finally:
+            metricas.observar("ponto_consulta_pontos_segundos", time.perf_counter() - t0)
         if r.status_code == 200:
             try:
                 data = r.json()
@@ -300,32 +1224,108 @@ def consultar_pontos_do_dia(serial, data_iso, endpoint):
         logging.debug(f"Erro ao consultar pontos do dia: {e}")
     return None
 
-def verificar_ponto_duplicado(serial, data_iso, modalidade, endpoint, config):
+def _modalidade_do_registro(p):
+    """Modalidade normalizada (sem acento, minúscula) de um registro de ponto, ou '' se ausente."""
+    for key in ("modalidade", "Modalidade", "Pratica_Teorica", "Pratica/Teorica", "tipo"):
+        val = p.get(key, "")
+        if val:
+            return _normalizar_texto(str(val))
+    return ""
+
+class LedgerPontos:
+    """
+    Registro local dos pontos do dia: (serial, data_iso, modalidade) → quantidade.
+
+    Semeado a partir do servidor (getPontos) na inicialização e na virada do
+    dia, e atualizado a cada ponto aceito, de modo que a verificação de
+    duplicatas é uma consulta em memória — inclusive sem conexão.
+    """
+
+    def __init__(self):
+        self._contagens = {}
+        self._ids_locais = {}  # id do journal já contabilizado → chave
+        self._lock = threading.Lock()
+        self.data_sincronizada = None  # data_iso da última semeadura vinda do servidor
+
+    @staticmethod
+    def _chave(serial, data_iso, modalidade):
+        return (str(serial), data_iso, _normalizar_texto(modalidade))
+
+    def contar(self, serial, data_iso, modalidade):
+        return self._contagens.get(self._chave(serial, data_iso, modalidade), 0)
+
+    def registrar(self, serial, data_iso, modalidade, id_tap=None):
+        """Contabiliza um ponto aceito (id_tap evita contar duas vezes o que a semeadura já incluiu)."""
+        chave = self._chave(serial, data_iso, modalidade)
+        with self._lock:
+            if id_tap is not None:
+                if id_tap in self._ids_locais:
+                    return
+                self._ids_locais[id_tap] = chave
+            self._contagens[chave] = self._contagens.get(chave, 0) + 1
+
+    def desfazer(self, id_tap):
+        """
+        Retira as batidas contabilizadas com `id_tap` (e a saída prática
+        "<id>:pratica" de uma transição) que o servidor não aplicou.
+        """
+        with self._lock:
+            for id_local in (id_tap, f"{id_tap}:pratica"):
+                chave = self._ids_locais.pop(id_local, None)
+                if chave is not None and self._contagens.get(chave, 0) > 0:
+                    self._contagens[chave] -= 1
+
+    def semear(self, data_iso, pontos_servidor=None, obter_locais=None):
+        """
+        Substitui todas as contagens pelas de `data_iso`.
+
+        pontos_servidor: registros retornados por getPontos (None = servidor indisponível)
+        obter_locais:    função que retorna [(id_tap, serial, modalidade)] do journal ainda
+                         não refletidos no servidor; chamada com o ledger travado para que
+                         nenhum ponto aceito durante a troca seja perdido.
+        """
+        novas = {}
+        for p in pontos_servidor or []:
+            modalidade = _modalidade_do_registro(p)
+            serial = p.get("SerialNumber") or p.get("serial")
+            if serial and modalidade:
+                chave = (str(serial), data_iso, modalidade)
+                novas[chave] = novas.get(chave, 0) + 1
+        with self._lock:
+            ids = {}
+            for id_tap, serial, modalidade in (obter_locais() if obter_locais else []):
+                chave = self._chave(serial, data_iso, modalidade)
+                novas[chave] = novas.get(chave, 0) + 1
+                ids[id_tap] = chave
+            self._contagens = novas
+            self._ids_locais = ids
+            if pontos_servidor is not None:
+                self.data_sincronizada = data_iso
+
+def verificar_ponto_duplicado(serial, data_iso, modalidade, endpoint, config, ledger=None):
     """
     Verifica se o aluno já atingiu o limite de pontos para a modalidade no dia.
 
+    Com `ledger` a verificação é local (sem acesso à rede); sem ele, consulta
+    o endpoint via getPontos.
+
     Retorna tupla (bloqueado: bool, contagem: int, mensagem: str).
     - bloqueado=True  → não deve registrar ponto
     - bloqueado=False → pode registrar (ou não foi possível verificar)
     """
     max_pontos = config.get("max_pontos_por_modalidade", MAX_PONTOS_POR_MODALIDADE)
-    pontos = consultar_pontos_do_dia(serial, data_iso, endpoint)
-
-    if pontos is None:
-        return False, 0, "⚠️  Não foi possível verificar duplicatas (servidor sem suporte a consulta)."
 
-    # Filtra registros da modalidade atual (aceita variações de campo e normaliza acentos)
-    modalidade_norm = _normalizar_texto(modalidade)
+    if ledger is not None:
+        contagem = ledger.contar(serial, data_iso, modalidade)
+    else:
+        pontos = consultar_pontos_do_dia(serial, data_iso, endpoint)
 
-    def _modalidade_match(p):
-        for key in ("modalidade", "Pratica_Teorica", "Pratica/Teorica", "tipo"):
-            val = p.get(key, "")
-            if val and _normalizar_texto(val) == modalidade_norm:
-                return True
-        return False
+        if pontos is None:
+            return False, 0, "⚠️  Não foi possível verificar duplicatas (servidor sem suporte a consulta)."
 
-    pontos_modalidade = [p for p in pontos if _modalidade_match(p)]
-    contagem = len(pontos_modalidade)
+        # Filtra registros da modalidade atual (aceita variações de campo e normaliza acentos)
+        modalidade_norm = _normalizar_texto(modalidade)
+        contagem = sum(1 for p in pontos if _modalidade_do_registro(p) == modalidade_norm)
 
     if contagem >= max_pontos:
         msg = (
@@ -337,11 +1337,60 @@ def verificar_ponto_duplicado(serial, data_iso, modalidade, endpoint, config):
 
     return False, contagem, f"Pontos de {modalidade} hoje: {contagem}/{max_pontos}"
 
+class ReconciliadorLedger(threading.Thread):
+    """
+    Ressincroniza o LedgerPontos com o servidor em segundo plano: na
+    inicialização, na virada do dia e a cada ledger_reconcile_seconds.
+    Pontos ainda pendentes no journal são somados às contagens do servidor.
+    """
+
+    def __init__(self, ledger, journal, endpoint, intervalo=LEDGER_RECONCILE_SECONDS):
+        super().__init__(name="ReconciliadorLedger", daemon=True)
+        self.ledger = ledger
+        self.journal = journal
+        self.endpoint = endpoint
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._agora = threading.Event()
+
+    def reconciliar(self):
+        data_iso = date.today().isoformat()
+        pontos = consultar_pontos_do_dia(None, data_iso, self.endpoint)
+        locais = []
+
+        def obter_locais():
+            if self.journal is not None:
+                # Sem servidor: todos os pontos do dia no journal; com servidor: só os não confirmados
+                locais.extend(self.journal.pontos_do_dia(data_iso, apenas_pendentes=pontos is not None))
+            return locais
+
+        self.ledger.semear(data_iso, pontos, obter_locais)
+        if pontos is None:
+            logging.info(f"Ledger semeado apenas com o journal local ({len(locais)} ponto(s) hoje).")
+        else:
+            logging.info(f"Ledger reconciliado com o servidor: {len(pontos)} ponto(s) + {len(locais)} pendente(s).")
+
+    def solicitar(self):
+        """Pede uma reconciliação imediata (ex.: virada do dia)."""
+        self._agora.set()
+
+    def run(self):
+        while not self._parar.is_set():
+            try:
+                self.reconciliar()
+            except Exception as e:
+                logging.error(f"Erro ao reconciliar ledger: {e}")
+            self._agora.wait(self.intervalo)
+            self._agora.clear()
+
+    def parar(self):
+        self._parar.set()
+        self._agora.set()
 
 def beep(kind="short"):
     """Feedback sonoro simples (works on Windows via winsound, else fallback to terminal bell)."""
     try:
-        if platform.system() == "Windows":
+        if EM_WINDOWS:
             import winsound
             if kind == "short":
                 winsound.Beep(800, 120)
@@ -358,69 +1407,1067 @@ def beep(kind="short"):
     except Exception:
         pass
 
-def send_to_endpoint(serial, nome, endpoint, is_teoria_day=False, escala="", email="", modalidade=None, tipo_registro=None):
-    """Envia POST JSON para o Apps Script."""
+# ========== RESILIÊNCIA DO ENVIO ==========
+
+class DisjuntorEndpoint:
+    """
+    Disjuntor (circuit breaker) e timeout adaptativo dos POSTs ao Apps Script.
+
+      fechado     → envios normais; `falhas_limite` falhas seguidas (erro de
+                    rede, 429 ou 5xx) abrem o disjuntor
+      aberto      → nenhum envio por `aberto_seconds`: os pontos ficam no journal
+      meio_aberto → um único envio de teste; sucesso fecha, falha reabre
+
+    O timeout acompanha a latência dos envios bem-sucedidos (média + 4 desvios,
+    como o RTO do TCP), limitado a [ENVIO_TIMEOUT_MIN, ENVIO_TIMEOUT_MAX].
+    """
+
+    FECHADO, MEIO_ABERTO, ABERTO = "fechado", "meio_aberto", "aberto"
+    _CODIGOS = {FECHADO: 0, MEIO_ABERTO: 1, ABERTO: 2}
+
+    def __init__(self, falhas_limite=DISJUNTOR_FALHAS, aberto_seconds=DISJUNTOR_ABERTO_SECONDS,
+                 tentativas=ENVIO_TENTATIVAS, relogio=time.monotonic):
+        self.falhas_limite = falhas_limite
+        self.aberto_seconds = aberto_seconds
+        self.tentativas = tentativas
+        self.estado = self.FECHADO
+        self.falhas_seguidas = 0
+        self.ouvintes = []  # funções (estado_antigo, estado_novo) chamadas a cada mudança
+        self._aberto_em = 0.0
+        self._teste_em_curso = False
+        self._media = None
+        self._desvio = 0.0
+        self._relogio = relogio  # injetável nos testes
+        self._lock = threading.Lock()
+
+    def configurar(self, config):
+        self.falhas_limite = max(1, int(config.get("disjuntor_falhas", DISJUNTOR_FALHAS)))
+        self.aberto_seconds = float(config.get("disjuntor_aberto_seconds", DISJUNTOR_ABERTO_SECONDS))
+        self.tentativas = max(1, int(config.get("envio_tentativas", ENVIO_TENTATIVAS)))
+
+    def reiniciar(self):
+        """Volta ao estado inicial (ex.: o endpoint mudou)."""
+        with self._lock:
+            self.falhas_seguidas = 0
+            self._teste_em_curso = False
+            self._media = None
+            self._desvio = 0.0
+            mudanca = self._mudar(self.FECHADO)
+        self._notificar(mudanca)
+
+    def codigo(self):
+        return self._CODIGOS[self.estado]
+
+    def timeout(self):
+        """Timeout (s) do próximo POST."""
+        with self._lock:
+            if self._media is None:
+                return ENVIO_TIMEOUT_MAX
+            return min(ENVIO_TIMEOUT_MAX, max(ENVIO_TIMEOUT_MIN, self._media + 4 * self._desvio))
+
+    def restante(self):
+        """Segundos até o próximo envio de teste (0 se o disjuntor não está aberto)."""
+        if self.estado != self.ABERTO:
+            return 0.0
+        return max(0.0, self.aberto_seconds - (self._relogio() - self._aberto_em))
+
+    def bloqueado(self):
+        """True enquanto nenhum envio deve ser tentado (não consome o envio de teste)."""
+        with self._lock:
+            if self.estado == self.ABERTO:
+                return self._relogio() - self._aberto_em < self.aberto_seconds
+            return self.estado == self.MEIO_ABERTO and self._teste_em_curso
+
+    def permitir(self):
+        """Autoriza um envio; no meio-aberto apenas um por vez (o envio de teste)."""
+        mudanca = None
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO:
+                if self._relogio() - self._aberto_em < self.aberto_seconds:
+                    return False
+                mudanca = self._mudar(self.MEIO_ABERTO)
+            permitido = not self._teste_em_curso
+            self._teste_em_curso = True
+        self._notificar(mudanca)
+        return permitido
+
+    def sucesso(self, latencia):
+        with self._lock:
+            if self._media is None:
+                self._media, self._desvio = latencia, latencia / 2
+            else:
+                self._desvio = 0.75 * self._desvio + 0.25 * abs(latencia - self._media)
+                self._media = 0.875 * self._media + 0.125 * latencia
+            self.falhas_seguidas = 0
+            self._teste_em_curso = False
+            mudanca = self._mudar(self.FECHADO)
+        self._notificar(mudanca)
+
+    def falha(self):
+        mudanca = None
+        with self._lock:
+            self.falhas_seguidas += 1
+            self._teste_em_curso = False
+            if self.estado == self.MEIO_ABERTO or (
+                    self.estado == self.FECHADO and self.falhas_seguidas >= self.falhas_limite):
+                self._aberto_em = self._relogio()
+                mudanca = self._mudar(self.ABERTO)
+        self._notificar(mudanca)
+
+    def descricao(self):
+        """Situação do disjuntor para o console."""
+        if self.estado == self.ABERTO:
+            return (f"🔴 Servidor instável ({self.falhas_seguidas} falha(s) seguida(s)) — envios suspensos "
+                    f"por {self.restante():.0f} s; os pontos ficam na fila local.")
+        if self.estado == self.MEIO_ABERTO:
+            return "🟡 Testando a conexão com o servidor..."
+        return "🟢 Conexão com o servidor normalizada."
+
+    def _mudar(self, novo):
+        antigo, self.estado = self.estado, novo
+        return (antigo, novo) if antigo != novo else None
+
+    def _notificar(self, mudanca):
+        if mudanca is None:
+            return
+        antigo, novo = mudanca
+        metricas.contar("ponto_disjuntor_transicoes_total", estado=novo)
+        if novo == self.ABERTO:
+            logging.warning(f"Disjuntor do endpoint ABERTO após {self.falhas_seguidas} falha(s) seguida(s): "
+                            f"envios suspensos por {self.aberto_seconds:.0f} s, pontos seguem para o journal.")
+        elif novo == self.MEIO_ABERTO:
+            logging.info("Disjuntor do endpoint meio-aberto: testando o servidor.")
+        else:
+            logging.info(f"Disjuntor do endpoint fechado (estava {antigo}): servidor respondendo.")
+        for ouvinte in list(self.ouvintes):
+            try:
+                ouvinte(antigo, novo)
+            except Exception as e:
+                logging.debug(f"Erro em ouvinte do disjuntor: {e}")
+
+disjuntor = DisjuntorEndpoint()
+
+# ========== COTA DO APPS SCRIPT ==========
+
+class GovernadorCota:
+    """
+    Orçamento de chamadas ao Apps Script: contador diário (persistido em
+    cota_file, para que um reinício não zere o dia) e balde de fichas
+    (token bucket) de cota_por_minuto, que dá o ritmo das requisições.
+
+    Níveis, conforme o uso se aproxima dos limites:
+      0 normal   → tudo liberado
+      1 economia → GETs opcionais (anti-duplicata, ping, aba Alunos) são
+                   pulados; a partir de COTA_FRACAO_ECONOMIA do
+                   dia ou com o balde abaixo de 1/4
+      2 lote     → além disso, os pontos vão para o journal e seguem em lote
+                   pelo reenvio; a partir de COTA_FRACAO_LOTE do dia
+    Chamadas essenciais (POST de ponto) nunca são descartadas, só espaçadas.
+    """
+
+    NORMAL, ECONOMIA, LOTE = 0, 1, 2
+    _NOMES = {NORMAL: "normal", ECONOMIA: "economia", LOTE: "lote"}
+
+    def __init__(self, diaria=COTA_DIARIA, por_minuto=COTA_POR_MINUTO, caminho=None, relogio=time.monotonic):
+        self.diaria = diaria
+        self.por_minuto = por_minuto
+        self.caminho = Path(caminho) if caminho else None
+        self.dia = date.today().isoformat()
+        self.chamadas = 0
+        self.puladas = 0
+        self._relogio = relogio  # injetável nos testes
+        self._fichas = float(por_minuto or 0)
+        self._atualizado = relogio()
+        self._nivel = self.NORMAL
+        self._nao_salvas = 0
+        self._lock = threading.Lock()
+
+    def configurar(self, config):
+        with self._lock:
+            antigo = self.por_minuto
+            self.diaria = int(config.get("cota_diaria") or 0)
+            self.por_minuto = int(config.get("cota_por_minuto") or 0)
+            # Balde cheio continua cheio com a nova capacidade
+            self._fichas = float(self.por_minuto) if self._fichas >= antigo else min(self._fichas, float(self.por_minuto))
+        caminho = config.get("cota_file", COTA_FILE_PADRAO)
+        if caminho and (self.caminho is None or Path(caminho) != self.caminho):
+            self.caminho = Path(caminho)
+            self.carregar()
+
+    def carregar(self):
+        """Retoma o uso do dia e as fichas gravados por uma execução anterior."""
+        try:
+            dados = json.loads(self.caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(dados, dict) or dados.get("dia") != date.today().isoformat():
+            return
+        with self._lock:
+            self.chamadas = max(self.chamadas, int(dados.get("chamadas", 0)))
+            self.puladas = max(self.puladas, int(dados.get("puladas", 0)))
+            if self.por_minuto and "fichas" in dados:
+                decorrido = max(0.0, time.time() - float(dados.get("em", 0)))
+                self._fichas = min(self._fichas, float(dados["fichas"]) + decorrido * self.por_minuto / 60)
+                self._atualizado = self._relogio()
+
+    def salvar(self):
+        if self.caminho is None:
+            return
+        with self._lock:
+            dados = {"dia": self.dia, "chamadas": self.chamadas, "puladas": self.puladas,
+                     "fichas": round(self._fichas, 3), "em": time.time()}
+            self._nao_salvas = 0
+        try:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.caminho.with_name(self.caminho.name + ".tmp")
+            tmp.write_text(json.dumps(dados), encoding="utf-8")
+            os.replace(tmp, self.caminho)
+        except OSError as e:
+            logging.debug(f"Não foi possível gravar o uso da cota: {e}")
+
+    def nivel(self):
+        with self._lock:
+            self._repor()
+            return self._calcular_nivel()
+
+    def adquirir(self, essencial=True):
+        """
+        Autoriza e contabiliza uma chamada ao Apps Script.
+
+        Essenciais esperam uma ficha do balde. Opcionais só seguem no nível
+        normal e com ficha disponível; caso contrário retornam False.
+        """
+        salvar = False
+        while True:
+            mudanca = None
+            with self._lock:
+                self._repor()
+                nivel = self._calcular_nivel()
+                sem_ficha = self.por_minuto and self._fichas < 1
+                if not essencial and (nivel != self.NORMAL or sem_ficha):
+                    self.puladas += 1
+                    mudanca = self._mudar(nivel)
+                    permitido = False
+                elif not sem_ficha:
+                    if self.por_minuto:
+                        self._fichas -= 1
+                    self.chamadas += 1
+                    self._nao_salvas += 1
+                    salvar = self._nao_salvas >= 20
+                    mudanca = self._mudar(self._calcular_nivel())
+                    permitido = True
+                else:
+                    permitido = None
+                    espera = (1 - self._fichas) * 60 / self.por_minuto
+            self._notificar(mudanca)
+            if permitido is not None:
+                break
+            time.sleep(espera)
+        if permitido:
+            metricas.contar("ponto_cota_chamadas_total", tipo="essencial" if essencial else "opcional")
+            if salvar:
+                self.salvar()
+        else:
+            metricas.contar("ponto_cota_puladas_total")
+        return permitido
+
+    def resumo(self):
+        limite = f"/{self.diaria}" if self.diaria else ""
+        return (f"{self.chamadas}{limite} chamada(s) hoje, {self.puladas} consulta(s) pulada(s), "
+                f"nível {self._NOMES[self.nivel()]}")
+
+    def _repor(self):
+        hoje = date.today().isoformat()
+        if hoje != self.dia:
+            self.dia, self.chamadas, self.puladas = hoje, 0, 0
+        agora = self._relogio()
+        if self.por_minuto:
+            self._fichas = min(float(self.por_minuto),
+                               self._fichas + (agora - self._atualizado) * self.por_minuto / 60)
+        self._atualizado = agora
+
+    def _calcular_nivel(self):
+        if self.diaria:
+            uso = self.chamadas / self.diaria
+            if uso >= COTA_FRACAO_LOTE:
+                return self.LOTE
+            if uso >= COTA_FRACAO_ECONOMIA:
+                return self.ECONOMIA
+        if self.por_minuto and self._fichas < self.por_minuto / 4:
+            return self.ECONOMIA
+        return self.NORMAL
+
+    def _mudar(self, novo):
+        antigo, self._nivel = self._nivel, novo
+        return (antigo, novo) if antigo != novo else None
+
+    def _notificar(self, mudanca):
+        if mudanca is None:
+            return
+        antigo, novo = mudanca
+        texto = f"Cota do Apps Script: nível {self._NOMES[antigo]} → {self._NOMES[novo]} ({self.chamadas} chamada(s) hoje)"
+        if novo > antigo:
+            logging.warning(texto)
+        else:
+            logging.info(texto)
+
+governador = GovernadorCota()
+
+def envio_repetivel(code, text=""):
+    """True para falhas transitórias: erro de rede/timeout, 429, 5xx ou servidor ocupado."""
+    if code == 200:
+        return servidor_ocupado(text)
+    return code is None or code == 429 or code >= 500
+
+def servidor_ocupado(text):
+    """True se o Code.gs não obteve o lock a tempo (resposta 200 com ERRO_SERVIDOR_OCUPADO)."""
+    return str(text or "").lstrip().startswith(ERRO_SERVIDOR_OCUPADO)
+
+def espera_backoff(tentativa, base=ENVIO_BACKOFF_BASE, maximo=ENVIO_BACKOFF_MAX):
+    """Espera (s) antes da `tentativa`-ésima repetição: exponencial com jitter total."""
+    return random.uniform(0, min(maximo, base * 2 ** (tentativa - 1)))
+
+def instante_ponto():
+    """Agora, no fuso America/Sao_Paulo (ou no fuso local, sem base de fusos)."""
+    if FUSO_PONTO is not None:
+        return datetime.now(FUSO_PONTO)
+    return datetime.now().astimezone()
+
+def montar_payload(serial, nome, is_teoria_day=False, escala="", email="", modalidade=None, tipo_registro=None):
+    """
+    Monta o payload JSON de um ponto no formato esperado pelo doPost.
+
+    DataHoraLeitura (ISO 8601 com fuso) é a hora da batida, usada pelo
+    servidor no lugar da hora de chegada; IdempotencyKey identifica a batida
+    em todos os reenvios (o journal guarda o payload pronto).
+    """
     payload = {
         "SerialNumber": serial,
         "NomeCompleto": nome,
         "EmailHC": email,
         "IsDiaTeoria": is_teoria_day,
-        "Escala": escala
+        "Escala": escala,
+        "DataHoraLeitura": instante_ponto().isoformat(timespec="seconds"),
+        "IdempotencyKey": uuid.uuid4().hex
     }
     if modalidade is not None:
         payload["Modalidade"] = modalidade
     if tipo_registro is not None:
         payload["TipoRegistro"] = tipo_registro
+    return payload
+
+def enviar_payload(payload, endpoint, tentativas=1):
+    """
+    Envia um payload já montado. Retorna (status_code, texto) ou (None, erro).
+
+    Falhas transitórias são repetidas até `tentativas` vezes, com backoff.
+    Com o disjuntor aberto nenhuma requisição é feita: retorna (None, motivo)
+    de imediato e o ponto segue para o journal.
+    """
+    for tentativa in range(1, tentativas + 1):
+        if not disjuntor.permitir():
+            metricas.contar("ponto_envios_total", resultado="disjuntor_aberto")
+            return None, f"servidor indisponível (disjuntor aberto; novo teste em {disjuntor.restante():.0f} s)"
+        governador.adquirir(essencial=True)
+        t0 = time.perf_counter()
+        try:
+            r = obter_cliente_http().post(endpoint, json=payload, timeout=disjuntor.timeout())
+            code, text = r.status_code, r.text
+        except Exception as e:
+            code, text = None, str(e)
+        duracao = time.perf_counter() - t0
+        metricas.observar("ponto_envio_segundos", duracao)
+        metricas.contar("ponto_envios_total", resultado=resultado_envio(code, text))
+        if not envio_repetivel(code, text):
+            disjuntor.sucesso(duracao)
+            break
+        disjuntor.falha()
+        if tentativa < tentativas:
+            time.sleep(espera_backoff(tentativa))
+    return code, text
+
+def send_to_endpoint(serial, nome, endpoint, is_teoria_day=False, escala="", email="", modalidade=None, tipo_registro=None):
+    """Envia POST JSON para o Apps Script."""
+    payload = montar_payload(serial, nome, is_teoria_day, escala, email, modalidade, tipo_registro)
+    return enviar_payload(payload, endpoint, disjuntor.tentativas)
+
+# ========== JOURNAL (fila local durável) ==========
+
+class JournalPonto:
+    """
+    Fila local durável (SQLite) dos pontos validados.
+
+    Todo ponto é gravado aqui ANTES de qualquer acesso à rede. O envio ao
+    Apps Script apenas marca a entrada como confirmada; se falhar, a entrada
+    volta a 'pendente' e é reenviada pelo FlusherJournal. Uma recusa
+    definitiva (ex.: 4xx, "Erro: …" do doPost) ou JOURNAL_MAX_RECUSAS falhas
+    transitórias respondidas pelo servidor levam a entrada a 'rejeitado',
+    para que ela não trave a fila.
+
+    Estados: 'pendente' → 'enviando' → 'confirmado' | 'rejeitado'
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        if not self.caminho.parent.exists():
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None → autocommit; transações explícitas onde necessário
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS taps (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                criado_em REAL NOT NULL,
+                endpoint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pendente',
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                ultimo_erro TEXT,
+                resposta TEXT,
+                confirmado_em REAL,
+                recusas INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(taps)")}
+        if "recusas" not in colunas:
+            # Journal criado por uma versão anterior
+            self._conn.execute("ALTER TABLE taps ADD COLUMN recusas INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_taps_status ON taps(status, id)")
+        # Entradas presas em 'enviando' (programa caiu durante o envio) voltam para a fila
+        self._conn.execute("UPDATE taps SET status = 'pendente' WHERE status = 'enviando'")
+
+    def registrar(self, payload, endpoint, reservar=False):
+        """
+        Grava um ponto no journal e retorna seu id.
+        Com reservar=True a entrada já nasce 'enviando' (envio imediato pelo chamador).
+        """
+        status = "enviando" if reservar else "pendente"
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO taps (criado_em, endpoint, payload, status) VALUES (?, ?, ?, ?)",
+                (time.time(), endpoint, json.dumps(payload, ensure_ascii=False), status)
+            )
+            return cur.lastrowid
+
+    def reservar_pendentes(self, limite=JOURNAL_LOTE_ENVIO):
+        """Marca até `limite` entradas pendentes como 'enviando' e as retorna como [(id, endpoint, payload)]."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                linhas = self._conn.execute(
+                    "SELECT id, endpoint, payload FROM taps WHERE status = 'pendente' ORDER BY id LIMIT ?",
+                    (limite,)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE taps SET status = 'enviando' WHERE id = ?",
+                    [(linha[0],) for linha in linhas]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(id_tap, endpoint, json.loads(payload)) for id_tap, endpoint, payload in linhas]
+
+    def confirmar(self, id_tap, resposta=""):
+        """Marca a entrada como confirmada pelo servidor."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE taps SET status = 'confirmado', tentativas = tentativas + 1, "
+                "resposta = ?, confirmado_em = ? WHERE id = ?",
+                (str(resposta)[:500], time.time(), id_tap)
+            )
+
+    def devolver(self, id_tap, erro="", recusa=False, max_recusas=JOURNAL_MAX_RECUSAS):
+        """
+        Devolve a entrada para a fila após uma falha de envio. Com recusa=True
+        (o servidor respondeu com falha transitória) a recusa é contada e, ao
+        chegar a `max_recusas`, a entrada é rejeitada. Retorna o novo status.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE taps SET tentativas = tentativas + 1, ultimo_erro = ?, recusas = recusas + ?, "
+                "status = CASE WHEN recusas + ? >= ? THEN 'rejeitado' ELSE 'pendente' END WHERE id = ?",
+                (str(erro)[:500], int(recusa), int(recusa), max_recusas, id_tap)
+            )
+            linha = self._conn.execute("SELECT status FROM taps WHERE id = ?", (id_tap,)).fetchone()
+        return linha[0] if linha else None
+
+    def expirar(self, max_idade_dias=JOURNAL_MAX_IDADE_DIAS):
+        """
+        Rejeita as pendentes gravadas há mais de `max_idade_dias`: o Code.gs só
+        lembra as IdempotencyKey por esse prazo. Retorna quantas foram rejeitadas.
+        """
+        limite = time.time() - max_idade_dias * 86400
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE taps SET status = 'rejeitado', ultimo_erro = ? WHERE status = 'pendente' AND criado_em < ?",
+                (f"expirado: mais de {max_idade_dias} dias sem confirmação do servidor", limite)
+            )
+        return cur.rowcount
+
+    def rejeitar(self, id_tap, erro=""):
+        """Tira a entrada da fila: o servidor recusou o ponto em definitivo."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE taps SET status = 'rejeitado', tentativas = tentativas + 1, ultimo_erro = ? WHERE id = ?",
+                (str(erro)[:500], id_tap)
+            )
+
+    def pontos_do_dia(self, data_iso, apenas_pendentes=False):
+        """
+        Pontos gravados em `data_iso` como [(id, serial, modalidade)].
+        Entradas sem Modalidade no payload, as rejeitadas e as confirmadas com
+        "Sem ação…" (não aplicadas pelo servidor) são ignoradas; uma transição conta
+        como duas (saída prática com id "<id>:pratica" + entrada teórica).
+        """
+        inicio = datetime.combine(date.fromisoformat(data_iso), dtime()).timestamp()
+        sql = ("SELECT id, payload FROM taps WHERE criado_em >= ? AND criado_em < ?"
+               " AND status != 'rejeitado' AND NOT (status = 'confirmado' AND resposta LIKE 'Sem ação%')")
+        if apenas_pendentes:
+            sql += " AND status != 'confirmado'"
+        with self._lock:
+            linhas = self._conn.execute(sql, (inicio, inicio + 86400)).fetchall()
+        pontos = []
+        for id_tap, payload in linhas:
+            dados = json.loads(payload)
+            if dados.get("Modalidade"):
+                pontos.append((id_tap, dados.get("SerialNumber", ""), dados["Modalidade"]))
+            if dados.get("Acao") == ACAO_TRANSICAO:
+                # A transição também fecha a prática (ver contabilizar_transicao)
+                pontos.append((f"{id_tap}:pratica", dados.get("SerialNumber", ""), "Prática"))
+        return pontos
+
+    def contar(self):
+        """Retorna um dict {status: quantidade}."""
+        with self._lock:
+            linhas = self._conn.execute("SELECT status, COUNT(*) FROM taps GROUP BY status").fetchall()
+        return dict(linhas)
+
+    def contar_pendentes(self):
+        """Quantidade de pontos ainda não confirmados pelo servidor."""
+        contagem = self.contar()
+        return contagem.get("pendente", 0) + contagem.get("enviando", 0)
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+def concluir_no_journal(journal, id_tap, code, text, ledger=None):
+    """
+    Confirma a entrada do journal (ponto_aceito), a devolve à fila após uma
+    falha transitória (envio_repetivel) ou a rejeita em definitivo.
+    Com `ledger`, uma resposta aceita mas não aplicada ("Sem ação…") ou uma
+    rejeição retira a batida das contagens do dia.
+
+    Retorna o novo status da entrada ('confirmado', 'pendente' ou 'rejeitado').
+    """
+    if ponto_aceito(code, text):
+        journal.confirmar(id_tap, text)
+        if ledger is not None and not ponto_aplicado(code, text):
+            ledger.desfazer(id_tap)
+        return "confirmado"
+    erro = text if code is None else f"HTTP {code}: {text}"
+    if envio_repetivel(code, text):
+        # Sem resposta (rede, disjuntor) não conta recusa: só o servidor respondendo com falha
+        status = journal.devolver(id_tap, erro, recusa=code is not None)
+    else:
+        journal.rejeitar(id_tap, erro)
+        status = "rejeitado"
+    if status == "rejeitado":
+        metricas.contar("ponto_journal_rejeitados_total")
+        logging.error(f"Ponto #{id_tap} rejeitado pelo servidor e retirado do journal: {erro}")
+        if ledger is not None:
+            ledger.desfazer(id_tap)
+    return status
+
+def enviar_do_journal(journal, id_tap, payload, endpoint, ledger=None):
+    """Envia uma entrada já reservada do journal e registra o resultado."""
+    code, text = enviar_payload(payload, endpoint)
+    concluir_no_journal(journal, id_tap, code, text, ledger)
+    return code, text
+
+def tamanho_lote(lote_max, endpoint):
+    """Batidas por POST: `lote_max` se o servidor aceita a ação 'lote', senão 1."""
+    lote_max = int(lote_max or 1)
+    if lote_max <= 1:
+        return 1
+    acoes = capacidades_servidor(endpoint)
+    return lote_max if acoes is not None and ACAO_LOTE in acoes else 1
+
+def enviar_lote(payloads, endpoint, tentativas=1):
+    """
+    Envia várias batidas em um único POST ({"Acao": "lote", "Taps": [...]}).
+
+    Retorna [(status_code, texto)] alinhado a `payloads`: a mensagem do
+    servidor para cada batida ou, se o POST falhou, o erro do lote inteiro.
+    Batidas cuja mensagem começa com "Erro" voltam como (None, mensagem) para
+    continuar no journal.
+    """
+    code, text = enviar_payload({"Acao": ACAO_LOTE, "Taps": payloads}, endpoint, tentativas)
+    if not ponto_aceito(code, text):
+        return [(code, text)] * len(payloads)
+    try:
+        resultados = json.loads(text)["resultados"]
+    except (ValueError, KeyError, TypeError):
+        return [(None, f"resposta de lote inválida: {text[:200]}")] * len(payloads)
+    metricas.contar("ponto_lote_batidas_total", len(payloads))
+    saida = []
+    for i, payload in enumerate(payloads):
+        r = resultados[i] if i < len(resultados) and isinstance(resultados[i], dict) else {}
+        mensagem = str(r.get("mensagem", ""))
+        if not mensagem or r.get("IdempotencyKey") not in (None, payload.get("IdempotencyKey")):
+            saida.append((None, "batida sem resultado na resposta do lote"))
+        elif not ponto_aceito(200, mensagem):
+            saida.append((None, mensagem))
+        else:
+            saida.append((200, mensagem))
+    return saida
+
+def blocos_de_envio(itens, tamanho, endpoint_de):
+    """Agrupa itens consecutivos com o mesmo endpoint_de(item) em blocos de até `tamanho`."""
+    bloco = []
+    for item in itens:
+        if bloco and (len(bloco) >= tamanho or endpoint_de(item) != endpoint_de(bloco[0])):
+            yield bloco
+            bloco = []
+        bloco.append(item)
+    if bloco:
+        yield bloco
+
+def registrar_ponto(journal, serial, nome, endpoint, is_teoria_day=False, escala="", email="", modalidade=None, tipo_registro=None, ledger=None):
+    """
+    Grava o ponto no journal e tenta o envio imediato.
+
+    Retorna (status_code, texto) como send_to_endpoint. Em caso de falha o
+    ponto permanece no journal e será reenviado em segundo plano.
+    Sem journal (journal=None) o comportamento é o de send_to_endpoint.
+    Com `ledger` e `modalidade`, o ponto é contabilizado assim que aceito.
+    """
+    payload = montar_payload(serial, nome, is_teoria_day, escala, email, modalidade, tipo_registro)
+    data_iso = date.today().isoformat()
+    id_tap = None
+    if journal is not None:
+        try:
+            id_tap = journal.registrar(payload, endpoint, reservar=True)
+        except sqlite3.Error as e:
+            logging.error(f"Falha ao gravar ponto no journal ({e}); enviando sem fila local.")
+    if id_tap is None:
+        code, text = enviar_payload(payload, endpoint, disjuntor.tentativas)
+        if ponto_aplicado(code, text) and ledger is not None and modalidade:
+            ledger.registrar(serial, data_iso, modalidade)
+    else:
+        if ledger is not None and modalidade:
+            ledger.registrar(serial, data_iso, modalidade, id_tap)
+        if governador.nivel() >= GovernadorCota.LOTE:
+            # Cota quase esgotada: o reenvio do journal junta os pontos em lotes
+            code, text = None, "cota do Apps Script quase esgotada — envio adiado para o próximo lote"
+            journal.devolver(id_tap, text)
+        else:
+            code, text = enviar_do_journal(journal, id_tap, payload, endpoint, ledger)
+    metricas.contar("ponto_leituras_total", resultado=resultado_envio(code, text))
+    return code, text
+
+class FlusherJournal(threading.Thread):
+    """
+    Thread em segundo plano que reenvia ao endpoint os pontos pendentes do journal.
+    Após falhas seguidas o intervalo cresce com backoff exponencial e jitter
+    (até JOURNAL_BACKOFF_MAX); com o disjuntor aberto o ciclo é pulado.
+    Se o servidor aceita lotes, até `lote_max` pendentes seguem em cada POST.
+    """
+
+    def __init__(self, journal, intervalo=JOURNAL_FLUSH_SECONDS, lote=JOURNAL_LOTE_ENVIO, lote_max=LOTE_MAX):
+        super().__init__(name="FlusherJournal", daemon=True)
+        self.journal = journal
+        self.intervalo = intervalo
+        self.lote = lote
+        self.lote_max = lote_max
+        self.ledger = None  # LedgerPontos, ligado pelo ServicosFundo (estorna respostas "Sem ação")
+        self.falhas_seguidas = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.proxima_espera()):
+            try:
+                self.drenar()
+            except Exception as e:
+                logging.error(f"Erro ao drenar journal: {e}")
+
+    def proxima_espera(self):
+        """Segundos até o próximo ciclo de reenvio."""
+        if not self.falhas_seguidas:
+            return self.intervalo
+        return self.intervalo + espera_backoff(self.falhas_seguidas, self.intervalo, JOURNAL_BACKOFF_MAX)
+
+    def drenar(self):
+        """Envia pendentes até esvaziar a fila ou ocorrer uma falha transitória. Retorna quantos foram confirmados."""
+        enviados = 0
+        expirados = self.journal.expirar()
+        if expirados:
+            metricas.contar("ponto_journal_rejeitados_total", expirados)
+            logging.error(f"{expirados} ponto(s) do journal expirados sem confirmação (mais de "
+                          f"{JOURNAL_MAX_IDADE_DIAS} dias): não serão reenviados.")
+        while not self._parar.is_set():
+            if disjuntor.bloqueado():
+                break
+            entradas = self.journal.reservar_pendentes(self.lote)
+            if not entradas:
+                break
+            tamanho = tamanho_lote(self.lote_max, entradas[0][1])
+            feitos = 0
+            for bloco in blocos_de_envio(entradas, tamanho, lambda e: e[1]):
+                endpoint = bloco[0][1]
+                if len(bloco) == 1:
+                    resultados = [enviar_payload(bloco[0][2], endpoint)]
+                else:
+                    resultados = enviar_lote([payload for _, _, payload in bloco], endpoint)
+                falha = None
+                for (id_tap, _, payload), (code, text) in zip(bloco, resultados):
+                    status = concluir_no_journal(self.journal, id_tap, code, text, self.ledger)
+                    if status == "confirmado":
+                        enviados += 1
+                        logging.info(f"Ponto pendente #{id_tap} ({payload.get('SerialNumber')}) confirmado pelo servidor.")
+                    elif status == "pendente" and falha is None:
+                        falha = (code, text)
+                feitos += len(bloco)
+                if falha is not None:
+                    # Falha transitória (uplink instável, servidor ocupado): devolve o restante
+                    # do lote e tenta no próximo ciclo. Pontos rejeitados não interrompem a fila
+                    for id_restante, _, _ in entradas[feitos:]:
+                        self.journal.devolver(id_restante, "adiado: falha anterior no lote")
+                    self.falhas_seguidas += 1
+                    logging.warning(f"Reenvio do journal interrompido: {falha[0]} - {falha[1]} "
+                                    f"(próxima tentativa em ~{self.proxima_espera():.0f} s)")
+                    return enviados
+                self.falhas_seguidas = 0
+        return enviados
+
+    def parar(self):
+        self._parar.set()
+
+def iniciar_journal(config):
+    """
+    Abre o journal configurado e inicia o FlusherJournal.
+    Retorna (journal, flusher) ou (None, None) se o journal estiver desativado ou indisponível.
+    """
+    caminho = config.get("journal_file", JOURNAL_FILE_PADRAO)
+    if not caminho:
+        return None, None
+    try:
+        journal = JournalPonto(caminho)
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Não foi possível abrir o journal {caminho}: {e}")
+        return None, None
+    pendentes = journal.contar_pendentes()
+    if pendentes:
+        logging.info(f"Journal: {pendentes} ponto(s) pendente(s) de envio.")
+    flusher = FlusherJournal(
+        journal,
+        config.get("journal_flush_seconds", JOURNAL_FLUSH_SECONDS),
+        lote_max=config.get("lote_max", LOTE_MAX)
+    )
+    flusher.start()
+    return journal, flusher
+
+def encerrar_journal(journal, flusher):
+    """Para o flusher e fecha o journal (pendentes permanecem gravados em disco)."""
+    if flusher is not None:
+        flusher.parar()
+        flusher.join(timeout=2)
+    if journal is not None:
+        pendentes = journal.contar_pendentes()
+        if pendentes:
+            logging.warning(f"Journal: {pendentes} ponto(s) pendente(s) serão reenviados na próxima execução.")
+        journal.fechar()
+
+# ========== TRANSIÇÃO PRÁTICA → TEORIA ==========
+
+_capacidades = {}  # endpoint → (instante da consulta, frozenset de ações compostas)
+_capacidades_lock = threading.Lock()
+
+def capacidades_servidor(endpoint, forcar=False):
+    """
+    Ações compostas aceitas pelo doPost do endpoint (GET action=capacidades),
+    guardadas em memória por CAPACIDADES_TTL_SECONDS.
+
+    Retorna um frozenset (vazio em versões do Code.gs sem a consulta). Se o
+    servidor não respondeu, retorna a última resposta conhecida (None se não
+    houver) e guarda a falha pelo mesmo TTL: durante uma queda o
+    AquecedorConexoes não gasta uma ficha essencial a cada ciclo.
+    """
+    with _capacidades_lock:
+        salvo = _capacidades.get(endpoint)
+    if salvo is not None and not forcar and time.monotonic() - salvo[0] < CAPACIDADES_TTL_SECONDS:
+        return salvo[1]
+    # Essencial para o governador: é dela que depende a troca para o envio em lote
+    governador.adquirir(essencial=True)
+    resultado = None
     try:
-        r = requests.post(endpoint, json=payload, timeout=10)
-        return r.status_code, r.text
+        # 'aba' inexistente mantém a resposta pequena em versões do Code.gs sem 'capacidades'
+        r = obter_cliente_http().get(
+            endpoint, params={"action": "capacidades", "aba": "__capacidades__"}, timeout=5
+        )
+        if r.status_code == 200:
+            try:
+                dados = r.json()
+            except ValueError:
+                dados = {}
+            acoes = dados.get("acoes") if isinstance(dados, dict) else None
+            resultado = frozenset(str(a) for a in acoes) if isinstance(acoes, list) else frozenset()
     except Exception as e:
-        return None, str(e)
+        logging.debug(f"Erro ao consultar capacidades do servidor: {e}")
+    with _capacidades_lock:
+        if resultado is None:
+            salvo = _capacidades.get(endpoint)
+            resultado = None if salvo is None else salvo[1]
+        _capacidades[endpoint] = (time.monotonic(), resultado)
+    return resultado
+
+def capacidades_em_cache(endpoint):
+    """Última consulta de capacidades do endpoint (mesmo vencida) ou None; nunca acessa a rede."""
+    with _capacidades_lock:
+        salvo = _capacidades.get(endpoint)
+    return None if salvo is None else salvo[1]
+
+def servidor_suporta_transicao(endpoint, consultar=True):
+    """
+    True se o doPost do endpoint aplica a transição em uma única requisição.
+    Com consultar=False usa só o cache: sem consulta feita, a resposta é False
+    (ponto comum por POST) e a renovação fica com o AquecedorConexoes.
+    """
+    acoes = capacidades_servidor(endpoint) if consultar else capacidades_em_cache(endpoint)
+    return acoes is not None and ACAO_TRANSICAO in acoes
+
+def requer_transicao(serial, data_iso, em_transicao, ledger):
+    """
+    True quando a leitura é a transição Prática→Teoria: horário de transição
+    em dia de teoria, prática aberta hoje (nº ímpar de batidas) e nenhuma
+    batida de teoria. Sem ledger não há como saber — segue o fluxo normal.
+    """
+    if not em_transicao or ledger is None:
+        return False
+    return (ledger.contar(serial, data_iso, "Prática") % 2 == 1
+            and ledger.contar(serial, data_iso, "Teoria") == 0)
+
+def montar_payload_transicao(serial, nome, escala="", email=""):
+    """Payload composto da transição: o doPost fecha a prática e abre a teoria de uma vez."""
+    payload = montar_payload(serial, nome, True, escala, email, modalidade="Teoria", tipo_registro="Transicao")
+    payload["Acao"] = ACAO_TRANSICAO
+    return payload
+
+def transicao_encadeada(text):
+    """True se o doPost encadeou saída prática + entrada teórica na resposta a um ponto comum."""
+    return "saída prática e entrada teórica" in str(text or "").lower()
+
+def contabilizar_transicao(ledger, serial, data_iso, id_tap=None):
+    """Soma ao ledger as duas batidas da transição (saída prática + entrada teórica)."""
+    if ledger is None:
+        return
+    ledger.registrar(serial, data_iso, "Prática", None if id_tap is None else f"{id_tap}:pratica")
+    ledger.registrar(serial, data_iso, "Teoria", id_tap)
 
-def registrar_transicao_ponto(serial, nome, endpoint, escala, config):
+def registrar_transicao_ponto(journal, serial, nome, endpoint, escala, config, email="", ledger=None):
     """
-    Registra o duplo ponto de transição (Terça/Quinta partir da hora_transicao):
+    Registra o duplo ponto de transição (Terça/Quinta a partir da hora_transicao):
       1. Saída da Prática
       2. Entrada da Teoria
 
-    Ambos enviados com a mesma hora (hora atual).
+    Se o servidor anuncia a ação 'transicao', ambos seguem em um único POST
+    (gravado no journal como qualquer ponto) e o Code.gs os aplica juntos.
+    Caso contrário, volta às duas chamadas; a segunda só é feita se a
+    primeira foi aceita e o servidor ainda não abriu a teoria por conta própria.
 
     Retorna:
-      (ok_pratica: bool, ok_teoria: bool, msg_pratica: str, msg_teoria: str)
+      (code: int|None, ok_pratica: bool, ok_teoria: bool, msg_pratica: str, msg_teoria: str)
     """
     hora_fim_teoria = config.get("hora_fim_teoria", HORA_FIM_TEORIA_PADRAO)
+    data_iso = date.today().isoformat()
+
+    if servidor_suporta_transicao(endpoint):
+        payload = montar_payload_transicao(serial, nome, escala, email)
+        id_tap = None
+        if journal is not None:
+            try:
+                id_tap = journal.registrar(payload, endpoint, reservar=True)
+            except sqlite3.Error as e:
+                logging.error(f"Falha ao gravar transição no journal ({e}); enviando sem fila local.")
+        if id_tap is None:
+            code, text = enviar_payload(payload, endpoint, disjuntor.tentativas)
+            if ponto_aplicado(code, text):
+                contabilizar_transicao(ledger, serial, data_iso)
+        else:
+            contabilizar_transicao(ledger, serial, data_iso, id_tap)
+            code, text = enviar_do_journal(journal, id_tap, payload, endpoint, ledger)
+        metricas.contar("ponto_leituras_total", resultado=resultado_envio(code, text))
+        ok = ponto_aceito(code, text)
+        msg_pratica = "✅ Saída da Prática registrada!" if ok else f"⚠️  Transição: {code} — {text}"
+        msg_teoria = (
+            f"✅ Entrada da Teoria registrada! (até {hora_fim_teoria})"
+            if ok
+            else ("💾 Transição salva localmente — será reenviada automaticamente."
+                  if id_tap is not None else "⚠️  Entrada Teoria não registrada.")
+        )
+        return code, ok, ok, msg_pratica, msg_teoria
 
     # 1 — Saída da Prática
-    code1, text1 = send_to_endpoint(
-        serial, nome, endpoint,
+    code1, text1 = registrar_ponto(
+        journal, serial, nome, endpoint,
         is_teoria_day=True,
         escala=escala,
+        email=email,
         modalidade="Prática",
-        tipo_registro="Saída"
+        tipo_registro="Saída",
+        ledger=ledger
     )
-    ok_pratica = code1 == 200
+    ok_pratica = ponto_aceito(code1, text1)
     msg_pratica = (
         "✅ Saída da Prática registrada!"
         if ok_pratica
         else f"⚠️  Saída Prática: {code1} — {text1}"
     )
+    if not ok_pratica:
+        # Um reenvio da saída já abre a teoria no doPost; a segunda chamada fecharia essa teoria
+        return code1, False, False, msg_pratica, "⚠️  Entrada Teoria não enviada (saída prática pendente)."
+    if "entrada teórica" in (text1 or "").lower():
+        # Versões do Code.gs que encadeiam saída prática + entrada teórica no mesmo POST
+        if ledger is not None and ponto_aplicado(code1, text1):
+            ledger.registrar(serial, data_iso, "Teoria")
+        return code1, True, True, msg_pratica, f"✅ Entrada da Teoria registrada! (até {hora_fim_teoria})"
 
     # 2 — Entrada da Teoria
-    code2, text2 = send_to_endpoint(
-        serial, nome, endpoint,
+    code2, text2 = registrar_ponto(
+        journal, serial, nome, endpoint,
         is_teoria_day=True,
         escala=escala,
+        email=email,
         modalidade="Teoria",
         tipo_registro="Entrada",
+        ledger=ledger
     )
-    ok_teoria = code2 == 200
+    ok_teoria = ponto_aceito(code2, text2)
     msg_teoria = (
         f"✅ Entrada da Teoria registrada! (até {hora_fim_teoria})"
         if ok_teoria
         else f"⚠️  Entrada Teoria: {code2} — {text2}"
     )
 
-    return ok_pratica, ok_teoria, msg_pratica, msg_teoria
+    return code2, ok_pratica, ok_teoria, msg_pratica, msg_teoria
+
+class ServicosFundo:
+    """
+    Serviços em segundo plano do quiosque: journal + reenvio, aquecimento de
+    conexões, ledger local de pontos do dia (com reconciliação periódica),
+    sincronização da aba Alunos e observação do arquivo de configuração.
+    """
+
+    def __init__(self, config):
+        verificar_requests()
+        endpoint = get_endpoint_for_config(config)
+        self.endpoint = endpoint
+        disjuntor.configurar(config)
+        governador.configurar(config)
+        self.observador = ObservadorConfig()
+        self.journal, self.flusher = iniciar_journal(config)
+        self.cliente = obter_cliente_http(config)
+        self.aquecedor = AquecedorConexoes(
+            self.cliente,
+            endpoint,
+            config.get("http_keepalive_seconds", HTTP_KEEPALIVE_SECONDS)
+        )
+        self.aquecedor.start()
+        threading.Thread(target=capacidades_servidor, args=(endpoint,), daemon=True).start()
+        self.ledger = LedgerPontos()
+        if self.flusher is not None:
+            self.flusher.ledger = self.ledger
+        self.reconciliador = ReconciliadorLedger(
+            self.ledger,
+            self.journal,
+            endpoint,
+            config.get("ledger_reconcile_seconds", LEDGER_RECONCILE_SECONDS)
+        )
+        self.reconciliador.start()
+        self.sincronizador = None
+        intervalo_sync = config.get("sync_alunos_seconds", SYNC_ALUNOS_SECONDS)
+        if intervalo_sync:
+            self.sincronizador = SincronizadorAlunos(obter_registro_alunos(config), endpoint, intervalo_sync)
+            self.sincronizador.start()
+
+        # Spans por leitura (opcional)
+        self.tracador = TracadorLeituras(config.get("trace_file"))
+
+        # Endpoint de métricas (opcional)
+        self.servidor_metricas = None
+        if config.get("metrics_port"):
+            registro = obter_registro_alunos(config)
+            metricas.medidor("ponto_alunos_cadastrados", lambda: len(registro))
+            metricas.medidor("ponto_disjuntor_estado", disjuntor.codigo)
+            metricas.medidor("ponto_cota_chamadas_dia", lambda: governador.chamadas)
+            metricas.medidor("ponto_cota_nivel", governador.nivel)
+            if self.journal is not None:
+                metricas.medidor("ponto_journal_pendentes", self.journal.contar_pendentes)
+            try:
+                self.servidor_metricas = ServidorMetricas(
+                    metricas, int(config["metrics_port"]), config.get("metrics_host") or "127.0.0.1"
+                )
+            except OSError as e:
+                logging.error(f"Não foi possível abrir o endpoint de métricas: {e}")
+
+        # Socket de controle (--serve): comandos de gerenciamento sem novo processo
+        self.inicio = time.monotonic()
+        self.servidor_controle = None
+        if config.get("controle_socket"):
+            try:
+                self.servidor_controle = ServidorControle(self, config)
+            except OSError as e:
+                logging.error(f"Não foi possível abrir o socket de controle: {e}")
+
+    def descricao(self):
+        """Resumo do daemon para o --status-fila atendido pelo socket de controle."""
+        minutos = int(time.monotonic() - self.inicio) // 60
+        return (f"ativo há {minutos // 60}h{minutos % 60:02d}, {self.observador.recargas} recarga(s) "
+                f"da configuração, disjuntor {disjuntor.estado}")
+
+    def atualizar_config(self, config, novo_dia=False):
+        """
+        Aplica uma nova configuração. Conexões e ledger só são refeitos na
+        virada do dia ou quando o endpoint muda.
+        """
+        endpoint = get_endpoint_for_config(config)
+        disjuntor.configurar(config)
+        governador.configurar(config)
+        if self.flusher is not None:
+            self.flusher.lote_max = config.get("lote_max", LOTE_MAX)
+        if not novo_dia and endpoint == self.endpoint:
+            return
+        if endpoint != self.endpoint:
+            disjuntor.reiniciar()
+        self.endpoint = endpoint
+        self.aquecedor.endpoint = endpoint
+        threading.Thread(target=self.cliente.aquecer, args=(endpoint,), daemon=True).start()
+        threading.Thread(target=capacidades_servidor, args=(endpoint, True), daemon=True).start()
+        self.reconciliador.endpoint = endpoint
+        self.reconciliador.solicitar()
+        if self.sincronizador is not None:
+            self.sincronizador.endpoint = endpoint
+            self.sincronizador.solicitar()
+
+    def encerrar(self):
+        if self.servidor_controle is not None:
+            self.servidor_controle.parar()
+        self.observador.parar()
+        if self.servidor_metricas is not None:
+            self.servidor_metricas.parar()
+        self.aquecedor.parar()
+        if self.sincronizador is not None:
+            self.sincronizador.parar()
+        self.reconciliador.parar()
+        self.tracador.fechar()
+        encerrar_journal(self.journal, self.flusher)
+        governador.salvar()
+        logging.info(f"Cota do Apps Script: {governador.resumo()}")
 
 def add_dia_especial(data_str, hora_transicao=None, hora_inicio=None, config_path=None):
     """Adiciona um dia especial de teoria.
@@ -549,7 +2596,7 @@ def list_dias_especiais(config_path=None):
     if horarios:
         print("\nDias fixos semanais (horarios_teoria):")
         for h in sorted(horarios, key=lambda x: x.get("dia", 0)):
-            dia_nome = dias_semana[h["dia"]] if 0 <= h.get("dia", -1) <= 6 else f"dia {h.get('dia')}"
+            dia_nome = dias_semana[h["dia"]] if _dia_da_semana(h.get("dia")) else f"dia {h.get('dia')}"
             print(f"  - {dia_nome}-feira | transição: {h.get('hora_transicao','?')} | início: {h.get('hora_inicio','?')}")
     else:
         # Legado
@@ -558,7 +2605,8 @@ def list_dias_especiais(config_path=None):
         hora_i = config.get("hora_inicio_teoria", HORA_INICIO_TEORIA_PADRAO)
         print("\nDias fixos semanais (formato legado):")
         for dia in dias_teoria:
-            print(f"  - {dias_semana[dia]}-feira | transição: {hora_t} | início: {hora_i}")
+            dia_nome = dias_semana[dia] if _dia_da_semana(dia) else f"dia {dia}"
+            print(f"  - {dia_nome}-feira | transição: {hora_t} | início: {hora_i}")
 
     hora_fim = config.get("hora_fim_teoria", HORA_FIM_TEORIA_PADRAO)
     print(f"\nEncerramento da teoria: {hora_fim} (meia-noite)")
@@ -628,7 +2676,7 @@ def get_endpoint_for_config(config):
 
 def install_windows_startup():
     """Instala o script para iniciar com o Windows."""
-    if platform.system() != "Windows":
+    if not EM_WINDOWS:
         print("Esta funcionalidade só está disponível no Windows.")
         return False
     
@@ -666,7 +2714,7 @@ def install_windows_startup():
 
 def uninstall_windows_startup():
     """Remove o script da inicialização do Windows."""
-    if platform.system() != "Windows":
+    if not EM_WINDOWS:
         print("Esta funcionalidade só está disponível no Windows.")
         return False
     
@@ -698,7 +2746,7 @@ def uninstall_windows_startup():
 
 def hide_console_window():
     """Esconde a janela do console no Windows."""
-    if platform.system() == "Windows":
+    if EM_WINDOWS:
         try:
             import ctypes
             ctypes.windll.user32.ShowWindow(
@@ -711,7 +2759,7 @@ def hide_console_window():
 
 def clear_screen():
     """Limpa a tela do terminal."""
-    os.system('cls' if platform.system() == 'Windows' else 'clear')
+    os.system('cls' if EM_WINDOWS else 'clear')
 
 def print_header():
     """Exibe o cabeçalho do programa."""
@@ -722,42 +2770,370 @@ def print_header():
     print(f"                    {data_hora}")
     print("=" * 60 + "\n")
 
+# ========== CADASTRO DE ALUNOS (registro indexado) ==========
+
+class Aluno:
+    """Registro compacto de um aluno no índice em memória."""
+
+    __slots__ = ("uid", "nome", "email", "data_cadastro")
+
+    def __init__(self, uid, nome, email="", data_cadastro=""):
+        self.uid = uid
+        self.nome = nome
+        self.email = email or ""
+        self.data_cadastro = data_cadastro or ""
+
+    def como_dict(self):
+        dados = {"nome": self.nome, "email": self.email}
+        if self.data_cadastro:
+            dados["data_cadastro"] = self.data_cadastro
+        return dados
+
+class RegistroAlunos:
+    """
+    Cadastro de alunos com um único índice em memória (uid → Aluno).
+
+    O índice é a fusão de quatro fontes, da menor para a maior prioridade:
+      1. "nomes" do config (formato antigo)
+      2. "alunos" do config
+      3. aba "Alunos" da planilha (SincronizadorAlunos; cópia em alunos_planilha.json)
+      4. log de cadastros (registro_alunos_file, JSON Lines só de acréscimo)
+
+    Um cadastro novo é uma linha acrescentada ao log (com fsync): o
+    config_ponto.json não é mais regravado. Uma linha truncada por queda de
+    energia é ignorada na releitura. compactar() reescreve o log (arquivo
+    temporário + os.replace) mantendo só o estado atual de cada crachá.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = Path(caminho) if caminho else None
+        self._lock = threading.Lock()
+        self._do_config = {}
+        self._do_log = {}
+        self._indice = {}
+        self._config = None
+        self._fontes_config = (None, None)
+        self._linhas_log = 0
+        self._linha_incompleta = False
+        self._linhas_planilha = {}
+        self._do_planilha = {}
+        self.planilha_atualizada_em = None
+        self.caminho_planilha = self.caminho.with_name("alunos_planilha.json") if self.caminho else None
+        self._carregar_log()
+        self._carregar_planilha()
+
+    def _carregar_log(self):
+        if self.caminho is None or not self.caminho.exists():
+            return
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                self._linha_incompleta = not linha.endswith("\n")
+                try:
+                    registro = json.loads(linha)
+                    uid = str(registro["uid"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logging.warning(f"Linha inválida ignorada em {self.caminho}: {linha.strip()[:80]!r}")
+                    continue
+                self._linhas_log += 1
+                if registro.get("op") == "remover":
+                    self._do_log[uid] = None
+                else:
+                    self._do_log[uid] = Aluno(uid, registro.get("nome", ""),
+                                              registro.get("email", ""),
+                                              registro.get("data_cadastro", ""))
+
+    def _carregar_planilha(self):
+        if self.caminho_planilha is None or not self.caminho_planilha.exists():
+            return
+        try:
+            with open(self.caminho_planilha, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logging.warning(f"Cópia local da aba Alunos ignorada ({self.caminho_planilha}): {e}")
+            return
+        for row_id, r in dados.get("linhas", {}).items():
+            self._linhas_planilha[row_id] = Aluno(r["uid"], r.get("nome", ""), r.get("email", ""))
+        self._do_planilha = {a.uid: a for a in self._linhas_planilha.values()}
+        self.planilha_atualizada_em = dados.get("ultimaAtualizacao")
+
+    def _salvar_planilha(self):
+        if self.caminho_planilha is None:
+            return
+        dados = {
+            "ultimaAtualizacao": self.planilha_atualizada_em,
+            "linhas": {row_id: {"uid": a.uid, "nome": a.nome, "email": a.email}
+                       for row_id, a in self._linhas_planilha.items()},
+        }
+        self.caminho_planilha.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho_planilha.with_name(self.caminho_planilha.name + ".tmp")
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho_planilha)
+
+    def sincronizar_config(self, config):
+        """Remonta a parte do índice vinda do config apenas se "alunos"/"nomes" mudaram."""
+        if config is self._config:
+            return
+        fontes = (config.get("alunos", {}), config.get("nomes", {}))
+        self._config = config
+        if fontes == self._fontes_config:
+            return
+        do_config = {}
+        for uid, nome in fontes[1].items():
+            do_config[uid] = Aluno(uid, nome)
+        for uid, dados in fontes[0].items():
+            if isinstance(dados, dict):
+                do_config[uid] = Aluno(uid, dados.get("nome", "Desconhecido"),
+                                       dados.get("email", ""), dados.get("data_cadastro", ""))
+            else:
+                do_config[uid] = Aluno(uid, dados)
+        with self._lock:
+            self._fontes_config = fontes
+            self._do_config = do_config
+            self._reindexar()
+
+    def _reindexar(self):
+        indice = dict(self._do_config)
+        indice.update(self._do_planilha)
+        for uid, aluno in self._do_log.items():
+            if aluno is None:
+                indice.pop(uid, None)
+            else:
+                indice[uid] = aluno
+        self._indice = indice
+
+    def _resolver(self, uid):
+        """Recalcula a entrada de um único crachá no índice, respeitando a prioridade das fontes."""
+        if uid in self._do_log:
+            aluno = self._do_log[uid]
+        else:
+            aluno = self._do_planilha.get(uid) or self._do_config.get(uid)
+        if aluno is None:
+            self._indice.pop(uid, None)
+        else:
+            self._indice[uid] = aluno
+
+    def aplicar_planilha(self, registros, atualizada_em=None):
+        """
+        Aplica os registros da aba Alunos comparando-os, por _rowId, com a
+        versão anterior: só os crachás de linhas novas, alteradas ou removidas
+        são recalculados no índice. Retorna (novos, alterados, removidos).
+        """
+        linhas = {}
+        for registro in registros:
+            row_id = str(registro.get("_rowId") or registro.get("_rowIndex") or "")
+            aluno = aluno_da_planilha(registro)
+            if row_id and aluno is not None:
+                linhas[row_id] = aluno
+
+        novos = alterados = removidos = 0
+        afetados = set()
+        with self._lock:
+            antigas = self._linhas_planilha
+            for row_id, aluno in linhas.items():
+                antigo = antigas.get(row_id)
+                if antigo is None:
+                    novos += 1
+                elif (antigo.uid, antigo.nome, antigo.email) != (aluno.uid, aluno.nome, aluno.email):
+                    alterados += 1
+                    afetados.add(antigo.uid)
+                else:
+                    linhas[row_id] = antigo
+                    continue
+                afetados.add(aluno.uid)
+            for row_id in antigas.keys() - linhas.keys():
+                removidos += 1
+                afetados.add(antigas[row_id].uid)
+
+            self._linhas_planilha = linhas
+            self.planilha_atualizada_em = atualizada_em
+            if afetados:
+                do_planilha = dict(self._do_planilha)
+                for uid in afetados:
+                    do_planilha.pop(uid, None)
+                for aluno in linhas.values():
+                    if aluno.uid in afetados:
+                        do_planilha[aluno.uid] = aluno
+                self._do_planilha = do_planilha
+                for uid in afetados:
+                    self._resolver(uid)
+            self._salvar_planilha()
+        return novos, alterados, removidos
+
+    def buscar(self, uid):
+        """Retorna o Aluno do crachá ou None (uma única consulta ao índice)."""
+        return self._indice.get(uid)
+
+    def __len__(self):
+        return len(self._indice)
+
+    def todos(self):
+        """uid → {"nome", "email", ...} de todos os alunos cadastrados."""
+        return {uid: aluno.como_dict() for uid, aluno in self._indice.items()}
+
+    def _acrescentar(self, registro):
+        if self.caminho is None:
+            return
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        if self._linha_incompleta:
+            # Isola a linha truncada deixada por uma gravação interrompida
+            linha = "\n" + linha
+            self._linha_incompleta = False
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(linha)
+            f.flush()
+            os.fsync(f.fileno())
+        self._linhas_log += 1
+
+    def cadastrar(self, uid, nome, email="", data_cadastro=None):
+        """Cadastra (ou atualiza) um aluno: uma linha no log + atualização do índice."""
+        aluno = Aluno(uid, nome, email, data_cadastro or datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
+        with self._lock:
+            self._acrescentar({"op": "cadastrar", "uid": uid, **aluno.como_dict()})
+            self._do_log[uid] = aluno
+            self._indice[uid] = aluno
+        return aluno
+
+    def remover(self, uid):
+        """Remove um aluno do índice (registrado no log, inclusive sobre o config)."""
+        with self._lock:
+            self._acrescentar({"op": "remover", "uid": uid})
+            self._do_log[uid] = None
+            self._indice.pop(uid, None)
+
+    def precisa_compactar(self):
+        with self._lock:
+            return self._linhas_log > 1000 and self._linhas_log > 2 * len(self._do_log)
+
+    def compactar(self):
+        """Reescreve o log com uma linha por crachá (escrita atômica)."""
+        if self.caminho is None:
+            return
+        with self._lock:
+            registros = []
+            for uid, aluno in self._do_log.items():
+                if aluno is None:
+                    registros.append({"op": "remover", "uid": uid})
+                else:
+                    registros.append({"op": "cadastrar", "uid": uid, **aluno.como_dict()})
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = self.caminho.with_name(self.caminho.name + ".tmp")
+            with open(temporario, 'w', encoding='utf-8') as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho)
+            self._linhas_log = len(registros)
+
+def aluno_da_planilha(registro):
+    """Converte uma linha da aba Alunos em Aluno (None se sem crachá ou inativo)."""
+    serial = registro.get("SerialNumber")
+    if isinstance(serial, float) and serial.is_integer():
+        serial = int(serial)
+    serial = str(serial or "").strip()
+    if not serial:
+        return None
+    if _normalizar_texto(str(registro.get("Status") or "")).startswith("inativ"):
+        return None
+    return Aluno(serial, str(registro.get("NomeCompleto") or "").strip() or "Desconhecido",
+                 str(registro.get("EmailHC") or "").strip())
+
+class SincronizadorAlunos(threading.Thread):
+    """
+    Sincroniza em segundo plano o RegistroAlunos com a aba Alunos da planilha
+    (doGet?aba=Alunos), na inicialização e a cada sync_alunos_seconds.
+
+    Envia a última metadados.ultimaAtualizacao conhecida em `desde`: se a aba
+    não mudou, o servidor responde naoModificado e nada é processado.
+    """
+
+    def __init__(self, registro, endpoint, intervalo=SYNC_ALUNOS_SECONDS, aba="Alunos"):
+        super().__init__(name="SincronizadorAlunos", daemon=True)
+        self.registro = registro
+        self.endpoint = endpoint
+        self.intervalo = intervalo
+        self.aba = aba
+        self._parar = threading.Event()
+        self._agora = threading.Event()
+
+    def sincronizar(self):
+        """Busca a aba e aplica as diferenças. Retorna (novos, alterados, removidos) ou None."""
+        if not governador.adquirir(essencial=False):
+            logging.debug("Sincronização de alunos adiada para poupar a cota do Apps Script.")
+            return None
+        params = {"aba": self.aba}
+        if self.registro.planilha_atualizada_em:
+            params["desde"] = self.registro.planilha_atualizada_em
+        r = obter_cliente_http().get(self.endpoint, params=params, timeout=15)
+        if r.status_code != 200:
+            logging.warning(f"Sincronização de alunos: HTTP {r.status_code}")
+            return None
+        dados = r.json()
+        if not isinstance(dados, dict) or dados.get("erro"):
+            logging.warning(f"Sincronização de alunos: resposta inesperada ({str(dados)[:120]})")
+            return None
+        atualizada_em = (dados.get("metadados") or {}).get("ultimaAtualizacao")
+        if dados.get("naoModificado") or (atualizada_em and atualizada_em == self.registro.planilha_atualizada_em):
+            logging.debug("Aba Alunos sem alterações desde a última sincronização.")
+            return None
+        resultado = self.registro.aplicar_planilha(dados.get("registros") or [], atualizada_em)
+        logging.info(
+            f"Alunos sincronizados com a planilha: {resultado[0]} novo(s), "
+            f"{resultado[1]} alterado(s), {resultado[2]} removido(s)."
+        )
+        return resultado
+
+    def solicitar(self):
+        """Pede uma sincronização imediata."""
+        self._agora.set()
+
+    def run(self):
+        while not self._parar.is_set():
+            try:
+                self.sincronizar()
+            except Exception as e:
+                logging.error(f"Erro ao sincronizar alunos: {e}")
+            self._agora.wait(self.intervalo)
+            self._agora.clear()
+
+    def parar(self):
+        self._parar.set()
+        self._agora.set()
+
+_registro_alunos = None
+
+def obter_registro_alunos(config):
+    """Retorna o RegistroAlunos do processo, alinhado com `config`."""
+    global _registro_alunos
+    if _registro_alunos is None:
+        registro = RegistroAlunos(config.get("registro_alunos_file", REGISTRO_ALUNOS_FILE_PADRAO))
+        if registro.precisa_compactar():
+            registro.compactar()
+        _registro_alunos = registro
+    _registro_alunos.sincronizar_config(config)
+    return _registro_alunos
+
+def buscar_aluno(uid, config):
+    """Retorna o Aluno cadastrado com o UID ou None."""
+    return obter_registro_alunos(config).buscar(uid)
+
 def aluno_existe(uid, config):
     """Verifica se o aluno já está cadastrado pelo UID."""
-    # Verifica na lista de alunos (novo formato)
-    alunos = config.get("alunos", {})
-    if uid in alunos:
-        return True
-    
-    # Verifica no formato antigo (nomes)
-    nomes = config.get("nomes", {})
-    if uid in nomes:
-        return True
-    
-    return False
+    return buscar_aluno(uid, config) is not None
 
 def get_nome_aluno(uid, config):
     """Obtém o nome do aluno pelo UID."""
-    # Primeiro verifica na lista de alunos (novo formato)
-    alunos = config.get("alunos", {})
-    if uid in alunos:
-        aluno = alunos[uid]
-        if isinstance(aluno, dict):
-            return aluno.get("nome", "Desconhecido")
-        return aluno
-    
-    # Fallback para o formato antigo (nomes)
-    nomes = config.get("nomes", NOMES)
-    return nomes.get(uid, "Desconhecido")
+    aluno = buscar_aluno(uid, config)
+    return aluno.nome if aluno is not None else "Desconhecido"
 
 def get_email_aluno(uid, config):
     """Obtém o e-mail do aluno pelo UID."""
-    alunos = config.get("alunos", {})
-    if uid in alunos:
-        aluno = alunos[uid]
-        if isinstance(aluno, dict):
-            return aluno.get("email", "")
-    return ""
+    aluno = buscar_aluno(uid, config)
+    return aluno.email if aluno is not None else ""
 
 def validar_email(email):
     """Valida o formato básico de um e-mail (usuario@dominio.tld)."""
@@ -775,29 +3151,6 @@ def validar_email(email):
         return False
     return True
 
-def salvar_config(config, config_path=None):
-    """Salva a configuração no arquivo JSON."""
-    if config_path is None:
-        # Procura o arquivo de configuração existente ou usa o padrão
-        config_paths = [
-            Path(CONFIG_FILE),
-            Path(__file__).parent / CONFIG_FILE,
-        ]
-        for path in config_paths:
-            if path.exists():
-                config_path = path
-                break
-        if config_path is None:
-            config_path = Path(__file__).parent / CONFIG_FILE
-    
-    try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except IOError as e:
-        print(f"   ❌ Erro ao salvar configuração: {e}")
-        return False
-
 def cadastrar_aluno_inline(uid, config):
     """
     Cadastra um novo aluno diretamente quando o UID não é encontrado.
@@ -834,66 +3187,328 @@ def cadastrar_aluno_inline(uid, config):
         else:
             print("   ⚠️  E-mail inválido. Continuando sem e-mail.")
     
-    # Salvar no config
-    if "alunos" not in config:
-        config["alunos"] = {}
-    
-    config["alunos"][uid] = {
-        "nome": nome,
-        "email": email,
-        "data_cadastro": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    }
-    
-    # Também atualiza o campo nomes para compatibilidade
-    if "nomes" not in config:
-        config["nomes"] = {}
-    config["nomes"][uid] = nome
-    
-    # Salvar configuração
-    if salvar_config(config):
-        print("\n   " + "═" * 50)
-        print("   ✅ ALUNO CADASTRADO COM SUCESSO!")
-        print("   " + "═" * 50)
-        print(f"   📛 Nome: {nome}")
-        print(f"   🔢 UID: {uid}")
-        print(f"   📧 Email: {email if email else '(não informado)'}")
-        print("   " + "═" * 50)
-        return nome, email
-    else:
-        print("\n   ❌ Erro ao salvar cadastro.")
+    # Salvar no registro de alunos (uma linha acrescentada ao log)
+    try:
+        obter_registro_alunos(config).cadastrar(uid, nome, email)
+    except OSError as e:
+        print(f"   ❌ Erro ao salvar cadastro: {e}")
         return None, None
 
+    print("\n   " + "═" * 50)
+    print("   ✅ ALUNO CADASTRADO COM SUCESSO!")
+    print("   " + "═" * 50)
+    print(f"   📛 Nome: {nome}")
+    print(f"   🔢 UID: {uid}")
+    print(f"   📧 Email: {email if email else '(não informado)'}")
+    print("   " + "═" * 50)
+    return nome, email
+
 def listar_alunos_cadastrados(config):
     """Lista todos os alunos cadastrados de forma compacta."""
-    alunos = config.get("alunos", {})
-    nomes = config.get("nomes", {})
-    
-    # Combina as duas listas (alunos tem prioridade)
-    todos_alunos = {}
-    
-    # Adiciona do formato antigo
-    for uid, nome in nomes.items():
-        if uid not in todos_alunos:
-            todos_alunos[uid] = {"nome": nome, "email": ""}
-    
-    # Adiciona/sobrescreve do formato novo
-    for uid, dados in alunos.items():
-        if isinstance(dados, dict):
-            todos_alunos[uid] = dados
+    return obter_registro_alunos(config).todos()
+
+class DebounceCrachas:
+    """
+    Debounce por crachá: suprime apenas releituras do MESMO serial dentro de
+    debounce_seconds; crachás diferentes são aceitos em sequência.
+
+    Tabela LRU limitada (max_crachas) com expiração por tempo: como cada
+    leitura aceita vai para o fim da ordem, as entradas expiradas ficam
+    sempre no início e são removidas sem varrer a tabela inteira.
+    """
+
+    def __init__(self, janela=DEBOUNCE_SECONDS, max_crachas=DEBOUNCE_MAX_CRACHAS):
+        self.janela = janela
+        self.max_crachas = max_crachas
+        self._ultimos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aceitos = 0
+        self.suprimidos = 0
+        self.suprimidos_por_serial = Counter()
+
+    def aceitar(self, serial, agora=None):
+        """Retorna True se a leitura deve ser processada, False se for releitura do mesmo crachá."""
+        if agora is None:
+            agora = time.monotonic()
+        with self._lock:
+            while self._ultimos:
+                instante = next(iter(self._ultimos.values()))
+                if agora - instante < self.janela:
+                    break
+                self._ultimos.popitem(last=False)
+
+            if serial in self._ultimos:
+                self.suprimidos += 1
+                self.suprimidos_por_serial[serial] += 1
+                return False
+
+            self._ultimos[serial] = agora
+            if len(self._ultimos) > self.max_crachas:
+                self._ultimos.popitem(last=False)
+            self.aceitos += 1
+            return True
+
+    def resumo(self):
+        """Texto com os contadores de leituras aceitas/suprimidas."""
+        return f"{self.aceitos} leitura(s) aceita(s), {self.suprimidos} releitura(s) suprimida(s)"
+
+# ========== CONTROLE LOCAL (--serve) ==========
+
+class _SaidaPorThread:
+    """
+    Substituto de sys.stdout que desvia para um buffer o que a thread atual
+    imprimir enquanto executa um comando de controle. As demais threads (o
+    loop do quiosque, por exemplo) continuam escrevendo no console.
+    """
+
+    def __init__(self, original):
+        self.original = original
+        self._local = threading.local()
+
+    def capturar(self):
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+
+    def liberar(self):
+        self._local.buffer = None
+
+    def write(self, texto):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(texto)
+        if self.original is None:
+            # pythonw: sem console
+            return len(texto)
+        return self.original.write(texto)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None and self.original is not None:
+            self.original.flush()
+
+    def __getattr__(self, nome):
+        return getattr(self.original, nome)
+
+def endereco_controle(config):
+    """
+    Retorna (família, endereço) do socket de controle: caminho de socket Unix
+    ou, para "host:porta" (e no Windows, sem AF_UNIX), TCP local.
+    """
+    endereco = str(config.get("controle_socket") or CONTROLE_SOCKET_PADRAO)
+    host, _, porta = endereco.rpartition(":")
+    if host and porta.isdigit():
+        return socket.AF_INET, (host, int(porta))
+    return socket.AF_UNIX, endereco
+
+def gravar_token_controle(token, caminho=CONTROLE_TOKEN_FILE):
+    """Grava o segredo do socket de controle legível só pelo usuário (0600)."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, 0o600)  # arquivo já existente mantém a permissão antiga no os.open
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(token)
+
+def ler_token_controle(caminho=CONTROLE_TOKEN_FILE):
+    """Segredo do daemon em execução ou "" se o arquivo não existe ou não pode ser lido."""
+    try:
+        return Path(caminho).read_text(encoding="ascii").strip()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+def mostrar_alunos(config):
+    """Imprime os alunos cadastrados (--list-alunos)."""
+    alunos = listar_alunos_cadastrados(config)
+    print("\n=== Alunos Cadastrados ===\n")
+    if not alunos:
+        print("Nenhum aluno cadastrado.")
+    else:
+        for uid, dados in sorted(alunos.items(), key=lambda x: x[1].get("nome", "")):
+            nome = dados.get("nome", "")
+            email = dados.get("email", "") or "(sem email)"
+            print(f"  {uid}: {nome} - {email}")
+    print("")
+
+def mostrar_escala(config):
+    """Imprime a escala atual (--show-escala)."""
+    escala = config.get("escala_atual", "9")
+    print("\n=== Escala Atual ===\n")
+    print(f"  Escala configurada: {escala}")
+    print("")
+
+def mostrar_status_fila(config, journal=None):
+    """Imprime a situação do journal e da cota (--status-fila). Usa `journal` se já aberto."""
+    caminho = config.get("journal_file", JOURNAL_FILE_PADRAO)
+    print("\n=== Journal de Pontos ===\n")
+    if journal is None and (not caminho or not Path(caminho).exists()):
+        print("  Nenhum journal encontrado.")
+    else:
+        if journal is None:
+            aberto = JournalPonto(caminho)
+            contagem = aberto.contar()
+            aberto.fechar()
         else:
-            todos_alunos[uid] = {"nome": dados, "email": ""}
-    
-    return todos_alunos
+            contagem = journal.contar()
+        print(f"  Arquivo:     {caminho}")
+        print(f"  Pendentes:   {contagem.get('pendente', 0) + contagem.get('enviando', 0)}")
+        print(f"  Confirmados: {contagem.get('confirmado', 0)}")
+        if contagem.get("rejeitado"):
+            print(f"  Rejeitados:  {contagem['rejeitado']} (recusados pelo servidor; ver ultimo_erro no journal)")
+    caminho_cota = config.get("cota_file", COTA_FILE_PADRAO)
+    if journal is not None or (caminho_cota and Path(caminho_cota).exists()):
+        if journal is None:
+            governador.configurar(config)
+        print(f"  Cota:        {governador.resumo()}")
+    print("")
+
+def executar_comando(comando, argumentos, servicos=None):
+    """
+    Executa um comando de gerenciamento e retorna True se deu certo.
+    Com `servicos` (daemon --serve), usa o arquivo observado pelo loop e o
+    journal já aberto; a alteração vale a partir da próxima leitura.
+    """
+    config_path = servicos.observador.caminho if servicos is not None else None
+    if comando == "ping":
+        return True
+    if comando == "add-dia":
+        return add_dia_especial(argumentos.get("data", ""),
+                                hora_transicao=argumentos.get("hora_transicao"),
+                                hora_inicio=argumentos.get("hora_inicio"),
+                                config_path=config_path)
+    if comando == "remove-dia":
+        return remove_dia_especial(argumentos.get("data", ""), config_path=config_path)
+    if comando == "list-dias":
+        list_dias_especiais(config_path=config_path)
+        return True
+    if comando == "set-escala":
+        return set_escala_atual(argumentos.get("escala", ""), config_path=config_path)
+    if comando == "show-escala":
+        mostrar_escala(load_config())
+        return True
+    if comando == "list-alunos":
+        mostrar_alunos(load_config())
+        return True
+    if comando == "status-fila":
+        mostrar_status_fila(load_config(), servicos.journal if servicos is not None else None)
+        if servicos is not None:
+            print(f"  Servidor:    {servicos.descricao()}\n")
+        return True
+    print(f"Comando desconhecido: {comando}")
+    return False
+
+class ServidorControle:
+    """
+    Socket de controle do daemon (--serve). Protocolo: uma linha JSON
+    {"comando": ..., "argumentos": {...}, "token": ...} por conexão, respondida
+    com uma linha {"ok": bool, "saida": "..."} — o texto que o comando imprimiria.
+    Os comandos rodam um de cada vez, dentro do processo do quiosque.
+
+    A cada subida um segredo novo vai para CONTROLE_TOKEN_FILE (0600) e todo
+    comando sem ele é recusado: no Windows o socket é TCP e qualquer processo
+    local alcançaria a porta.
+    """
+
+    def __init__(self, servicos, config):
+        import socketserver
+
+        familia, endereco = endereco_controle(config)
+        lock = threading.Lock()
+        token = secrets.token_hex(32)
+        if not isinstance(sys.stdout, _SaidaPorThread):
+            sys.stdout = _SaidaPorThread(sys.stdout)
+        saida = sys.stdout
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    pedido = json.loads(self.rfile.readline(65536) or b"{}")
+                    comando = str(pedido.get("comando", ""))
+                    argumentos = pedido.get("argumentos") or {}
+                    recebido = str(pedido.get("token", "")).encode("utf-8")
+                except (ValueError, AttributeError) as e:
+                    resposta = {"ok": False, "saida": f"Pedido inválido: {e}\n"}
+                else:
+                    if not hmac.compare_digest(recebido, token.encode("ascii")):
+                        logging.warning(f"Comando de controle '{comando}' recusado: token inválido")
+                        resposta = {"ok": False, "saida": "Token de controle inválido.\n"}
+                        self.wfile.write((json.dumps(resposta, ensure_ascii=False) + "\n").encode("utf-8"))
+                        return
+                    with lock:
+                        buffer = saida.capturar()
+                        try:
+                            ok = bool(executar_comando(comando, argumentos, servicos))
+                        except Exception as e:
+                            logging.exception(f"Falha no comando de controle '{comando}'")
+                            print(f"Erro ao executar '{comando}': {e}")
+                            ok = False
+                        finally:
+                            saida.liberar()
+                    logging.info(f"Comando de controle '{comando}': {'ok' if ok else 'falhou'}")
+                    resposta = {"ok": ok, "saida": buffer.getvalue()}
+                self.wfile.write((json.dumps(resposta, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        self.caminho = None
+        if familia == socket.AF_UNIX:
+            self.caminho = Path(endereco)
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            if self.caminho.exists():
+                # Socket deixado por um daemon anterior: só é removido se ninguém atende nele
+                if enviar_comando_controle(config, "ping", {}) is not None:
+                    raise OSError(f"já existe um daemon atendendo em {endereco}")
+                self.caminho.unlink()
+            self.servidor = socketserver.ThreadingUnixStreamServer(endereco, Handler)
+            os.chmod(endereco, 0o600)
+        else:
+            self.servidor = socketserver.ThreadingTCPServer(endereco, Handler)
+        self.servidor.daemon_threads = True
+        gravar_token_controle(token)
+        self._thread = threading.Thread(target=self.servidor.serve_forever, name="ServidorControle", daemon=True)
+        self._thread.start()
+        logging.info(f"Socket de controle em {endereco}")
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        try:
+            os.unlink(CONTROLE_TOKEN_FILE)
+        except OSError:
+            pass
+        if self.caminho is not None:
+            try:
+                self.caminho.unlink()
+            except OSError:
+                pass
+
+def enviar_comando_controle(config, comando, argumentos):
+    """
+    Envia um comando ao daemon (--serve). Retorna a resposta (dict) ou None
+    se não houver daemon atendendo no socket de controle.
+    """
+    familia, endereco = endereco_controle(config)
+    if familia == socket.AF_UNIX and not os.path.exists(endereco):
+        return None
+    try:
+        with socket.socket(familia, socket.SOCK_STREAM) as s:
+            s.settimeout(CONTROLE_TIMEOUT_SECONDS)
+            s.connect(endereco)
+            pedido = {"comando": comando, "argumentos": argumentos, "token": ler_token_controle()}
+            s.sendall((json.dumps(pedido) + "\n").encode("utf-8"))
+            with s.makefile("rb") as f:
+                linha = f.readline()
+    except OSError:
+        return None
+    try:
+        return json.loads(linha)
+    except ValueError:
+        return None
 
 def main_interativo(config):
     """Loop principal interativo com detecção automática de cadastro e anti-duplicata."""
-    global _last_time
-
     clear_screen()
     print_header()
 
     endpoint = get_endpoint_for_config(config)
-    debounce = config.get("debounce_seconds", DEBOUNCE_SECONDS)
+    debounce = DebounceCrachas(config.get("debounce_seconds", DEBOUNCE_SECONDS))
     escala_atual = config.get("escala_atual", "9")
 
     # Verifica status do dia
@@ -902,7 +3517,8 @@ def main_interativo(config):
     hora_transicao = horario_hoje["hora_transicao"] if horario_hoje else HORA_TRANSICAO_TEORIA_PADRAO
     hora_inicio = horario_hoje["hora_inicio"] if horario_hoje else HORA_INICIO_TEORIA_PADRAO
     hora_fim_teoria = config.get("hora_fim_teoria", HORA_FIM_TEORIA_PADRAO)
-    modalidade = determinar_modalidade(config)
+    relogio = RelogioModalidade(obter_agenda(config))
+    modalidade = relogio.atual
 
     # Cabeçalho informativo do dia
     print("┌─────────────────────────────────────────────────────────┐")
@@ -913,6 +3529,8 @@ def main_interativo(config):
         print("│         📅 HOJE É DIA DE PRÁTICA                        │")
     print("└─────────────────────────────────────────────────────────┘")
     print(f"\n   🕐 Modalidade atual: {modalidade}")
+    if relogio.proxima is not None:
+        print(f"   ⏭️  Próxima mudança: {relogio.proxima.strftime('%d/%m %H:%M')}")
     print(f"   📊 Escala Atual:    {escala_atual}")
 
     alunos = listar_alunos_cadastrados(config)
@@ -927,13 +3545,24 @@ def main_interativo(config):
     print("   (Ctrl+C para sair)")
     print("═" * 60)
 
-    # Controle de data para recarregar config apenas uma vez por dia
+    # Fila local durável (journal) e conexões aquecidas com o endpoint
+    servicos = ServicosFundo(config)
+    journal = servicos.journal
+    if journal is not None:
+        pendentes = journal.contar_pendentes()
+        if pendentes:
+            print(f"   💾 Pontos pendentes de envio: {pendentes} (reenvio automático)")
+
+    # Controle da virada do dia (a configuração em si é recarregada pelo observador)
     last_config_date = date.today()
+    # Último estado do disjuntor mostrado no console
+    estado_disjuntor = disjuntor.estado
 
     try:
         while True:
             print("\n   ⏳ Aguardando leitura do crachá...")
 
+            t_leitura = time.perf_counter()
             line = sys.stdin.readline()
             if not line:
                 break
@@ -941,22 +3570,40 @@ def main_interativo(config):
             serial = line.strip()
             if not serial:
                 continue
+            span = servicos.tracador.iniciar(serial, t_leitura)
+            span.marcar("stdin")
 
             # Validação: espera 8+ dígitos numéricos
             if not (serial.isdigit() and len(serial) >= 8):
                 if serial:
+                    metricas.contar("ponto_leituras_total", resultado="nao_reconhecida")
                     print(f"   ⚠️  Leitura não reconhecida: '{serial}'")
+                span.marcar("validacao")
+                span.finalizar("nao_reconhecida")
                 continue
 
-            now = time.time()
-            if now - _last_time < debounce:
+            if not debounce.aceitar(serial):
+                metricas.contar("ponto_leituras_total", resultado="debounce")
+                print(f"   🔁 Releitura do crachá {serial} ignorada ({debounce.suprimidos} suprimida(s) até agora)")
+                span.marcar("validacao")
+                span.finalizar("debounce")
                 continue
-            _last_time = now
+            span.marcar("validacao")
+
+            # Hot-reload: config_ponto.json alterado é validado e trocado entre leituras
+            recarga = servicos.observador.verificar(config)
+            if recarga is not None:
+                nova_config, alteracoes, erros = recarga
+                if nova_config is None:
+                    print(f"\n   ⚠️  Alteração da configuração ignorada: {'; '.join(erros)}")
+                else:
+                    config = nova_config
+                    print(f"\n   ♻️  Configuração recarregada ({', '.join(alteracoes)})")
 
-            # Recarrega configuração se mudou o dia
+            # Recalcula o estado do dia se a configuração mudou ou virou o dia
             current_date = date.today()
-            if current_date != last_config_date:
-                config = load_config()
+            novo_dia = current_date != last_config_date
+            if novo_dia or (recarga is not None and recarga[0] is not None):
                 is_teoria = is_dia_teoria(config)
                 horario_hoje = get_horario_teoria_hoje(config)
                 hora_transicao = horario_hoje["hora_transicao"] if horario_hoje else HORA_TRANSICAO_TEORIA_PADRAO
@@ -964,22 +3611,45 @@ def main_interativo(config):
                 hora_fim_teoria = config.get("hora_fim_teoria", HORA_FIM_TEORIA_PADRAO)
                 escala_atual = config.get("escala_atual", "9")
                 endpoint = get_endpoint_for_config(config)
-                last_config_date = current_date
-                print(f"\n   🔄 Novo dia detectado. Dia de teoria: {is_teoria}")
+                debounce.janela = config.get("debounce_seconds", DEBOUNCE_SECONDS)
+                relogio = RelogioModalidade(obter_agenda(config))
+                servicos.atualizar_config(config, novo_dia)
+                if novo_dia:
+                    last_config_date = current_date
+                    print(f"\n   🔄 Novo dia detectado. Dia de teoria: {is_teoria}")
+            span.marcar("config")
 
             hora = datetime.now().strftime("%H:%M:%S")
             data_br = datetime.now().strftime("%d/%m/%Y")
             data_iso = datetime.now().strftime("%Y-%m-%d")
 
-            # Determina modalidade baseada na hora atual
-            modalidade = determinar_modalidade(config)
+            # Modalidade vigente (recalculada apenas quando passa a hora de transição)
+            modalidade, mudou = relogio.modalidade()
+            if mudou:
+                print(f"\n   🔄 Modalidade agora: {modalidade}")
             # True quando está no momento de transição (>= hora_transicao em dia de teoria)
             em_transicao = is_teoria and (modalidade == 'Teoria')
+            span.marcar("agenda")
+
+            # Anti-duplicata: consulta em memória ao ledger local do dia
+            bloqueado, _, msg_duplicado = verificar_ponto_duplicado(
+                serial, data_iso, modalidade, endpoint, config, servicos.ledger
+            )
+            span.marcar("duplicata")
+            if bloqueado:
+                metricas.contar("ponto_leituras_total", resultado="duplicado")
+                print(f"\n   {msg_duplicado}")
+                beep("long")
+                span.marcar("bipe")
+                span.finalizar("duplicado")
+                continue
 
             # Resolve o nome do aluno (cadastrando se necessário)
-            if aluno_existe(serial, config):
-                nome = get_nome_aluno(serial, config)
-                email = get_email_aluno(serial, config)
+            aluno = buscar_aluno(serial, config)
+            span.marcar("registro")
+            if aluno is not None:
+                nome = aluno.nome
+                email = aluno.email
                 
                 print("\n   " + "─" * 50)
                 print("   ✅ CRACHÁ RECONHECIDO!")
@@ -993,71 +3663,115 @@ def main_interativo(config):
                 print("   " + "─" * 50)
                 
                 print("   📤 Enviando para o servidor...")
+                span.marcar("console")
                 
-                code, text = send_to_endpoint(serial, nome, endpoint, is_teoria, escala_atual, email)
-                
-                if code is None:
-                    print(f"   ❌ ERRO DE ENVIO: {text}")
-                    beep("long")
-                elif code == 200:
-                    print("   ✅ PONTO REGISTRADO COM SUCESSO!")
-                    beep("short")
+                if requer_transicao(serial, data_iso, em_transicao, servicos.ledger):
+                    # Saída da Prática + Entrada da Teoria (um único POST quando o servidor suporta)
+                    code, ok_pratica, ok_teoria, msg_pratica, msg_teoria = registrar_transicao_ponto(
+                        journal, serial, nome, endpoint, escala_atual, config, email, servicos.ledger
+                    )
+                    span.marcar("envio")
+                    aceito = ok_pratica and ok_teoria
+                    print(f"   {msg_pratica}")
+                    print(f"   {msg_teoria}")
+                    beep("short" if aceito else "long")
                 else:
-                    print(f"   ⚠️  Resposta do servidor: {code}")
-                    beep("long")
+                    code, text = registrar_ponto(
+                        journal, serial, nome, endpoint, is_teoria, escala_atual, email,
+                        modalidade=modalidade, ledger=servicos.ledger
+                    )
+                    span.marcar("envio")
+                    aceito = ponto_aceito(code, text)
+                
+                    if code is None:
+                        print(f"   ❌ ERRO DE ENVIO: {text}")
+                        if journal is not None:
+                            print("   💾 Ponto salvo localmente — será reenviado automaticamente.")
+                        beep("long")
+                    elif aceito:
+                        print("   ✅ PONTO REGISTRADO COM SUCESSO!")
+                        beep("short")
+                    else:
+                        print(f"   ⚠️  Resposta do servidor: {code} — {text}")
+                        beep("long")
                 
                 print("   " + "─" * 50)
             
             else:
                 # ALUNO NÃO EXISTE - Solicitar cadastro
                 nome, email = cadastrar_aluno_inline(serial, config)
+                span.marcar("cadastro")
                 
                 if nome:
                     # Aluno foi cadastrado, registrar ponto
                     print(f"\n   📤 Registrando ponto para {nome}...")
                     
-                    code, text = send_to_endpoint(serial, nome, endpoint, is_teoria, escala_atual, email)
+                    code, text = registrar_ponto(
+                        journal, serial, nome, endpoint, is_teoria, escala_atual, email,
+                        modalidade=modalidade, ledger=servicos.ledger
+                    )
+                    span.marcar("envio")
+                    aceito = ponto_aceito(code, text)
                     
                     if code is None:
                         print(f"   ❌ ERRO DE ENVIO: {text}")
+                        if journal is not None:
+                            print("   💾 Ponto salvo localmente — será reenviado automaticamente.")
                         beep("long")
                     else:
-                        if code == 200:
+                        if aceito:
                             print("   ✅ PONTO REGISTRADO COM SUCESSO!")
                             beep("short")
                         else:
-                            print(f"   ⚠️  Resposta do servidor: {code}")
+                            print(f"   ⚠️  Resposta do servidor: {code} — {text}")
                             beep("long")
                 else:
                     # Usuário pulou o cadastro, registrar como desconhecido
                     print(f"\n   📤 Registrando ponto como 'Desconhecido'...")
                     
-                    code, text = send_to_endpoint(serial, "Desconhecido", endpoint, is_teoria, escala_atual)
+                    code, text = registrar_ponto(
+                        journal, serial, "Desconhecido", endpoint, is_teoria, escala_atual,
+                        modalidade=modalidade, ledger=servicos.ledger
+                    )
+                    span.marcar("envio")
+                    aceito = ponto_aceito(code, text)
                     
                     if code is None:
                         print(f"   ❌ ERRO DE ENVIO: {text}")
+                        if journal is not None:
+                            print("   💾 Ponto salvo localmente — será reenviado automaticamente.")
                         beep("long")
                     else:
-                        if code == 200:
+                        if aceito:
                             print("   ✅ PONTO REGISTRADO (como Desconhecido)")
                             beep("short")
                         else:
-                            print(f"   ⚠️  Resposta do servidor: {code}")
+                            print(f"   ⚠️  Resposta do servidor: {code} — {text}")
                             beep("long")
                 
                 print("   " + "─" * 50)
+
+            # Situação do servidor: mostrada quando o disjuntor muda de estado
+            if disjuntor.estado != estado_disjuntor:
+                estado_disjuntor = disjuntor.estado
+                print(f"   {disjuntor.descricao()}")
+
+            span.marcar("bipe")
+            span.finalizar(resultado_envio(code, aceito=aceito))
     
     except KeyboardInterrupt:
         print("\n\n   👋 Sistema encerrado pelo usuário.")
+        print(f"   📊 {debounce.resumo()}")
         print("   Até logo!\n")
+    finally:
+        servicos.encerrar()
 
 
 def main(config):
     """Loop principal do programa."""
-    global _last_time
     
     endpoint = get_endpoint_for_config(config)
-    debounce = config.get("debounce_seconds", DEBOUNCE_SECONDS)
+    debounce = DebounceCrachas(config.get("debounce_seconds", DEBOUNCE_SECONDS))
     escala_atual = config.get("escala_atual", "9")
     
     logging.info("=== Sistema de Ponto NFC ===")
@@ -1067,17 +3781,23 @@ def main(config):
     
     # Verifica se hoje é dia de teoria
     is_teoria = is_dia_teoria(config)
+    relogio = RelogioModalidade(obter_agenda(config))
     if is_teoria:
         logging.info("Hoje é dia de TEORIA (aulas teóricas permitidas)")
     else:
         logging.info("Hoje NÃO é dia de teoria (apenas prática)")
     
-    # Controle de data para recarregar config apenas uma vez por dia
+    # Fila local durável (journal) e conexões aquecidas com o endpoint
+    servicos = ServicosFundo(config)
+    journal = servicos.journal
+    
+    # Controle da virada do dia (a configuração em si é recarregada pelo observador)
     last_config_date = date.today()
     
     try:
         while True:
             # lê linha (o leitor HID "digita" o UID e envia Enter)
+            t_leitura = time.perf_counter()
             line = sys.stdin.readline()
             if not line:
                 # EOF
@@ -1085,52 +3805,395 @@ def main(config):
             serial = line.strip()
             if not serial:
                 continue
+            span = servicos.tracador.iniciar(serial, t_leitura)
+            span.marcar("stdin")
 
             # validação: espera 8+ dígitos numéricos
             if not (serial.isdigit() and len(serial) >= 8):
+                metricas.contar("ponto_leituras_total", resultado="nao_reconhecida")
                 logging.debug(f"Leitura não reconhecida: '{serial}'")
+                span.marcar("validacao")
+                span.finalizar("nao_reconhecida")
                 continue
 
-            now = time.time()
-            if now - _last_time < debounce:
-                # debounce para evitar duplicados
+            if not debounce.aceitar(serial):
+                metricas.contar("ponto_leituras_total", resultado="debounce")
+                # debounce por crachá para evitar duplicados
+                logging.debug(f"Releitura de {serial} suprimida ({debounce.resumo()})")
+                span.marcar("validacao")
+                span.finalizar("debounce")
                 continue
-            _last_time = now
+            span.marcar("validacao")
+
+            # Hot-reload: config_ponto.json alterado é validado e trocado entre leituras
+            recarga = servicos.observador.verificar(config)
+            if recarga is not None:
+                nova_config, alteracoes, erros = recarga
+                if nova_config is None:
+                    logging.warning(f"Alteração da configuração ignorada: {'; '.join(erros)}")
+                else:
+                    config = nova_config
 
-            # Recarrega configuração apenas se mudou o dia
-            # (para verificar novos dias especiais adicionados)
+            # Recalcula o estado do dia se a configuração mudou ou virou o dia
             current_date = date.today()
-            if current_date != last_config_date:
-                config = load_config()
+            novo_dia = current_date != last_config_date
+            if novo_dia or (recarga is not None and recarga[0] is not None):
                 is_teoria = is_dia_teoria(config)
                 escala_atual = config.get("escala_atual", "9")
                 endpoint = get_endpoint_for_config(config)
-                last_config_date = current_date
-                logging.info(f"Novo dia detectado. Dia de teoria: {is_teoria}")
-
-            nome = get_nome_aluno(serial, config)
-            email = get_email_aluno(serial, config)
+                debounce.janela = config.get("debounce_seconds", DEBOUNCE_SECONDS)
+                relogio = RelogioModalidade(obter_agenda(config))
+                servicos.atualizar_config(config, novo_dia)
+                if novo_dia:
+                    last_config_date = current_date
+                    logging.info(f"Novo dia detectado. Dia de teoria: {is_teoria}")
+            span.marcar("config")
+
+            aluno = buscar_aluno(serial, config)
+            nome = aluno.nome if aluno is not None else "Desconhecido"
+            email = aluno.email if aluno is not None else ""
+            span.marcar("registro")
             hora = datetime.now().strftime("%H:%M:%S")
             data = datetime.now().strftime("%d/%m/%Y")
+            modalidade, mudou = relogio.modalidade()
+            if mudou:
+                logging.info(f"Modalidade agora: {modalidade}")
+            span.marcar("agenda")
+
+            bloqueado, _, msg_duplicado = verificar_ponto_duplicado(
+                serial, date.today().isoformat(), modalidade, endpoint, config, servicos.ledger
+            )
+            span.marcar("duplicata")
+            if bloqueado:
+                metricas.contar("ponto_leituras_total", resultado="duplicado")
+                logging.warning(f"{serial} ({nome}): {' '.join(msg_duplicado.split())}")
+                beep("long")
+                span.marcar("bipe")
+                span.finalizar("duplicado")
+                continue
             
             logging.info(f"Lido: {serial} ({nome}) - {data} {hora}")
             logging.info(f"Enviando para endpoint... (Dia Teoria: {is_teoria}, Escala: {escala_atual})")
 
-            code, text = send_to_endpoint(serial, nome, endpoint, is_teoria, escala_atual, email)
+            data_iso = date.today().isoformat()
+            em_transicao = is_teoria and modalidade == "Teoria"
+            if requer_transicao(serial, data_iso, em_transicao, servicos.ledger):
+                code, ok_pratica, ok_teoria, msg_pratica, msg_teoria = registrar_transicao_ponto(
+                    journal, serial, nome, endpoint, escala_atual, config, email, servicos.ledger
+                )
+                span.marcar("envio")
+                logging.info(f"Transição Prática→Teoria de {serial}: {msg_pratica} | {msg_teoria}")
+                beep("short" if ok_pratica and ok_teoria else "long")
+                span.marcar("bipe")
+                span.finalizar(resultado_envio(code, aceito=ok_pratica and ok_teoria))
+                continue
+
+            code, text = registrar_ponto(
+                journal, serial, nome, endpoint, is_teoria, escala_atual, email,
+                modalidade=modalidade, ledger=servicos.ledger
+            )
+            span.marcar("envio")
             if code is None:
                 logging.error(f"Erro de envio: {text}")
+                if journal is not None:
+                    logging.info("Ponto mantido no journal para reenvio automático.")
                 beep("long")
             else:
                 logging.info(f"Resposta: {code} - {text}")
-                if code == 200:
+                if ponto_aceito(code, text):
                     beep("short")
                 else:
                     beep("long")
+            span.marcar("bipe")
+            span.finalizar(resultado_envio(code, text))
 
     except KeyboardInterrupt:
         logging.info("Encerrado pelo usuário.")
+        logging.info(f"Debounce: {debounce.resumo()}")
     except Exception as e:
         logging.exception(f"Erro inesperado: {e}")
+    finally:
+        servicos.encerrar()
+
+# ========== MODO PIPELINE ==========
+
+class PipelinePonto:
+    """
+    Modo pipeline: desacopla a leitura dos crachás do envio pela rede.
+
+    - Uma thread leitora consome o stdin, valida, grava no journal e entrega
+      o ponto numa fila limitada (pipeline_fila_max), dando o bipe na hora.
+    - Um pool de workers (pipeline_workers) envia os pontos ao endpoint.
+    - Fila cheia (backpressure): o ponto continua gravado no journal e será
+      enviado pelo FlusherJournal; sem journal a leitura aguarda vaga na fila.
+    """
+
+    _FIM = object()
+
+    def __init__(self, config, entrada=None):
+        self.config = config
+        self.entrada = entrada if entrada is not None else sys.stdin
+        self.workers = max(1, int(config.get("pipeline_workers", PIPELINE_WORKERS)))
+        self.fila_max = max(1, int(config.get("pipeline_fila_max", PIPELINE_FILA_MAX)))
+        self.fila = queue.Queue(maxsize=self.fila_max)
+        self.debounce = DebounceCrachas(config.get("debounce_seconds", DEBOUNCE_SECONDS))
+        self.servicos = None
+        self.journal = None
+        self._console = threading.Lock()
+        self._lock_contadores = threading.Lock()
+        self._threads = []
+        self.contadores = {"lidos": 0, "enviados": 0, "falhas": 0, "transbordo": 0}
+
+    def _print(self, msg):
+        with self._console:
+            print(msg, flush=True)
+
+    def _contar(self, chave):
+        with self._lock_contadores:
+            self.contadores[chave] += 1
+
+    def _profundidade(self):
+        return f"fila {self.fila.qsize()}/{self.fila_max}"
+
+    def _ler(self):
+        """Thread leitora: stdin → validação → journal → fila."""
+        config = self.config
+        endpoint = get_endpoint_for_config(config)
+        escala_atual = config.get("escala_atual", "9")
+        is_teoria = is_dia_teoria(config)
+        relogio = RelogioModalidade(obter_agenda(config))
+        last_config_date = date.today()
+
+        tracador = self.servicos.tracador
+        while True:
+            t_leitura = time.perf_counter()
+            line = self.entrada.readline()
+            if not line:
+                break
+            serial = line.strip()
+            if not serial:
+                continue
+            span = tracador.iniciar(serial, t_leitura)
+            span.marcar("stdin")
+            if not (serial.isdigit() and len(serial) >= 8):
+                metricas.contar("ponto_leituras_total", resultado="nao_reconhecida")
+                self._print(f"   ⚠️  Leitura não reconhecida: '{serial}'")
+                span.marcar("validacao")
+                span.finalizar("nao_reconhecida")
+                continue
+
+            if not self.debounce.aceitar(serial):
+                metricas.contar("ponto_leituras_total", resultado="debounce")
+                self._print(f"   🔁 Releitura do crachá {serial} ignorada")
+                span.marcar("validacao")
+                span.finalizar("debounce")
+                continue
+            span.marcar("validacao")
+
+            recarga = self.servicos.observador.verificar(config)
+            if recarga is not None:
+                nova_config, alteracoes, erros = recarga
+                if nova_config is None:
+                    self._print(f"   ⚠️  Alteração da configuração ignorada: {'; '.join(erros)}")
+                else:
+                    config = self.config = nova_config
+                    self._print(f"   ♻️  Configuração recarregada ({', '.join(alteracoes)})")
+
+            current_date = date.today()
+            novo_dia = current_date != last_config_date
+            if novo_dia or (recarga is not None and recarga[0] is not None):
+                is_teoria = is_dia_teoria(config)
+                escala_atual = config.get("escala_atual", "9")
+                endpoint = get_endpoint_for_config(config)
+                self.debounce.janela = config.get("debounce_seconds", DEBOUNCE_SECONDS)
+                relogio = RelogioModalidade(obter_agenda(config))
+                self.servicos.atualizar_config(config, novo_dia)
+                if novo_dia:
+                    last_config_date = current_date
+                    self._print(f"\n   🔄 Novo dia detectado. Dia de teoria: {is_teoria}")
+            span.marcar("config")
+
+            aluno = buscar_aluno(serial, config)
+            nome = aluno.nome if aluno is not None else "Desconhecido"
+            email = aluno.email if aluno is not None else ""
+            span.marcar("registro")
+            data_iso = current_date.isoformat()
+            modalidade, mudou = relogio.modalidade()
+            if mudou:
+                self._print(f"   🔄 Modalidade agora: {modalidade}")
+            span.marcar("agenda")
+            ledger = self.servicos.ledger
+            bloqueado, _, msg_duplicado = verificar_ponto_duplicado(serial, data_iso, modalidade, endpoint, config, ledger)
+            span.marcar("duplicata")
+            if bloqueado:
+                metricas.contar("ponto_leituras_total", resultado="duplicado")
+                self._print(f"   {nome}: {msg_duplicado}")
+                beep("long")
+                span.marcar("bipe")
+                span.finalizar("duplicado")
+                continue
+
+            # Transição em um único POST; servidores sem a ação recebem o ponto comum,
+            # que o doPost já encadeia (saída prática + entrada teórica). Só o cache
+            # de capacidades é lido aqui: a thread leitora não espera a rede
+            em_transicao = requer_transicao(serial, data_iso, is_teoria and modalidade == "Teoria", ledger)
+            transicao = em_transicao and servidor_suporta_transicao(endpoint, consultar=False)
+            if transicao:
+                payload = montar_payload_transicao(serial, nome, escala_atual, email)
+            else:
+                payload = montar_payload(serial, nome, is_teoria, escala_atual, email, modalidade)
+            id_tap = None
+            if self.journal is not None:
+                try:
+                    id_tap = self.journal.registrar(payload, endpoint, reservar=True)
+                    if em_transicao:
+                        # Nos dois formatos o servidor fecha a prática e abre a teoria
+                        contabilizar_transicao(ledger, serial, data_iso, id_tap)
+                    else:
+                        ledger.registrar(serial, data_iso, modalidade, id_tap)
+                except sqlite3.Error as e:
+                    logging.error(f"Falha ao gravar ponto no journal: {e}")
+            span.marcar("journal")
+
+            self._contar("lidos")
+            # A partir daqui o span pertence ao worker que retirar o item da fila
+            item = (id_tap, payload, endpoint, time.perf_counter(), span)
+            try:
+                self.fila.put_nowait(item)
+            except queue.Full:
+                if id_tap is not None:
+                    # Backpressure: o ponto já está no journal, o flusher envia depois
+                    self.journal.devolver(id_tap, "fila do pipeline cheia")
+                    self._contar("transbordo")
+                    metricas.contar("ponto_leituras_total", resultado="transbordo")
+                    self._print(f"   ⏸️  FILA CHEIA ({self._profundidade()}) — {nome} salvo no journal para envio posterior.")
+                    beep("short")
+                    span.marcar("bipe")
+                    span.finalizar("transbordo")
+                    continue
+                self._print(f"   ⏸️  FILA CHEIA ({self._profundidade()}) — aguardando vaga...")
+                self.fila.put(item)
+
+            aviso = "" if aluno is not None else "  (crachá sem cadastro — registre no modo interativo)"
+            self._print(f"   📥 {nome} ({serial}) lido — {self._profundidade()}{aviso}")
+            beep("short")
+
+    def _coletar(self):
+        """
+        Retira a próxima batida da fila e, se o servidor aceita lotes, as que
+        chegarem em até lote_janela_ms (no máximo lote_max). O _FIM encerra a coleta.
+        """
+        item = self.fila.get()
+        itens = [item]
+        if item is self._FIM:
+            return itens
+        maximo = tamanho_lote(self.config.get("lote_max", LOTE_MAX), item[2])
+        prazo = time.monotonic() + self.config.get("lote_janela_ms", LOTE_JANELA_MS) / 1000
+        while len(itens) < maximo:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self.fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            itens.append(item)
+            if item is self._FIM:
+                break
+        return itens
+
+    def _enviar(self):
+        """Worker: fila → endpoint (um POST por batida ou por lote)."""
+        while True:
+            itens = self._coletar()
+            try:
+                batidas = [item for item in itens if item is not self._FIM]
+                for bloco in blocos_de_envio(batidas, len(batidas), lambda item: item[2]):
+                    self._enviar_bloco(bloco)
+            finally:
+                for _ in itens:
+                    self.fila.task_done()
+            if itens[-1] is self._FIM:
+                return
+
+    def _enviar_bloco(self, bloco):
+        """Envia batidas do mesmo endpoint e dá o retorno de cada aluno."""
+        endpoint = bloco[0][2]
+        for item in bloco:
+            item[4].marcar("espera_fila")
+        # Sem journal não há reenvio em segundo plano: tenta mais vezes agora
+        tentativas = 1 if all(item[0] is not None for item in bloco) else disjuntor.tentativas
+        if len(bloco) == 1:
+            resultados = [enviar_payload(bloco[0][1], endpoint, tentativas)]
+        else:
+            resultados = enviar_lote([item[1] for item in bloco], endpoint, tentativas)
+        sufixo = f", lote de {len(bloco)}" if len(bloco) > 1 else ""
+        for (id_tap, payload, _, t_leitura, span), (code, text) in zip(bloco, resultados):
+            status = None
+            if id_tap is not None:
+                status = concluir_no_journal(self.journal, id_tap, code, text, self.servicos.ledger)
+            span.marcar("envio")
+            ms = (time.perf_counter() - t_leitura) * 1000
+            metricas.contar("ponto_leituras_total", resultado=resultado_envio(code, text))
+            nome = payload.get("NomeCompleto", "")
+            if ponto_aceito(code, text):
+                if id_tap is None and ponto_aplicado(code, text):
+                    if payload.get("Acao") == ACAO_TRANSICAO or transicao_encadeada(text):
+                        contabilizar_transicao(self.servicos.ledger, payload["SerialNumber"], date.today().isoformat())
+                    else:
+                        self.servicos.ledger.registrar(payload["SerialNumber"], date.today().isoformat(), payload["Modalidade"])
+                self._contar("enviados")
+                self._print(f"   ✅ {nome}: ponto registrado ({ms:.0f} ms{sufixo}) — {self._profundidade()}")
+            else:
+                self._contar("falhas")
+                detalhe = text if code in (None, 200) else f"resposta {code}"
+                salvo = " — salvo no journal para reenvio" if status == "pendente" else ""
+                self._print(f"   ❌ {nome}: falha no envio ({detalhe}){salvo}")
+                beep("long")
+            span.finalizar(resultado_envio(code, text))
+
+    def executar(self):
+        """Inicia leitor e workers; retorna quando o stdin termina (EOF) ou Ctrl+C."""
+        self.servicos = ServicosFundo(self.config)
+        self.journal = self.servicos.journal
+        metricas.medidor("ponto_fila_profundidade", self.fila.qsize)
+        avisar_disjuntor = lambda antigo, novo: self._print(f"   {disjuntor.descricao()}")
+        disjuntor.ouvintes.append(avisar_disjuntor)
+        for i in range(self.workers):
+            t = threading.Thread(target=alvo_perfilado(self._enviar), name=f"EnvioPonto-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        leitor = threading.Thread(target=alvo_perfilado(self._ler), name="LeitorCracha", daemon=True)
+        leitor.start()
+
+        self._print(f"   ⚙️  Pipeline: {self.workers} worker(s) de envio, fila de até {self.fila_max} ponto(s)")
+        self._print("   👆 APROXIME O CRACHÁ DO LEITOR PARA BATER PONTO  (Ctrl+C para sair)")
+        try:
+            # join com timeout para que o Ctrl+C seja atendido (Windows)
+            while leitor.is_alive():
+                leitor.join(0.5)
+            self.fila.join()
+        except KeyboardInterrupt:
+            self._print("\n   👋 Sistema encerrado pelo usuário.")
+        finally:
+            for _ in self._threads:
+                try:
+                    self.fila.put(self._FIM, timeout=1)
+                except queue.Full:
+                    break
+            for t in self._threads:
+                t.join(timeout=2)
+            disjuntor.ouvintes.remove(avisar_disjuntor)
+            self.servicos.encerrar()
+            c = self.contadores
+            self._print(f"   📊 Lidos: {c['lidos']} | Enviados: {c['enviados']} | Falhas: {c['falhas']} | Transbordo p/ journal: {c['transbordo']}")
+            self._print(f"   🔁 Debounce: {self.debounce.resumo()}")
+
+def main_pipeline(config):
+    """Loop principal em modo pipeline (leitura desacoplada do envio)."""
+    clear_screen()
+    print_header()
+    PipelinePonto(config).executar()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -1140,6 +4203,7 @@ if __name__ == "__main__":
 Exemplos de uso:
   python SistemaPonto.py                                    # Execução interativa (padrão)
   python SistemaPonto.py --background                       # Executar em segundo plano (Windows)
+  python SistemaPonto.py --pipeline --workers 4             # Leitura desacoplada do envio (fila + workers)
   python SistemaPonto.py --add-dia 25/12/2024               # Dia especial (horários padrão)
   python SistemaPonto.py --add-dia 25/12/2024 --hora-transicao 16:30 --hora-inicio 17:00
   python SistemaPonto.py --remove-dia 25/12/2024            # Remover dia especial
@@ -1149,6 +4213,10 @@ Exemplos de uso:
   python SistemaPonto.py --show-escala                      # Mostrar escala atual
   python SistemaPonto.py --install-startup                  # Instalar para iniciar com Windows
   python SistemaPonto.py --create-config                    # Criar arquivo de configuração padrão
+  python SistemaPonto.py --status-fila                      # Mostrar pontos pendentes no journal local
+  python SistemaPonto.py --testar-conexao                   # Medir tempos de conexão/TLS/1º byte com o endpoint
+  python SistemaPonto.py --trace logs/spans.jsonl           # Gravar o tempo de cada fase de cada leitura
+  python SistemaPonto.py --profile                          # Rodar sob cProfile e mostrar relatório ao sair
 
 Funcionamento:
   - Ao aproximar um crachá antes de hora_transicao → registra Prática (entrada ou saída)
@@ -1156,11 +4224,19 @@ Funcionamento:
       registra automaticamente: Saída da Prática + Entrada da Teoria (1 tap = 2 registros)
   - Teoria encerra às hora_fim_teoria (padrão: 00:00 / meia-noite)
   - Horários configuráveis por dia da semana em horarios_teoria no config_ponto.json
+  - Todo ponto é gravado no journal local (journal_file) antes do envio;
+      pontos que falharem são reenviados automaticamente em segundo plano
         """
     )
     parser.add_argument("--endpoint", "-e", help="URL do Apps Script endpoint")
     parser.add_argument("--background", "-b", action="store_true",
                         help="Executar em segundo plano (esconde janela no Windows)")
+    parser.add_argument("--pipeline", "-p", action="store_true",
+                        help="Modo pipeline: leitor dedicado, fila limitada e workers de envio")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="Número de workers de envio no modo pipeline")
+    parser.add_argument("--fila-max", type=int, metavar="N",
+                        help="Tamanho máximo da fila do modo pipeline")
     parser.add_argument("--create-config", action="store_true",
                         help="Criar arquivo de configuração padrão")
     parser.add_argument("--add-dia", metavar="DD/MM/YYYY",
@@ -1183,6 +4259,16 @@ Funcionamento:
                         help="Instalar para iniciar com o Windows")
     parser.add_argument("--uninstall-startup", action="store_true",
                         help="Remover da inicialização do Windows")
+    parser.add_argument("--status-fila", action="store_true",
+                        help="Mostrar a situação do journal local de pontos")
+    parser.add_argument("--testar-conexao", action="store_true",
+                        help="Medir os tempos por fase (conexão, TLS, 1º byte) até o endpoint")
+    parser.add_argument("--trace", metavar="ARQUIVO",
+                        help="Gravar spans por leitura (JSON Lines) em ARQUIVO (sobrescreve trace_file)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Daemon: loop do quiosque + socket de controle que atende os comandos de gerenciamento")
+    parser.add_argument("--profile", nargs="?", const=PERFIL_FILE_PADRAO, metavar="ARQUIVO",
+                        help=f"Executar sob cProfile; ao sair grava ARQUIVO (padrão: {PERFIL_FILE_PADRAO}) e mostra o relatório")
 
     args = parser.parse_args()
 
@@ -1191,48 +4277,50 @@ Funcionamento:
         save_default_config()
         sys.exit(0)
 
+    # Com um daemon (--serve) no ar, o comando é atendido por ele e vale na
+    # hora; sem daemon, é executado aqui mesmo sobre o config_ponto.json.
+    pedido = None
     if args.add_dia:
-        add_dia_especial(
-            args.add_dia,
-            hora_transicao=getattr(args, 'hora_transicao', None),
-            hora_inicio=getattr(args, 'hora_inicio', None),
-        )
-        sys.exit(0)
-
-    if args.remove_dia:
-        remove_dia_especial(args.remove_dia)
-        sys.exit(0)
-
-    if args.list_dias:
-        list_dias_especiais()
-        sys.exit(0)
-
-    if args.list_alunos:
-        config = load_config()
-        alunos = listar_alunos_cadastrados(config)
-        print("\n=== Alunos Cadastrados ===\n")
-        if not alunos:
-            print("Nenhum aluno cadastrado.")
+        pedido = ("add-dia", {"data": args.add_dia, "hora_transicao": args.hora_transicao,
+                              "hora_inicio": args.hora_inicio})
+    elif args.remove_dia:
+        pedido = ("remove-dia", {"data": args.remove_dia})
+    elif args.list_dias:
+        pedido = ("list-dias", {})
+    elif args.list_alunos:
+        pedido = ("list-alunos", {})
+    elif args.show_escala:
+        pedido = ("show-escala", {})
+    elif args.set_escala:
+        pedido = ("set-escala", {"escala": args.set_escala})
+    elif args.status_fila:
+        pedido = ("status-fila", {})
+    if pedido is not None:
+        comando, argumentos = pedido
+        resposta = enviar_comando_controle(load_config(), comando, argumentos)
+        if resposta is not None:
+            print(resposta.get("saida", ""), end="")
         else:
-            for uid, dados in sorted(alunos.items(), key=lambda x: x[1].get("nome", "")):
-                nome = dados.get("nome", "")
-                email = dados.get("email", "") or "(sem email)"
-                print(f"  {uid}: {nome} - {email}")
-        print("")
+            executar_comando(comando, argumentos)
         sys.exit(0)
 
-    if args.show_escala:
+    if args.testar_conexao:
         config = load_config()
-        escala = config.get("escala_atual", "9")
-        print(f"\n=== Escala Atual ===\n")
-        print(f"  Escala configurada: {escala}")
+        if args.endpoint:
+            config["endpoint"] = args.endpoint
+        endpoint = get_endpoint_for_config(config)
+        cliente = obter_cliente_http(config)
+        print("\n=== Teste de Conexão ===\n")
+        print(f"  Endpoint: {endpoint}\n")
+        for i, rotulo in enumerate(["fria", "aquecida", "aquecida"]):
+            fases = cliente.aquecer(endpoint)
+            if fases is None:
+                print(f"  {i + 1}. Falha na requisição ao endpoint.")
+                break
+            print(f"  {i + 1}. Conexão {rotulo}: {formatar_fases(fases)}")
         print("")
         sys.exit(0)
 
-    if args.set_escala:
-        set_escala_atual(args.set_escala)
-        sys.exit(0)
-
     if args.install_startup:
         install_windows_startup()
         sys.exit(0)
@@ -1241,20 +4329,36 @@ Funcionamento:
         uninstall_windows_startup()
         sys.exit(0)
 
-    # Carrega configuração
-    config = load_config()
-    
     # Sobrescreve endpoint se fornecido via argumento
+    # (mantidas também nas recargas da configuração)
     if args.endpoint:
-        config["endpoint"] = args.endpoint
+        CONFIG_SOBRESCRITAS["endpoint"] = args.endpoint
+    if args.workers:
+        CONFIG_SOBRESCRITAS["pipeline_workers"] = args.workers
+    if args.fila_max:
+        CONFIG_SOBRESCRITAS["pipeline_fila_max"] = args.fila_max
+    if args.trace:
+        CONFIG_SOBRESCRITAS["trace_file"] = args.trace
+
+    # Carrega configuração
+    config = load_config()
+    if args.serve and not config.get("controle_socket"):
+        CONFIG_SOBRESCRITAS["controle_socket"] = config["controle_socket"] = CONTROLE_SOCKET_PADRAO
     
     # Modo background (esconde console no Windows e usa logging)
-    if args.background:
+    if args.background or (args.serve and not args.pipeline):
         hide_console_window()
         # Configura logging para modo background
         setup_logging(config.get("log_file"))
         # Executa o loop principal silencioso (antigo)
-        main(config)
+        loop = main
+    elif args.pipeline:
+        loop = main_pipeline
     else:
         # Modo interativo (padrão) - com visual melhorado
-        main_interativo(config)
+        loop = main_interativo
+
+    if args.profile:
+        executar_com_perfil(loop, config, args.profile)
+    else:
+        loop(config)
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+SnapshotColunar.py
+
+Formato colunar compacto para o snapshot completo do doGet (o "cache" de
+todas as abas, como o BancoDeDadosTeste.json), lido por memory-map.
+
+Em vez de um JSON com uma lista de dicionários por aba, o arquivo guarda:
+  - um sumário (TOC) com as abas, seus metadados e onde está cada coluna;
+  - cada coluna tipada (texto, inteiro, número, booleano) num bloco contínuo;
+  - todos os textos uma única vez, numa tabela de strings internadas.
+
+Abrir o arquivo lê só o cabeçalho e o sumário; ler `cache.Alunos` ou uma
+`EscalaPratica{N}` toca apenas os bytes das colunas dessa aba (e os textos
+que elas usam). `para_dict()` reconstrói o snapshot idêntico ao JSON.
+
+Uso:
+  python SnapshotColunar.py ../BancoDeDadosTeste.json -o dados/snapshot.colunar
+  python SnapshotColunar.py dados/snapshot.colunar --info
+  python SnapshotColunar.py dados/snapshot.colunar --aba Alunos
+  python SnapshotColunar.py ../BancoDeDadosTeste.json --benchmark --repeticoes 5
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+# ========== FORMATO ==========
+MAGICO = b"PSNAPCOL"
+VERSAO = 1
+CABECALHO = struct.Struct("<8sIIQQ")  # mágico, versão, reservado, offset do sumário, tamanho do sumário
+
+# Tipos de coluna
+TIPO_TEXTO = "s"     # uint32: id na tabela de strings
+TIPO_INTEIRO = "i"   # int64
+TIPO_NUMERO = "f"    # float64 (inteiros marcados no estado, para voltarem como int)
+TIPO_BOOLEANO = "b"  # uint8
+TIPO_JSON = "j"      # uint32: id do texto JSON do valor (colunas com tipos misturados)
+TIPO_VAZIA = "z"     # sem valores: todas as células vazias ou ausentes
+
+FORMATOS = {TIPO_TEXTO: "I", TIPO_INTEIRO: "q", TIPO_NUMERO: "d", TIPO_BOOLEANO: "B", TIPO_JSON: "I"}
+
+# Estado de cada célula (uint8), gravado só quando a coluna tem alguma célula
+# diferente de "valor"
+ESTADO_VALOR = 0
+ESTADO_VAZIO = 1    # ""
+ESTADO_AUSENTE = 2  # registro sem a chave
+ESTADO_INTEIRO = 3  # valor inteiro guardado numa coluna TIPO_NUMERO
+
+INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+FLOAT64_INTEIRO_EXATO = 2 ** 53  # maior |inteiro| que o float64 guarda sem perda
+ABA_EXEMPLO_ESCALA = "EscalaPratica1"
+# ===========================
+
+
+def _tipo_do_valor(valor):
+    if isinstance(valor, bool):
+        return TIPO_BOOLEANO
+    if isinstance(valor, int):
+        return TIPO_INTEIRO if INT64_MIN <= valor <= INT64_MAX else TIPO_JSON
+    if isinstance(valor, float):
+        return TIPO_NUMERO
+    if isinstance(valor, str):
+        return TIPO_TEXTO
+    return TIPO_JSON
+
+def _tipo_da_coluna(valores):
+    """
+    Tipo que acomoda todos os valores presentes. int + float vira número
+    (float64) só se cada inteiro cabe nele sem perda; senão a coluna é JSON.
+    """
+    tipos = {_tipo_do_valor(v) for v in valores}
+    if not tipos:
+        return TIPO_VAZIA
+    if len(tipos) == 1:
+        return tipos.pop()
+    if tipos == {TIPO_INTEIRO, TIPO_NUMERO}:
+        exatos = all(isinstance(v, float) or abs(v) <= FLOAT64_INTEIRO_EXATO for v in valores)
+        return TIPO_NUMERO if exatos else TIPO_JSON
+    return TIPO_JSON
+
+
+# ========== ESCRITA ==========
+
+class _Escritor:
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.posicao = 0
+        self.strings = {}
+
+    def escrever(self, dados):
+        inicio = self.posicao
+        self.arquivo.write(dados)
+        self.posicao += len(dados)
+        return inicio
+
+    def alinhar(self):
+        resto = self.posicao % 8
+        if resto:
+            self.escrever(b"\0" * (8 - resto))
+
+    def id_string(self, texto):
+        if texto not in self.strings:
+            self.strings[texto] = len(self.strings)
+        return self.strings[texto]
+
+
+def converter(snapshot, caminho_saida):
+    """
+    Grava um snapshot do doGet (dict no formato {cache, metadados}) no formato
+    colunar. Retorna o tamanho do arquivo em bytes.
+    """
+    caminho_saida = Path(caminho_saida)
+    caminho_saida.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho_saida.with_suffix(caminho_saida.suffix + ".tmp")
+    with open(temporario, "wb") as f:
+        w = _Escritor(f)
+        w.escrever(CABECALHO.pack(MAGICO, VERSAO, 0, 0, 0))
+        sumario = {"metadados": snapshot.get("metadados") or {}, "abas": {}}
+
+        for chave, conteudo in (snapshot.get("cache") or {}).items():
+            registros = conteudo.get("registros") or []
+            nomes = []
+            for registro in registros:
+                nomes.extend(k for k in registro if k not in nomes)
+            colunas = []
+            for nome in nomes:
+                brutos = [r.get(nome) for r in registros]
+                estados = []
+                presentes = []
+                for registro, valor in zip(registros, brutos):
+                    if nome not in registro:
+                        estados.append(ESTADO_AUSENTE)
+                    elif valor == "":
+                        estados.append(ESTADO_VAZIO)
+                    else:
+                        estados.append(ESTADO_VALOR)
+                        presentes.append(valor)
+                tipo = _tipo_da_coluna(presentes)
+                if tipo == TIPO_NUMERO:
+                    estados = [ESTADO_INTEIRO if e == ESTADO_VALOR and not isinstance(v, float) else e
+                               for e, v in zip(estados, brutos)]
+                coluna = {"n": nome, "t": tipo, "o": -1, "e": -1}
+                if tipo != TIPO_VAZIA:
+                    valores = []
+                    for e, v in zip(estados, brutos):
+                        if e in (ESTADO_VAZIO, ESTADO_AUSENTE):
+                            valores.append(0)
+                        elif tipo == TIPO_TEXTO:
+                            valores.append(w.id_string(v))
+                        elif tipo == TIPO_JSON:
+                            valores.append(w.id_string(json.dumps(v, ensure_ascii=False, separators=(",", ":"))))
+                        elif tipo == TIPO_NUMERO:
+                            valores.append(float(v))
+                        else:
+                            valores.append(v)
+                    w.alinhar()
+                    coluna["o"] = w.escrever(struct.pack(f"<{len(valores)}{FORMATOS[tipo]}", *valores))
+                if any(estados):
+                    coluna["e"] = w.escrever(bytes(estados))
+                colunas.append(coluna)
+            sumario["abas"][chave] = {
+                "metadados": conteudo.get("metadados") or {},
+                "linhas": len(registros),
+                "colunas": colunas,
+            }
+
+        # Tabela de strings: offsets uint32 (n + 1) seguidos dos textos em UTF-8
+        codificados = [s.encode("utf-8") for s in w.strings]
+        offsets = [0]
+        for dados in codificados:
+            offsets.append(offsets[-1] + len(dados))
+        w.alinhar()
+        sumario["strings"] = {
+            "quantidade": len(codificados),
+            "offsets": w.escrever(struct.pack(f"<{len(offsets)}I", *offsets)),
+        }
+        sumario["strings"]["dados"] = w.escrever(b"".join(codificados))
+
+        texto = json.dumps(sumario, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        inicio_sumario = w.escrever(texto)
+        f.seek(0)
+        f.write(CABECALHO.pack(MAGICO, VERSAO, 0, inicio_sumario, len(texto)))
+        tamanho = w.posicao
+    os.replace(temporario, caminho_saida)
+    return tamanho
+
+
+# ========== LEITURA ==========
+
+class AbaColunar:
+    """Uma aba do snapshot; as colunas são decodificadas sob demanda e guardadas."""
+
+    def __init__(self, snapshot, chave, info):
+        self._snapshot = snapshot
+        self._info = info
+        self._colunas = {}
+        self.chave = chave
+        self.metadados = info["metadados"]
+        self.nome_original = self.metadados.get("nomeOriginal", chave)
+        self.nomes_colunas = [c["n"] for c in info["colunas"]]
+
+    def __len__(self):
+        return self._info["linhas"]
+
+    def _estados(self, coluna):
+        if coluna["e"] < 0:
+            return None
+        return self._snapshot._mm[coluna["e"]:coluna["e"] + len(self)]
+
+    def coluna(self, nome):
+        """
+        Valores da coluna, um por linha. Células vazias voltam como "" e
+        células ausentes (registro sem a chave) como None.
+        """
+        if nome in self._colunas:
+            return self._colunas[nome]
+        coluna = next((c for c in self._info["colunas"] if c["n"] == nome), None)
+        if coluna is None:
+            raise KeyError(nome)
+        n = len(self)
+        tipo = coluna["t"]
+        estados = self._estados(coluna)
+        if tipo == TIPO_VAZIA:
+            brutos = [None] * n
+        else:
+            brutos = list(struct.unpack_from(f"<{n}{FORMATOS[tipo]}", self._snapshot._mm, coluna["o"]))
+        texto = self._snapshot.string
+        if estados is None:
+            # Caminho comum: nenhuma célula vazia ou ausente na coluna
+            if tipo == TIPO_TEXTO:
+                valores = [texto(i) for i in brutos]
+            elif tipo == TIPO_JSON:
+                valores = [json.loads(texto(i)) for i in brutos]
+            elif tipo == TIPO_BOOLEANO:
+                valores = [bool(v) for v in brutos]
+            else:
+                valores = brutos
+            self._colunas[nome] = valores
+            return valores
+        valores = []
+        for i, bruto in enumerate(brutos):
+            estado = estados[i]
+            if estado == ESTADO_VAZIO:
+                valores.append("")
+            elif estado == ESTADO_AUSENTE:
+                valores.append(None)
+            elif estado == ESTADO_INTEIRO:
+                valores.append(int(bruto))
+            elif tipo == TIPO_TEXTO:
+                valores.append(texto(bruto))
+            elif tipo == TIPO_JSON:
+                valores.append(json.loads(texto(bruto)))
+            elif tipo == TIPO_BOOLEANO:
+                valores.append(bool(bruto))
+            else:
+                valores.append(bruto)
+        self._colunas[nome] = valores
+        return valores
+
+    def registros(self):
+        """Lista de dicionários, igual a cache.<aba>.registros do JSON."""
+        nomes = self.nomes_colunas
+        colunas = [self.coluna(nome) for nome in nomes]
+        ausentes = []
+        for c in self._info["colunas"]:
+            estados = self._estados(c)
+            if estados is not None and ESTADO_AUSENTE in estados:
+                ausentes.append((c["n"], bytes(estados)))
+        resultado = [dict(zip(nomes, linha)) for linha in zip(*colunas)] if colunas else [{} for _ in range(len(self))]
+        for nome, estados in ausentes:
+            for i, estado in enumerate(estados):
+                if estado == ESTADO_AUSENTE:
+                    del resultado[i][nome]
+        return resultado
+
+    def __iter__(self):
+        return iter(self.registros())
+
+
+class SnapshotColunar:
+    """
+    Snapshot colunar aberto por memory-map. Só o cabeçalho e o sumário são
+    lidos ao abrir; abas, colunas e textos são carregados quando usados.
+
+        with SnapshotColunar("dados/snapshot.colunar") as snap:
+            alunos = snap["Alunos"].registros()
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._arquivo = open(self.caminho, "rb")
+        try:
+            self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._arquivo.close()
+            raise ValueError(f"{caminho}: arquivo vazio")
+        magico, versao, _, inicio, tamanho = CABECALHO.unpack_from(self._mm, 0)
+        if magico != MAGICO:
+            self.fechar()
+            raise ValueError(f"{caminho}: não é um snapshot colunar")
+        if versao != VERSAO:
+            self.fechar()
+            raise ValueError(f"{caminho}: versão {versao} não suportada (esperado {VERSAO})")
+        self._sumario = json.loads(self._mm[inicio:inicio + tamanho].decode("utf-8"))
+        self._strings = {}
+        self._abas = {}
+        self.metadados = self._sumario["metadados"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        self._abas.clear()
+        self._strings.clear()
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._arquivo.close()
+
+    def string(self, indice):
+        """Texto internado `indice` (decodificado uma vez e reaproveitado)."""
+        texto = self._strings.get(indice)
+        if texto is None:
+            info = self._sumario["strings"]
+            inicio, fim = struct.unpack_from("<II", self._mm, info["offsets"] + 4 * indice)
+            texto = self._mm[info["dados"] + inicio:info["dados"] + fim].decode("utf-8")
+            self._strings[indice] = texto
+        return texto
+
+    def abas(self):
+        return list(self._sumario["abas"])
+
+    def __contains__(self, chave):
+        return chave in self._sumario["abas"]
+
+    def __getitem__(self, chave):
+        if chave not in self._abas:
+            if chave not in self._sumario["abas"]:
+                raise KeyError(chave)
+            self._abas[chave] = AbaColunar(self, chave, self._sumario["abas"][chave])
+        return self._abas[chave]
+
+    aba = __getitem__
+
+    def para_dict(self):
+        """Snapshot completo, idêntico ao JSON de origem."""
+        return {
+            "cache": {chave: {"registros": self[chave].registros(), "metadados": self[chave].metadados}
+                      for chave in self.abas()},
+            "metadados": self.metadados,
+        }
+
+
+def eh_colunar(caminho):
+    with open(caminho, "rb") as f:
+        return f.read(len(MAGICO)) == MAGICO
+
+def carregar_snapshot(caminho):
+    """Snapshot como dict, de um arquivo colunar ou de um JSON do doGet."""
+    if eh_colunar(caminho):
+        with SnapshotColunar(caminho) as snap:
+            return snap.para_dict()
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ========== BENCHMARK (--benchmark) ==========
+
+# Cada medição roda num processo novo; o script imprime tempo (ms) e quanto a
+# memória residente (KiB) cresceu com a operação (dados ainda referenciados).
+_MEDICAO = r"""
+import sys, time, json, resource
+sys.path.insert(0, {pasta!r})
+def rss():
+    try:  # memória residente atual (Linux)
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:  # outros sistemas: só o pico
+        r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return r // 1024 if sys.platform == "darwin" else r
+import SnapshotColunar as sc
+antes = rss()
+t0 = time.perf_counter()
+{codigo}
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": ms, "rss_kib": rss() - antes, "linhas": linhas}}))
+"""
+
+def _casos(json_path, colunar_path, aba_escala):
+    return [
+        ("json: snapshot completo",
+         f"d = json.load(open({json_path!r}, encoding='utf-8')); linhas = sum(len(a['registros']) for a in d['cache'].values())"),
+        ("json: só Alunos",
+         f"d = json.load(open({json_path!r}, encoding='utf-8')); linhas = len(d['cache']['Alunos']['registros'])"),
+        ("colunar: abrir (sumário)",
+         f"s = sc.SnapshotColunar({colunar_path!r}); linhas = 0"),
+        ("colunar: só Alunos",
+         f"s = sc.SnapshotColunar({colunar_path!r}); linhas = len(s['Alunos'].registros())"),
+        (f"colunar: só {aba_escala}",
+         f"s = sc.SnapshotColunar({colunar_path!r}); linhas = len(s[{aba_escala!r}].registros())"),
+        ("colunar: snapshot completo",
+         f"s = sc.SnapshotColunar({colunar_path!r}); d = s.para_dict(); linhas = sum(len(a['registros']) for a in d['cache'].values())"),
+    ]
+
+def _descartar_cache_de_paginas(*caminhos):
+    """Pede ao kernel para esquecer as páginas dos arquivos (leitura fria), quando suportado."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for caminho in caminhos:
+        fd = os.open(caminho, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def executar_benchmark(json_path, colunar_path=None, repeticoes=5, aba_escala=ABA_EXEMPLO_ESCALA):
+    """Compara tempo de carga e memória residente do JSON com o formato colunar."""
+    if sys.platform == "win32":
+        print("❌ O benchmark usa o módulo 'resource' (Linux/macOS).")
+        sys.exit(1)
+    json_path = str(Path(json_path).resolve())
+    if colunar_path is None:
+        colunar_path = str(Path(json_path).with_suffix(".colunar"))
+    with open(json_path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    converter(snapshot, colunar_path)
+    colunar_path = str(Path(colunar_path).resolve())
+    if aba_escala not in snapshot.get("cache", {}):
+        aba_escala = next(iter(snapshot["cache"]))
+
+    pasta = str(Path(__file__).resolve().parent)
+    resultados = []
+    frio = False
+    for nome, codigo in _casos(json_path, colunar_path, aba_escala):
+        amostras = []
+        for _ in range(repeticoes):
+            frio = _descartar_cache_de_paginas(json_path, colunar_path)
+            saida = subprocess.run([sys.executable, "-c", _MEDICAO.format(pasta=pasta, codigo=codigo)],
+                                   capture_output=True, text=True, check=True)
+            amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+        resultados.append({
+            "caso": nome,
+            "ms": statistics.median(a["ms"] for a in amostras),
+            "rss_kib": max(a["rss_kib"] for a in amostras),
+            "linhas": amostras[0]["linhas"],
+        })
+    return {
+        "json_bytes": os.path.getsize(json_path),
+        "colunar_bytes": os.path.getsize(colunar_path),
+        "repeticoes": repeticoes,
+        "frio": frio,
+        "resultados": resultados,
+    }
+
+def imprimir_benchmark(r):
+    print(f"\n📦 Tamanho: JSON {r['json_bytes'] / 1024:.0f} KiB | colunar {r['colunar_bytes'] / 1024:.0f} KiB "
+          f"({100 * r['colunar_bytes'] / r['json_bytes']:.0f}%)")
+    print(f"⏱️  Carga (mediana de {r['repeticoes']}, processo novo"
+          f"{', cache de páginas descartado' if r['frio'] else ''}):\n")
+    print(f"  {'caso':<32} {'tempo':>10} {'+RSS':>10} {'linhas':>8}")
+    for linha in r["resultados"]:
+        print(f"  {linha['caso']:<32} {linha['ms']:>8.1f}ms {linha['rss_kib']:>7} KiB {linha['linhas']:>8}")
+    print()
+
+
+def imprimir_info(snap):
+    tamanho = os.path.getsize(snap.caminho)
+    print(f"\n📦 {snap.caminho} ({tamanho / 1024:.0f} KiB, {snap._sumario['strings']['quantidade']} textos internados)")
+    print(f"   Atualizado em: {snap.metadados.get('ultimaAtualizacao', '-')}\n")
+    for chave in snap.abas():
+        info = snap._sumario["abas"][chave]
+        tipos = "".join(c["t"] for c in info["colunas"])
+        print(f"  {chave:<20} {info['linhas']:>5} linha(s)  {len(info['colunas']):>3} coluna(s)  [{tipos}]")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte e lê o snapshot do doGet em formato colunar (memory-map)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("arquivo", help="Snapshot JSON do doGet ou arquivo colunar")
+    parser.add_argument("-o", "--saida", help="Converte o JSON para um arquivo colunar neste caminho")
+    parser.add_argument("--info", action="store_true", help="Mostra as abas e os tipos de coluna do arquivo colunar")
+    parser.add_argument("--aba", help="Imprime os registros de uma aba (em JSON)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compara tempo de carga e memória do JSON com o formato colunar")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por caso no --benchmark (padrão: 5)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        print(f"❌ Arquivo não encontrado: {args.arquivo}")
+        sys.exit(1)
+
+    if args.benchmark:
+        if eh_colunar(args.arquivo):
+            print("❌ O --benchmark parte do snapshot JSON.")
+            sys.exit(1)
+        imprimir_benchmark(executar_benchmark(args.arquivo, args.saida, args.repeticoes))
+        return
+
+    if args.saida:
+        if eh_colunar(args.arquivo):
+            print("❌ O arquivo já está no formato colunar.")
+            sys.exit(1)
+        with open(args.arquivo, "r", encoding="utf-8") as f:
+            tamanho = converter(json.load(f), args.saida)
+        print(f"✅ {args.saida} gravado ({tamanho / 1024:.0f} KiB; JSON: "
+              f"{os.path.getsize(args.arquivo) / 1024:.0f} KiB)")
+        return
+
+    if not eh_colunar(args.arquivo):
+        print("❌ Use -o para converter o JSON, ou informe um arquivo colunar.")
+        sys.exit(1)
+    with SnapshotColunar(args.arquivo) as snap:
+        if args.aba:
+            if args.aba not in snap:
+                print(f"❌ Aba não encontrada: {args.aba}")
+                sys.exit(1)
+            print(json.dumps(snap[args.aba].registros(), ensure_ascii=False, indent=2))
+        else:
+            imprimir_info(snap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+SnapshotDelta.py
+
+Diferença entre snapshots do doGet por linha (_rowId/_rowIndex, gerados pelo
+criarRegistrosDeAba do Code.gs) e um espelho local que aplica só o que mudou.
+
+Um conjunto de mudanças (delta) descreve, por aba:
+  - inserir:   {chave: registro} das linhas novas
+  - atualizar: {chave: {"campos": {campo: valor}, "remover": [campo]}} só com o que mudou
+  - remover:   [chave] das linhas que saíram
+  - mover:     [[primeiro, último, deslocamento]] faixas de _rowIndex que só
+               mudaram de posição (ex.: uma linha apagada acima delas)
+  - metadados: os metadados da aba, se mudaram
+e abas_removidas para abas que deixaram de existir.
+
+A chave de uma linha é o _rowId; quando ele se repete na aba (o Code.gs usa o
+EmailHC, que repete em Ausencias e nas abas de ponto), vale "_rowId@_rowIndex".
+
+O EspelhoSnapshot guarda o snapshot em SQLite com um hash por linha: comparar
+um snapshot novo não decodifica as linhas guardadas, e aplicar o delta escreve
+só as linhas que mudaram.
+
+Uso:
+  python SnapshotDelta.py antigo.json novo.json -o delta.json
+  python SnapshotDelta.py --espelho dados/espelho_snapshot.db --sincronizar novo.json
+  python SnapshotDelta.py --espelho dados/espelho_snapshot.db --aplicar delta.json
+  python SnapshotDelta.py --benchmark --escalas 10 100 --alteracoes 50
+"""
+
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import itertools
+from collections import Counter
+from pathlib import Path
+
+VERSAO_DELTA = 1
+ESPELHO_PADRAO = "dados/espelho_snapshot.db"
+_AUSENTE = object()
+
+
+# ========== DIFERENÇA ==========
+
+def chaves_da_aba(registros):
+    """Pares (chave, registro) de uma aba: _rowId, ou _rowId@_rowIndex se ele se repete."""
+    ids = [str(r.get("_rowId", "")) for r in registros]
+    repetidos = {i for i, n in Counter(ids).items() if n > 1 or not i}
+    for row_id, registro in zip(ids, registros):
+        yield (f"{row_id}@{registro.get('_rowIndex')}" if row_id in repetidos else row_id), registro
+
+def _faixas_de_deslocamento(deslocados):
+    """[(rowIndex antigo, deslocamento)] → [[primeiro, último, deslocamento]] contíguos."""
+    faixas = []
+    for indice, delta in sorted(deslocados):
+        if faixas and faixas[-1][1] == indice - 1 and faixas[-1][2] == delta:
+            faixas[-1][1] = indice
+        else:
+            faixas.append([indice, indice, delta])
+    return faixas
+
+def _mudanca_de_linha(antigo, novo):
+    """{"campos": ..., "remover": ...} com o que mudou de `antigo` para `novo`."""
+    mudanca = {}
+    campos = {c: v for c, v in novo.items() if antigo.get(c, _AUSENTE) != v}
+    removidos = [c for c in antigo if c not in novo]
+    if campos:
+        mudanca["campos"] = campos
+    if removidos:
+        mudanca["remover"] = removidos
+    return mudanca
+
+def _so_deslocou(mudanca):
+    campos = mudanca.get("campos", {})
+    return (not mudanca.get("remover") and list(campos) == ["_rowIndex"]
+            and isinstance(campos["_rowIndex"], int))
+
+def diferenca_aba(antigos, novos):
+    """Mudanças de uma aba (listas de registros); {} se nada mudou."""
+    if antigos == novos:
+        return {}
+    a = dict(chaves_da_aba(antigos))
+    n = dict(chaves_da_aba(novos))
+    mudancas = {}
+    inserir = {k: r for k, r in n.items() if k not in a}
+    remover = [k for k in a if k not in n]
+    atualizar = {}
+    deslocados = []
+    for chave, registro in n.items():
+        antigo = a.get(chave)
+        if antigo is None or antigo == registro:
+            continue
+        mudanca = _mudanca_de_linha(antigo, registro)
+        if _so_deslocou(mudanca) and isinstance(antigo.get("_rowIndex"), int):
+            deslocados.append((antigo["_rowIndex"], registro["_rowIndex"] - antigo["_rowIndex"]))
+        else:
+            atualizar[chave] = mudanca
+    if inserir:
+        mudancas["inserir"] = inserir
+    if atualizar:
+        mudancas["atualizar"] = atualizar
+    if remover:
+        mudancas["remover"] = remover
+    if deslocados:
+        mudancas["mover"] = _faixas_de_deslocamento(deslocados)
+    return mudancas
+
+def diferenca(antigo, novo):
+    """Delta que leva o snapshot `antigo` ao `novo` (dicts no formato do doGet)."""
+    cache_antigo = antigo.get("cache") or {}
+    cache_novo = novo.get("cache") or {}
+    delta = {
+        "versao": VERSAO_DELTA,
+        "de": (antigo.get("metadados") or {}).get("ultimaAtualizacao"),
+        "para": (novo.get("metadados") or {}).get("ultimaAtualizacao"),
+        "abas": {},
+    }
+    if antigo.get("metadados") != novo.get("metadados"):
+        delta["metadados"] = novo.get("metadados") or {}
+    for aba, conteudo in cache_novo.items():
+        anterior = cache_antigo.get(aba) or {}
+        mudancas = diferenca_aba(anterior.get("registros") or [], conteudo.get("registros") or [])
+        if aba not in cache_antigo or anterior.get("metadados") != conteudo.get("metadados"):
+            mudancas["metadados"] = conteudo.get("metadados") or {}
+        if mudancas:
+            delta["abas"][aba] = mudancas
+    removidas = [aba for aba in cache_antigo if aba not in cache_novo]
+    if removidas:
+        delta["abas_removidas"] = removidas
+    return delta
+
+def delta_vazio(delta):
+    return not delta["abas"] and not delta.get("abas_removidas") and "metadados" not in delta
+
+def resumo_delta(delta):
+    """Contagens do delta: {"inserir", "atualizar", "remover", "mover", "abas"}."""
+    resumo = Counter()
+    for mudancas in delta["abas"].values():
+        resumo["inserir"] += len(mudancas.get("inserir", {}))
+        resumo["atualizar"] += len(mudancas.get("atualizar", {}))
+        resumo["remover"] += len(mudancas.get("remover", []))
+        resumo["mover"] += sum(f[1] - f[0] + 1 for f in mudancas.get("mover", []))
+    resumo["abas"] = len(delta["abas"]) + len(delta.get("abas_removidas", []))
+    return dict(resumo)
+
+
+# ========== APLICAÇÃO EM MEMÓRIA ==========
+
+def _deslocar(indice, faixas):
+    for primeiro, ultimo, desloc in faixas:
+        if isinstance(indice, int) and primeiro <= indice <= ultimo:
+            return indice + desloc
+    return indice
+
+def aplicar_delta(snapshot, delta):
+    """Aplica o delta a um snapshot em memória (altera e retorna o próprio dict)."""
+    cache = snapshot.setdefault("cache", {})
+    for aba in delta.get("abas_removidas", []):
+        cache.pop(aba, None)
+    for aba, mudancas in delta["abas"].items():
+        conteudo = cache.setdefault(aba, {"registros": [], "metadados": {}})
+        linhas = dict(chaves_da_aba(conteudo["registros"]))
+        for chave in mudancas.get("remover", []):
+            linhas.pop(chave, None)
+        faixas = mudancas.get("mover")
+        for chave, mudanca in mudancas.get("atualizar", {}).items():
+            registro = dict(linhas[chave])
+            for campo in mudanca.get("remover", []):
+                registro.pop(campo, None)
+            registro.update(mudanca.get("campos", {}))
+            linhas[chave] = registro
+        if faixas:
+            atualizadas = mudancas.get("atualizar", {})
+            for chave, registro in linhas.items():
+                if chave not in atualizadas:
+                    novo_indice = _deslocar(registro.get("_rowIndex"), faixas)
+                    if novo_indice != registro.get("_rowIndex"):
+                        linhas[chave] = {**registro, "_rowIndex": novo_indice}
+        linhas.update(mudancas.get("inserir", {}))
+        conteudo["registros"] = sorted(linhas.values(), key=lambda r: r.get("_rowIndex") or 0)
+        if "metadados" in mudancas:
+            conteudo["metadados"] = mudancas["metadados"]
+    if "metadados" in delta:
+        snapshot["metadados"] = delta["metadados"]
+    return snapshot
+
+
+# ========== ESPELHO LOCAL (SQLite) ==========
+
+def _hash_registro(registro):
+    """Hash do conteúdo de uma linha, sem o _rowIndex (guardado à parte)."""
+    texto = json.dumps({k: v for k, v in registro.items() if k != "_rowIndex"},
+                       sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+
+def _abas_do_snapshot(fonte):
+    """
+    (gerador de (aba, registros), função que retorna {aba: metadados} e os
+    metadados do snapshot) para um dict, um caminho/URL ou um FluxoSnapshot.
+    Com fonte em fluxo, só uma aba por vez fica na memória.
+    """
+    if isinstance(fonte, dict):
+        cache = fonte.get("cache") or {}
+        abas = ((aba, c.get("registros") or []) for aba, c in cache.items())
+        return abas, lambda: ({aba: c.get("metadados") or {} for aba, c in cache.items()},
+                              fonte.get("metadados") or {})
+    from SnapshotStream import FluxoSnapshot
+    fluxo = fonte if isinstance(fonte, FluxoSnapshot) else FluxoSnapshot(fonte)
+    abas = ((aba, [r for _, r in grupo]) for aba, grupo in itertools.groupby(fluxo, key=lambda p: p[0]))
+    return abas, lambda: (fluxo.metadados_abas, fluxo.metadados)
+
+
+class EspelhoSnapshot:
+    """
+    Cópia local do snapshot em SQLite, atualizada por deltas.
+
+      linhas   - (aba, chave) → hash do conteúdo e registro (JSON, sem _rowIndex)
+      posicoes - (aba, chave) → _rowIndex; tabela estreita, para que deslocar
+                 milhares de linhas (uma linha apagada no topo) não reescreva os registros
+      abas   - metadados de cada aba
+      meta   - metadados do snapshot
+
+    calcular_delta() compara um snapshot novo com o espelho pelos hashes (só as
+    linhas alteradas são lidas do banco); aplicar() grava o delta numa transação.
+    """
+
+    def __init__(self, caminho=ESPELHO_PADRAO):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.caminho), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS linhas (
+                aba TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                hash BLOB NOT NULL,
+                registro TEXT NOT NULL,
+                PRIMARY KEY (aba, chave)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS posicoes (
+                aba TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                row_index INTEGER,
+                PRIMARY KEY (aba, chave)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_posicoes_ordem ON posicoes(aba, row_index);
+            CREATE TABLE IF NOT EXISTS abas (
+                aba TEXT PRIMARY KEY,
+                metadados TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL
+            );
+        """)
+
+    def fechar(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    @property
+    def metadados(self):
+        r = self._conn.execute("SELECT valor FROM meta WHERE chave = 'metadados'").fetchone()
+        return json.loads(r[0]) if r else {}
+
+    def abas(self):
+        return [r[0] for r in self._conn.execute("SELECT aba FROM abas ORDER BY rowid")]
+
+    def registros(self, aba):
+        """Registros da aba na ordem da planilha, como no doGet."""
+        resultado = []
+        for row_index, texto in self._conn.execute(
+                "SELECT p.row_index, l.registro FROM posicoes p JOIN linhas l USING (aba, chave)"
+                " WHERE p.aba = ? ORDER BY p.row_index", (aba,)):
+            registro = json.loads(texto)
+            if row_index is not None:
+                registro["_rowIndex"] = row_index
+            resultado.append(registro)
+        return resultado
+
+    def para_dict(self):
+        cache = {}
+        for aba, metadados in self._conn.execute("SELECT aba, metadados FROM abas ORDER BY rowid").fetchall():
+            cache[aba] = {"registros": self.registros(aba), "metadados": json.loads(metadados)}
+        return {"cache": cache, "metadados": self.metadados}
+
+    def calcular_delta(self, fonte):
+        """Delta do espelho para o snapshot `fonte` (dict, caminho, URL ou FluxoSnapshot)."""
+        metadados_atuais = self.metadados
+        delta = {"versao": VERSAO_DELTA, "de": metadados_atuais.get("ultimaAtualizacao"), "abas": {}}
+        abas_guardadas = {aba: json.loads(m) for aba, m in self._conn.execute("SELECT aba, metadados FROM abas")}
+        vistas = set()
+        abas, obter_metadados = _abas_do_snapshot(fonte)
+        for aba, novos in abas:
+            vistas.add(aba)
+            mudancas = self._diferenca_aba(aba, novos)
+            if mudancas:
+                delta["abas"][aba] = mudancas
+        metadados_abas, metadados = obter_metadados()
+        for aba, meta_aba in metadados_abas.items():
+            if aba not in vistas:  # aba sem registros no snapshot novo
+                mudancas = self._diferenca_aba(aba, [])
+                if mudancas:
+                    delta["abas"][aba] = mudancas
+            if abas_guardadas.get(aba) != meta_aba:
+                delta["abas"].setdefault(aba, {})["metadados"] = meta_aba
+        removidas = [aba for aba in abas_guardadas if aba not in metadados_abas]
+        if removidas:
+            delta["abas_removidas"] = removidas
+        delta["para"] = metadados.get("ultimaAtualizacao")
+        if metadados != metadados_atuais:
+            delta["metadados"] = metadados
+        return delta
+
+    def _diferenca_aba(self, aba, novos):
+        guardadas = {chave: (row_index, h) for chave, row_index, h in self._conn.execute(
+            "SELECT l.chave, p.row_index, l.hash FROM linhas l JOIN posicoes p USING (aba, chave)"
+            " WHERE l.aba = ?", (aba,))}
+        inserir, atualizar, deslocados, alteradas = {}, {}, [], {}
+        for chave, registro in chaves_da_aba(novos):
+            guardada = guardadas.pop(chave, None)
+            if guardada is None:
+                inserir[chave] = registro
+                continue
+            row_index, h = guardada
+            if h != _hash_registro(registro):
+                alteradas[chave] = registro
+            elif row_index != registro.get("_rowIndex"):
+                if isinstance(row_index, int) and isinstance(registro.get("_rowIndex"), int):
+                    deslocados.append((row_index, registro["_rowIndex"] - row_index))
+                else:
+                    atualizar[chave] = {"campos": {"_rowIndex": registro.get("_rowIndex")}}
+        for chave, registro in alteradas.items():
+            row_index, texto = self._linha(aba, chave)
+            antigo = json.loads(texto)
+            if row_index is not None:
+                antigo["_rowIndex"] = row_index
+            atualizar[chave] = _mudanca_de_linha(antigo, registro)
+        mudancas = {}
+        if inserir:
+            mudancas["inserir"] = inserir
+        if atualizar:
+            mudancas["atualizar"] = atualizar
+        if guardadas:
+            mudancas["remover"] = list(guardadas)
+        if deslocados:
+            mudancas["mover"] = _faixas_de_deslocamento(deslocados)
+        return mudancas
+
+    def _linha(self, aba, chave):
+        """(row_index, registro em JSON) de uma linha guardada, ou None."""
+        return self._conn.execute(
+            "SELECT p.row_index, l.registro FROM linhas l JOIN posicoes p USING (aba, chave)"
+            " WHERE l.aba = ? AND l.chave = ?", (aba, chave)).fetchone()
+
+    def _gravar_linha(self, aba, chave, registro):
+        conteudo = {k: v for k, v in registro.items() if k != "_rowIndex"}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO linhas (aba, chave, hash, registro) VALUES (?, ?, ?, ?)",
+            (aba, chave, _hash_registro(registro), json.dumps(conteudo, ensure_ascii=False, separators=(",", ":"))))
+        self._conn.execute("INSERT OR REPLACE INTO posicoes (aba, chave, row_index) VALUES (?, ?, ?)",
+                           (aba, chave, registro.get("_rowIndex")))
+
+    def aplicar(self, delta):
+        """Grava o delta no espelho (tudo ou nada). Retorna o resumo_delta()."""
+        if delta.get("versao") != VERSAO_DELTA:
+            raise ValueError(f"Versão de delta não suportada: {delta.get('versao')}")
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for aba in delta.get("abas_removidas", []):
+                conn.execute("DELETE FROM linhas WHERE aba = ?", (aba,))
+                conn.execute("DELETE FROM posicoes WHERE aba = ?", (aba,))
+                conn.execute("DELETE FROM abas WHERE aba = ?", (aba,))
+            for aba, mudancas in delta["abas"].items():
+                removidas = [(aba, chave) for chave in mudancas.get("remover", [])]
+                conn.executemany("DELETE FROM linhas WHERE aba = ? AND chave = ?", removidas)
+                conn.executemany("DELETE FROM posicoes WHERE aba = ? AND chave = ?", removidas)
+                # Faixas em duas etapas (sinal negativo) para uma faixa já deslocada
+                # não cair dentro da próxima
+                for primeiro, ultimo, desloc in mudancas.get("mover", []):
+                    conn.execute("UPDATE posicoes SET row_index = -(row_index + ?) "
+                                 "WHERE aba = ? AND row_index BETWEEN ? AND ?", (desloc, aba, primeiro, ultimo))
+                if mudancas.get("mover"):
+                    conn.execute("UPDATE posicoes SET row_index = -row_index WHERE aba = ? AND row_index < 0", (aba,))
+                for chave, mudanca in mudancas.get("atualizar", {}).items():
+                    r = self._linha(aba, chave)
+                    if r is None:
+                        raise ValueError(f"Linha {chave!r} da aba {aba} não está no espelho")
+                    registro = json.loads(r[1])
+                    registro["_rowIndex"] = r[0]
+                    for campo in mudanca.get("remover", []):
+                        registro.pop(campo, None)
+                    registro.update(mudanca.get("campos", {}))
+                    self._gravar_linha(aba, chave, registro)
+                for chave, registro in mudancas.get("inserir", {}).items():
+                    self._gravar_linha(aba, chave, registro)
+                if "metadados" in mudancas:
+                    conn.execute("INSERT INTO abas (aba, metadados) VALUES (?, ?) "
+                                 "ON CONFLICT(aba) DO UPDATE SET metadados = excluded.metadados",
+                                 (aba, json.dumps(mudancas["metadados"], ensure_ascii=False)))
+            if "metadados" in delta:
+                conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('metadados', ?)",
+                             (json.dumps(delta["metadados"], ensure_ascii=False),))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return resumo_delta(delta)
+
+    def sincronizar(self, fonte):
+        """calcular_delta() + aplicar(). Retorna o delta aplicado."""
+        delta = self.calcular_delta(fonte)
+        if not delta_vazio(delta):
+            self.aplicar(delta)
+        return delta
+
+
+# ========== BENCHMARK (--benchmark) ==========
+
+def snapshot_sintetico(base, escala):
+    """O snapshot `base` com cada aba repetida `escala` vezes (_rowId e _rowIndex únicos)."""
+    cache = {}
+    for aba, conteudo in base["cache"].items():
+        registros = []
+        for copia in range(escala):
+            for registro in conteudo["registros"]:
+                novo = dict(registro)
+                novo["_rowId"] = f"{registro['_rowId']}~{copia}"
+                novo["_rowIndex"] = len(registros) + 2
+                registros.append(novo)
+        cache[aba] = {"registros": registros,
+                      "metadados": {**conteudo["metadados"], "totalRegistros": len(registros)}}
+    return {"cache": cache, "metadados": dict(base["metadados"])}
+
+def alterar_snapshot(snapshot, alteracoes, semente=1):
+    """
+    Cópia do snapshot com `alteracoes` mudanças aleatórias: metade edições de
+    uma célula, um quarto linhas novas no fim da aba e um quarto linhas apagadas
+    (as de baixo sobem uma posição, como na planilha).
+    """
+    aleatorio = random.Random(semente)
+    cache = {aba: {"registros": list(c["registros"]), "metadados": dict(c["metadados"])}
+             for aba, c in snapshot["cache"].items()}
+    abas = [aba for aba, c in cache.items() if c["registros"]]
+    for i in range(alteracoes):
+        aba = aleatorio.choice(abas)
+        registros = cache[aba]["registros"]
+        tipo = ("editar", "editar", "inserir", "remover")[i % 4]
+        if tipo == "editar" or (tipo == "remover" and len(registros) < 2):
+            pos = aleatorio.randrange(len(registros))
+            registro = dict(registros[pos])
+            campo = aleatorio.choice([c for c in registro if not c.startswith("_")] or ["_rowId"])
+            registro[campo] = f"alterado {i}"
+            registros[pos] = registro
+        elif tipo == "inserir":
+            registro = dict(aleatorio.choice(registros))
+            registro["_rowId"] = f"novo-{i}"
+            registro["_rowIndex"] = len(registros) + 2
+            registros.append(registro)
+        else:
+            pos = aleatorio.randrange(len(registros))
+            del registros[pos]
+            for j in range(pos, len(registros)):
+                registros[j] = {**registros[j], "_rowIndex": j + 2}
+        cache[aba]["metadados"]["totalRegistros"] = len(registros)
+    return {"cache": cache, "metadados": {**snapshot["metadados"], "ultimaAtualizacao": f"alterado-{semente}"}}
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def executar_benchmark(base, escalas, alteracoes, pasta):
+    resultados = []
+    for escala in escalas:
+        antigo = snapshot_sintetico(base, escala)
+        novo = alterar_snapshot(antigo, alteracoes)
+        linhas = sum(len(c["registros"]) for c in novo["cache"].values())
+        tamanho_snapshot = len(json.dumps(novo, ensure_ascii=False).encode("utf-8"))
+
+        delta, ms_diferenca = _cronometrar(lambda: diferenca(antigo, novo))
+        tamanho_delta = len(json.dumps(delta, ensure_ascii=False).encode("utf-8"))
+        if aplicar_delta(json.loads(json.dumps(antigo)), delta) != novo:
+            raise AssertionError("aplicar_delta(antigo, diferenca(antigo, novo)) != novo")
+
+        caminho = Path(pasta) / f"espelho_x{escala}.db"
+        for arquivo in (caminho, Path(f"{caminho}-wal"), Path(f"{caminho}-shm")):
+            if arquivo.exists():
+                arquivo.unlink()
+        with EspelhoSnapshot(caminho) as espelho:
+            _, ms_carga = _cronometrar(lambda: espelho.aplicar(diferenca({}, antigo)))
+            delta_espelho, ms_comparar = _cronometrar(lambda: espelho.calcular_delta(novo))
+            _, ms_aplicar = _cronometrar(lambda: espelho.aplicar(delta_espelho))
+            if espelho.para_dict() != novo:
+                raise AssertionError("o espelho não ficou igual ao snapshot novo")
+        resultados.append({
+            "escala": escala, "linhas": linhas, "alteracoes": alteracoes,
+            "snapshot_bytes": tamanho_snapshot, "delta_bytes": tamanho_delta,
+            "resumo": resumo_delta(delta),
+            "ms_diferenca": ms_diferenca, "ms_carga_completa": ms_carga,
+            "ms_comparar_espelho": ms_comparar, "ms_aplicar_delta": ms_aplicar,
+        })
+    return resultados
+
+def imprimir_benchmark(resultados):
+    print("\n📐 Delta por _rowId em snapshots sintéticos\n")
+    print(f"  {'escala':>6} {'linhas':>8} {'snapshot':>10} {'delta':>9} {'diferença':>10} "
+          f"{'carga total':>12} {'comparar':>9} {'aplicar':>8}")
+    for r in resultados:
+        print(f"  {r['escala']:>5}x {r['linhas']:>8} {r['snapshot_bytes'] / 1048576:>8.1f}MB "
+              f"{r['delta_bytes'] / 1024:>7.1f}KB {r['ms_diferenca']:>8.0f}ms {r['ms_carga_completa']:>10.0f}ms "
+              f"{r['ms_comparar_espelho']:>7.0f}ms {r['ms_aplicar_delta']:>6.1f}ms")
+    print("\n  diferença: dois snapshots em memória | carga total: gravar o snapshot inteiro no espelho")
+    print("  comparar: snapshot novo × espelho (hashes) | aplicar: gravar só o delta no espelho\n")
+    for r in resultados:
+        resumo = r["resumo"]
+        print(f"  {r['escala']:>5}x: {resumo.get('inserir', 0)} inserida(s), {resumo.get('atualizar', 0)} "
+              f"alterada(s), {resumo.get('remover', 0)} removida(s), {resumo.get('mover', 0)} deslocada(s) "
+              f"em {resumo['abas']} aba(s)")
+    print()
+
+
+# ========== CLI ==========
+
+def _carregar(caminho):
+    from SnapshotColunar import carregar_snapshot
+    return carregar_snapshot(caminho)
+
+def _imprimir_resumo(delta, prefixo="Δ"):
+    resumo = resumo_delta(delta)
+    print(f"  {prefixo} {resumo.get('inserir', 0)} inserida(s), {resumo.get('atualizar', 0)} alterada(s), "
+          f"{resumo.get('remover', 0)} removida(s), {resumo.get('mover', 0)} deslocada(s) em {resumo['abas']} aba(s)")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diferença entre snapshots do doGet por _rowId e espelho local atualizado por deltas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("snapshots", nargs="*", help="antigo.json novo.json (para calcular o delta)")
+    parser.add_argument("-o", "--saida", help="Grava o delta calculado neste arquivo JSON")
+    parser.add_argument("--espelho", default=ESPELHO_PADRAO, help=f"Banco do espelho (padrão: {ESPELHO_PADRAO})")
+    parser.add_argument("--sincronizar", metavar="SNAPSHOT",
+                        help="Atualiza o espelho a partir de um snapshot (JSON, colunar ou URL do endpoint)")
+    parser.add_argument("--aplicar", metavar="DELTA", help="Aplica um delta (JSON) ao espelho")
+    parser.add_argument("--benchmark", action="store_true", help="Mede delta × snapshot completo em dados sintéticos")
+    parser.add_argument("--base", default=str(Path(__file__).resolve().parent.parent / "BancoDeDadosTeste.json"),
+                        help="Snapshot usado como base no --benchmark")
+    parser.add_argument("--escalas", nargs="+", type=int, default=[10, 100],
+                        help="Multiplicadores do tamanho da base no --benchmark (padrão: 10 100)")
+    parser.add_argument("--alteracoes", type=int, default=50, help="Mudanças por snapshot no --benchmark (padrão: 50)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        import tempfile
+        with tempfile.TemporaryDirectory() as pasta:
+            imprimir_benchmark(executar_benchmark(_carregar(args.base), args.escalas, args.alteracoes, pasta))
+        return
+
+    if args.sincronizar or args.aplicar:
+        with EspelhoSnapshot(args.espelho) as espelho:
+            if args.aplicar:
+                with open(args.aplicar, "r", encoding="utf-8") as f:
+                    delta = json.load(f)
+                espelho.aplicar(delta)
+            else:
+                delta = espelho.sincronizar(args.sincronizar)
+                if args.saida:
+                    with open(args.saida, "w", encoding="utf-8") as f:
+                        json.dump(delta, f, ensure_ascii=False)
+        if delta_vazio(delta):
+            print(f"✅ Espelho {args.espelho} já estava atualizado.")
+        else:
+            print(f"✅ Espelho {args.espelho} atualizado ({delta.get('para') or '-'}):")
+            _imprimir_resumo(delta)
+        return
+
+    if len(args.snapshots) != 2:
+        parser.error("informe dois snapshots (antigo e novo), --sincronizar, --aplicar ou --benchmark")
+    delta = diferenca(_carregar(args.snapshots[0]), _carregar(args.snapshots[1]))
+    texto = json.dumps(delta, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"✅ Delta gravado em {args.saida} ({len(texto.encode('utf-8')) / 1024:.1f} KiB):")
+        _imprimir_resumo(delta)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+SnapshotStream.py
+
+Leitura em fluxo do snapshot completo do doGet (cache → aba → registros), sem
+montar o documento inteiro na memória.
+
+O arquivo (ou a resposta HTTP do endpoint) é lido em blocos; só a estrutura
+externa é percorrida à mão e cada registro é decodificado sozinho, gerando
+pares (aba, registro). A memória fica limitada ao bloco de leitura e ao
+registro atual, qualquer que seja o tamanho do snapshot.
+
+Os geradores podem ser encadeados (filtrar_abas, filtrar_campo, projetar) e
+vários consumidores podem compartilhar uma única passada com distribuir():
+
+    fluxo = FluxoSnapshot("../BancoDeDadosTeste.json")
+    alunos, pontos, resumo = distribuir(fluxo, [ConsumidorAlunos(registro),
+                                                ConsumidorLedger(ledger),
+                                                ConsumidorResumo()])
+
+Uso:
+  python SnapshotStream.py ../BancoDeDadosTeste.json --resumo
+  python SnapshotStream.py ../BancoDeDadosTeste.json --aba Alunos --campos SerialNumber NomeCompleto
+  python SnapshotStream.py ../BancoDeDadosTeste.json --aba Ausencias --onde Escala=11
+  python SnapshotStream.py https://script.google.com/macros/s/.../exec --resumo
+  python SnapshotStream.py ../BancoDeDadosTeste.json --memoria
+"""
+
+import io
+import re
+import sys
+import json
+import argparse
+import tracemalloc
+from datetime import datetime, date
+
+try:
+    from zoneinfo import ZoneInfo
+    FUSO = ZoneInfo("America/Sao_Paulo")
+except Exception:
+    FUSO = None  # usa o fuso local da máquina
+
+TAMANHO_BLOCO = 64 * 1024
+TIMEOUT_ENDPOINT_SECONDS = 60
+ABAS_PONTO = {"PontoPratica": "Prática", "PontoTeoria": "Teoria"}
+
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+
+
+class ErroSnapshot(ValueError):
+    """Snapshot malformado, truncado ou resposta de erro do doGet."""
+
+
+# ========== LEITOR INCREMENTAL ==========
+
+class _Leitor:
+    """
+    Cursor sobre um texto JSON lido em blocos. Objetos e listas da estrutura
+    externa são percorridos com iterar_objeto()/iterar_lista(); valor() decodifica
+    o próximo valor inteiro (o registro) com o decodificador do json.
+    """
+
+    def __init__(self, arquivo, bloco=TAMANHO_BLOCO):
+        self._arquivo = arquivo
+        self._bloco = bloco
+        self._decodificador = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.fim = False
+        self.consumidos = 0  # caracteres já descartados do buffer (para mensagens de erro)
+
+    def _ler_mais(self):
+        if self.fim:
+            return False
+        dados = self._arquivo.read(self._bloco)
+        if not dados:
+            self.fim = True
+            return False
+        self.consumidos += self.pos
+        self.buf = self.buf[self.pos:] + dados
+        self.pos = 0
+        return True
+
+    def _erro(self, mensagem):
+        return ErroSnapshot(f"{mensagem} (caractere {self.consumidos + self.pos})")
+
+    def proximo(self):
+        """Próximo caractere significativo, sem consumi-lo."""
+        while True:
+            self.pos = _ESPACOS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._ler_mais():
+                raise self._erro("Fim inesperado do snapshot")
+
+    def consumir(self, caractere):
+        if self.proximo() != caractere:
+            raise self._erro(f"Esperado {caractere!r}, encontrado {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def valor(self):
+        self.proximo()
+        while True:
+            try:
+                valor, fim = self._decodificador.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Valor cortado no fim do bloco: lê mais e tenta de novo
+                if not self._ler_mais():
+                    raise self._erro("Valor JSON inválido ou truncado")
+                continue
+            if fim == len(self.buf) and self._ler_mais():
+                continue  # um número pode continuar no próximo bloco
+            self.pos = fim
+            return valor
+
+    def iterar_objeto(self):
+        """Gera as chaves de um objeto; quem chama consome o valor de cada uma."""
+        self.consumir("{")
+        if self.proximo() == "}":
+            self.pos += 1
+            return
+        while True:
+            chave = self.valor()
+            if not isinstance(chave, str):
+                raise self._erro("Chave de objeto inválida")
+            self.consumir(":")
+            yield chave
+            separador = self.proximo()
+            self.pos += 1
+            if separador == "}":
+                return
+            if separador != ",":
+                raise self._erro(f"Esperado ',' ou '}}', encontrado {separador!r}")
+
+    def iterar_lista(self):
+        """Gera uma vez por elemento de uma lista; quem chama consome o elemento."""
+        self.consumir("[")
+        if self.proximo() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            separador = self.proximo()
+            self.pos += 1
+            if separador == "]":
+                return
+            if separador != ",":
+                raise self._erro(f"Esperado ',' ou ']', encontrado {separador!r}")
+
+    def pular(self):
+        """Descarta o próximo valor sem montá-lo por inteiro (listas/objetos elemento a elemento)."""
+        c = self.proximo()
+        if c == "{":
+            for _ in self.iterar_objeto():
+                self.pular()
+        elif c == "[":
+            for _ in self.iterar_lista():
+                self.pular()
+        else:
+            self.valor()
+
+
+def _abrir(fonte):
+    """(arquivo de texto, fechar?) para um caminho, URL ou arquivo já aberto (texto ou binário)."""
+    if hasattr(fonte, "read"):
+        if isinstance(fonte, io.TextIOBase):
+            return fonte, False
+        return io.TextIOWrapper(fonte, encoding="utf-8"), False
+    fonte = str(fonte)
+    if fonte.startswith(("http://", "https://")):
+        import urllib.request
+        resposta = urllib.request.urlopen(fonte, timeout=TIMEOUT_ENDPOINT_SECONDS)
+        return io.TextIOWrapper(resposta, encoding="utf-8"), True
+    return open(fonte, "r", encoding="utf-8"), True
+
+
+# ========== FLUXO (aba, registro) ==========
+
+class FluxoSnapshot:
+    """
+    Iterável de pares (aba, registro) de um snapshot do doGet.
+
+    fonte: caminho do JSON, arquivo colunar (SnapshotColunar.py), URL do
+           endpoint ou arquivo já aberto
+    abas:  chaves de aba a percorrer (as do "cache", já sanitizadas); os
+           registros das demais são descartados sem decodificação completa
+
+    Os metadados aparecem à medida que são lidos: `metadados` (do snapshot) e
+    `metadados_abas` (por aba) ficam completos ao fim da passada.
+    """
+
+    def __init__(self, fonte, abas=None, bloco=TAMANHO_BLOCO):
+        self.fonte = fonte
+        self.abas = set(abas) if abas else None
+        self.bloco = bloco
+        self.metadados = {}
+        self.metadados_abas = {}
+
+    def __iter__(self):
+        if isinstance(self.fonte, str) and not self.fonte.startswith(("http://", "https://")):
+            from SnapshotColunar import eh_colunar
+            if eh_colunar(self.fonte):
+                yield from self._do_colunar()
+                return
+        arquivo, fechar = _abrir(self.fonte)
+        try:
+            yield from self._do_json(_Leitor(arquivo, self.bloco))
+        finally:
+            if fechar:
+                arquivo.close()
+
+    def _do_json(self, leitor):
+        if leitor.proximo() != "{":
+            raise ErroSnapshot("O snapshot deve ser um objeto JSON")
+        for chave in leitor.iterar_objeto():
+            if chave == "cache":
+                for aba in leitor.iterar_objeto():
+                    for campo in leitor.iterar_objeto():
+                        if campo == "registros":
+                            if self.abas is not None and aba not in self.abas:
+                                leitor.pular()
+                                continue
+                            for _ in leitor.iterar_lista():
+                                yield aba, leitor.valor()
+                        elif campo == "metadados":
+                            self.metadados_abas[aba] = leitor.valor()
+                        else:
+                            leitor.pular()
+            elif chave == "metadados":
+                self.metadados = leitor.valor()
+            elif chave == "erro":
+                raise ErroSnapshot(f"O endpoint respondeu com erro: {leitor.valor()}")
+            else:
+                leitor.pular()
+
+    def _do_colunar(self):
+        from SnapshotColunar import SnapshotColunar
+        with SnapshotColunar(self.fonte) as snap:
+            self.metadados = snap.metadados
+            for aba in snap.abas():
+                self.metadados_abas[aba] = snap[aba].metadados
+                if self.abas is None or aba in self.abas:
+                    for registro in snap[aba].registros():
+                        yield aba, registro
+
+
+def filtrar_abas(fluxo, abas):
+    abas = set(abas)
+    return ((aba, r) for aba, r in fluxo if aba in abas)
+
+def filtrar_campo(fluxo, campo, condicao):
+    """Mantém os registros cujo `campo` satisfaz `condicao` (função ou valor, comparado como texto)."""
+    if not callable(condicao):
+        esperado = str(condicao)
+        condicao = lambda v: str(v) == esperado
+    return ((aba, r) for aba, r in fluxo if campo in r and condicao(r[campo]))
+
+def projetar(fluxo, campos):
+    """Só os `campos` informados de cada registro (os ausentes ficam de fora)."""
+    campos = list(campos)
+    return ((aba, {c: r[c] for c in campos if c in r}) for aba, r in fluxo)
+
+
+# ========== CONSUMIDORES ==========
+
+class Consumidor:
+    """
+    Base dos consumidores de distribuir(): `abas` (None = todas) limita o que
+    chega a consumir(); finalizar() é chamado uma vez, ao fim da passada, e o
+    que retornar vira o resultado.
+    """
+
+    abas = None
+
+    def consumir(self, aba, registro):
+        raise NotImplementedError
+
+    def finalizar(self, fluxo):
+        return None
+
+
+def distribuir(fluxo, consumidores):
+    """Percorre o fluxo uma vez entregando cada registro aos consumidores da aba. Retorna os resultados."""
+    por_aba = {}
+    for aba, registro in fluxo:
+        destinos = por_aba.get(aba)
+        if destinos is None:
+            destinos = por_aba[aba] = [c for c in consumidores if c.abas is None or aba in c.abas]
+        for consumidor in destinos:
+            consumidor.consumir(aba, registro)
+    return [c.finalizar(fluxo) for c in consumidores]
+
+
+class ConsumidorAlunos(Consumidor):
+    """
+    Cadastro de alunos (aba Alunos). Com um RegistroAlunos do SistemaPonto,
+    aplica as linhas como a sincronização faria e retorna (novos, alterados,
+    removidos); sem ele, retorna {serial: Aluno}.
+    """
+
+    CAMPOS = ("_rowId", "_rowIndex", "SerialNumber", "NomeCompleto", "EmailHC", "Status")
+
+    def __init__(self, registro_alunos=None, aba="Alunos"):
+        self.abas = {aba}
+        self.registro_alunos = registro_alunos
+        self.linhas = []
+
+    def consumir(self, aba, registro):
+        self.linhas.append({c: registro[c] for c in self.CAMPOS if c in registro})
+
+    def finalizar(self, fluxo):
+        from SistemaPonto import aluno_da_planilha
+        if self.registro_alunos is not None:
+            # Sem carimbo da aba no snapshot completo: a próxima sincronização busca a aba inteira
+            return self.registro_alunos.aplicar_planilha(self.linhas, atualizada_em=None)
+        alunos = (aluno_da_planilha(r) for r in self.linhas)
+        return {a.uid: a for a in alunos if a is not None}
+
+
+def data_iso_do_valor(valor):
+    """Data (YYYY-MM-DD) de uma célula: dd/MM/yyyy ou Date serializado em ISO pelo doGet."""
+    if not isinstance(valor, str) or not valor:
+        return None
+    if "/" in valor:
+        partes = valor.strip().split("/")
+        if len(partes) == 3:
+            return f"{partes[2][:4]}-{partes[1].zfill(2)}-{partes[0].zfill(2)}"
+        return None
+    try:
+        instante = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(FUSO) if FUSO is not None else instante.astimezone()
+    return instante.date().isoformat()
+
+
+class ConsumidorLedger(Consumidor):
+    """
+    Batidas de um dia nas abas PontoPratica/PontoTeoria, no formato do
+    getPontos. Com um LedgerPontos do SistemaPonto, semeia-o com elas.
+    """
+
+    def __init__(self, ledger=None, data_iso=None):
+        self.abas = set(ABAS_PONTO)
+        self.ledger = ledger
+        self.data_iso = data_iso or date.today().isoformat()
+        self.pontos = []
+
+    def consumir(self, aba, registro):
+        if data_iso_do_valor(registro.get("Data")) != self.data_iso:
+            return
+        for campo, tipo in (("HoraEntrada", "Entrada"), ("HoraSaida", "Saída")):
+            if registro.get(campo):
+                self.pontos.append({"SerialNumber": str(registro.get("SerialNumber") or ""),
+                                    "Data": self.data_iso, "TipoRegistro": tipo,
+                                    "Modalidade": ABAS_PONTO[aba]})
+
+    def finalizar(self, fluxo):
+        if self.ledger is not None:
+            self.ledger.semear(self.data_iso, self.pontos)
+        return self.pontos
+
+
+class ConsumidorResumo(Consumidor):
+    """Quantidade de registros e de campos por aba."""
+
+    def __init__(self, abas=None):
+        self.abas = set(abas) if abas else None
+        self.contagens = {}
+
+    def consumir(self, aba, registro):
+        linhas, campos = self.contagens.get(aba, (0, 0))
+        self.contagens[aba] = (linhas + 1, max(campos, len(registro)))
+
+    def finalizar(self, fluxo):
+        resumo = {}
+        for aba, metadados in fluxo.metadados_abas.items():
+            if self.abas is None or aba in self.abas:
+                linhas, campos = self.contagens.get(aba, (0, 0))
+                resumo[aba] = {"nome": metadados.get("nomeOriginal", aba), "registros": linhas, "campos": campos}
+        return resumo
+
+
+# ========== CLI ==========
+
+def medir_memoria(caminho):
+    """Pico de memória (tracemalloc) de uma passada em fluxo e de um json.load do mesmo arquivo."""
+    resultados = {}
+    from SnapshotColunar import eh_colunar  # fora da medição: só o custo da leitura conta
+    if eh_colunar(caminho):
+        raise ErroSnapshot("O --memoria compara com o json.load: informe o snapshot JSON")
+    tracemalloc.start()
+    fluxo = FluxoSnapshot(caminho)
+    total = sum(1 for _ in fluxo)
+    resultados["fluxo"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tracemalloc.start()
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    resultados["json.load"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del dados
+    return total, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lê o snapshot completo do doGet em fluxo, registro a registro",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("fonte", help="Snapshot JSON, arquivo colunar ou URL do endpoint (doGet sem parâmetros)")
+    parser.add_argument("--aba", nargs="+", help="Só estas abas (chaves do cache, ex.: Alunos EscalaPratica1)")
+    parser.add_argument("--campos", nargs="+", help="Só estes campos de cada registro")
+    parser.add_argument("--onde", action="append", default=[], metavar="CAMPO=VALOR",
+                        help="Só registros com CAMPO igual a VALOR (pode repetir)")
+    parser.add_argument("--resumo", action="store_true", help="Mostra registros e campos por aba")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Compara o pico de memória da leitura em fluxo com o json.load")
+    args = parser.parse_args()
+
+    try:
+        if args.memoria:
+            total, picos = medir_memoria(args.fonte)
+            print(f"\n🧮 {total} registro(s) | pico de memória:")
+            for nome, pico in picos.items():
+                print(f"  {nome:<10} {pico / 1024:>9.0f} KiB")
+            print()
+            return
+
+        fluxo = FluxoSnapshot(args.fonte, abas=args.aba)
+        if args.resumo:
+            resumo, = distribuir(fluxo, [ConsumidorResumo(args.aba)])
+            print(f"\n📋 Snapshot atualizado em {fluxo.metadados.get('ultimaAtualizacao', '-')}\n")
+            for aba, info in resumo.items():
+                print(f"  {aba:<20} {info['registros']:>6} registro(s)  {info['campos']:>3} campo(s)")
+            print(f"\n  Total: {sum(i['registros'] for i in resumo.values())} registro(s) "
+                  f"em {len(resumo)} aba(s)\n")
+            return
+
+        registros = iter(fluxo)
+        for condicao in args.onde:
+            campo, _, valor = condicao.partition("=")
+            registros = filtrar_campo(registros, campo, valor)
+        if args.campos:
+            registros = projetar(registros, args.campos)
+        for aba, registro in registros:
+            sys.stdout.write(json.dumps({"aba": aba, "registro": registro}, ensure_ascii=False) + "\n")
+    except ErroSnapshot as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"❌ Não foi possível ler {args.fonte}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
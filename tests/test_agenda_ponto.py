@@ -0,0 +1,91 @@
+"""
+Testes da agenda de teoria do quiosque (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import SistemaPonto as sp
+
+# 2025-06-02 é uma segunda-feira (dia 0)
+SEGUNDA = date(2025, 6, 2)
+TERCA = date(2025, 6, 3)
+QUARTA = date(2025, 6, 4)
+
+
+class TestAgendaTeoria(unittest.TestCase):
+
+    def setUp(self):
+        self.agenda = sp.AgendaTeoria({
+            "horarios_teoria": [{"dia": 1, "hora_transicao": "17:30", "hora_inicio": "18:00"}],
+            "dias_especiais_teoria": [
+                "04/06/2025",
+                {"data": "03/06/2025", "hora_transicao": "14:00", "hora_inicio": "14:30"},
+            ],
+        })
+
+    def test_horario_do_dia_fixo(self):
+        agenda = sp.AgendaTeoria({"horarios_teoria": [{"dia": 1, "hora_transicao": "17:30", "hora_inicio": "18:00"}]})
+        self.assertTrue(agenda.is_dia_teoria(TERCA))
+        self.assertFalse(agenda.is_dia_teoria(SEGUNDA))
+        self.assertEqual(agenda.horario(TERCA), {"hora_transicao": "17:30", "hora_inicio": "18:00"})
+        self.assertIsNone(agenda.horario(SEGUNDA))
+
+    def test_modalidade_antes_e_depois_da_transicao(self):
+        agenda = sp.AgendaTeoria({"horarios_teoria": [{"dia": 1, "hora_transicao": "17:30", "hora_inicio": "18:00"}]})
+        self.assertEqual(agenda.modalidade(datetime(2025, 6, 3, 17, 29)), "Prática")
+        self.assertEqual(agenda.modalidade(datetime(2025, 6, 3, 17, 30)), "Teoria")
+        self.assertEqual(agenda.modalidade(datetime(2025, 6, 2, 20, 0)), "Prática")
+        self.assertEqual(agenda.proxima_transicao(datetime(2025, 6, 3, 12, 0)), datetime(2025, 6, 3, 17, 30))
+
+    def test_dia_especial_prevalece_sobre_o_semanal(self):
+        self.assertEqual(self.agenda.horario(TERCA)["hora_transicao"], "14:00")
+        self.assertEqual(self.agenda.modalidade(datetime(2025, 6, 3, 15, 0)), "Teoria")
+        # Dia especial em formato string usa o horário padrão
+        self.assertTrue(self.agenda.is_dia_teoria(QUARTA))
+        self.assertEqual(self.agenda.horario(QUARTA)["hora_transicao"], sp.HORA_TRANSICAO_TEORIA_PADRAO)
+
+    def test_formato_legado(self):
+        agenda = sp.AgendaTeoria({"dias_teoria": [0], "hora_transicao_teoria": "19:00", "hora_inicio_teoria": "19:30"})
+        self.assertEqual(agenda.horario(SEGUNDA), {"hora_transicao": "19:00", "hora_inicio": "19:30"})
+        self.assertFalse(agenda.is_dia_teoria(TERCA))
+
+
+class TestEntradasInvalidas(unittest.TestCase):
+
+    INVALIDOS = [{"dia": 1.0}, {"dia": True}, {"dia": 7}, {"dia": -1}, {"dia": "1"}, "terça"]
+
+    def test_horarios_invalidos_sao_ignorados(self):
+        agenda = sp.AgendaTeoria({"horarios_teoria": self.INVALIDOS + [{"dia": 2}]})
+        self.assertEqual([dia for dia in range(7) if agenda.semana[dia] is not None], [2])
+
+    def test_dias_legados_invalidos_sao_ignorados(self):
+        agenda = sp.AgendaTeoria({"dias_teoria": [1.0, True, 7, "1", 3]})
+        self.assertEqual([dia for dia in range(7) if agenda.semana[dia] is not None], [3])
+
+    def test_dia_especial_invalido_e_ignorado(self):
+        with self.assertLogs(level="WARNING"):
+            agenda = sp.AgendaTeoria({"horarios_teoria": [{"dia": 2}], "dias_especiais_teoria": ["31/02/2025", "amanhã"]})
+        self.assertEqual(agenda.especiais, {})
+
+    def test_validar_config_aponta_os_invalidos(self):
+        erros = sp.validar_config({"horarios_teoria": self.INVALIDOS + [{"dia": 2}]})
+        invalidos = [e for e in erros if e.startswith("horário de teoria inválido")]
+        self.assertEqual(len(invalidos), len(self.INVALIDOS))
+
+    def test_validar_config_aponta_dias_legados_invalidos(self):
+        erros = sp.validar_config({"dias_teoria": [1.0, True, 3]})
+        self.assertIn("dia de teoria inválido: 1.0", erros)
+        self.assertIn("dia de teoria inválido: True", erros)
+        self.assertNotIn("dia de teoria inválido: 3", erros)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Testes do governador de cota do Apps Script (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import SistemaPonto as sp
+
+
+class RelogioFalso:
+    """Substituto de time.monotonic controlado pelo teste."""
+
+    def __init__(self, agora=1000.0):
+        self.agora = agora
+
+    def __call__(self):
+        return self.agora
+
+    def avancar(self, segundos):
+        self.agora += segundos
+
+
+class TestBaldeDeFichas(unittest.TestCase):
+
+    def setUp(self):
+        self.relogio = RelogioFalso()
+        self.cota = sp.GovernadorCota(diaria=0, por_minuto=60, relogio=self.relogio)
+
+    def test_essenciais_consomem_fichas(self):
+        for _ in range(10):
+            self.assertTrue(self.cota.adquirir(essencial=True))
+        self.assertAlmostEqual(self.cota._fichas, 50)
+        self.assertEqual(self.cota.chamadas, 10)
+
+    def test_fichas_repostas_no_ritmo_por_minuto(self):
+        self.cota._fichas = 0.0
+        self.relogio.avancar(10)
+        self.cota.nivel()
+        self.assertAlmostEqual(self.cota._fichas, 10)
+        self.relogio.avancar(600)
+        self.cota.nivel()
+        # O balde não passa da capacidade
+        self.assertAlmostEqual(self.cota._fichas, 60)
+
+    def test_balde_baixo_entra_em_economia(self):
+        self.cota._fichas = 14.0
+        self.assertEqual(self.cota.nivel(), sp.GovernadorCota.ECONOMIA)
+        self.assertFalse(self.cota.adquirir(essencial=False))
+        self.assertEqual(self.cota.puladas, 1)
+        self.relogio.avancar(2)
+        self.assertEqual(self.cota.nivel(), sp.GovernadorCota.NORMAL)
+        self.assertTrue(self.cota.adquirir(essencial=False))
+
+    def test_opcional_sem_ficha_e_pulado(self):
+        cota = sp.GovernadorCota(diaria=0, por_minuto=2, relogio=self.relogio)
+        cota._fichas = 0.5
+        self.assertFalse(cota.adquirir(essencial=False))
+        self.assertEqual(cota.chamadas, 0)
+
+
+class TestNiveisDaCotaDiaria(unittest.TestCase):
+
+    def setUp(self):
+        self.cota = sp.GovernadorCota(diaria=100, por_minuto=0, relogio=RelogioFalso())
+
+    def _usar(self, chamadas):
+        for _ in range(chamadas):
+            self.cota.adquirir(essencial=True)
+
+    def test_niveis_acompanham_o_uso_do_dia(self):
+        self._usar(int(100 * sp.COTA_FRACAO_ECONOMIA) - 1)
+        self.assertEqual(self.cota.nivel(), sp.GovernadorCota.NORMAL)
+        self._usar(1)
+        self.assertEqual(self.cota.nivel(), sp.GovernadorCota.ECONOMIA)
+        self._usar(int(100 * sp.COTA_FRACAO_LOTE) - int(100 * sp.COTA_FRACAO_ECONOMIA))
+        self.assertEqual(self.cota.nivel(), sp.GovernadorCota.LOTE)
+
+    def test_essenciais_seguem_acima_do_limite(self):
+        self._usar(100)
+        self.assertFalse(self.cota.adquirir(essencial=False))
+        self.assertTrue(self.cota.adquirir(essencial=True))
+        self.assertEqual(self.cota.chamadas, 101)
+
+
+class TestCapacidadesComFalha(unittest.TestCase):
+
+    ENDPOINT = "https://exemplo/exec"
+
+    def setUp(self):
+        self.governador = sp.GovernadorCota(diaria=0, por_minuto=0)
+        patches = [
+            mock.patch.object(sp, "governador", self.governador),
+            mock.patch.dict(sp._capacidades, clear=True),
+            mock.patch.object(sp, "obter_cliente_http"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.cliente = sp.obter_cliente_http.return_value
+
+    def test_falha_fica_em_cache_pelo_ttl(self):
+        self.cliente.get.side_effect = OSError("sem rede")
+        self.assertIsNone(sp.capacidades_servidor(self.ENDPOINT))
+        self.assertIsNone(sp.capacidades_servidor(self.ENDPOINT))
+        self.assertEqual(self.cliente.get.call_count, 1)
+        self.assertEqual(self.governador.chamadas, 1)
+
+    def test_falha_mantem_a_ultima_resposta(self):
+        self.cliente.get.return_value.status_code = 200
+        self.cliente.get.return_value.json.return_value = {"acoes": [sp.ACAO_LOTE]}
+        self.assertEqual(sp.capacidades_servidor(self.ENDPOINT), frozenset([sp.ACAO_LOTE]))
+        self.cliente.get.side_effect = OSError("sem rede")
+        self.assertEqual(sp.capacidades_servidor(self.ENDPOINT, forcar=True), frozenset([sp.ACAO_LOTE]))
+        self.assertEqual(sp.capacidades_servidor(self.ENDPOINT), frozenset([sp.ACAO_LOTE]))
+        self.assertEqual(self.cliente.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
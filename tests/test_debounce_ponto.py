@@ -0,0 +1,61 @@
+"""
+Testes do debounce de crachás do quiosque (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import SistemaPonto as sp
+
+
+class TestDebounceCrachas(unittest.TestCase):
+
+    def setUp(self):
+        self.debounce = sp.DebounceCrachas(janela=2.0, max_crachas=3)
+
+    def test_releitura_dentro_da_janela_e_suprimida(self):
+        self.assertTrue(self.debounce.aceitar("04AA", agora=100.0))
+        self.assertFalse(self.debounce.aceitar("04AA", agora=101.9))
+        self.assertEqual(self.debounce.suprimidos_por_serial["04AA"], 1)
+
+    def test_releitura_depois_da_janela_e_aceita(self):
+        self.assertTrue(self.debounce.aceitar("04AA", agora=100.0))
+        self.assertTrue(self.debounce.aceitar("04AA", agora=102.0))
+        self.assertEqual((self.debounce.aceitos, self.debounce.suprimidos), (2, 0))
+
+    def test_janela_conta_da_leitura_aceita(self):
+        self.debounce.aceitar("04AA", agora=100.0)
+        self.assertFalse(self.debounce.aceitar("04AA", agora=101.5))
+        # A releitura suprimida não renova a janela
+        self.assertTrue(self.debounce.aceitar("04AA", agora=102.1))
+
+    def test_outro_cracha_nao_e_suprimido(self):
+        self.assertTrue(self.debounce.aceitar("04AA", agora=100.0))
+        self.assertTrue(self.debounce.aceitar("04BB", agora=100.1))
+        self.assertFalse(self.debounce.aceitar("04AA", agora=100.2))
+        self.assertFalse(self.debounce.aceitar("04BB", agora=100.3))
+        self.assertEqual(dict(self.debounce.suprimidos_por_serial), {"04AA": 1, "04BB": 1})
+
+    def test_tabela_limitada_descarta_o_mais_antigo(self):
+        for i, serial in enumerate(("04AA", "04BB", "04CC", "04DD")):
+            self.assertTrue(self.debounce.aceitar(serial, agora=100.0 + i * 0.1))
+        self.assertEqual(list(self.debounce._ultimos), ["04BB", "04CC", "04DD"])
+        # O descartado pela LRU volta a ser aceito mesmo dentro da janela
+        self.assertTrue(self.debounce.aceitar("04AA", agora=100.5))
+        self.assertFalse(self.debounce.aceitar("04DD", agora=100.6))
+
+    def test_expirados_saem_da_tabela(self):
+        self.debounce.aceitar("04AA", agora=100.0)
+        self.debounce.aceitar("04BB", agora=101.0)
+        self.debounce.aceitar("04CC", agora=102.5)
+        self.assertEqual(list(self.debounce._ultimos), ["04BB", "04CC"])
+
+
+if __name__ == "__main__":
+    unittest.main()
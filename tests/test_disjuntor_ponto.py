@@ -0,0 +1,99 @@
+"""
+Testes do disjuntor dos envios ao Apps Script (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import SistemaPonto as sp
+
+
+class RelogioFalso:
+    """Substituto de time.monotonic controlado pelo teste."""
+
+    def __init__(self, agora=1000.0):
+        self.agora = agora
+
+    def __call__(self):
+        return self.agora
+
+    def avancar(self, segundos):
+        self.agora += segundos
+
+
+class TestDisjuntorEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.relogio = RelogioFalso()
+        self.disjuntor = sp.DisjuntorEndpoint(falhas_limite=3, aberto_seconds=30, relogio=self.relogio)
+        self.transicoes = []
+        self.disjuntor.ouvintes.append(lambda antigo, novo: self.transicoes.append(novo))
+
+    def _abrir(self):
+        for _ in range(3):
+            self.disjuntor.falha()
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.ABERTO)
+
+    def test_abre_ao_atingir_o_limite_de_falhas(self):
+        self.disjuntor.falha()
+        self.disjuntor.falha()
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.FECHADO)
+        self.assertTrue(self.disjuntor.permitir())
+        self.disjuntor.falha()
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.ABERTO)
+        self.assertEqual(self.transicoes, ["aberto"])
+
+    def test_sucesso_zera_as_falhas_seguidas(self):
+        self.disjuntor.falha()
+        self.disjuntor.falha()
+        self.disjuntor.sucesso(0.5)
+        self.disjuntor.falha()
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.FECHADO)
+
+    def test_aberto_bloqueia_durante_a_espera(self):
+        self._abrir()
+        self.relogio.avancar(29.9)
+        self.assertTrue(self.disjuntor.bloqueado())
+        self.assertFalse(self.disjuntor.permitir())
+        self.assertAlmostEqual(self.disjuntor.restante(), 0.1)
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.ABERTO)
+
+    def test_meio_aberto_libera_um_unico_envio_de_teste(self):
+        self._abrir()
+        self.relogio.avancar(30)
+        self.assertFalse(self.disjuntor.bloqueado())
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.MEIO_ABERTO)
+        self.assertFalse(self.disjuntor.permitir())
+        self.assertTrue(self.disjuntor.bloqueado())
+
+    def test_teste_bem_sucedido_fecha(self):
+        self._abrir()
+        self.relogio.avancar(30)
+        self.disjuntor.permitir()
+        self.disjuntor.sucesso(0.4)
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.FECHADO)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.transicoes, ["aberto", "meio_aberto", "fechado"])
+
+    def test_teste_com_falha_reabre_e_reinicia_a_espera(self):
+        self._abrir()
+        self.relogio.avancar(30)
+        self.disjuntor.permitir()
+        self.disjuntor.falha()
+        self.assertEqual(self.disjuntor.estado, sp.DisjuntorEndpoint.ABERTO)
+        self.relogio.avancar(29)
+        self.assertFalse(self.disjuntor.permitir())
+        self.relogio.avancar(1)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.transicoes, ["aberto", "meio_aberto", "aberto", "meio_aberto"])
+
+
+if __name__ == "__main__":
+    unittest.main()
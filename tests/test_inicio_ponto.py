@@ -0,0 +1,50 @@
+"""
+Testes da inicialização dos comandos de configuração (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import BenchmarkPonto as bench
+
+# Comandos que só leem/alteram o config_ponto.json (não falam com o servidor)
+COMANDOS_DE_CONFIGURACAO = (["--list-dias"], ["--show-escala"], ["--list-alunos"])
+
+
+class TestInicioDosComandos(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory(prefix="teste_inicio_")
+        self.diretorio = self._dir.name
+        bench.escrever_config(self.diretorio, "http://127.0.0.1:9/exec", [str(bench.SERIAL_BASE)], 50, 2)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_comandos_de_configuracao_nao_importam_o_cliente_http(self):
+        for argumentos in COMANDOS_DE_CONFIGURACAO:
+            with self.subTest(comando=argumentos[0]):
+                proc = subprocess.run([sys.executable, str(bench.SCRIPT_PONTO)] + argumentos, cwd=self.diretorio,
+                                      env=bench._env_subprocesso(), stdin=subprocess.DEVNULL,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+                self.assertEqual(proc.returncode, 0)
+                modulos, _ = bench.perfil_importacao(self.diretorio, argumentos)
+                self.assertIn("json", modulos)
+                self.assertEqual(bench.MODULOS_PESADOS & modulos, set())
+
+    def test_list_dias_dentro_do_orcamento(self):
+        bench.medir_comando(self.diretorio, ["--list-dias"])  # aquece o cache de bytecode
+        tempos = sorted(bench.medir_comando(self.diretorio, ["--list-dias"]) for _ in range(3))
+        self.assertLessEqual(tempos[1] * 1000, bench.ORCAMENTO_COMANDO_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
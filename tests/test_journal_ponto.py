@@ -0,0 +1,149 @@
+"""
+Testes do journal de pontos do quiosque (scripts/SistemaPonto.py).
+
+Execução (na raiz do repositório):
+    python -m unittest discover -s tests -p "test_*.py"
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import SistemaPonto as sp
+
+
+class TestConcluirNoJournal(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.journal = sp.JournalPonto(os.path.join(self._dir.name, "journal.db"))
+        payload = sp.montar_payload("04AABBCC", "Aluno Teste", modalidade="Prática")
+        self.id_tap = self.journal.registrar(payload, "https://exemplo/exec", reservar=True)
+
+    def tearDown(self):
+        self.journal.fechar()
+        self._dir.cleanup()
+
+    def test_resposta_200_com_erro_continua_pendente(self):
+        sp.concluir_no_journal(self.journal, self.id_tap, 200, "Erro: servidor ocupado, ponto não registrado.")
+        self.assertEqual(self.journal.contar_pendentes(), 1)
+        self.assertEqual(self.journal.contar().get("confirmado", 0), 0)
+
+    def test_resposta_200_aplicada_confirma(self):
+        sp.concluir_no_journal(self.journal, self.id_tap, 200, "Entrada registrada para Aluno Teste.")
+        self.assertEqual(self.journal.contar_pendentes(), 0)
+        self.assertEqual(self.journal.contar().get("confirmado", 0), 1)
+
+    def test_sem_acao_nao_conta_no_ledger(self):
+        hoje = sp.date.today().isoformat()
+        ledger = sp.LedgerPontos()
+        ledger.registrar("04AABBCC", hoje, "Prática", self.id_tap)
+        sp.concluir_no_journal(self.journal, self.id_tap, 200, "Sem ação: aluno já completou a prática hoje.", ledger)
+        self.assertEqual(self.journal.contar_pendentes(), 0)
+        self.assertEqual(ledger.contar("04AABBCC", hoje, "Prática"), 0)
+        self.assertEqual(self.journal.pontos_do_dia(hoje), [])
+
+    def test_mesma_checagem_para_metricas(self):
+        self.assertEqual(sp.resultado_envio(200, "Erro: falha no doPost"), "erro_servidor")
+        self.assertEqual(sp.resultado_envio(200, "Entrada registrada."), "200")
+        self.assertFalse(sp.ponto_aceito(200, "Erro: falha no doPost"))
+
+
+class TestEnvioRepetivel(unittest.TestCase):
+
+    def test_servidor_ocupado_e_repetido(self):
+        self.assertTrue(sp.envio_repetivel(200, "Erro: servidor ocupado, ponto não registrado. Tente novamente."))
+
+    def test_outros_erros_200_nao_sao_repetidos(self):
+        self.assertFalse(sp.envio_repetivel(200, "Erro: Aluno não encontrado."))
+        self.assertFalse(sp.envio_repetivel(200, "Entrada registrada."))
+
+
+class TestTransicaoEncadeada(unittest.TestCase):
+
+    def test_resposta_encadeada_e_reconhecida(self):
+        self.assertTrue(sp.transicao_encadeada("Saída prática e entrada teórica registradas: 17:45:00"))
+        self.assertFalse(sp.transicao_encadeada("Entrada teórica registrada: 17:45:00"))
+        self.assertFalse(sp.transicao_encadeada(None))
+
+    def test_ledger_conta_as_duas_modalidades_e_desfaz_juntas(self):
+        hoje = sp.date.today().isoformat()
+        ledger = sp.LedgerPontos()
+        ledger.registrar("04AA", hoje, "Prática", 1)
+        sp.contabilizar_transicao(ledger, "04AA", hoje, 2)
+        self.assertEqual((ledger.contar("04AA", hoje, "Prática"), ledger.contar("04AA", hoje, "Teoria")), (2, 1))
+        ledger.desfazer(2)
+        self.assertEqual((ledger.contar("04AA", hoje, "Prática"), ledger.contar("04AA", hoje, "Teoria")), (1, 0))
+
+
+class TestFlusherJournal(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.journal = sp.JournalPonto(os.path.join(self._dir.name, "journal.db"))
+        self.ids = [
+            self.journal.registrar(sp.montar_payload(serial, "Aluno", modalidade="Prática"), "https://exemplo/exec")
+            for serial in ("04AA", "04BB")
+        ]
+        self.flusher = sp.FlusherJournal(self.journal, lote_max=1)
+
+    def tearDown(self):
+        self.journal.fechar()
+        self._dir.cleanup()
+
+    def _drenar(self, resposta_do_primeiro):
+        def enviar(payload, endpoint, tentativas=1):
+            if payload["SerialNumber"] == "04AA":
+                return resposta_do_primeiro
+            return 200, "Entrada registrada."
+        with mock.patch.object(sp, "enviar_payload", side_effect=enviar) as enviar_mock:
+            enviados = self.flusher.drenar()
+        return enviados, enviar_mock
+
+    def test_recusa_definitiva_nao_trava_a_fila(self):
+        enviados, _ = self._drenar((200, "Erro: Colunas essenciais ausentes na aba."))
+        self.assertEqual(enviados, 1)
+        self.assertEqual(self.journal.contar(), {"rejeitado": 1, "confirmado": 1})
+        self.assertEqual(self.flusher.falhas_seguidas, 0)
+
+    def test_resposta_4xx_e_rejeitada(self):
+        self._drenar((400, "Bad Request"))
+        self.assertEqual(self.journal.contar(), {"rejeitado": 1, "confirmado": 1})
+
+    def test_falha_transitoria_interrompe_o_ciclo(self):
+        enviados, enviar_mock = self._drenar((503, "Service Unavailable"))
+        self.assertEqual(enviados, 0)
+        self.assertEqual(enviar_mock.call_count, 1)
+        self.assertEqual(self.journal.contar(), {"pendente": 2})
+        self.assertEqual(self.flusher.falhas_seguidas, 1)
+
+    def test_recusas_transitorias_tem_limite(self):
+        for _ in range(3):
+            self.journal.reservar_pendentes(1)
+            sp.concluir_no_journal(self.journal, self.ids[0], 503, "Service Unavailable")
+        self.assertEqual(self.journal.contar().get("rejeitado", 0), 0)
+        self.journal.reservar_pendentes(1)
+        status = self.journal.devolver(self.ids[0], "HTTP 503", recusa=True, max_recusas=4)
+        self.assertEqual(status, "rejeitado")
+
+    def test_pendente_alem_da_janela_de_idempotencia_expira(self):
+        antigo = sp.time.time() - (sp.JOURNAL_MAX_IDADE_DIAS + 1) * 86400
+        self.journal._conn.execute("UPDATE taps SET criado_em = ? WHERE id = ?", (antigo, self.ids[0]))
+        enviados, enviar_mock = self._drenar((200, "Entrada registrada."))
+        self.assertEqual(enviados, 1)
+        self.assertEqual(enviar_mock.call_count, 1)
+        self.assertEqual(self.journal.contar(), {"rejeitado": 1, "confirmado": 1})
+
+    def test_queda_de_rede_nao_conta_recusa(self):
+        for _ in range(sp.JOURNAL_MAX_RECUSAS + 1):
+            self.journal.reservar_pendentes(1)
+            sp.concluir_no_journal(self.journal, self.ids[0], None, "timeout")
+        self.assertEqual(self.journal.contar_pendentes(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()